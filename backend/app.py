@@ -1,26 +1,33 @@
 # app.py - Sistema Completo de Lista de Tarefas com CRUD
 
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, Blueprint, Response, current_app, send_file, render_template, stream_template, stream_with_context, request, redirect, url_for, flash, jsonify, get_flashed_messages
 import os
-from datetime import datetime
-from models import db, Usuario, Categoria, Tarefa, Comentario
+import json
+import click
+import mimetypes
+import base64
+import time
+import logging
+from datetime import datetime, date
+from sqlalchemy import tuple_, insert, update, delete, select, func
+from sqlalchemy.orm import aliased
+from models import db, Usuario, Categoria, Projeto, Tarefa, Comentario, Anexo, StatusTarefa, Prioridade, condicao_busca_tarefa, dia_de_referencia, insert_do_dialeto
+from estatisticas import obter_estatisticas
+from referencias import cache_referencias
+from exportacao import FORMATOS_EXPORTACAO, campos_exportacao, linhas_exportacao, gerar_ndjson, gerar_csv
+from configuracao import obter_configuracao
+from conexoes import opcoes_engine, metricas_pool
+from sincronizacao import condicional, registrar_exclusoes, buscar_alteracoes
+import eventos
+import resumos
+from armazenamento import ArquivoMuitoGrande, gravar_fluxo, caminho_absoluto, limpar_orfaos
+import armazenamento
+import jobs
+from logs import configurar_logging
+from metricas import configurar_metricas
 
-app = Flask(__name__)
-app.secret_key = "sua-chave-secreta-super-segura-2025"
-
-# ========================================
-# CONFIGURAÇÃO DO BANCO POSTGRESQL
-# ========================================
-DB_USER = os.environ.get("DB_USER", "elvis")
-DB_PASS = os.environ.get("DB_PASS", "8531")
-DB_NAME = os.environ.get("DB_NAME", "northwind")
-DB_HOST = os.environ.get("DB_HOST", "localhost")
-DB_PORT = os.environ.get("DB_PORT", "5432")
-
-app.config["SQLALCHEMY_DATABASE_URI"] = f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-
-db.init_app(app)
+rotas = Blueprint("rotas", __name__)
+log = logging.getLogger("tarefas.api")
 
 # ========================================
 # INICIALIZAÇÃO DO BANCO E DADOS PADRÃO
@@ -42,84 +49,431 @@ def criar_dados_iniciais():
             print("✅ Categoria padrão criada")
         
         db.session.commit()
+        cache_referencias.carregar()
         print("🎉 Dados iniciais configurados com sucesso!")
         
     except Exception as erro:
         print(f"❌ Erro ao criar dados iniciais: {erro}")
         db.session.rollback()
 
-with app.app_context():
-    db.create_all()
-    criar_dados_iniciais()
-
 # ========================================
 # FUNÇÕES UTILITÁRIAS
 # ========================================
-def create_response(success=True, message="", data=None):
+def create_response(success=True, message="", data=None, paginacao=None):
     """Criar resposta JSON padronizada"""
-    return jsonify({
+    resposta = {
         "success": success,
         "message": message,
-        "data": data,
-        "timestamp": datetime.now().isoformat()
-    })
+        "data": data
+    }
+    
+    if paginacao is not None:
+        resposta["paginacao"] = paginacao
+    
+    # Fora do corpo, o timestamp não impede que respostas iguais tenham
+    # exatamente os mesmos bytes (ETag forte)
+    timestamp = datetime.now().isoformat()
+    if current_app.config["RESPOSTA_TIMESTAMP_NO_CORPO"]:
+        resposta["timestamp"] = timestamp
+        return jsonify(resposta)
+    
+    json_resposta = jsonify(resposta)
+    json_resposta.headers["X-Timestamp"] = timestamp
+    return json_resposta
 
-def tarefa_to_dict(tarefa):
-    """Converter tarefa para dicionário JSON"""
-    return {
-        "id": tarefa.tarefa_id,
-        "titulo": tarefa.titulo,
-        "descricao": tarefa.descricao or "",
-        "prioridade": tarefa.prioridade,
-        "status": tarefa.status,
-        "data_criacao": tarefa.data_criacao.isoformat() if tarefa.data_criacao else None,
-        "usuario_id": tarefa.usuario_id,
-        "categoria_id": tarefa.categoria_id
+# Campos aceitos em ?fields= e a coluna que cada um precisa
+CAMPOS_TAREFA = {
+    "id": Tarefa.tarefa_id,
+    "titulo": Tarefa.titulo,
+    "descricao": Tarefa.descricao,
+    "prioridade": Tarefa.prioridade,
+    "status": Tarefa.status,
+    "versao": Tarefa.versao,
+    "data_criacao": Tarefa.data_criacao,
+    "usuario_id": Tarefa.usuario_id,
+    "categoria_id": Tarefa.categoria_id
+}
+
+FORMATADORES_TAREFA = {
+    "id": lambda tarefa: tarefa.tarefa_id,
+    "titulo": lambda tarefa: tarefa.titulo,
+    "descricao": lambda tarefa: tarefa.descricao or "",
+    "prioridade": lambda tarefa: tarefa.prioridade,
+    "status": lambda tarefa: tarefa.status,
+    "versao": lambda tarefa: tarefa.versao,
+    "data_criacao": lambda tarefa: tarefa.data_criacao.isoformat() if tarefa.data_criacao else None,
+    "usuario_id": lambda tarefa: tarefa.usuario_id,
+    "categoria_id": lambda tarefa: tarefa.categoria_id
+}
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+TAREFAS_POR_PAGINA_HOME = 30
+DIAS_PROXIMAS_PADRAO = 7
+DIAS_PROXIMAS_MAXIMO = 366
+
+def tarefa_to_dict(tarefa, campos=None):
+    """Converter tarefa (objeto ou linha projetada) para dicionário JSON"""
+    campos = campos or FORMATADORES_TAREFA.keys()
+    return {campo: FORMATADORES_TAREFA[campo](tarefa) for campo in campos}
+
+def codificar_cursor(data_criacao, tarefa_id):
+    """Gerar cursor opaco a partir da última tarefa da página"""
+    bruto = f"{data_criacao.isoformat()}|{tarefa_id}"
+    return base64.urlsafe_b64encode(bruto.encode()).decode()
+
+def decodificar_cursor(cursor):
+    """Ler cursor recebido em ?after= ou ?since= (ValueError se for inválido)"""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor.encode()).decode()
+        data_criacao, tarefa_id = bruto.rsplit("|", 1)
+        return datetime.fromisoformat(data_criacao), int(tarefa_id)
+    except Exception:
+        raise ValueError("Cursor inválido")
+
+def ler_parametros_paginacao(args):
+    """Validar limit, after e fields da query string"""
+    try:
+        limite = int(args.get("limit", LIMITE_PADRAO))
+    except ValueError:
+        raise ValueError("limit deve ser um número inteiro")
+    
+    if limite < 1 or limite > LIMITE_MAXIMO:
+        raise ValueError(f"limit deve estar entre 1 e {LIMITE_MAXIMO}")
+    
+    cursor = decodificar_cursor(args["after"]) if args.get("after") else None
+    
+    campos = None
+    if args.get("fields"):
+        campos = [campo.strip() for campo in args["fields"].split(",") if campo.strip()]
+        invalidos = [campo for campo in campos if campo not in CAMPOS_TAREFA]
+        if invalidos:
+            raise ValueError(f"Campos inválidos: {', '.join(invalidos)}")
+    
+    return limite, cursor, campos
+
+def _ler_lista(args, nome, validos=None, tipo=str):
+    """Ler parâmetro com um ou mais valores separados por vírgula"""
+    valores = [valor.strip() for valor in args.get(nome, "").split(",") if valor.strip()]
+    
+    try:
+        valores = [tipo(valor) for valor in valores]
+    except ValueError:
+        raise ValueError(f"{nome} deve conter apenas números inteiros")
+    
+    if validos is not None:
+        invalidos = [valor for valor in valores if valor not in validos]
+        if invalidos:
+            raise ValueError(f"{nome} deve ser: {', '.join(validos)}")
+    
+    return valores
+
+def _ler_data(args, nome):
+    """Ler data no formato AAAA-MM-DD"""
+    if not args.get(nome):
+        return None
+    try:
+        return date.fromisoformat(args[nome])
+    except ValueError:
+        raise ValueError(f"{nome} deve estar no formato AAAA-MM-DD")
+
+def condicoes_filtros_tarefas(args):
+    """Condições WHERE dos filtros da query string (status, prioridade,
+    categoria_id, projeto_id, vencimento_de, vencimento_ate, q).
+    
+    Parâmetros presentes mas vazios (?status=,) não viram condição.
+    Levanta ValueError com mensagem amigável se algum valor for inválido.
+    """
+    status = _ler_lista(args, "status", StatusTarefa.valores())
+    prioridades = _ler_lista(args, "prioridade", Prioridade.valores())
+    categorias = _ler_lista(args, "categoria_id", tipo=int)
+    projetos = _ler_lista(args, "projeto_id", tipo=int)
+    vencimento_de = _ler_data(args, "vencimento_de")
+    vencimento_ate = _ler_data(args, "vencimento_ate")
+    texto = args.get("q", "").strip()
+    
+    condicoes = []
+    if status:
+        condicoes.append(Tarefa.status.in_(status))
+    if prioridades:
+        condicoes.append(Tarefa.prioridade.in_(prioridades))
+    if categorias:
+        condicoes.append(Tarefa.categoria_id.in_(categorias))
+    if projetos:
+        condicoes.append(Tarefa.projeto_id.in_(projetos))
+    if vencimento_de:
+        condicoes.append(Tarefa.data_vencimento >= vencimento_de)
+    if vencimento_ate:
+        condicoes.append(Tarefa.data_vencimento <= vencimento_ate)
+    if texto:
+        condicoes.append(condicao_busca_tarefa(texto))
+    
+    return condicoes
+
+def aplicar_filtros_tarefas(consulta, args):
+    """Aplicar na consulta de tarefas os filtros da query string
+    (ValueError se algum valor for inválido)"""
+    return consulta.filter(*condicoes_filtros_tarefas(args))
+
+# Ordens da paginação por cursor: coluna, decrescente e conversão do valor do cursor
+ORDENS_PAGINACAO = {
+    "data_criacao": (Tarefa.data_criacao, True, lambda valor: valor),
+    "data_vencimento": (Tarefa.data_vencimento, False, lambda valor: valor.date())
+}
+
+def buscar_pagina_tarefas(consulta_base=None, limite=LIMITE_PADRAO, cursor=None, campos=None, detalhes=False, ordem="data_criacao"):
+    """Buscar uma página de tarefas por (data_criacao, tarefa_id) decrescente.
+    
+    Só as colunas pedidas são selecionadas; tarefa_id e a coluna da ordem
+    entram sempre porque formam o cursor da próxima página. Com detalhes=True
+    volta objetos Tarefa já com nomes e contagens carregados para to_dict().
+    ordem="data_vencimento" pagina por (data_vencimento, tarefa_id) crescente.
+    """
+    consulta = consulta_base if consulta_base is not None else db.session.query(Tarefa)
+    coluna_ordem, decrescente, valor_cursor = ORDENS_PAGINACAO[ordem]
+    
+    if detalhes:
+        consulta = consulta.options(*Tarefa.opcoes_serializacao())
+    else:
+        nomes = list(campos or CAMPOS_TAREFA)
+        colunas = [CAMPOS_TAREFA[campo] for campo in nomes]
+        if "id" not in nomes:
+            colunas.append(Tarefa.tarefa_id)
+        if ordem not in nomes:
+            colunas.append(coluna_ordem)
+        consulta = consulta.with_entities(*colunas)
+    
+    if cursor:
+        chave = tuple_(coluna_ordem, Tarefa.tarefa_id)
+        limite_cursor = tuple_(valor_cursor(cursor[0]), cursor[1])
+        consulta = consulta.filter(chave < limite_cursor if decrescente else chave > limite_cursor)
+    
+    # Busca uma linha a mais só para saber se existe próxima página
+    if decrescente:
+        consulta = consulta.order_by(coluna_ordem.desc(), Tarefa.tarefa_id.desc())
+    else:
+        consulta = consulta.order_by(coluna_ordem, Tarefa.tarefa_id)
+    linhas = consulta.limit(limite + 1).all()
+    
+    tem_mais = len(linhas) > limite
+    linhas = linhas[:limite]
+    
+    proximo_cursor = None
+    if tem_mais:
+        ultima = linhas[-1]
+        proximo_cursor = codificar_cursor(getattr(ultima, ordem), ultima.tarefa_id)
+    
+    return linhas, {
+        "limit": limite,
+        "tem_mais": tem_mais,
+        "proximo_cursor": proximo_cursor
     }
 
+# A API de escrita aceita um subconjunto dos enums (critica e cancelada só
+# chegam por filtros e leituras)
+PRIORIDADES_VALIDAS = [Prioridade.BAIXA.value, Prioridade.MEDIA.value, Prioridade.ALTA.value]
+STATUS_VALIDOS = [StatusTarefa.PENDENTE.value, StatusTarefa.ANDAMENTO.value, StatusTarefa.CONCLUIDA.value]
+
+def validar_campos_tarefa(valores):
+    """Validar só os campos presentes em `valores` (edição parcial)"""
+    erros = []
+    
+    if "titulo" in valores:
+        titulo = valores["titulo"]
+        if not titulo or len(titulo.strip()) < 3:
+            erros.append("Título deve ter pelo menos 3 caracteres")
+        
+        if len(titulo) > 100:
+            erros.append("Título deve ter no máximo 100 caracteres")
+    
+    if "prioridade" in valores and valores["prioridade"] not in PRIORIDADES_VALIDAS:
+        erros.append(f"Prioridade deve ser: {', '.join(PRIORIDADES_VALIDAS)}")
+    
+    if "status" in valores and valores["status"] not in STATUS_VALIDOS:
+        erros.append(f"Status deve ser: {', '.join(STATUS_VALIDOS)}")
+    
+    return erros
+
 def validar_dados_tarefa(titulo, prioridade, status):
     """Validar dados da tarefa"""
-    erros = []
+    return validar_campos_tarefa({"titulo": titulo, "prioridade": prioridade, "status": status})
+
+# ========================================
+# ESCRITA EM UM COMANDO (UPDATE/DELETE ... RETURNING)
+# ========================================
+# Sem carregar a tarefa antes: o corpo é validado, o comando vai direto ao
+# banco e o RETURNING traz o que a resposta precisa. O que os eventos do
+# flush fariam sozinhos (versões, tombstones, SSE, resumos, total de
+# armazenamento) é chamado aqui explicitamente.
+
+class ConflitoVersao(Exception):
+    """A tarefa existe, mas com outra versão (alguém gravou antes)"""
+    
+    def __init__(self, versao_atual):
+        super().__init__(f"Tarefa alterada por outra requisição (versão atual: {versao_atual})")
+        self.versao_atual = versao_atual
+
+def ler_alteracoes_tarefa(dados):
+    """Campos enviados no corpo (só os presentes), normalizados e validados.
     
-    if not titulo or len(titulo.strip()) < 3:
-        erros.append("Título deve ter pelo menos 3 caracteres")
+    Volta (valores, versao_esperada, erros); versao_esperada é None quando o
+    cliente não pediu controle de concorrência.
+    """
+    if not isinstance(dados, dict):
+        return {}, None, ["O corpo deve ser um objeto JSON"]
     
-    if len(titulo) > 100:
-        erros.append("Título deve ter no máximo 100 caracteres")
+    valores = {}
+    if "titulo" in dados:
+        valores["titulo"] = str(dados["titulo"] or "").strip()
+    if "descricao" in dados:
+        valores["descricao"] = str(dados["descricao"] or "").strip()[:500]
+    if "prioridade" in dados:
+        valores["prioridade"] = str(dados["prioridade"] or "").lower()
+    if "status" in dados:
+        valores["status"] = str(dados["status"] or "").lower()
     
-    prioridades_validas = ["baixa", "media", "alta"]
-    if prioridade not in prioridades_validas:
-        erros.append(f"Prioridade deve ser: {', '.join(prioridades_validas)}")
+    erros = validar_campos_tarefa(valores)
+    if not valores and not erros:
+        erros.append("Nenhum campo para atualizar (titulo, descricao, prioridade, status)")
     
-    status_validos = ["pendente", "andamento", "concluida"]
-    if status not in status_validos:
-        erros.append(f"Status deve ser: {', '.join(status_validos)}")
+    versao = None
+    if dados.get("versao") is not None:
+        try:
+            versao = int(dados["versao"])
+        except (TypeError, ValueError):
+            erros.append("versao deve ser um número inteiro")
     
-    return erros
+    return valores, versao, erros
+
+def atualizar_tarefa(tarefa_id, valores, versao=None):
+    """UPDATE ... RETURNING de uma tarefa; None se ela não existe.
+    
+    Com `versao`, só grava se a linha ainda estiver nessa versão; senão
+    levanta ConflitoVersao. O commit fica com quem chama.
+    """
+    comando = update(Tarefa).where(Tarefa.tarefa_id == tarefa_id)
+    if versao is not None:
+        comando = comando.where(Tarefa.versao == versao)
+    retorno = [*CAMPOS_TAREFA.values(), Tarefa.projeto_id]
+    
+    # Com o status de antes, o resumo do projeto recebe só -1/+1, sem
+    # reagregar o projeto inteiro
+    status_anterior = None
+    if "status" in valores:
+        if db.engine.dialect.name == "postgresql":
+            # No mesmo comando (UPDATE ... FROM ... RETURNING); o FOR UPDATE
+            # faz a leitura esperar escritas concorrentes na linha
+            anterior = aliased(Tarefa)
+            linha_anterior = (
+                select(anterior.tarefa_id, anterior.status.label("status_anterior"))
+                .where(anterior.tarefa_id == tarefa_id)
+                .with_for_update()
+                .subquery("anterior")
+            )
+            comando = comando.where(Tarefa.tarefa_id == linha_anterior.c.tarefa_id)
+            retorno.append(linha_anterior.c.status_anterior)
+        else:
+            # SQLite não devolve colunas do FROM no RETURNING; lá as
+            # escritas já são serializadas pelo lock do arquivo
+            status_anterior = db.session.execute(
+                select(Tarefa.status).where(Tarefa.tarefa_id == tarefa_id)
+            ).scalar()
+    
+    comando = comando.values(**valores).returning(*retorno)
+    linha = db.session.execute(comando, execution_options={"synchronize_session": False}).first()
+    if linha is None:
+        if versao is None:
+            return None
+        # Só no caminho de falha: distinguir "não existe" de "versão antiga"
+        versao_atual = db.session.execute(
+            select(Tarefa.versao).where(Tarefa.tarefa_id == tarefa_id)
+        ).scalar()
+        if versao_atual is None:
+            return None
+        raise ConflitoVersao(versao_atual)
+    
+    eventos.registrar_eventos(db.session, "upsert", [tarefa_id])
+    if "status" in valores:
+        if "status_anterior" in linha._fields:
+            status_anterior = linha.status_anterior
+        resumos.trocar_status(db.session, linha.projeto_id, status_anterior, linha.status)
+    
+    return linha
+
+def excluir_tarefas(ids):
+    """DELETE ... RETURNING das tarefas, sem carregá-las.
+    
+    Comentários saem pelo ON DELETE CASCADE do banco. Os anexos são
+    excluídos aqui mesmo porque o RETURNING traz o que o total de
+    armazenamento precisa (os arquivos ficam para limpar_orfaos); as
+    subtarefas ganham tarefa_pai_id nulo por UPDATE (e não pelo SET NULL
+    do banco) para que data_atualizacao/versao mudem e a sincronização
+    as reenvie. Volta as linhas (tarefa_id, titulo, projeto_id)
+    excluídas; o commit fica com quem chama.
+    """
+    anexos_excluidos = db.session.execute(
+        delete(Anexo).where(Anexo.tarefa_id.in_(ids))
+        .returning(Anexo.tamanho_bytes, Anexo.ativo)
+    ).all()
+    ativos = [linha for linha in anexos_excluidos if linha.ativo]
+    armazenamento.acumular_total(
+        db.session, -len(ativos), -sum(linha.tamanho_bytes or 0 for linha in ativos)
+    )
+    db.session.execute(
+        update(Tarefa).where(Tarefa.tarefa_pai_id.in_(ids)).values(tarefa_pai_id=None)
+    )
+    excluidas = db.session.execute(
+        delete(Tarefa).where(Tarefa.tarefa_id.in_(ids))
+        .returning(Tarefa.tarefa_id, Tarefa.titulo, Tarefa.projeto_id)
+    ).all()
+    
+    excluidos = {linha.tarefa_id for linha in excluidas}
+    registrar_exclusoes(db.session, excluidos)
+    eventos.registrar_eventos(db.session, "delete", excluidos)
+    resumos.recalcular_resumos(db.session, {linha.projeto_id for linha in excluidas})
+    
+    return excluidas
 
 # ========================================
 # ROTAS PRINCIPAIS (HTML)
 # ========================================
-@app.route("/")
+@rotas.route("/")
 def home():
-    """Página inicial - renderizar HTML"""
-    print("🏠 Usuário acessou a página inicial")
+    """Página inicial - primeira página de tarefas, enviada em streaming"""
+    log.debug("🏠 Usuário acessou a página inicial")
+    
+    # Ler as mensagens antes do streaming: depois disso o cookie de sessão
+    # já foi enviado e elas voltariam a aparecer no próximo acesso
+    mensagens = get_flashed_messages(with_categories=True)
     
     try:
-        todas_as_tarefas = Tarefa.query.order_by(Tarefa.data_criacao.desc()).all()
-        print(f"📋 Encontrei {len(todas_as_tarefas)} tarefas no banco")
+        tarefas, paginacao = buscar_pagina_tarefas(limite=TAREFAS_POR_PAGINA_HOME)
+        estatisticas = obter_estatisticas()
+        log.debug("📋 Enviando %s de %s tarefas", len(tarefas), estatisticas['total_tarefas'])
         
-        return render_template("index.html", tarefas=todas_as_tarefas)
+        return stream_template(
+            "index.html",
+            tarefas=tarefas,
+            paginacao=paginacao,
+            estatisticas=estatisticas,
+            mensagens=mensagens
+        )
         
     except Exception as erro:
-        print(f"❌ Erro ao buscar tarefas: {erro}")
-        flash("Erro ao carregar tarefas!", "error")
-        return render_template("index.html", tarefas=[])
+        log.exception("❌ Erro ao buscar tarefas: %s", erro)
+        mensagens.append(("error", "Erro ao carregar tarefas!"))
+        return render_template(
+            "index.html",
+            tarefas=[],
+            paginacao={"tem_mais": False, "proximo_cursor": None},
+            estatisticas={"total_tarefas": 0},
+            mensagens=mensagens
+        )
 
-@app.route("/adicionar", methods=["POST"])
+@rotas.route("/adicionar", methods=["POST"])
 def adicionar_tarefa():
     """Adicionar nova tarefa"""
-    print("💾 Usuário enviou nova tarefa")
+    log.debug("💾 Usuário enviou nova tarefa")
     
     try:
         # Receber dados do formulário
@@ -133,15 +487,15 @@ def adicionar_tarefa():
         if erros:
             for erro in erros:
                 flash(erro, "error")
-            return redirect(url_for("home"))
+            return redirect(url_for(".home"))
         
-        # Buscar dados padrão
-        primeiro_usuario = Usuario.query.first()
-        primeira_categoria = Categoria.query.first()
+        # Buscar dados padrão (cache em memória, sem ida ao banco)
+        usuario_id = cache_referencias.usuario_padrao_id()
+        categoria_id = cache_referencias.categoria_padrao_id()
         
-        if not primeiro_usuario or not primeira_categoria:
+        if not usuario_id or not categoria_id:
             flash("Erro: dados básicos do sistema não encontrados!", "error")
-            return redirect(url_for("home"))
+            return redirect(url_for(".home"))
         
         # Criar tarefa
         nova_tarefa = Tarefa(
@@ -149,38 +503,30 @@ def adicionar_tarefa():
             descricao=descricao if len(descricao) <= 500 else descricao[:500],
             prioridade=prioridade,
             status=status,
-            usuario_id=primeiro_usuario.id_usuario,
-            categoria_id=primeira_categoria.id_categoria,
-            data_criacao=datetime.now(),
-            data_atualizacao=datetime.now()
+            usuario_id=usuario_id,
+            categoria_id=categoria_id,
+            data_criacao=datetime.now()
         )
         
         db.session.add(nova_tarefa)
         db.session.commit()
         
-        print(f"✅ Tarefa '{titulo}' criada com ID {nova_tarefa.tarefa_id}")
+        log.info("✅ Tarefa '%s' criada com ID %s", titulo, nova_tarefa.tarefa_id, extra={"tarefa_id": nova_tarefa.tarefa_id})
         flash(f"Tarefa '{titulo}' adicionada com sucesso!", "success")
-        return redirect(url_for("home"))
+        return redirect(url_for(".home"))
         
     except Exception as erro:
         db.session.rollback()
-        print(f"❌ Erro ao salvar tarefa: {erro}")
+        log.exception("❌ Erro ao salvar tarefa: %s", erro)
         flash(f"Erro ao salvar tarefa: {str(erro)}", "error")
-        return redirect(url_for("home"))
+        return redirect(url_for(".home"))
 
-@app.route("/editar/<int:tarefa_id>", methods=["POST"])
+@rotas.route("/editar/<int:tarefa_id>", methods=["POST"])
 def editar_tarefa(tarefa_id):
     """Editar tarefa existente"""
-    print(f"✏️ Editando tarefa ID: {tarefa_id}")
+    log.debug("✏️ Editando tarefa ID: %s", tarefa_id)
     
     try:
-        # Buscar a tarefa no banco
-        tarefa = Tarefa.query.filter_by(tarefa_id=tarefa_id).first()
-        
-        if not tarefa:
-            flash("Tarefa não encontrada!", "error")
-            return redirect(url_for("home"))
-        
         # Receber dados do formulário
         titulo = request.form.get("titulo", "").strip()
         descricao = request.form.get("descricao", "").strip()
@@ -192,86 +538,338 @@ def editar_tarefa(tarefa_id):
         if erros:
             for erro in erros:
                 flash(erro, "error")
-            return redirect(url_for("home"))
+            return redirect(url_for(".home"))
+        
+        # Um UPDATE ... RETURNING, sem buscar a tarefa antes
+        linha = atualizar_tarefa(tarefa_id, {
+            "titulo": titulo,
+            "descricao": descricao[:500],
+            "prioridade": prioridade,
+            "status": status
+        })
         
-        # Atualizar os dados da tarefa
-        titulo_antigo = tarefa.titulo
-        tarefa.titulo = titulo
-        tarefa.descricao = descricao if len(descricao) <= 500 else descricao[:500]
-        tarefa.prioridade = prioridade
-        tarefa.status = status
-        tarefa.data_atualizacao = datetime.now()
+        if linha is None:
+            db.session.rollback()
+            flash("Tarefa não encontrada!", "error")
+            return redirect(url_for(".home"))
         
-        # Salvar no banco
         db.session.commit()
         
-        print(f"✅ Tarefa '{titulo_antigo}' atualizada para '{titulo}'")
+        log.info("✅ Tarefa %s atualizada para '%s'", tarefa_id, titulo, extra={"tarefa_id": tarefa_id})
         flash(f"Tarefa '{titulo}' foi atualizada com sucesso!", "success")
         
-        return redirect(url_for("home"))
+        return redirect(url_for(".home"))
         
     except Exception as erro:
         db.session.rollback()
-        print(f"❌ Erro ao editar tarefa: {erro}")
+        log.exception("❌ Erro ao editar tarefa: %s", erro)
         flash(f"Erro ao editar tarefa: {str(erro)}", "error")
-        return redirect(url_for("home"))
+        return redirect(url_for(".home"))
 
-@app.route("/excluir/<int:tarefa_id>")
+@rotas.route("/excluir/<int:tarefa_id>")
 def excluir_tarefa(tarefa_id):
     """Excluir tarefa"""
-    print(f"🗑️ Excluindo tarefa ID: {tarefa_id}")
+    log.debug("🗑️ Excluindo tarefa ID: %s", tarefa_id)
     
     try:
-        tarefa = Tarefa.query.filter_by(tarefa_id=tarefa_id).first()
+        excluidas = excluir_tarefas([tarefa_id])
         
-        if not tarefa:
+        if not excluidas:
+            db.session.rollback()
             flash("Tarefa não encontrada!", "error")
-            return redirect(url_for("home"))
+            return redirect(url_for(".home"))
         
-        titulo = tarefa.titulo
-        db.session.delete(tarefa)
         db.session.commit()
         
-        print(f"✅ Tarefa '{titulo}' excluída")
+        titulo = excluidas[0].titulo
+        log.info("✅ Tarefa '%s' excluída", titulo, extra={"tarefa_id": tarefa_id})
         flash(f"Tarefa '{titulo}' foi excluída!", "success")
-        return redirect(url_for("home"))
+        return redirect(url_for(".home"))
         
     except Exception as erro:
         db.session.rollback()
-        print(f"❌ Erro ao excluir: {erro}")
+        log.exception("❌ Erro ao excluir: %s", erro)
         flash(f"Erro ao excluir tarefa: {str(erro)}", "error")
-        return redirect(url_for("home"))
+        return redirect(url_for(".home"))
 
 # ========================================
 # API REST (JSON)
 # ========================================
-@app.route("/api/tarefas", methods=["GET"])
+@rotas.route("/api/tarefas", methods=["GET"])
+@condicional("tarefas", "comentarios", "anexos", "projetos", "usuarios", "categorias")
 def api_listar_tarefas():
-    """API: Listar todas as tarefas"""
-    print("🔗 API: Buscando tarefas...")
+    """API: Listar tarefas paginadas e filtradas.
+    
+    Paginação: ?limit=, ?after=, ?fields=, ?detalhes=1
+    Filtros: ?status=, ?prioridade=, ?categoria_id=, ?projeto_id=,
+    ?vencimento_de=, ?vencimento_ate=, ?q= (busca em título/descrição)
+    """
+    log.debug("🔗 API: Buscando tarefas...")
     
     try:
-        tarefas = Tarefa.query.order_by(Tarefa.data_criacao.desc()).all()
-        tarefas_json = [tarefa_to_dict(tarefa) for tarefa in tarefas]
+        try:
+            limite, cursor, campos = ler_parametros_paginacao(request.args)
+            consulta = aplicar_filtros_tarefas(db.session.query(Tarefa), request.args)
+        except ValueError as erro:
+            return create_response(
+                success=False,
+                message=str(erro)
+            ), 400
         
-        print(f"📋 API: Retornando {len(tarefas_json)} tarefas")
+        # detalhes=1 devolve o formato completo de Tarefa.to_dict()
+        detalhes = request.args.get("detalhes") in ("1", "true") and not campos
+        
+        linhas, paginacao = buscar_pagina_tarefas(
+            consulta,
+            limite=limite,
+            cursor=cursor,
+            campos=campos,
+            detalhes=detalhes
+        )
+        
+        if detalhes:
+            tarefas_json = [tarefa.to_dict() for tarefa in linhas]
+        else:
+            tarefas_json = [tarefa_to_dict(linha, campos) for linha in linhas]
+        
+        log.debug("📋 API: Retornando %s tarefas", len(tarefas_json))
         return create_response(
             success=True,
             message=f"Encontradas {len(tarefas_json)} tarefas",
-            data=tarefas_json
+            data=tarefas_json,
+            paginacao=paginacao
         )
         
     except Exception as erro:
-        print(f"❌ API Erro ao buscar tarefas: {erro}")
+        log.exception("❌ API Erro ao buscar tarefas: %s", erro)
         return create_response(
             success=False,
             message=f"Erro ao buscar tarefas: {str(erro)}"
         ), 500
 
-@app.route("/api/tarefas", methods=["POST"])
+def listar_por_vencimento(condicao, descricao):
+    """Resposta paginada por (data_vencimento, tarefa_id) das tarefas que
+    atendem `condicao` (mesmos parâmetros de /api/tarefas)"""
+    try:
+        limite, cursor, campos = ler_parametros_paginacao(request.args)
+        consulta = aplicar_filtros_tarefas(db.session.query(Tarefa).filter(condicao), request.args)
+    except ValueError as erro:
+        return create_response(
+            success=False,
+            message=str(erro)
+        ), 400
+    
+    detalhes = request.args.get("detalhes") in ("1", "true") and not campos
+    
+    linhas, paginacao = buscar_pagina_tarefas(
+        consulta,
+        limite=limite,
+        cursor=cursor,
+        campos=campos,
+        detalhes=detalhes,
+        ordem="data_vencimento"
+    )
+    
+    if detalhes:
+        tarefas_json = [tarefa.to_dict() for tarefa in linhas]
+    else:
+        tarefas_json = [
+            dict(tarefa_to_dict(linha, campos), data_vencimento=linha.data_vencimento.isoformat())
+            for linha in linhas
+        ]
+    
+    log.debug("📋 API: Retornando %s tarefas %s", len(tarefas_json), descricao)
+    return create_response(
+        success=True,
+        message=f"Encontradas {len(tarefas_json)} tarefas {descricao}",
+        data=tarefas_json,
+        paginacao=paginacao
+    )
+
+@rotas.route("/api/tarefas/vencidas", methods=["GET"])
+@condicional("tarefas", "comentarios", "anexos", "projetos", "usuarios", "categorias", referencia=dia_de_referencia)
+def api_tarefas_vencidas():
+    """API: Tarefas em aberto com vencimento antes de hoje, da mais atrasada
+    para a menos atrasada (mesmos parâmetros de /api/tarefas)"""
+    log.debug("🔗 API: Buscando tarefas vencidas...")
+    
+    try:
+        return listar_por_vencimento(Tarefa.is_vencida, "vencidas")
+    
+    except Exception as erro:
+        log.exception("❌ API Erro ao buscar tarefas vencidas: %s", erro)
+        return create_response(
+            success=False,
+            message=f"Erro ao buscar tarefas vencidas: {str(erro)}"
+        ), 500
+
+@rotas.route("/api/tarefas/proximas", methods=["GET"])
+@condicional("tarefas", "comentarios", "anexos", "projetos", "usuarios", "categorias", referencia=dia_de_referencia)
+def api_tarefas_proximas():
+    """API: Tarefas em aberto que vencem de hoje até ?dias= (padrão 7),
+    por data de vencimento (mesmos parâmetros de /api/tarefas)"""
+    log.debug("🔗 API: Buscando tarefas próximas do vencimento...")
+    
+    try:
+        dias = int(request.args.get("dias", DIAS_PROXIMAS_PADRAO))
+    except ValueError:
+        return create_response(success=False, message="dias deve ser um número inteiro"), 400
+    if dias < 0 or dias > DIAS_PROXIMAS_MAXIMO:
+        return create_response(success=False, message=f"dias deve estar entre 0 e {DIAS_PROXIMAS_MAXIMO}"), 400
+    
+    try:
+        return listar_por_vencimento(Tarefa.condicao_vence_ate(dias), f"vencendo em até {dias} dias")
+    
+    except Exception as erro:
+        log.exception("❌ API Erro ao buscar tarefas próximas: %s", erro)
+        return create_response(
+            success=False,
+            message=f"Erro ao buscar tarefas próximas: {str(erro)}"
+        ), 500
+
+@rotas.route("/api/tarefas/export", methods=["GET"])
+def api_exportar_tarefas():
+    """API: Exportar tarefas em streaming (?format=ndjson|csv, ?nomes=1).
+    
+    Aceita os mesmos filtros da listagem.
+    """
+    formato = request.args.get("format", "ndjson").lower()
+    if formato not in FORMATOS_EXPORTACAO:
+        return create_response(
+            success=False,
+            message=f"format deve ser: {', '.join(FORMATOS_EXPORTACAO)}"
+        ), 400
+    
+    try:
+        consulta = aplicar_filtros_tarefas(db.session.query(Tarefa), request.args)
+    except ValueError as erro:
+        return create_response(success=False, message=str(erro)), 400
+    
+    incluir_nomes = request.args.get("nomes") in ("1", "true")
+    linhas = linhas_exportacao(consulta, incluir_nomes=incluir_nomes)
+    
+    if formato == "csv":
+        corpo = gerar_csv(linhas, campos_exportacao(incluir_nomes))
+    else:
+        corpo = gerar_ndjson(linhas)
+    
+    log.debug("📤 API: Exportando tarefas em %s", formato)
+    
+    return Response(
+        stream_with_context(corpo),
+        mimetype=FORMATOS_EXPORTACAO[formato],
+        headers={"Content-Disposition": f"attachment; filename=tarefas.{formato}"}
+    )
+
+@rotas.route("/api/tarefas/changes", methods=["GET"])
+def api_alteracoes_tarefas():
+    """API: Tarefas alteradas e excluídas desde ?since=<cursor>.
+    
+    Sem since, começa do início. O proximo_cursor da resposta vai no
+    since da próxima chamada (continua igual quando não há novidades).
+    """
+    try:
+        limite, _, campos = ler_parametros_paginacao(request.args)
+        cursor = decodificar_cursor(request.args["since"]) if request.args.get("since") else None
+    except ValueError as erro:
+        return create_response(success=False, message=str(erro)), 400
+    
+    nomes = list(campos or CAMPOS_TAREFA)
+    colunas = [CAMPOS_TAREFA[campo] for campo in nomes if campo != "id"]
+    
+    try:
+        alteracoes, tem_mais = buscar_alteracoes(
+            colunas,
+            cursor=cursor,
+            limite=limite,
+            margem_segundos=current_app.config["SINCRONIZACAO_MARGEM_SEGUNDOS"]
+        )
+        
+        itens = []
+        for data, tarefa_id, linha in alteracoes:
+            item = {"id": tarefa_id, "data": data.isoformat()}
+            if linha is None:
+                item["tipo"] = "delete"
+            else:
+                item["tipo"] = "upsert"
+                item["tarefa"] = tarefa_to_dict(linha, nomes)
+            itens.append(item)
+        
+        proximo_cursor = request.args.get("since")
+        if alteracoes:
+            data, tarefa_id, _ = alteracoes[-1]
+            proximo_cursor = codificar_cursor(data, tarefa_id)
+        
+        log.debug("🔄 API: %s alterações desde o cursor", len(itens))
+        
+        return create_response(
+            success=True,
+            message=f"{len(itens)} alterações encontradas",
+            data=itens,
+            paginacao={
+                "limit": limite,
+                "tem_mais": tem_mais,
+                "proximo_cursor": proximo_cursor
+            }
+        )
+        
+    except Exception as erro:
+        log.exception("❌ API Erro ao buscar alterações: %s", erro)
+        return create_response(
+            success=False,
+            message=f"Erro ao buscar alterações: {str(erro)}"
+        ), 500
+
+@rotas.route("/api/tarefas/stream", methods=["GET"])
+def api_stream_tarefas():
+    """API: Alterações de tarefas em tempo real (Server-Sent Events).
+    
+    Eventos "upsert" e "delete" trazem {"tipo", "ids"}; "reset" avisa que
+    eventos se perderam e a lista deve ser recarregada. A conexão é
+    encerrada depois de EVENTOS_DURACAO_MAXIMA segundos e o EventSource
+    reconecta sozinho, devolvendo a thread do worker de tempos em tempos.
+    """
+    broker = eventos.broker
+    if broker is None:
+        return create_response(success=False, message="Eventos desativados"), 503
+    
+    heartbeat = current_app.config["EVENTOS_HEARTBEAT_SEGUNDOS"]
+    duracao_maxima = current_app.config["EVENTOS_DURACAO_MAXIMA"]
+    assinatura = broker.assinar()
+    
+    # A transação da requisição não precisa ficar aberta durante o stream
+    db.session.remove()
+    
+    def gerar():
+        inicio = time.monotonic()
+        try:
+            yield "retry: 3000\n\n"
+            while not duracao_maxima or time.monotonic() - inicio < duracao_maxima:
+                if assinatura.perdeu_eventos:
+                    assinatura.perdeu_eventos = False
+                    yield "event: reset\ndata: {}\n\n"
+                
+                evento = assinatura.proximo(timeout=heartbeat)
+                if evento is None:
+                    # Comentário SSE: mantém proxies e a conexão vivos
+                    yield ": ping\n\n"
+                else:
+                    yield f"event: {evento['tipo']}\ndata: {json.dumps(evento)}\n\n"
+        finally:
+            broker.cancelar(assinatura)
+    
+    log.debug("📡 API: Novo assinante de eventos (%s ativos)", broker.total_assinantes())
+    
+    return Response(
+        gerar(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@rotas.route("/api/tarefas", methods=["POST"])
 def api_adicionar_tarefa():
     """API: Adicionar nova tarefa"""
-    print("💾 API: Adicionando nova tarefa...")
+    log.debug("💾 API: Adicionando nova tarefa...")
     
     try:
         if not request.is_json:
@@ -295,11 +893,11 @@ def api_adicionar_tarefa():
                 message="; ".join(erros)
             ), 400
         
-        # Buscar usuário e categoria padrão
-        primeiro_usuario = Usuario.query.first()
-        primeira_categoria = Categoria.query.first()
+        # Buscar usuário e categoria padrão (cache em memória)
+        usuario_id = cache_referencias.usuario_padrao_id()
+        categoria_id = cache_referencias.categoria_padrao_id()
         
-        if not primeiro_usuario or not primeira_categoria:
+        if not usuario_id or not categoria_id:
             return create_response(
                 success=False,
                 message="Dados básicos do sistema não configurados"
@@ -311,16 +909,15 @@ def api_adicionar_tarefa():
             descricao=descricao if len(descricao) <= 500 else descricao[:500],
             prioridade=prioridade,
             status=status,
-            usuario_id=primeiro_usuario.id_usuario,
-            categoria_id=primeira_categoria.id_categoria,
-            data_criacao=datetime.now(),
-            data_atualizacao=datetime.now()
+            usuario_id=usuario_id,
+            categoria_id=categoria_id,
+            data_criacao=datetime.now()
         )
         
         db.session.add(nova_tarefa)
         db.session.commit()
         
-        print(f"✅ API: Tarefa '{titulo}' criada com ID {nova_tarefa.tarefa_id}")
+        log.info("✅ API: Tarefa '%s' criada com ID %s", titulo, nova_tarefa.tarefa_id, extra={"tarefa_id": nova_tarefa.tarefa_id})
         
         return create_response(
             success=True,
@@ -330,13 +927,14 @@ def api_adicionar_tarefa():
         
     except Exception as erro:
         db.session.rollback()
-        print(f"❌ API Erro ao criar tarefa: {erro}")
+        log.exception("❌ API Erro ao criar tarefa: %s", erro)
         return create_response(
             success=False,
             message=f"Erro interno do servidor: {str(erro)}"
         ), 500
 
-@app.route("/api/tarefas/<int:tarefa_id>", methods=["GET"])
+@rotas.route("/api/tarefas/<int:tarefa_id>", methods=["GET"])
+@condicional("tarefas")
 def api_obter_tarefa(tarefa_id):
     """API: Obter tarefa específica por ID"""
     try:
@@ -360,51 +958,132 @@ def api_obter_tarefa(tarefa_id):
             message=f"Erro ao buscar tarefa: {str(erro)}"
         ), 500
 
-@app.route("/api/tarefas/<int:tarefa_id>", methods=["PUT"])
-def api_editar_tarefa(tarefa_id):
-    """API: Editar tarefa"""
+@rotas.route("/api/tarefas/<int:tarefa_id>/arvore", methods=["GET"])
+@condicional("tarefas")
+def api_arvore_tarefa(tarefa_id):
+    """API: Subtarefas da tarefa em árvore (?profundidade=N, ?caminho=1)"""
     try:
-        if not request.is_json:
+        profundidade = request.args.get("profundidade")
+        profundidade = int(profundidade) if profundidade else None
+        if profundidade is not None and profundidade < 0:
+            raise ValueError
+    except ValueError:
+        return create_response(
+            success=False,
+            message="profundidade deve ser um inteiro maior ou igual a 0"
+        ), 400
+    
+    try:
+        arvore = Tarefa.arvore(tarefa_id, profundidade_max=profundidade)
+        
+        if arvore is None:
             return create_response(
                 success=False,
-                message="Content-Type deve ser application/json"
-            ), 400
+                message="Tarefa não encontrada"
+            ), 404
         
-        tarefa = Tarefa.query.filter_by(tarefa_id=tarefa_id).first()
-        if not tarefa:
+        if request.args.get("caminho") in ("1", "true"):
+            arvore["caminho"] = Tarefa.caminho(tarefa_id)
+        
+        return create_response(
+            success=True,
+            message="Árvore da tarefa encontrada",
+            data=arvore
+        )
+        
+    except Exception as erro:
+        log.exception("❌ API Erro ao buscar árvore: %s", erro)
+        return create_response(
+            success=False,
+            message=f"Erro ao buscar árvore: {str(erro)}"
+        ), 500
+
+@rotas.route("/api/tarefas/<int:tarefa_id>/comentarios", methods=["GET"])
+@condicional("comentarios", "usuarios")
+def api_comentarios_tarefa(tarefa_id):
+    """API: Discussão da tarefa em árvore (?limit=N&after=<cursor>).
+    
+    A paginação vale para os comentários de primeiro nível; cada um vem
+    com todas as respostas.
+    """
+    try:
+        limite, cursor, _ = ler_parametros_paginacao(request.args)
+    except ValueError as erro:
+        return create_response(success=False, message=str(erro)), 400
+    
+    try:
+        comentarios, tem_mais, ultimo = Comentario.discussao(tarefa_id, limite=limite, cursor=cursor)
+        
+        # Sem comentários: só então vale conferir se a tarefa existe
+        if not comentarios and not cursor and db.session.get(Tarefa, tarefa_id) is None:
             return create_response(
                 success=False,
                 message="Tarefa não encontrada"
             ), 404
         
-        data = request.get_json()
+        return create_response(
+            success=True,
+            message=f"{len(comentarios)} comentários encontrados",
+            data=comentarios,
+            paginacao={
+                "limit": limite,
+                "tem_mais": tem_mais,
+                "proximo_cursor": codificar_cursor(*ultimo) if tem_mais else None
+            }
+        )
         
-        titulo = data.get("titulo", tarefa.titulo).strip()
-        descricao = data.get("descricao", tarefa.descricao or "").strip()
-        prioridade = data.get("prioridade", tarefa.prioridade).lower()
-        status = data.get("status", tarefa.status).lower()
+    except Exception as erro:
+        log.exception("❌ API Erro ao buscar comentários: %s", erro)
+        return create_response(
+            success=False,
+            message=f"Erro ao buscar comentários: {str(erro)}"
+        ), 500
+
+@rotas.route("/api/tarefas/<int:tarefa_id>", methods=["PUT", "PATCH"])
+def api_editar_tarefa(tarefa_id):
+    """API: Editar tarefa (só os campos enviados).
+    
+    Um UPDATE ... RETURNING, sem SELECT antes. Com "versao" no corpo a
+    gravação só acontece se a tarefa ainda estiver nessa versão (409 se
+    outra requisição gravou antes).
+    """
+    try:
+        if not request.is_json:
+            return create_response(
+                success=False,
+                message="Content-Type deve ser application/json"
+            ), 400
         
-        # Validar dados
-        erros = validar_dados_tarefa(titulo, prioridade, status)
+        valores, versao, erros = ler_alteracoes_tarefa(request.get_json(silent=True))
         if erros:
             return create_response(
                 success=False,
                 message="; ".join(erros)
             ), 400
         
-        # Atualizar tarefa
-        tarefa.titulo = titulo
-        tarefa.descricao = descricao if len(descricao) <= 500 else descricao[:500]
-        tarefa.prioridade = prioridade
-        tarefa.status = status
-        tarefa.data_atualizacao = datetime.now()
+        try:
+            linha = atualizar_tarefa(tarefa_id, valores, versao)
+        except ConflitoVersao as conflito:
+            db.session.rollback()
+            return create_response(
+                success=False,
+                message=str(conflito),
+                data={"versao_atual": conflito.versao_atual}
+            ), 409
+        
+        if linha is None:
+            db.session.rollback()
+            return create_response(
+                success=False,
+                message="Tarefa não encontrada"
+            ), 404
         
         db.session.commit()
         
         return create_response(
             success=True,
-            message=f"Tarefa '{titulo}' atualizada com sucesso!",
-            data=tarefa_to_dict(tarefa)
+            message=f"Tarefa '{linha.titulo}' atualizada com sucesso!",
+            data=tarefa_to_dict(linha)
         )
         
     except Exception as erro:
@@ -414,22 +1093,22 @@ def api_editar_tarefa(tarefa_id):
             message=f"Erro ao editar tarefa: {str(erro)}"
         ), 500
 
-@app.route("/api/tarefas/<int:tarefa_id>", methods=["DELETE"])
+@rotas.route("/api/tarefas/<int:tarefa_id>", methods=["DELETE"])
 def api_excluir_tarefa(tarefa_id):
     """API: Excluir tarefa"""
     try:
-        tarefa = Tarefa.query.filter_by(tarefa_id=tarefa_id).first()
+        excluidas = excluir_tarefas([tarefa_id])
         
-        if not tarefa:
+        if not excluidas:
+            db.session.rollback()
             return create_response(
                 success=False,
                 message="Tarefa não encontrada"
             ), 404
         
-        titulo = tarefa.titulo
-        db.session.delete(tarefa)
         db.session.commit()
         
+        titulo = excluidas[0].titulo
         return create_response(
             success=True,
             message=f"Tarefa '{titulo}' excluída com sucesso!"
@@ -442,10 +1121,647 @@ def api_excluir_tarefa(tarefa_id):
             message=f"Erro ao excluir tarefa: {str(erro)}"
         ), 500
 
+# ========================================
+# API REST EM LOTE (JSON OU NDJSON)
+# ========================================
+def ler_itens_bulk():
+    """Ler o corpo como array JSON ou NDJSON (um objeto por linha).
+    
+    Devolve (itens, erros_por_indice); linhas NDJSON inválidas viram erro
+    do próprio item em vez de derrubar o lote inteiro.
+    """
+    if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+        itens, erros = [], {}
+        linhas = (linha for linha in request.get_data(as_text=True).splitlines() if linha.strip())
+        for indice, linha in enumerate(linhas):
+            try:
+                itens.append(json.loads(linha))
+            except ValueError:
+                itens.append(None)
+                erros[indice] = ["Linha NDJSON inválida"]
+        return itens, erros
+    
+    if not request.is_json:
+        raise ValueError("Content-Type deve ser application/json ou application/x-ndjson")
+    
+    itens = request.get_json(silent=True)
+    if not isinstance(itens, list):
+        raise ValueError("O corpo deve ser um array JSON de tarefas")
+    
+    return itens, {}
+
+def ler_tamanho_lote():
+    """Tamanho do lote: ?lote= ou BULK_TAMANHO_LOTE"""
+    try:
+        tamanho = int(request.args.get("lote", current_app.config["BULK_TAMANHO_LOTE"]))
+    except ValueError:
+        raise ValueError("lote deve ser um número inteiro")
+    
+    if tamanho < 1:
+        raise ValueError("lote deve ser maior que zero")
+    
+    return tamanho
+
+def dividir_em_lotes(itens, tamanho):
+    """Quebrar a lista de (indice, item) em pedaços de `tamanho`"""
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+def preparar_dados_tarefa(item, atual=None):
+    """Normalizar e validar um item do lote (atual = valores já gravados)"""
+    if not isinstance(item, dict):
+        return None, ["Item deve ser um objeto JSON"]
+    
+    atual = atual or {}
+    titulo = str(item.get("titulo", atual.get("titulo", ""))).strip()
+    descricao = str(item.get("descricao", atual.get("descricao") or "")).strip()
+    prioridade = str(item.get("prioridade", atual.get("prioridade", "media"))).lower()
+    status = str(item.get("status", atual.get("status", "pendente"))).lower()
+    
+    erros = validar_dados_tarefa(titulo, prioridade, status)
+    if erros:
+        return None, erros
+    
+    return {
+        "titulo": titulo,
+        "descricao": descricao if len(descricao) <= 500 else descricao[:500],
+        "prioridade": prioridade,
+        "status": status
+    }, []
+
+def ler_id_item(item):
+    """Ler o id de um item do lote (None se ausente ou inválido)"""
+    if not isinstance(item, dict) or isinstance(item.get("id"), bool):
+        # bool é subclasse de int: True viraria o id 1
+        return None
+    try:
+        return int(item.get("id"))
+    except (TypeError, ValueError):
+        return None
+
+def acertar_sequencia_tarefas(maior_id):
+    """Avançar a sequência de tarefa_id para além de um id gravado
+    explicitamente (upsert com id que não existia)"""
+    if db.engine.dialect.name != "postgresql":
+        # No SQLite o próximo id já sai de MAX(rowid) + 1
+        return
+    
+    # Nunca recua: nextval() já passou de todo id entregue até aqui,
+    # inclusive por transações ainda abertas
+    sequencia = func.pg_get_serial_sequence("tarefas", "tarefa_id")
+    db.session.execute(select(func.setval(sequencia, func.greatest(maior_id, func.nextval(sequencia)))))
+
+def resposta_bulk(resultados, verbo):
+    """Montar a resposta com o resultado de cada item"""
+    resultados.sort(key=lambda resultado: resultado["indice"])
+    sucessos = sum(1 for resultado in resultados if resultado["sucesso"])
+    falhas = len(resultados) - sucessos
+    
+    log.info("📦 API: %s tarefas %s, %s com erro", sucessos, verbo, falhas, extra={"sucessos": sucessos, "falhas": falhas})
+    
+    return create_response(
+        success=falhas == 0,
+        message=f"{sucessos} tarefas {verbo}, {falhas} com erro",
+        data={
+            "total": len(resultados),
+            "sucessos": sucessos,
+            "falhas": falhas,
+            "itens": resultados
+        }
+    ), 200 if sucessos or not resultados else 400
+
+@rotas.route("/api/tarefas/bulk", methods=["POST"])
+def api_adicionar_tarefas_bulk():
+    """API: Criar várias tarefas (?upsert=1 atualiza itens com id existente)"""
+    log.debug("📦 API: Criando tarefas em lote...")
+    
+    try:
+        itens, erros_leitura = ler_itens_bulk()
+        tamanho_lote = ler_tamanho_lote()
+    except ValueError as erro:
+        return create_response(success=False, message=str(erro)), 400
+    
+    upsert = request.args.get("upsert") in ("1", "true")
+    resultados = []
+    validos = []
+    
+    # Validação de todos os itens antes de qualquer escrita
+    for indice, item in enumerate(itens):
+        if indice in erros_leitura:
+            resultados.append({"indice": indice, "sucesso": False, "erros": erros_leitura[indice]})
+            continue
+        
+        valores, erros = preparar_dados_tarefa(item)
+        if erros:
+            resultados.append({"indice": indice, "sucesso": False, "erros": erros})
+            continue
+        
+        if upsert and ler_id_item(item) is not None:
+            valores["tarefa_id"] = ler_id_item(item)
+        validos.append((indice, valores))
+    
+    if validos:
+        # Usuário e categoria padrão vêm do cache de referências
+        usuario_id = cache_referencias.usuario_padrao_id()
+        categoria_id = cache_referencias.categoria_padrao_id()
+        
+        if usuario_id is None or categoria_id is None:
+            return create_response(
+                success=False,
+                message="Dados básicos do sistema não configurados"
+            ), 500
+    
+    for lote in dividir_em_lotes(validos, tamanho_lote):
+        agora = datetime.now()
+        linhas = [
+            dict(
+                valores,
+                usuario_id=usuario_id,
+                categoria_id=categoria_id,
+                data_criacao=agora
+            )
+            for _, valores in lote
+        ]
+        
+        try:
+            if upsert:
+                comando = insert_do_dialeto(Tarefa)
+                comando = comando.on_conflict_do_update(
+                    index_elements=[Tarefa.tarefa_id],
+                    set_={
+                        "titulo": comando.excluded.titulo,
+                        "descricao": comando.excluded.descricao,
+                        "prioridade": comando.excluded.prioridade,
+                        "status": comando.excluded.status,
+                        "data_atualizacao": comando.excluded.data_atualizacao,
+                        # O UPSERT em Core não passa pelo onupdate do ORM
+                        "versao": Tarefa.versao + 1
+                    }
+                )
+            else:
+                comando = insert(Tarefa)
+            
+            # Linhas com e sem tarefa_id precisam de INSERTs separados
+            ids = {}
+            for com_id in (False, True):
+                grupo = [(posicao, linha) for posicao, linha in enumerate(linhas) if ("tarefa_id" in linha) == com_id]
+                if not grupo:
+                    continue
+                retornados = db.session.execute(
+                    comando.returning(Tarefa.tarefa_id, sort_by_parameter_order=True),
+                    [linha for _, linha in grupo]
+                ).scalars().all()
+                ids.update(zip((posicao for posicao, _ in grupo), retornados))
+                if com_id and retornados:
+                    acertar_sequencia_tarefas(max(retornados))
+            
+            eventos.registrar_eventos(db.session, "upsert", ids.values())
+            if upsert:
+                # Tarefas já existentes podem ter mudado de status
+                resumos.recalcular_resumos_das_tarefas(db.session, ids.values())
+            db.session.commit()
+            
+            for posicao, (indice, _) in enumerate(lote):
+                resultados.append({"indice": indice, "sucesso": True, "id": ids[posicao]})
+                
+        except Exception as erro:
+            db.session.rollback()
+            log.exception("❌ API Erro ao gravar lote: %s", erro)
+            for indice, _ in lote:
+                resultados.append({"indice": indice, "sucesso": False, "erros": [f"Erro ao gravar lote: {str(erro)}"]})
+    
+    return resposta_bulk(resultados, "criadas")
+
+@rotas.route("/api/tarefas/bulk", methods=["PUT"])
+def api_editar_tarefas_bulk():
+    """API: Editar várias tarefas (cada item precisa de id)"""
+    log.debug("📦 API: Editando tarefas em lote...")
+    
+    try:
+        itens, erros_leitura = ler_itens_bulk()
+        tamanho_lote = ler_tamanho_lote()
+    except ValueError as erro:
+        return create_response(success=False, message=str(erro)), 400
+    
+    resultados = []
+    com_id = []
+    
+    for indice, item in enumerate(itens):
+        if indice in erros_leitura:
+            resultados.append({"indice": indice, "sucesso": False, "erros": erros_leitura[indice]})
+        elif ler_id_item(item) is None:
+            resultados.append({"indice": indice, "sucesso": False, "erros": ["Item sem id válido"]})
+        else:
+            com_id.append((indice, item))
+    
+    for lote in dividir_em_lotes(com_id, tamanho_lote):
+        # Valores atuais do lote inteiro em uma consulta (para edição parcial)
+        ids = [ler_id_item(item) for _, item in lote]
+        atuais = {
+            linha.tarefa_id: linha._asdict()
+            for linha in db.session.query(
+                Tarefa.tarefa_id, Tarefa.titulo, Tarefa.descricao, Tarefa.prioridade, Tarefa.status
+            ).filter(Tarefa.tarefa_id.in_(ids))
+        }
+        
+        alteracoes = []
+        indices_alterados = []
+        
+        for indice, item in lote:
+            tarefa_id = ler_id_item(item)
+            if tarefa_id not in atuais:
+                resultados.append({"indice": indice, "sucesso": False, "id": tarefa_id, "erros": ["Tarefa não encontrada"]})
+                continue
+            
+            valores, erros = preparar_dados_tarefa(item, atuais[tarefa_id])
+            if erros:
+                resultados.append({"indice": indice, "sucesso": False, "id": tarefa_id, "erros": erros})
+                continue
+            
+            alteracoes.append(dict(valores, tarefa_id=tarefa_id))
+            indices_alterados.append((indice, tarefa_id))
+        
+        if not alteracoes:
+            continue
+        
+        try:
+            # UPDATE por chave primária, executado como executemany
+            db.session.execute(update(Tarefa), alteracoes)
+            alterados = [tarefa_id for _, tarefa_id in indices_alterados]
+            eventos.registrar_eventos(db.session, "upsert", alterados)
+            resumos.recalcular_resumos_das_tarefas(db.session, alterados)
+            db.session.commit()
+            resultados += [{"indice": indice, "sucesso": True, "id": tarefa_id} for indice, tarefa_id in indices_alterados]
+            
+        except Exception as erro:
+            db.session.rollback()
+            log.exception("❌ API Erro ao gravar lote: %s", erro)
+            resultados += [
+                {"indice": indice, "sucesso": False, "id": tarefa_id, "erros": [f"Erro ao gravar lote: {str(erro)}"]}
+                for indice, tarefa_id in indices_alterados
+            ]
+    
+    return resposta_bulk(resultados, "atualizadas")
+
+# Filtros aceitos por DELETE /api/tarefas (os mesmos da listagem)
+FILTROS_TAREFAS = ("status", "prioridade", "categoria_id", "projeto_id", "vencimento_de", "vencimento_ate", "q")
+
+@rotas.route("/api/tarefas", methods=["DELETE"])
+def api_excluir_tarefas_filtro():
+    """API: Excluir todas as tarefas que atendem aos filtros da query string.
+    
+    Exige pelo menos um filtro (nada de apagar tudo por engano). Os ids
+    são lidos e excluídos em lotes por tarefa_id crescente, um commit por
+    lote, para não segurar uma transação gigante.
+    """
+    log.debug("🧹 API: Excluindo tarefas por filtro...")
+    
+    try:
+        condicoes = condicoes_filtros_tarefas(request.args)
+        tamanho_lote = ler_tamanho_lote()
+    except ValueError as erro:
+        return create_response(success=False, message=str(erro)), 400
+    
+    # Conferido depois da leitura: ?status=, chega com valor, mas sem filtro
+    if not condicoes:
+        return create_response(
+            success=False,
+            message=f"Informe pelo menos um filtro: {', '.join(FILTROS_TAREFAS)}"
+        ), 400
+    
+    consulta = db.session.query(Tarefa.tarefa_id).filter(*condicoes)
+    
+    total = 0
+    ultimo = 0
+    try:
+        while True:
+            ids = [
+                linha.tarefa_id for linha in
+                consulta.filter(Tarefa.tarefa_id > ultimo).order_by(Tarefa.tarefa_id).limit(tamanho_lote)
+            ]
+            if not ids:
+                break
+            
+            excluidas = excluir_tarefas(ids)
+            db.session.commit()
+            
+            total += len(excluidas)
+            ultimo = ids[-1]
+        
+        log.info("🗑️ API: %s tarefa(s) excluída(s) por filtro", total)
+        return create_response(
+            data={"excluidas": total},
+            message=f"{total} tarefa(s) excluída(s)"
+        )
+        
+    except Exception as erro:
+        db.session.rollback()
+        log.exception("❌ API Erro ao excluir tarefas por filtro: %s", erro)
+        return create_response(
+            success=False,
+            data={"excluidas": total},
+            message=f"Erro ao excluir tarefas: {str(erro)}"
+        ), 500
+
+@rotas.route("/api/tarefas/bulk", methods=["DELETE"])
+def api_excluir_tarefas_bulk():
+    """API: Excluir várias tarefas (array de ids ou de objetos com id)"""
+    log.debug("📦 API: Excluindo tarefas em lote...")
+    
+    try:
+        itens, erros_leitura = ler_itens_bulk()
+        tamanho_lote = ler_tamanho_lote()
+    except ValueError as erro:
+        return create_response(success=False, message=str(erro)), 400
+    
+    resultados = []
+    com_id = []
+    
+    for indice, item in enumerate(itens):
+        if isinstance(item, bool):
+            tarefa_id = None
+        elif isinstance(item, int):
+            tarefa_id = item
+        else:
+            tarefa_id = ler_id_item(item)
+        if indice in erros_leitura or tarefa_id is None:
+            resultados.append({"indice": indice, "sucesso": False, "erros": erros_leitura.get(indice, ["Item sem id válido"])})
+        else:
+            com_id.append((indice, tarefa_id))
+    
+    for lote in dividir_em_lotes(com_id, tamanho_lote):
+        ids = [tarefa_id for _, tarefa_id in lote]
+        
+        try:
+            excluidas = excluir_tarefas(ids)
+            excluidos = {linha.tarefa_id for linha in excluidas}
+            db.session.commit()
+            
+            for indice, tarefa_id in lote:
+                if tarefa_id in excluidos:
+                    resultados.append({"indice": indice, "sucesso": True, "id": tarefa_id})
+                else:
+                    resultados.append({"indice": indice, "sucesso": False, "id": tarefa_id, "erros": ["Tarefa não encontrada"]})
+                    
+        except Exception as erro:
+            db.session.rollback()
+            log.exception("❌ API Erro ao excluir lote: %s", erro)
+            resultados += [
+                {"indice": indice, "sucesso": False, "id": tarefa_id, "erros": [f"Erro ao excluir lote: {str(erro)}"]}
+                for indice, tarefa_id in lote
+            ]
+    
+    return resposta_bulk(resultados, "excluídas")
+
+# ========================================
+# ROTAS DA API - ANEXOS
+# ========================================
+def ler_nome_arquivo(padrao="arquivo"):
+    """Nome original do upload (?nome=, X-Nome-Arquivo ou o do multipart)"""
+    nome = request.args.get("nome") or request.headers.get("X-Nome-Arquivo") or padrao
+    # Só o nome: nada de diretórios vindos do cliente
+    nome = os.path.basename(nome.replace("\\", "/")).strip()
+    return nome[:255] or "arquivo"
+
+@rotas.route("/api/tarefas/<int:tarefa_id>/anexos", methods=["GET"])
+@condicional("anexos", "usuarios")
+def api_anexos_tarefa(tarefa_id):
+    """API: Listar os anexos da tarefa"""
+    try:
+        anexos = Anexo.query.filter_by(tarefa_id=tarefa_id, ativo=True).order_by(Anexo.id_anexo).all()
+        
+        if not anexos and db.session.get(Tarefa, tarefa_id) is None:
+            return create_response(
+                success=False,
+                message="Tarefa não encontrada"
+            ), 404
+        
+        return create_response(
+            success=True,
+            message=f"{len(anexos)} anexos encontrados",
+            data=[anexo.to_dict() for anexo in anexos]
+        )
+        
+    except Exception as erro:
+        return create_response(
+            success=False,
+            message=f"Erro ao buscar anexos: {str(erro)}"
+        ), 500
+
+@rotas.route("/api/tarefas/<int:tarefa_id>/anexos", methods=["POST"])
+def api_enviar_anexo(tarefa_id):
+    """API: Enviar anexo.
+    
+    O corpo da requisição é o próprio arquivo (Content-Type = tipo do
+    arquivo, nome em ?nome= ou X-Nome-Arquivo); multipart/form-data com o
+    campo "arquivo" também é aceito. O arquivo é gravado em blocos.
+    """
+    log.debug("📎 API: Recebendo anexo...")
+    
+    tamanho_maximo = current_app.config["ANEXOS_TAMANHO_MAXIMO"]
+    if request.content_length is not None and request.content_length > tamanho_maximo:
+        return create_response(
+            success=False,
+            message=f"Arquivo maior que {tamanho_maximo} bytes"
+        ), 413
+    
+    if db.session.get(Tarefa, tarefa_id) is None:
+        return create_response(
+            success=False,
+            message="Tarefa não encontrada"
+        ), 404
+    
+    if request.mimetype == "multipart/form-data":
+        arquivo = request.files.get("arquivo")
+        if arquivo is None:
+            return create_response(success=False, message="Campo 'arquivo' não enviado"), 400
+        fonte = arquivo.stream
+        nome = ler_nome_arquivo(arquivo.filename or "arquivo")
+        tipo_mime = arquivo.mimetype
+    else:
+        fonte = request.stream
+        nome = ler_nome_arquivo()
+        tipo_mime = request.mimetype
+    
+    if not tipo_mime or tipo_mime == "application/x-www-form-urlencoded":
+        tipo_mime = mimetypes.guess_type(nome)[0] or "application/octet-stream"
+    
+    usuario_id = cache_referencias.usuario_padrao_id()
+    if usuario_id is None:
+        return create_response(
+            success=False,
+            message="Dados básicos do sistema não configurados"
+        ), 500
+    
+    try:
+        hash_conteudo, tamanho, caminho, duplicado = gravar_fluxo(fonte)
+    except ArquivoMuitoGrande as erro:
+        return create_response(success=False, message=str(erro)), 413
+    except OSError as erro:
+        log.exception("❌ API Erro ao gravar anexo: %s", erro)
+        return create_response(success=False, message=f"Erro ao gravar anexo: {str(erro)}"), 500
+    
+    try:
+        anexo = Anexo(
+            nome_arquivo=hash_conteudo,
+            nome_original=nome,
+            tipo_mime=tipo_mime[:100],
+            tamanho_bytes=tamanho,
+            caminho_arquivo=caminho,
+            hash_conteudo=hash_conteudo,
+            usuario_id=usuario_id,
+            tarefa_id=tarefa_id
+        )
+        db.session.add(anexo)
+        db.session.commit()
+        
+    except Exception as erro:
+        db.session.rollback()
+        log.exception("❌ API Erro ao salvar anexo: %s", erro)
+        return create_response(
+            success=False,
+            message=f"Erro ao salvar anexo: {str(erro)}"
+        ), 500
+    
+    log.info(
+        "✅ API: Anexo %s salvo (%s bytes%s)", anexo.id_anexo, tamanho, ', conteúdo já existente' if duplicado else '',
+        extra={"anexo_id": anexo.id_anexo, "tamanho_bytes": tamanho, "duplicado": duplicado}
+    )
+    
+    dados = anexo.to_dict()
+    dados["duplicado"] = duplicado
+    return create_response(
+        success=True,
+        message="Anexo enviado com sucesso",
+        data=dados
+    ), 201
+
+@rotas.route("/api/anexos/<int:anexo_id>/download", methods=["GET"])
+def api_baixar_anexo(anexo_id):
+    """API: Baixar anexo (If-None-Match/If-Modified-Since e Range)"""
+    anexo = db.session.get(Anexo, anexo_id)
+    if anexo is None or not anexo.ativo:
+        return create_response(success=False, message="Anexo não encontrado"), 404
+    
+    if current_app.config["ANEXOS_ENVIO"] == "x-accel-redirect":
+        # O nginx lê o arquivo da location interna e cuida de Range e cache
+        resposta = Response(mimetype=anexo.tipo_mime or "application/octet-stream")
+        resposta.headers["X-Accel-Redirect"] = current_app.config["ANEXOS_PREFIXO_INTERNO"] + anexo.caminho_arquivo.replace(os.sep, "/")
+        resposta.headers.set("Content-Disposition", "attachment", filename=anexo.nome_original)
+        if anexo.hash_conteudo:
+            resposta.set_etag(anexo.hash_conteudo)
+        return resposta
+    
+    try:
+        caminho = caminho_absoluto(anexo.caminho_arquivo)
+    except ValueError:
+        return create_response(success=False, message="Anexo não encontrado"), 404
+    
+    if not os.path.exists(caminho):
+        return create_response(success=False, message="Arquivo do anexo não encontrado"), 404
+    
+    # Com ANEXOS_ENVIO=x-sendfile (USE_X_SENDFILE) o send_file só devolve
+    # o cabeçalho X-Sendfile e o servidor web envia o arquivo
+    return send_file(
+        caminho,
+        mimetype=anexo.tipo_mime or "application/octet-stream",
+        as_attachment=True,
+        download_name=anexo.nome_original,
+        conditional=True,
+        etag=anexo.hash_conteudo or True,
+        max_age=3600
+    )
+
+@rotas.route("/api/anexos/<int:anexo_id>", methods=["DELETE"])
+def api_excluir_anexo(anexo_id):
+    """API: Excluir anexo (o arquivo fica para flask anexos limpar)"""
+    try:
+        anexo = db.session.get(Anexo, anexo_id)
+        if anexo is None:
+            return create_response(success=False, message="Anexo não encontrado"), 404
+        
+        db.session.delete(anexo)
+        db.session.commit()
+        log.info("🗑️ API: Anexo %s excluído", anexo_id)
+        
+        return create_response(
+            success=True,
+            message="Anexo excluído com sucesso",
+            data={"id": anexo_id}
+        )
+        
+    except Exception as erro:
+        db.session.rollback()
+        log.exception("❌ API Erro ao excluir anexo: %s", erro)
+        return create_response(
+            success=False,
+            message=f"Erro ao excluir anexo: {str(erro)}"
+        ), 500
+
+@rotas.route("/api/armazenamento", methods=["GET"])
+@condicional("anexos", "tarefas", "usuarios")
+def api_armazenamento():
+    """API: Espaço ocupado pelos anexos (total e por usuário, tarefa e projeto).
+    
+    ?limit=N limita por_tarefa às N tarefas com mais bytes.
+    """
+    try:
+        limite_tarefas, _, _ = ler_parametros_paginacao(request.args)
+    except ValueError as erro:
+        return create_response(success=False, message=str(erro)), 400
+    
+    try:
+        totais = armazenamento.calcular_totais(limite_tarefas)
+        
+        return create_response(
+            success=True,
+            message="Armazenamento calculado",
+            data={
+                "total": armazenamento.obter_total().to_dict(),
+                "por_usuario": totais["usuario"],
+                "por_tarefa": totais["tarefa"],
+                "por_projeto": totais["projeto"]
+            }
+        )
+        
+    except Exception as erro:
+        log.exception("❌ API Erro ao calcular armazenamento: %s", erro)
+        return create_response(
+            success=False,
+            message=f"Erro ao calcular armazenamento: {str(erro)}"
+        ), 500
+
+# ========================================
+# ROTAS DA API - PROJETOS
+# ========================================
+@rotas.route("/api/projetos/<int:projeto_id>/resumo", methods=["GET"])
+@condicional("tarefas", "projetos")
+def api_resumo_projeto(projeto_id):
+    """API: Contadores das tarefas do projeto (status, horas e progresso)"""
+    try:
+        if db.session.get(Projeto, projeto_id) is None:
+            return create_response(
+                success=False,
+                message="Projeto não encontrado"
+            ), 404
+        
+        return create_response(
+            success=True,
+            message="Resumo do projeto encontrado",
+            data=resumos.obter_resumo(projeto_id).to_dict()
+        )
+        
+    except Exception as erro:
+        log.exception("❌ API Erro ao buscar resumo do projeto: %s", erro)
+        return create_response(
+            success=False,
+            message=f"Erro ao buscar resumo do projeto: {str(erro)}"
+        ), 500
+
 # ========================================
 # ROTAS DE DEPURAÇÃO E UTILITÁRIOS
 # ========================================
-@app.route("/debug")
+@rotas.route("/debug")
 def debug():
     """Rota para debugar dados do banco"""
     try:
@@ -454,7 +1770,8 @@ def debug():
         tarefas = Tarefa.query.all()
         
         resultado = "<h1>🔍 Debug - Dados no Banco</h1>"
-        resultado += f"<p><strong>Banco:</strong> {DB_NAME} | <strong>Host:</strong> {DB_HOST}:{DB_PORT}</p>"
+        config = current_app.config
+        resultado += f"<p><strong>Banco:</strong> {config['DB_NAME']} | <strong>Host:</strong> {config['DB_HOST']}:{config['DB_PORT']}</p>"
         
         resultado += f"<h2>👥 Usuários ({len(usuarios)})</h2><ul>"
         for u in usuarios:
@@ -483,26 +1800,20 @@ def debug():
     except Exception as erro:
         return f"<h1>❌ Erro no Debug</h1><p>{erro}</p><a href='/'>← Voltar</a>"
 
-@app.route("/api/status")
+@rotas.route("/api/status")
 def api_status():
     """API: Status da aplicação"""
     try:
-        total_tarefas = Tarefa.query.count()
-        total_usuarios = Usuario.query.count()
-        total_categorias = Categoria.query.count()
+        estatisticas = obter_estatisticas(ttl=current_app.config["ESTATISTICAS_CACHE_TTL"])
         
-        # Estatísticas por status
+        # Estatísticas por status e por prioridade
         stats_status = {
-            'pendente': Tarefa.query.filter_by(status='pendente').count(),
-            'andamento': Tarefa.query.filter_by(status='andamento').count(),
-            'concluida': Tarefa.query.filter_by(status='concluida').count()
+            status: estatisticas['por_status'][status]
+            for status in STATUS_VALIDOS
         }
-        
-        # Estatísticas por prioridade
         stats_prioridade = {
-            'baixa': Tarefa.query.filter_by(prioridade='baixa').count(),
-            'media': Tarefa.query.filter_by(prioridade='media').count(),
-            'alta': Tarefa.query.filter_by(prioridade='alta').count()
+            prioridade: estatisticas['por_prioridade'][prioridade]
+            for prioridade in PRIORIDADES_VALIDAS
         }
         
         return create_response(
@@ -510,12 +1821,13 @@ def api_status():
             message="Sistema funcionando normalmente",
             data={
                 "database": "PostgreSQL",
-                "database_name": DB_NAME,
-                "total_tarefas": total_tarefas,
-                "total_usuarios": total_usuarios,
-                "total_categorias": total_categorias,
+                "database_name": current_app.config["DB_NAME"],
+                "total_tarefas": estatisticas['total_tarefas'],
+                "total_usuarios": estatisticas['total_usuarios'],
+                "total_categorias": estatisticas['total_categorias'],
                 "estatisticas_status": stats_status,
                 "estatisticas_prioridade": stats_prioridade,
+                "pool_conexoes": metricas_pool(),
                 "server_time": datetime.now().isoformat()
             }
         )
@@ -528,12 +1840,15 @@ def api_status():
 # ========================================
 # TRATAMENTO DE ERROS HTTP
 # ========================================
-@app.errorhandler(404)
+@rotas.app_errorhandler(404)
 def page_not_found(e):
     """Página não encontrada"""
-   
+    return create_response(
+        success=False,
+        message="Recurso não encontrado"
+    ), 404
 
-@app.errorhandler(500)
+@rotas.app_errorhandler(500)
 def internal_error(e):
     """Erro interno do servidor"""
     db.session.rollback()
@@ -543,9 +1858,141 @@ def internal_error(e):
     ), 500
 
 # ========================================
-# INICIAR APLICAÇÃO
+# FÁBRICA DA APLICAÇÃO
 # ========================================
+def create_app(config=None):
+    """Criar a aplicação Flask.
+    
+    `config` pode ser uma classe de configuracao.py, o nome dela
+    ("desenvolvimento", "producao", "teste") ou None para usar APP_CONFIG.
+    """
+    app = Flask(__name__)
+    
+    if config is None or isinstance(config, str):
+        config = obter_configuracao(config)
+    app.config.from_object(config)
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", opcoes_engine(app.config))
+    app.config.setdefault("USE_X_SENDFILE", app.config["ANEXOS_ENVIO"] == "x-sendfile")
+    
+    configurar_logging(app)
+    db.init_app(app)
+    eventos.configurar_broker(app)
+    configurar_metricas(app)
+    app.register_blueprint(rotas)
+    app.cli.add_command(comando_db)
+    app.cli.add_command(comando_seed)
+    app.cli.add_command(comando_resumos)
+    app.cli.add_command(comando_anexos)
+    app.cli.add_command(comando_jobs)
+    app.cli.add_command(comando_worker)
+    
+    # Nada de banco aqui: criar tabelas e dados padrão é feito pelos
+    # comandos abaixo, uma vez, e não a cada worker que sobe
+    return app
+
+# ========================================
+# COMANDOS DE LINHA DE COMANDO (flask ...)
+# ========================================
+@click.group("db")
+def comando_db():
+    """Gerenciar o esquema do banco"""
+
+@comando_db.command("init")
+@click.option("--seed/--sem-seed", default=True, help="Criar também usuário e categoria padrão")
+def comando_db_init(seed):
+    """Criar as tabelas que ainda não existem (flask db init)"""
+    db.create_all()
+    print("✅ Tabelas verificadas/criadas no banco de dados")
+    
+    if seed:
+        criar_dados_iniciais()
+
+@click.command("seed")
+def comando_seed():
+    """Criar usuário e categoria padrão (flask seed)"""
+    criar_dados_iniciais()
+
+@click.group("anexos")
+def comando_anexos():
+    """Manter os arquivos dos anexos"""
+
+@comando_anexos.command("limpar")
+def comando_anexos_limpar():
+    """Apagar arquivos sem anexo no banco há mais de uma hora (flask anexos limpar)"""
+    removidos = limpar_orfaos()
+    print(f"🧹 {removidos} arquivos órfãos removidos")
+
+@comando_anexos.command("recalcular")
+def comando_anexos_recalcular():
+    """Refazer o total de armazenamento a partir dos anexos (flask anexos recalcular)"""
+    armazenamento.recalcular_total(db.session)
+    db.session.commit()
+    total = armazenamento.obter_total()
+    print(f"📦 {total.total_anexos} anexos, {total.to_dict()['total_legivel']}")
+
+@click.group("jobs")
+def comando_jobs():
+    """Fila de trabalhos em segundo plano"""
+
+@comando_jobs.command("agendar")
+def comando_jobs_agendar():
+    """Enfileirar lembretes e resumos agora (flask jobs agendar)"""
+    print(f"🗓️ {jobs.agendar(db.session)}")
+
+@comando_jobs.command("processar")
+@click.option("--lote", type=int, default=None, help="Jobs reservados por vez")
+def comando_jobs_processar(lote):
+    """Executar os jobs vencidos neste processo e sair (flask jobs processar)"""
+    concluidos, falhas = jobs.processar_pendentes(lote)
+    print(f"✅ {concluidos} jobs concluídos, {falhas} falhas")
+
+@comando_jobs.command("status")
+def comando_jobs_status():
+    """Quantidade de jobs por status (flask jobs status)"""
+    for status, total in sorted(jobs.contar_por_status().items()):
+        print(f"📋 {status}: {total}")
+
+@click.command("worker")
+@click.option("--threads", type=int, default=None, help="Threads por processo (JOBS_THREADS)")
+@click.option("--processos", type=int, default=1, help="Processos de worker")
+@click.option("--lote", type=int, default=None, help="Jobs reservados por vez (JOBS_LOTE)")
+@click.option("--intervalo", type=float, default=None, help="Segundos de espera com a fila vazia")
+@click.option("--agendar-cada", type=float, default=None, help="Segundos entre rodadas do agendador (0 desliga)")
+def comando_worker(threads, processos, lote, intervalo, agendar_cada):
+    """Executar a fila de jobs até SIGTERM/SIGINT (flask worker)"""
+    jobs.executar_workers(
+        current_app._get_current_object(),
+        processos=processos,
+        threads=threads,
+        lote=lote,
+        intervalo=intervalo,
+        agendar_cada=agendar_cada
+    )
+
+@click.group("resumos")
+def comando_resumos():
+    """Manter o resumo dos projetos (projetos_resumo)"""
+
+@comando_resumos.command("reconciliar")
+@click.option("--corrigir/--so-verificar", default=True, help="Recalcular os projetos divergentes")
+def comando_resumos_reconciliar(corrigir):
+    """Comparar o resumo com as tarefas e corrigir divergências (flask resumos reconciliar)"""
+    divergentes = resumos.reconciliar_resumos(corrigir=corrigir)
+    
+    if not divergentes:
+        print("✅ Resumo dos projetos consistente")
+    elif corrigir:
+        print(f"🔧 {len(divergentes)} projetos recalculados: {divergentes}")
+    else:
+        print(f"⚠️ {len(divergentes)} projetos divergentes: {divergentes}")
+
+# ========================================
+# INICIAR APLICAÇÃO (DESENVOLVIMENTO)
+# ========================================
+# Em produção use wsgi.py com gunicorn (gunicorn.conf.py) ou waitress.
 if __name__ == "__main__":
+    app = create_app()
+    
     print("🚀 Iniciando aplicação Flask...")
     print(f"📊 Home: http://localhost:5000/")
     print(f"🔍 Debug: http://localhost:5000/debug")
@@ -553,4 +2000,4 @@ if __name__ == "__main__":
     print(f"📋 API Tarefas: http://localhost:5000/api/tarefas")
     print("=" * 50)
     
-    app.run(debug=True, port=5000, host='0.0.0.0')
\ No newline at end of file
+    app.run(debug=True, port=5000, host='0.0.0.0')
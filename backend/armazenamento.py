@@ -0,0 +1,346 @@
+# armazenamento.py - Arquivos dos anexos em disco, endereçados pelo conteúdo
+#
+# O corpo do upload é lido em blocos e gravado num arquivo temporário
+# enquanto o SHA-256 e o tamanho são calculados, sem carregar o arquivo
+# inteiro na memória. O arquivo final fica em <diretorio>/ab/cd/<sha256>:
+# conteúdo idêntico é gravado uma vez só, não importa quantos anexos
+# apontem para ele.
+#
+# Também cuida da contabilidade: totais por usuário/tarefa/projeto em uma
+# consulta e o total geral (armazenamento_total) mantido a cada commit.
+
+import os
+import hashlib
+import tempfile
+import time
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy import event, func, select, literal, union_all, inspect, or_
+from sqlalchemy.orm import Session
+from models import db, Usuario, Anexo, Tarefa, TotalArmazenamento, insert_do_dialeto, tarefas_em_cascata
+
+class ArquivoMuitoGrande(ValueError):
+    """O upload passou de ANEXOS_TAMANHO_MAXIMO"""
+
+def diretorio_anexos():
+    return current_app.config["ANEXOS_DIRETORIO"]
+
+def caminho_relativo(hash_conteudo):
+    """Caminho do arquivo dentro do diretório de anexos (ab/cd/abcd...)"""
+    return os.path.join(hash_conteudo[:2], hash_conteudo[2:4], hash_conteudo)
+
+def caminho_absoluto(relativo):
+    """Caminho no disco, sem deixar sair do diretório de anexos"""
+    base = os.path.realpath(diretorio_anexos())
+    caminho = os.path.realpath(os.path.join(base, relativo))
+    if os.path.commonpath([base, caminho]) != base:
+        raise ValueError("Caminho de anexo inválido")
+    return caminho
+
+def gravar_fluxo(fonte):
+    """Gravar o fluxo em disco, em blocos.
+    
+    Volta (hash_conteudo, tamanho_bytes, caminho_relativo, duplicado);
+    duplicado=True quando o mesmo conteúdo já estava gravado.
+    """
+    tamanho_maximo = current_app.config["ANEXOS_TAMANHO_MAXIMO"]
+    tamanho_bloco = current_app.config["ANEXOS_BLOCO_BYTES"]
+    
+    temporarios = os.path.join(diretorio_anexos(), "tmp")
+    os.makedirs(temporarios, exist_ok=True)
+    
+    soma = hashlib.sha256()
+    tamanho = 0
+    descritor, caminho_temporario = tempfile.mkstemp(dir=temporarios)
+    try:
+        with os.fdopen(descritor, "wb") as destino:
+            while True:
+                bloco = fonte.read(tamanho_bloco)
+                if not bloco:
+                    break
+                tamanho += len(bloco)
+                if tamanho > tamanho_maximo:
+                    raise ArquivoMuitoGrande(f"Arquivo maior que {tamanho_maximo} bytes")
+                soma.update(bloco)
+                destino.write(bloco)
+        
+        hash_conteudo = soma.hexdigest()
+        relativo = caminho_relativo(hash_conteudo)
+        final = caminho_absoluto(relativo)
+        
+        try:
+            # Conteúdo já gravado: renovar o mtime para que limpar_orfaos
+            # não apague o arquivo antes do commit do anexo que o usa
+            os.utime(final)
+        except FileNotFoundError:
+            pass
+        else:
+            os.remove(caminho_temporario)
+            return hash_conteudo, tamanho, relativo, True
+        
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        # Mesmo sistema de arquivos: troca atômica, nunca um arquivo pela metade
+        os.replace(caminho_temporario, final)
+        return hash_conteudo, tamanho, relativo, False
+    
+    except BaseException:
+        if os.path.exists(caminho_temporario):
+            os.remove(caminho_temporario)
+        raise
+
+def limpar_orfaos(idade_minima=3600):
+    """Apagar arquivos sem anexo no banco e temporários abandonados.
+    
+    É o único lugar que apaga arquivos: as rotas só excluem as linhas.
+    Apagar logo depois do commit disputaria com um upload do mesmo
+    conteúdo, que acha o arquivo em gravar_fluxo mas ainda não gravou o
+    anexo. Por isso só saem arquivos parados há mais de idade_minima
+    segundos (o upload deduplicado renova o mtime). Roda de tempos em
+    tempos (flask anexos limpar); volta a quantidade de arquivos removidos.
+    """
+    base = diretorio_anexos()
+    if not os.path.isdir(base):
+        return 0
+    
+    # O mtime é lido depois desta consulta: arquivo renovado por um
+    # upload em andamento já fica de fora pela idade
+    em_uso = set(db.session.execute(
+        select(Anexo.hash_conteudo).where(Anexo.hash_conteudo.is_not(None)).distinct()
+    ).scalars())
+    
+    removidos = 0
+    limite = time.time() - idade_minima
+    for pasta, _, arquivos in os.walk(base):
+        temporaria = os.path.basename(pasta) == "tmp"
+        for nome in arquivos:
+            caminho = os.path.join(pasta, nome)
+            if not temporaria and (len(nome) != 64 or nome in em_uso):
+                continue
+            # Upload ainda em andamento também fica aqui: só os antigos saem
+            if os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+                removidos += 1
+    return removidos
+
+# ========================================
+# CONTABILIDADE
+# ========================================
+CHAVE_TOTAL = "anexos"
+
+def consulta_totais(limite_tarefas=50):
+    """Totais de anexos ativos por usuário, tarefa e projeto em um comando.
+    
+    Três GROUP BY unidos por UNION ALL; cada linha traz a dimensão
+    ("usuario", "tarefa" ou "projeto"), o id, a quantidade e os bytes.
+    Só as `limite_tarefas` tarefas com mais bytes entram.
+    """
+    quantidade = func.count(Anexo.id_anexo)
+    soma = func.coalesce(func.sum(Anexo.tamanho_bytes), 0)
+    
+    por_usuario = (
+        select(literal("usuario").label("dimensao"), Anexo.usuario_id.label("id"),
+               quantidade.label("total_anexos"), soma.label("total_bytes"))
+        .where(Anexo.ativo.is_(True))
+        .group_by(Anexo.usuario_id)
+    )
+    por_tarefa = (
+        select(literal("tarefa").label("dimensao"), Anexo.tarefa_id.label("id"),
+               quantidade.label("total_anexos"), soma.label("total_bytes"))
+        .where(Anexo.ativo.is_(True))
+        .group_by(Anexo.tarefa_id)
+        .order_by(soma.desc(), Anexo.tarefa_id)
+        .limit(limite_tarefas)
+        .subquery()
+    )
+    por_projeto = (
+        select(literal("projeto").label("dimensao"), Tarefa.projeto_id.label("id"),
+               quantidade.label("total_anexos"), soma.label("total_bytes"))
+        .join(Tarefa, Tarefa.tarefa_id == Anexo.tarefa_id)
+        .where(Anexo.ativo.is_(True), Tarefa.projeto_id.is_not(None))
+        .group_by(Tarefa.projeto_id)
+    )
+    
+    return union_all(por_usuario, select(por_tarefa), por_projeto)
+
+def calcular_totais(limite_tarefas=50):
+    """Executar consulta_totais e separar por dimensão"""
+    totais = {"usuario": [], "tarefa": [], "projeto": []}
+    for linha in db.session.execute(consulta_totais(limite_tarefas)):
+        totais[linha.dimensao].append({
+            "id": linha.id,
+            "total_anexos": linha.total_anexos,
+            "total_bytes": int(linha.total_bytes)
+        })
+    for linhas in totais.values():
+        linhas.sort(key=lambda linha: (-linha["total_bytes"], linha["id"]))
+    return totais
+
+def somar_total(session, anexos, total_bytes):
+    """Somar (ou subtrair) no total geral, na transação da sessão"""
+    if not anexos and not total_bytes:
+        return
+    
+    comando = insert_do_dialeto(TotalArmazenamento)
+    comando = comando.on_conflict_do_update(
+        index_elements=[TotalArmazenamento.chave],
+        set_={
+            "total_anexos": TotalArmazenamento.total_anexos + comando.excluded.total_anexos,
+            "total_bytes": TotalArmazenamento.total_bytes + comando.excluded.total_bytes,
+            "data_atualizacao": comando.excluded.data_atualizacao
+        }
+    )
+    # Pela conexão, para não disparar de novo os eventos da sessão
+    session.connection().execute(comando, {
+        "chave": CHAVE_TOTAL,
+        "total_anexos": anexos,
+        "total_bytes": total_bytes,
+        "data_atualizacao": datetime.now(timezone.utc)
+    })
+
+def recalcular_total(session):
+    """Refazer o total geral a partir da tabela de anexos"""
+    linha = session.execute(
+        select(func.count(Anexo.id_anexo), func.coalesce(func.sum(Anexo.tamanho_bytes), 0))
+        .where(Anexo.ativo.is_(True))
+    ).one()
+    
+    comando = insert_do_dialeto(TotalArmazenamento)
+    comando = comando.on_conflict_do_update(
+        index_elements=[TotalArmazenamento.chave],
+        set_={
+            "total_anexos": comando.excluded.total_anexos,
+            "total_bytes": comando.excluded.total_bytes,
+            "data_atualizacao": comando.excluded.data_atualizacao
+        }
+    )
+    session.connection().execute(comando, {
+        "chave": CHAVE_TOTAL,
+        "total_anexos": linha[0],
+        "total_bytes": int(linha[1]),
+        "data_atualizacao": datetime.now(timezone.utc)
+    })
+
+def obter_total():
+    """Total geral gravado (calculado e gravado na primeira vez)"""
+    total = db.session.get(TotalArmazenamento, CHAVE_TOTAL)
+    if total is None:
+        recalcular_total(db.session)
+        db.session.commit()
+        total = db.session.get(TotalArmazenamento, CHAVE_TOTAL)
+    return total
+
+def _contribuicao(ativo, tamanho_bytes):
+    return (1, tamanho_bytes or 0) if ativo else (0, 0)
+
+@event.listens_for(Session, "before_flush")
+def _anexos_em_cascata(session, flush_context, instances):
+    """Anexos ativos que o banco vai excluir junto (ON DELETE CASCADE) com
+    as tarefas/usuários deste flush: contados antes, enquanto existem"""
+    usuarios = [objeto.id_usuario for objeto in session.deleted if isinstance(objeto, Usuario)]
+    tarefas = [objeto.tarefa_id for objeto in session.deleted if isinstance(objeto, Tarefa)]
+    tarefas += [linha.tarefa_id for linha in tarefas_em_cascata(session, flush_context)]
+    if not usuarios and not tarefas:
+        return
+    
+    # Os carregados na sessão já passam pelo after_flush como excluídos
+    ja_excluidos = [objeto.id_anexo for objeto in session.deleted if isinstance(objeto, Anexo)]
+    consulta = (
+        select(func.count(Anexo.id_anexo), func.coalesce(func.sum(Anexo.tamanho_bytes), 0))
+        .where(Anexo.ativo.is_(True))
+        .where(or_(Anexo.tarefa_id.in_(tarefas), Anexo.usuario_id.in_(usuarios)))
+    )
+    if ja_excluidos:
+        consulta = consulta.where(Anexo.id_anexo.not_in(ja_excluidos))
+    linha = session.connection().execute(consulta).one()
+    flush_context.attributes["anexos_em_cascata"] = (linha[0], int(linha[1]))
+
+@event.listens_for(Session, "after_flush")
+def _total_no_flush(session, flush_context):
+    anexos, total_bytes = flush_context.attributes.get("anexos_em_cascata", (0, 0))
+    anexos, total_bytes = -anexos, -total_bytes
+    recalcular = False
+    
+    for objeto in session.new:
+        if isinstance(objeto, Anexo):
+            quantidade, tamanho = _contribuicao(objeto.ativo, objeto.tamanho_bytes)
+            anexos += quantidade
+            total_bytes += tamanho
+    
+    for objeto in session.deleted:
+        if isinstance(objeto, Anexo):
+            estado = inspect(objeto)
+            if "ativo" not in estado.dict or "tamanho_bytes" not in estado.dict:
+                recalcular = True
+                continue
+            quantidade, tamanho = _contribuicao(objeto.ativo, objeto.tamanho_bytes)
+            anexos -= quantidade
+            total_bytes -= tamanho
+    
+    for objeto in session.dirty:
+        if not isinstance(objeto, Anexo):
+            continue
+        estado = inspect(objeto)
+        historicos = [estado.attrs[campo].history for campo in ("ativo", "tamanho_bytes")]
+        if not any(historico.has_changes() for historico in historicos):
+            continue
+        if any(historico.added and not historico.deleted for historico in historicos):
+            # Alterado sem ter sido carregado: valor antigo desconhecido
+            recalcular = True
+            continue
+        antigos = [
+            historico.deleted[0] if historico.deleted else historico.unchanged[0]
+            for historico in historicos
+        ]
+        quantidade, tamanho = _contribuicao(*antigos)
+        anexos -= quantidade
+        total_bytes -= tamanho
+        quantidade, tamanho = _contribuicao(objeto.ativo, objeto.tamanho_bytes)
+        anexos += quantidade
+        total_bytes += tamanho
+    
+    acumular_total(session, anexos, total_bytes, recalcular)
+
+# ========================================
+# TOTAL GERAL NO COMMIT
+# ========================================
+# armazenamento_total tem uma linha só: quem a atualiza segura o lock até
+# o COMMIT, e qualquer outra transação que mexa em anexos espera. Os
+# flushes (e excluir_tarefas) só acumulam o delta em session.info; o
+# UPSERT roda uma vez, no before_commit, como em
+# sincronizacao.gravar_versoes.
+
+def acumular_total(session, anexos, total_bytes, recalcular=False):
+    """Anotar um delta no total geral (ou pedir o recálculo); gravado no commit"""
+    if recalcular:
+        session.info["armazenamento_recalcular"] = True
+    if anexos or total_bytes:
+        pendente = session.info.setdefault("armazenamento_pendente", [0, 0])
+        pendente[0] += anexos
+        pendente[1] += total_bytes
+
+@event.listens_for(Session, "before_commit")
+def _total_no_commit(session):
+    if session.in_nested_transaction():
+        return
+    # O commit só faz o último flush depois deste evento
+    session.flush()
+    recalcular = session.info.pop("armazenamento_recalcular", False)
+    anexos, total_bytes = session.info.pop("armazenamento_pendente", (0, 0))
+    if recalcular:
+        recalcular_total(session)
+    else:
+        somar_total(session, anexos, total_bytes)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _total_no_rollback_do_savepoint(session, previous_transaction):
+    # Os deltas do SAVEPOINT desfeito já estão somados aos de fora:
+    # o total sai do recálculo no commit
+    if previous_transaction.nested and "armazenamento_pendente" in session.info:
+        session.info["armazenamento_recalcular"] = True
+
+@event.listens_for(Session, "after_transaction_end")
+def _limpar_total(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("armazenamento_pendente", None)
+        session.info.pop("armazenamento_recalcular", None)
+
@@ -0,0 +1,102 @@
+# conexoes.py - Pool de conexões do SQLAlchemy com métricas de espera
+
+import time
+import sqlite3
+import threading
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+class QueuePoolInstrumentado(QueuePool):
+    """QueuePool que mede quanto cada checkout esperou por uma conexão.
+    
+    Com o pool cheio (pool_size + max_overflow em uso) o checkout bloqueia
+    até pool_timeout; esse tempo é o que indica pool subdimensionado.
+    """
+    
+    _lock_metricas = threading.Lock()
+    _metricas = {
+        "checkouts": 0,
+        "espera_total_segundos": 0.0,
+        "espera_maxima_segundos": 0.0,
+        "timeouts": 0
+    }
+    _pools = []
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        QueuePoolInstrumentado._pools.append(self)
+    
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except PoolTimeoutError:
+            with self._lock_metricas:
+                self._metricas["timeouts"] += 1
+            raise
+        
+        espera = time.perf_counter() - inicio
+        with self._lock_metricas:
+            self._metricas["checkouts"] += 1
+            self._metricas["espera_total_segundos"] += espera
+            self._metricas["espera_maxima_segundos"] = max(self._metricas["espera_maxima_segundos"], espera)
+        
+        return conexao
+    
+    def recreate(self):
+        # engine.dispose() troca o pool; o antigo deixa de contar
+        novo = super().recreate()
+        if self in QueuePoolInstrumentado._pools:
+            QueuePoolInstrumentado._pools.remove(self)
+        return novo
+
+def metricas_pool():
+    """Contadores de espera no checkout e ocupação atual dos pools"""
+    with QueuePoolInstrumentado._lock_metricas:
+        metricas = dict(QueuePoolInstrumentado._metricas)
+    
+    metricas["espera_media_segundos"] = (
+        metricas["espera_total_segundos"] / metricas["checkouts"] if metricas["checkouts"] else 0.0
+    )
+    
+    pools = QueuePoolInstrumentado._pools
+    metricas["tamanho"] = sum(pool.size() for pool in pools)
+    metricas["em_uso"] = sum(pool.checkedout() for pool in pools)
+    metricas["livres"] = sum(pool.checkedin() for pool in pools)
+    metricas["overflow"] = sum(max(pool.overflow(), 0) for pool in pools)
+    
+    return metricas
+
+@event.listens_for(Engine, "connect")
+def _chaves_estrangeiras_sqlite(conexao_dbapi, registro):
+    # SQLite só aplica FOREIGN KEY / ON DELETE com o pragma ligado em cada conexão
+    if isinstance(conexao_dbapi, sqlite3.Connection):
+        cursor = conexao_dbapi.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+def opcoes_engine(config):
+    """Montar SQLALCHEMY_ENGINE_OPTIONS a partir das chaves DB_POOL_* da config"""
+    uri = config["SQLALCHEMY_DATABASE_URI"]
+    
+    # SQLite (testes/benchmarks) usa o pool padrão do Flask-SQLAlchemy
+    if uri.startswith("sqlite"):
+        return {}
+    
+    opcoes = {
+        "poolclass": QueuePoolInstrumentado,
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"]
+    }
+    
+    if uri.startswith("postgresql") and config["DB_STATEMENT_TIMEOUT_MS"]:
+        opcoes["connect_args"] = {
+            "options": f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"
+        }
+    
+    return opcoes
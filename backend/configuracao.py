@@ -0,0 +1,133 @@
+# configuracao.py - Configurações da aplicação por ambiente
+#
+# Tudo pode ser sobrescrito por variável de ambiente. APP_CONFIG escolhe a
+# classe usada por create_app() quando nenhuma é passada.
+
+import os
+import tempfile
+
+def _env_bool(nome, padrao):
+    return os.environ.get(nome, str(padrao)).lower() in ("1", "true", "sim", "yes")
+
+class Config:
+    """Configuração base (desenvolvimento local)"""
+    SECRET_KEY = os.environ.get("SECRET_KEY", "sua-chave-secreta-super-segura-2025")
+    
+    # Banco PostgreSQL
+    DB_USER = os.environ.get("DB_USER", "elvis")
+    DB_PASS = os.environ.get("DB_PASS", "8531")
+    DB_NAME = os.environ.get("DB_NAME", "northwind")
+    DB_HOST = os.environ.get("DB_HOST", "localhost")
+    DB_PORT = os.environ.get("DB_PORT", "5432")
+    
+    SQLALCHEMY_DATABASE_URI = os.environ.get(
+        "DATABASE_URL",
+        f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    )
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Pool de conexões (por processo/worker)
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "0"))
+    
+    # Segundos que /api/status pode reaproveitar as estatísticas (0 desliga)
+    ESTATISTICAS_CACHE_TTL = float(os.environ.get("ESTATISTICAS_CACHE_TTL", "2"))
+    # Segundos até o cache de usuários/categorias (referencias.py) reler o
+    # banco; commits locais nessas tabelas já o descartam na hora
+    REFERENCIAS_TTL = float(os.environ.get("REFERENCIAS_TTL", "60"))
+    
+    # Itens gravados por commit nos endpoints /api/tarefas/bulk
+    BULK_TAMANHO_LOTE = int(os.environ.get("BULK_TAMANHO_LOTE", "500"))
+    
+    # Cache HTTP das rotas GET da API (ETag/Last-Modified + revalidação)
+    API_CACHE_CONTROL = os.environ.get("API_CACHE_CONTROL", "no-cache")
+    # False move o "timestamp" do corpo JSON para o cabeçalho X-Timestamp
+    RESPOSTA_TIMESTAMP_NO_CORPO = _env_bool("RESPOSTA_TIMESTAMP_NO_CORPO", True)
+    
+    # /api/tarefas/changes só entrega alterações mais velhas que isto, para
+    # não pular transações que gravaram antes mas ainda não tinham commit
+    SINCRONIZACAO_MARGEM_SEGUNDOS = float(os.environ.get("SINCRONIZACAO_MARGEM_SEGUNDOS", "2"))
+    
+    # /api/tarefas/stream: "auto" (postgres no PostgreSQL, memoria nos demais),
+    # "postgres" (pg_notify + LISTEN, entre processos) ou "memoria"
+    EVENTOS_BROKER = os.environ.get("EVENTOS_BROKER", "auto")
+    EVENTOS_HEARTBEAT_SEGUNDOS = float(os.environ.get("EVENTOS_HEARTBEAT_SEGUNDOS", "15"))
+    # Cada conexão SSE ocupa uma thread do worker; 0 = sem limite
+    EVENTOS_DURACAO_MAXIMA = float(os.environ.get("EVENTOS_DURACAO_MAXIMA", "300"))
+    
+    # Anexos (armazenamento.py): arquivos gravados por hash do conteúdo
+    ANEXOS_DIRETORIO = os.environ.get(
+        "ANEXOS_DIRETORIO",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads")
+    )
+    ANEXOS_TAMANHO_MAXIMO = int(os.environ.get("ANEXOS_TAMANHO_MAXIMO", str(50 * 1024 * 1024)))
+    ANEXOS_BLOCO_BYTES = int(os.environ.get("ANEXOS_BLOCO_BYTES", str(64 * 1024)))
+    # "flask" (send_file), "x-sendfile" (Apache/lighttpd) ou "x-accel-redirect" (nginx)
+    ANEXOS_ENVIO = os.environ.get("ANEXOS_ENVIO", "flask")
+    # Location interna do nginx que aponta para ANEXOS_DIRETORIO
+    ANEXOS_PREFIXO_INTERNO = os.environ.get("ANEXOS_PREFIXO_INTERNO", "/anexos-internos/")
+
+    # Logging (logs.py): DEBUG, INFO, WARNING, ERROR ou OFF; "texto" ou "json"
+    LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+    LOG_FORMATO = os.environ.get("LOG_FORMATO", "texto")
+    # Escrita no stderr numa thread à parte, fora do caminho da requisição
+    LOG_ASSINCRONO = _env_bool("LOG_ASSINCRONO", True)
+    
+    # Métricas no formato do Prometheus (metricas.py)
+    METRICAS_ATIVAS = _env_bool("METRICAS_ATIVAS", True)
+    METRICAS_ROTA = os.environ.get("METRICAS_ROTA", "/metrics")
+    
+    # Fila de jobs (jobs.py) e worker (flask worker)
+    JOBS_THREADS = int(os.environ.get("JOBS_THREADS", "4"))
+    JOBS_LOTE = int(os.environ.get("JOBS_LOTE", "10"))
+    JOBS_INTERVALO_SEGUNDOS = float(os.environ.get("JOBS_INTERVALO_SEGUNDOS", "2"))
+    JOBS_MAX_TENTATIVAS = int(os.environ.get("JOBS_MAX_TENTATIVAS", "5"))
+    # Nova tentativa depois de base * 2^(tentativas - 1) segundos, até a máxima
+    JOBS_ESPERA_BASE_SEGUNDOS = float(os.environ.get("JOBS_ESPERA_BASE_SEGUNDOS", "30"))
+    JOBS_ESPERA_MAXIMA_SEGUNDOS = float(os.environ.get("JOBS_ESPERA_MAXIMA_SEGUNDOS", "3600"))
+    # "executando" há mais que isto volta para a fila (worker morreu)
+    JOBS_TEMPO_LIMITE_SEGUNDOS = float(os.environ.get("JOBS_TEMPO_LIMITE_SEGUNDOS", "900"))
+    # Agendador: lembretes de tarefas que vencem em até N dias e resumo diário
+    JOBS_AGENDAR_CADA_SEGUNDOS = float(os.environ.get("JOBS_AGENDAR_CADA_SEGUNDOS", "300"))
+    JOBS_LEMBRETE_DIAS = int(os.environ.get("JOBS_LEMBRETE_DIAS", "1"))
+    JOBS_LOTE_AGENDAMENTO = int(os.environ.get("JOBS_LOTE_AGENDAMENTO", "500"))
+    JOBS_RESUMO_DIAS_PROXIMAS = int(os.environ.get("JOBS_RESUMO_DIAS_PROXIMAS", "7"))
+
+class ConfigProducao(Config):
+    """Servidor WSGI (gunicorn/waitress)"""
+    DEBUG = False
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "5"))
+    DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "15000"))
+
+class ConfigTeste(Config):
+    """SQLite em memória, para benchmarks e testes"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get("TEST_DATABASE_URL", "sqlite://")
+    ESTATISTICAS_CACHE_TTL = 0
+    SINCRONIZACAO_MARGEM_SEGUNDOS = 0
+    EVENTOS_BROKER = "memoria"
+    LOG_LEVEL = os.environ.get("LOG_LEVEL", "WARNING")
+    LOG_ASSINCRONO = False
+    ANEXOS_DIRETORIO = os.environ.get(
+        "TEST_ANEXOS_DIRETORIO",
+        os.path.join(tempfile.gettempdir(), "tarefas-anexos-teste")
+    )
+
+CONFIGURACOES = {
+    "desenvolvimento": Config,
+    "producao": ConfigProducao,
+    "teste": ConfigTeste
+}
+
+def obter_configuracao(nome=None):
+    """Classe de configuração pelo nome (ou APP_CONFIG)"""
+    nome = nome or os.environ.get("APP_CONFIG", "desenvolvimento")
+    if nome not in CONFIGURACOES:
+        raise ValueError(f"APP_CONFIG deve ser: {', '.join(CONFIGURACOES)}")
+    return CONFIGURACOES[nome]
@@ -0,0 +1,87 @@
+# estatisticas.py - Estatísticas do sistema calculadas em uma única consulta
+
+import time
+import threading
+from sqlalchemy import func, select
+from models import db, Usuario, Categoria, Projeto, Tarefa, Comentario, Anexo, StatusTarefa, Prioridade
+
+STATUS_TAREFA = StatusTarefa.valores()
+PRIORIDADES_TAREFA = Prioridade.valores()
+
+# ========================================
+# CONSULTA AGREGADA
+# ========================================
+def _total(modelo):
+    """Subconsulta escalar com o COUNT(*) de uma tabela"""
+    return select(func.count()).select_from(modelo).scalar_subquery()
+
+def consulta_estatisticas():
+    """Montar o SELECT único com todas as contagens.
+    
+    As quebras por status e prioridade usam COUNT(*) FILTER (WHERE ...),
+    então a tabela de tarefas é lida uma vez só; os totais das outras
+    tabelas vão como subconsultas escalares no mesmo comando.
+    """
+    colunas = [func.count(Tarefa.tarefa_id).label("total_tarefas")]
+    
+    for status in STATUS_TAREFA:
+        colunas.append(
+            func.count(Tarefa.tarefa_id).filter(Tarefa.status == status).label(f"status_{status}")
+        )
+    
+    for prioridade in PRIORIDADES_TAREFA:
+        colunas.append(
+            func.count(Tarefa.tarefa_id).filter(Tarefa.prioridade == prioridade).label(f"prioridade_{prioridade}")
+        )
+    
+    colunas += [
+        _total(Usuario).label("total_usuarios"),
+        _total(Categoria).label("total_categorias"),
+        _total(Projeto).label("total_projetos"),
+        _total(Comentario).label("total_comentarios"),
+        _total(Anexo).label("total_anexos")
+    ]
+    
+    return select(*colunas).select_from(Tarefa)
+
+def calcular_estatisticas():
+    """Executar a consulta agregada e organizar o resultado"""
+    linha = db.session.execute(consulta_estatisticas()).mappings().one()
+    
+    return {
+        'total_tarefas': linha['total_tarefas'],
+        'total_usuarios': linha['total_usuarios'],
+        'total_categorias': linha['total_categorias'],
+        'total_projetos': linha['total_projetos'],
+        'total_comentarios': linha['total_comentarios'],
+        'total_anexos': linha['total_anexos'],
+        'por_status': {status: linha[f"status_{status}"] for status in STATUS_TAREFA},
+        'por_prioridade': {prioridade: linha[f"prioridade_{prioridade}"] for prioridade in PRIORIDADES_TAREFA}
+    }
+
+# ========================================
+# CACHE EM MEMÓRIA (TTL CURTO)
+# ========================================
+_cache = {"valor": None, "expira_em": 0.0}
+_cache_lock = threading.Lock()
+
+def obter_estatisticas(ttl=0):
+    """Obter estatísticas, reaproveitando o último resultado por até `ttl` segundos.
+    
+    Com ttl=0 o cache é ignorado e a consulta sempre roda.
+    """
+    if not ttl:
+        return calcular_estatisticas()
+    
+    with _cache_lock:
+        agora = time.monotonic()
+        if _cache["valor"] is None or agora >= _cache["expira_em"]:
+            _cache["valor"] = calcular_estatisticas()
+            _cache["expira_em"] = agora + ttl
+        return _cache["valor"]
+
+def invalidar_cache_estatisticas():
+    """Descartar o resultado guardado"""
+    with _cache_lock:
+        _cache["valor"] = None
+        _cache["expira_em"] = 0.0
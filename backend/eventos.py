@@ -0,0 +1,241 @@
+# eventos.py - Eventos de alteração de tarefas para /api/tarefas/stream (SSE)
+#
+# Cada flush que grava tarefas gera eventos compactos ({"tipo", "ids"}).
+# Com o BrokerPostgres eles saem por pg_notify dentro da própria transação
+# (o PostgreSQL só entrega no commit e descarta no rollback) e uma única
+# conexão LISTEN por processo repassa tudo para as filas dos assinantes.
+# O BrokerMemoria entrega direto no after_commit, só dentro do processo
+# (testes, SQLite, servidor de desenvolvimento).
+
+import json
+import queue
+import logging
+import select
+import threading
+import time
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from models import db, Tarefa, tarefas_em_cascata
+
+log = logging.getLogger("tarefas.eventos")
+
+CANAL_EVENTOS = "tarefas_eventos"
+
+# pg_notify aceita até 8000 bytes por mensagem
+IDS_POR_EVENTO = 500
+
+def montar_eventos(tipo, ids):
+    """Eventos {"tipo", "ids"} com no máximo IDS_POR_EVENTO ids cada"""
+    ids = sorted(set(ids))
+    return [
+        {"tipo": tipo, "ids": ids[inicio:inicio + IDS_POR_EVENTO]}
+        for inicio in range(0, len(ids), IDS_POR_EVENTO)
+    ]
+
+class Assinatura:
+    """Fila de um cliente SSE.
+    
+    Se o cliente não consome e a fila enche, os eventos seguintes são
+    descartados e perdeu_eventos avisa que ele precisa recarregar a lista.
+    """
+    
+    def __init__(self, tamanho_maximo=1000):
+        self.fila = queue.Queue(maxsize=tamanho_maximo)
+        self.perdeu_eventos = False
+    
+    def entregar(self, evento):
+        try:
+            self.fila.put_nowait(evento)
+        except queue.Full:
+            self.perdeu_eventos = True
+    
+    def proximo(self, timeout):
+        """Próximo evento ou None depois de `timeout` segundos"""
+        try:
+            return self.fila.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class BrokerMemoria:
+    """Distribui os eventos entre as assinaturas deste processo"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._assinaturas = set()
+    
+    def assinar(self):
+        assinatura = Assinatura()
+        with self._lock:
+            self._assinaturas.add(assinatura)
+        return assinatura
+    
+    def cancelar(self, assinatura):
+        with self._lock:
+            self._assinaturas.discard(assinatura)
+    
+    def total_assinantes(self):
+        with self._lock:
+            return len(self._assinaturas)
+    
+    def distribuir(self, evento):
+        """Entregar um evento a todas as assinaturas"""
+        with self._lock:
+            assinaturas = list(self._assinaturas)
+        for assinatura in assinaturas:
+            assinatura.entregar(evento)
+    
+    def marcar_perda(self):
+        """Avisar todos os assinantes que eventos podem ter sido perdidos"""
+        with self._lock:
+            for assinatura in self._assinaturas:
+                assinatura.perdeu_eventos = True
+    
+    def publicar(self, session, eventos):
+        """Chamado no flush: guarda os eventos até o commit"""
+        session.info.setdefault("eventos_pendentes", []).extend(eventos)
+    
+    def confirmar(self, session):
+        """Chamado no after_commit"""
+        for evento in session.info.pop("eventos_pendentes", []):
+            self.distribuir(evento)
+    
+    def descartar(self, session):
+        """Chamado no after_rollback"""
+        session.info.pop("eventos_pendentes", None)
+
+class BrokerPostgres(BrokerMemoria):
+    """pg_notify na transação + uma conexão LISTEN por processo.
+    
+    Os eventos de qualquer worker (ou de outro servidor) chegam a todos
+    os processos. A conexão de escuta é aberta no primeiro assinante.
+    """
+    
+    def __init__(self, engine, intervalo_reconexao=2.0):
+        super().__init__()
+        self.engine = engine
+        self.intervalo_reconexao = intervalo_reconexao
+        self._thread = None
+        self._parar = threading.Event()
+    
+    def assinar(self):
+        assinatura = super().assinar()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._escutar, name="eventos-listen", daemon=True)
+                self._thread.start()
+        return assinatura
+    
+    def publicar(self, session, eventos):
+        # Pela conexão, para não disparar de novo os eventos da sessão
+        session.connection().execute(
+            text("SELECT pg_notify(:canal, :evento)"),
+            [{"canal": CANAL_EVENTOS, "evento": json.dumps(evento)} for evento in eventos]
+        )
+    
+    def confirmar(self, session):
+        pass
+    
+    def descartar(self, session):
+        pass
+    
+    def parar(self):
+        self._parar.set()
+    
+    def _conectar(self):
+        # Conexão própria, fora do pool: fica presa no LISTEN
+        conexao = self.engine.raw_connection()
+        conexao.detach()
+        conexao_pg = conexao.driver_connection
+        conexao_pg.rollback()
+        conexao_pg.autocommit = True
+        with conexao_pg.cursor() as cursor:
+            cursor.execute(f"LISTEN {CANAL_EVENTOS}")
+        return conexao
+    
+    def _escutar(self):
+        while not self._parar.is_set():
+            conexao = None
+            try:
+                conexao = self._conectar()
+                conexao_pg = conexao.driver_connection
+                log.info("📡 Escutando %s", CANAL_EVENTOS)
+                
+                while not self._parar.is_set():
+                    if select.select([conexao_pg], [], [], 5) == ([], [], []):
+                        continue
+                    conexao_pg.poll()
+                    while conexao_pg.notifies:
+                        notificacao = conexao_pg.notifies.pop(0)
+                        self.distribuir(json.loads(notificacao.payload))
+            
+            except Exception as erro:
+                log.warning("❌ Conexão LISTEN perdida: %s", erro)
+                # O que foi notificado enquanto estava fora não volta
+                self.marcar_perda()
+                time.sleep(self.intervalo_reconexao)
+            finally:
+                if conexao is not None:
+                    try:
+                        conexao.close()
+                    except Exception:
+                        pass
+
+# Broker do processo (configurado em create_app; None = sem eventos)
+broker = None
+
+def configurar_broker(app):
+    """Escolher o broker pela configuração EVENTOS_BROKER.
+    
+    "auto" usa PostgreSQL quando o banco é PostgreSQL e memória nos demais.
+    """
+    global broker
+    
+    tipo = app.config["EVENTOS_BROKER"]
+    if tipo == "auto":
+        uri = app.config["SQLALCHEMY_DATABASE_URI"]
+        tipo = "postgres" if uri.startswith("postgresql") else "memoria"
+    
+    if tipo == "postgres":
+        with app.app_context():
+            broker = BrokerPostgres(db.engine)
+    elif tipo == "memoria":
+        broker = BrokerMemoria()
+    else:
+        raise ValueError(f"EVENTOS_BROKER inválido: {tipo}")
+    
+    return broker
+
+# ========================================
+# EVENTOS DA SESSÃO
+# ========================================
+def registrar_eventos(session, tipo, ids):
+    """Publicar alterações feitas fora do flush (INSERT/UPDATE/DELETE em lote)"""
+    if broker is not None and ids:
+        broker.publicar(session, montar_eventos(tipo, ids))
+
+@event.listens_for(Session, "after_flush")
+def _eventos_no_flush(session, flush_context):
+    if broker is None:
+        return
+    
+    gravadas = [objeto.tarefa_id for objeto in session.new if isinstance(objeto, Tarefa)]
+    gravadas += [
+        objeto.tarefa_id for objeto in session.dirty
+        if isinstance(objeto, Tarefa) and session.is_modified(objeto, include_collections=False)
+    ]
+    excluidas = [objeto.tarefa_id for objeto in session.deleted if isinstance(objeto, Tarefa)]
+    excluidas += [linha.tarefa_id for linha in tarefas_em_cascata(session, flush_context)]
+    
+    eventos = montar_eventos("upsert", gravadas) + montar_eventos("delete", excluidas)
+    if eventos:
+        broker.publicar(session, eventos)
+
+@event.listens_for(Session, "after_commit")
+def _eventos_no_commit(session):
+    if broker is not None:
+        broker.confirmar(session)
+
+@event.listens_for(Session, "after_rollback")
+def _eventos_no_rollback(session):
+    if broker is not None:
+        broker.descartar(session)
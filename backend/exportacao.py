@@ -0,0 +1,100 @@
+# exportacao.py - Exportação de tarefas em NDJSON/CSV com memória constante
+#
+# As linhas saem de um cursor no servidor (yield_per -> stream_results no
+# PostgreSQL), lidas em lotes e escritas direto na resposta. Nenhum ponto
+# guarda a tabela inteira em memória.
+
+import io
+import csv
+import json
+from models import Tarefa, Projeto
+from referencias import cache_referencias
+
+LINHAS_POR_LOTE = 1000
+
+# Nome no arquivo exportado -> coluna
+COLUNAS_EXPORTACAO = {
+    "id": Tarefa.tarefa_id,
+    "titulo": Tarefa.titulo,
+    "descricao": Tarefa.descricao,
+    "status": Tarefa.status,
+    "prioridade": Tarefa.prioridade,
+    "progresso": Tarefa.progresso,
+    "data_criacao": Tarefa.data_criacao,
+    "data_atualizacao": Tarefa.data_atualizacao,
+    "data_vencimento": Tarefa.data_vencimento,
+    "usuario_id": Tarefa.usuario_id,
+    "categoria_id": Tarefa.categoria_id,
+    "projeto_id": Tarefa.projeto_id
+}
+
+CAMPOS_NOMES = ["usuario_nome", "categoria_nome", "projeto_nome"]
+
+FORMATOS_EXPORTACAO = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+def campos_exportacao(incluir_nomes=False):
+    """Lista de campos, na ordem em que aparecem no arquivo"""
+    return list(COLUNAS_EXPORTACAO) + (CAMPOS_NOMES if incluir_nomes else [])
+
+def _formatar(valor):
+    """Datas em ISO 8601; o resto como está"""
+    return valor.isoformat() if hasattr(valor, "isoformat") else valor
+
+def linhas_exportacao(consulta, incluir_nomes=False, linhas_por_lote=LINHAS_POR_LOTE):
+    """Gerar dicionários a partir da consulta (já filtrada), lote a lote.
+    
+    Nomes de usuário e categoria vêm do cache de referências; o nome do
+    projeto entra por LEFT JOIN na mesma consulta, então não há N+1.
+    """
+    colunas = [coluna.label(nome) for nome, coluna in COLUNAS_EXPORTACAO.items()]
+    consulta = consulta.with_entities(*colunas)
+    
+    if incluir_nomes:
+        consulta = consulta.outerjoin(Projeto, Projeto.id_projeto == Tarefa.projeto_id)
+        consulta = consulta.add_columns(Projeto.nome.label("projeto_nome"))
+    
+    consulta = consulta.order_by(Tarefa.tarefa_id).execution_options(yield_per=linhas_por_lote)
+    
+    for linha in consulta:
+        dados = {nome: _formatar(valor) for nome, valor in linha._mapping.items()}
+        
+        if incluir_nomes:
+            dados["usuario_nome"] = cache_referencias.nome_usuario(dados["usuario_id"])
+            dados["categoria_nome"] = cache_referencias.nome_categoria(dados["categoria_id"])
+        
+        yield dados
+
+def _agrupar(pedacos, linhas_por_lote):
+    """Juntar vários pedaços pequenos em um só antes de enviar"""
+    buffer = []
+    for pedaco in pedacos:
+        buffer.append(pedaco)
+        if len(buffer) >= linhas_por_lote:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+def gerar_ndjson(linhas, linhas_por_lote=LINHAS_POR_LOTE):
+    """Uma tarefa JSON por linha"""
+    pedacos = (json.dumps(dados, ensure_ascii=False, default=str) + "\n" for dados in linhas)
+    return _agrupar(pedacos, linhas_por_lote)
+
+def gerar_csv(linhas, campos, linhas_por_lote=LINHAS_POR_LOTE):
+    """CSV com cabeçalho, escrito linha a linha"""
+    def pedacos():
+        buffer = io.StringIO()
+        escritor = csv.DictWriter(buffer, fieldnames=campos, extrasaction="ignore")
+        escritor.writeheader()
+        for dados in linhas:
+            escritor.writerow(dados)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    
+    # A primeira linha vai junto com as primeiras tarefas
+    return _agrupar(pedacos(), linhas_por_lote)
@@ -0,0 +1,31 @@
+# gunicorn.conf.py - Configuração do gunicorn (gunicorn -c gunicorn.conf.py wsgi:app)
+#
+# Cada worker tem o próprio pool: o total de conexões no PostgreSQL é
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW + 1), contando a conexão LISTEN
+# dos eventos. Mantenha abaixo de max_connections do servidor.
+#
+# Cada cliente de /api/tarefas/stream ocupa uma thread enquanto está
+# conectado: dimensione GUNICORN_THREADS pelo número de abas abertas.
+
+import os
+import multiprocessing
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = 30
+keepalive = 5
+
+# Reciclar workers aos poucos evita acúmulo de memória
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = 200
+
+# Sem preload: cada worker cria a própria engine depois do fork, então
+# nenhuma conexão do pool é compartilhada entre processos
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOGLEVEL", "info")
@@ -0,0 +1,425 @@
+# jobs.py - Fila de trabalhos em segundo plano (tabela jobs) e o worker
+#
+# Quem precisa de algo fora da requisição grava um Job com enfileirar(),
+# na mesma transação do que o originou. O worker (flask worker) reserva
+# lotes com SELECT ... FOR UPDATE SKIP LOCKED: vários processos e threads
+# dividem a fila sem pegar o mesmo job e sem esperar uns pelos outros.
+#
+# No SQLite (testes) o FOR UPDATE é ignorado e as escritas já são
+# serializadas, então o mesmo código roda sem PostgreSQL;
+# processar_pendentes() esvazia a fila no próprio processo.
+#
+# Job que falha volta para a fila com espera exponencial até
+# max_tentativas; depois fica como "falhou" (flask jobs status).
+
+import os
+import random
+import logging
+import signal
+import socket
+import threading
+import multiprocessing
+from datetime import date, datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import func, select, update, tuple_
+from models import db, Job, Tarefa, Usuario, insert_do_dialeto
+
+log = logging.getLogger("tarefas.jobs")
+
+MANIPULADORES = {}
+
+def manipulador(tipo):
+    """Registrar a função que executa os jobs do tipo (recebe job.dados)"""
+    def registrar(funcao):
+        MANIPULADORES[tipo] = funcao
+        return funcao
+    return registrar
+
+def _agora():
+    return datetime.now(timezone.utc)
+
+# ========================================
+# FILA
+# ========================================
+def enfileirar(session, tipo, dados=None, chave=None, executar_em=None, max_tentativas=None):
+    """Gravar um job na transação da sessão (False se a chave já existia)"""
+    return enfileirar_varios(session, [{
+        "tipo": tipo,
+        "dados": dados,
+        "chave": chave,
+        "executar_em": executar_em,
+        "max_tentativas": max_tentativas
+    }]) == 1
+
+def enfileirar_varios(session, jobs):
+    """INSERT em lote; jobs cuja chave já existe são ignorados.
+    
+    Volta quantos jobs foram realmente criados.
+    """
+    if not jobs:
+        return 0
+    
+    agora = _agora()
+    linhas = [{
+        "tipo": job["tipo"],
+        "chave": job.get("chave"),
+        "dados": job.get("dados") or {},
+        "status": "pendente",
+        "tentativas": 0,
+        "max_tentativas": job.get("max_tentativas") or current_app.config["JOBS_MAX_TENTATIVAS"],
+        "executar_em": job.get("executar_em") or agora,
+        "data_criacao": agora
+    } for job in jobs]
+    
+    comando = insert_do_dialeto(Job).on_conflict_do_nothing(index_elements=[Job.chave])
+    return len(session.execute(comando.returning(Job.id_job), linhas).all())
+
+def reservar(session, limite, trabalhador):
+    """Marcar até `limite` jobs vencidos como "executando" e voltar os ids.
+    
+    SKIP LOCKED pula as linhas que outro worker está reservando agora.
+    Faz commit: a reserva vale mesmo que a execução demore.
+    """
+    agora = _agora()
+    ids = session.execute(
+        select(Job.id_job)
+        .where(Job.status == "pendente", Job.executar_em <= agora)
+        .order_by(Job.executar_em, Job.id_job)
+        .limit(limite)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    
+    if ids:
+        session.execute(
+            update(Job)
+            .where(Job.id_job.in_(ids))
+            .values(
+                status="executando",
+                tentativas=Job.tentativas + 1,
+                reservado_em=agora,
+                reservado_por=trabalhador
+            )
+        )
+    session.commit()
+    return ids
+
+def espera_nova_tentativa(tentativas):
+    """Segundos até a próxima tentativa: base * 2^(n-1), com teto e ±20%"""
+    base = current_app.config["JOBS_ESPERA_BASE_SEGUNDOS"]
+    maxima = current_app.config["JOBS_ESPERA_MAXIMA_SEGUNDOS"]
+    espera = min(base * 2 ** max(tentativas - 1, 0), maxima)
+    # Espalha no tempo os jobs que falharam juntos
+    return espera * random.uniform(0.8, 1.2)
+
+def executar(session, id_job):
+    """Executar um job reservado (True se concluiu).
+    
+    O trabalho do manipulador e a marcação de concluído saem no mesmo commit.
+    """
+    job = session.get(Job, id_job)
+    if job is None or job.status != "executando":
+        return False
+    
+    try:
+        funcao = MANIPULADORES.get(job.tipo)
+        if funcao is None:
+            raise LookupError(f"Tipo de job desconhecido: {job.tipo}")
+        funcao(job.dados)
+        
+        job.status = "concluido"
+        job.data_conclusao = _agora()
+        job.ultimo_erro = None
+        session.commit()
+        return True
+    
+    except Exception as erro:
+        session.rollback()
+        log.warning("❌ Job %s falhou: %s", id_job, erro)
+        registrar_falha(session, id_job, erro)
+        return False
+
+def registrar_falha(session, id_job, erro):
+    """Devolver o job à fila com espera ou marcar como "falhou" de vez"""
+    job = session.get(Job, id_job)
+    job.ultimo_erro = f"{type(erro).__name__}: {erro}"
+    job.reservado_em = None
+    job.reservado_por = None
+    
+    if job.tentativas >= job.max_tentativas:
+        job.status = "falhou"
+        job.data_conclusao = _agora()
+    else:
+        job.status = "pendente"
+        job.executar_em = _agora() + timedelta(seconds=espera_nova_tentativa(job.tentativas))
+    session.commit()
+
+def recuperar_presos(session, tempo_limite=None):
+    """Devolver à fila jobs "executando" há mais de `tempo_limite` segundos
+    (o worker morreu no meio). Volta quantos foram recuperados."""
+    tempo_limite = tempo_limite or current_app.config["JOBS_TEMPO_LIMITE_SEGUNDOS"]
+    limite = _agora() - timedelta(seconds=tempo_limite)
+    presos = (Job.status == "executando", Job.reservado_em < limite)
+    
+    falharam = session.execute(
+        update(Job)
+        .where(*presos, Job.tentativas >= Job.max_tentativas)
+        .values(status="falhou", ultimo_erro="Tempo limite de execução excedido", data_conclusao=_agora())
+    ).rowcount
+    voltaram = session.execute(
+        update(Job)
+        .where(*presos)
+        .values(status="pendente", reservado_em=None, reservado_por=None)
+    ).rowcount
+    session.commit()
+    return falharam + voltaram
+
+def processar_pendentes(limite=None, trabalhador="local"):
+    """Executar no próprio processo tudo o que já venceu (testes, cron).
+    
+    Volta (concluidos, falhas).
+    """
+    limite = limite or current_app.config["JOBS_LOTE"]
+    concluidos = falhas = 0
+    while True:
+        ids = reservar(db.session, limite, trabalhador)
+        if not ids:
+            return concluidos, falhas
+        for id_job in ids:
+            if executar(db.session, id_job):
+                concluidos += 1
+            else:
+                falhas += 1
+
+def contar_por_status():
+    """Quantidade de jobs em cada status"""
+    return dict(db.session.execute(select(Job.status, func.count()).group_by(Job.status)).all())
+
+# ========================================
+# AGENDAMENTO (LEMBRETES E RESUMO DIÁRIO)
+# ========================================
+def agendar_lembretes(session, dias=None, lote=None):
+    """Enfileirar um lembrete por tarefa em aberto que vence em até `dias` dias.
+    
+    Percorre a consulta de vencimento (índice parcial) em lotes por cursor.
+    A chave lembrete:<tarefa>:<vencimento> impede lembrete repetido, mas
+    um novo vencimento gera um novo lembrete.
+    """
+    dias = current_app.config["JOBS_LEMBRETE_DIAS"] if dias is None else dias
+    lote = lote or current_app.config["JOBS_LOTE_AGENDAMENTO"]
+    
+    criados = 0
+    cursor = None
+    while True:
+        consulta = (
+            select(Tarefa.tarefa_id, Tarefa.data_vencimento)
+            .where(Tarefa.condicao_vence_ate(dias))
+            .order_by(Tarefa.data_vencimento, Tarefa.tarefa_id)
+            .limit(lote)
+        )
+        if cursor:
+            consulta = consulta.where(tuple_(Tarefa.data_vencimento, Tarefa.tarefa_id) > tuple_(*cursor))
+        
+        linhas = session.execute(consulta).all()
+        if not linhas:
+            break
+        
+        criados += enfileirar_varios(session, [{
+            "tipo": "lembrete_vencimento",
+            "chave": f"lembrete:{linha.tarefa_id}:{linha.data_vencimento.isoformat()}",
+            "dados": {"tarefa_id": linha.tarefa_id, "data_vencimento": linha.data_vencimento.isoformat()}
+        } for linha in linhas])
+        session.commit()
+        
+        if len(linhas) < lote:
+            break
+        cursor = (linhas[-1].data_vencimento, linhas[-1].tarefa_id)
+    
+    return criados
+
+def agendar_resumos_diarios(session, dia=None):
+    """Enfileirar o resumo do dia de cada usuário ativo (um por dia)"""
+    dia = dia or date.today()
+    usuario_ids = session.execute(
+        select(Usuario.id_usuario).where(Usuario.ativo.is_(True)).order_by(Usuario.id_usuario)
+    ).scalars().all()
+    
+    criados = enfileirar_varios(session, [{
+        "tipo": "resumo_diario",
+        "chave": f"resumo:{usuario_id}:{dia.isoformat()}",
+        "dados": {"usuario_id": usuario_id, "dia": dia.isoformat()}
+    } for usuario_id in usuario_ids])
+    session.commit()
+    return criados
+
+def agendar(session):
+    """Uma rodada do agendador: recuperar presos, lembretes e resumos"""
+    return {
+        "recuperados": recuperar_presos(session),
+        "lembretes": agendar_lembretes(session),
+        "resumos": agendar_resumos_diarios(session)
+    }
+
+# ========================================
+# MANIPULADORES
+# ========================================
+def notificar(usuario, assunto, mensagem):
+    """Entregar uma notificação ao usuário.
+    
+    Ainda não há envio de e-mail configurado: registra no log do worker (tarefas.jobs).
+    """
+    log.info("📧 Para %s: %s - %s", usuario.email, assunto, mensagem)
+
+@manipulador("lembrete_vencimento")
+def lembrete_vencimento(dados):
+    tarefa = db.session.get(Tarefa, dados["tarefa_id"])
+    
+    # A tarefa pode ter mudado desde o agendamento
+    if tarefa is None or not tarefa.em_aberto or tarefa.data_vencimento is None:
+        return
+    if tarefa.data_vencimento.isoformat() != dados["data_vencimento"]:
+        return
+    
+    dias = tarefa.dias_para_vencimento
+    quando = "hoje" if dias == 0 else f"em {dias} dia(s)" if dias > 0 else f"há {-dias} dia(s)"
+    notificar(tarefa.usuario, f"Tarefa vence {quando}", tarefa.titulo)
+
+@manipulador("resumo_diario")
+def resumo_diario(dados):
+    usuario = db.session.get(Usuario, dados["usuario_id"])
+    if usuario is None or not usuario.ativo:
+        return
+    
+    dias_proximas = current_app.config["JOBS_RESUMO_DIAS_PROXIMAS"]
+    linha = db.session.execute(
+        select(
+            func.count().label("em_aberto"),
+            func.count().filter(Tarefa.is_vencida).label("vencidas"),
+            func.count().filter(Tarefa.condicao_vence_ate(dias_proximas)).label("proximas")
+        )
+        .where(Tarefa.usuario_id == usuario.id_usuario, Tarefa.em_aberto)
+    ).one()
+    
+    if not linha.em_aberto:
+        return
+    notificar(
+        usuario,
+        f"Resumo de {dados['dia']}",
+        f"{linha.em_aberto} tarefas em aberto, {linha.vencidas} vencidas, "
+        f"{linha.proximas} vencendo nos próximos {dias_proximas} dias"
+    )
+
+# ========================================
+# WORKER
+# ========================================
+class Worker:
+    """Threads que reservam e executam jobs até receber SIGTERM/SIGINT.
+    
+    Cada thread tem o próprio app context (e portanto a própria sessão).
+    Com agendar_cada > 0 uma thread extra roda agendar() nesse intervalo.
+    """
+    
+    def __init__(self, app, threads=None, lote=None, intervalo=None, agendar_cada=None):
+        self.app = app
+        self.threads = threads or app.config["JOBS_THREADS"]
+        self.lote = lote or app.config["JOBS_LOTE"]
+        self.intervalo = intervalo or app.config["JOBS_INTERVALO_SEGUNDOS"]
+        self.agendar_cada = app.config["JOBS_AGENDAR_CADA_SEGUNDOS"] if agendar_cada is None else agendar_cada
+        self.nome = f"{socket.gethostname()}:{os.getpid()}"
+        self._parar = threading.Event()
+    
+    def parar(self, *_):
+        self._parar.set()
+    
+    def _laco(self, numero):
+        trabalhador = f"{self.nome}:{numero}"
+        with self.app.app_context():
+            try:
+                while not self._parar.is_set():
+                    try:
+                        ids = reservar(db.session, self.lote, trabalhador)
+                    except Exception as erro:
+                        db.session.rollback()
+                        log.exception("❌ Worker %s: erro ao reservar jobs: %s", trabalhador, erro)
+                        ids = []
+                    
+                    if not ids:
+                        self._parar.wait(self.intervalo)
+                        continue
+                    for id_job in ids:
+                        try:
+                            executar(db.session, id_job)
+                        except Exception as erro:
+                            # Erro fora do manipulador (ex.: banco caiu em
+                            # registrar_falha): o job fica "executando" e
+                            # volta pela recuperação de presos
+                            db.session.rollback()
+                            log.exception("❌ Worker %s: erro ao executar o job %s: %s", trabalhador, id_job, erro)
+            finally:
+                db.session.remove()
+    
+    def _agendador(self):
+        with self.app.app_context():
+            try:
+                while not self._parar.is_set():
+                    try:
+                        log.info("🗓️ Agendador: %s", agendar(db.session))
+                    except Exception as erro:
+                        db.session.rollback()
+                        log.exception("❌ Agendador: %s", erro)
+                    self._parar.wait(self.agendar_cada)
+            finally:
+                db.session.remove()
+    
+    def executar(self):
+        """Rodar até parar() (bloqueia)"""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.parar)
+            signal.signal(signal.SIGINT, self.parar)
+        
+        threads = [
+            threading.Thread(target=self._laco, args=(numero,), name=f"worker-{numero}")
+            for numero in range(self.threads)
+        ]
+        if self.agendar_cada:
+            threads.append(threading.Thread(target=self._agendador, name="worker-agendador"))
+        
+        log.info("👷 Worker %s: %s threads, lote %s", self.nome, self.threads, self.lote)
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        log.info("👋 Worker %s parado", self.nome)
+
+def _processo_worker(app, threads, lote, intervalo, agendar_cada):
+    # Conexões herdadas do processo pai não podem ser usadas aqui
+    with app.app_context():
+        db.engine.dispose(close=False)
+    Worker(app, threads, lote, intervalo, agendar_cada).executar()
+
+def executar_workers(app, processos=1, threads=None, lote=None, intervalo=None, agendar_cada=None):
+    """Rodar `processos` processos de worker (só o primeiro agenda)"""
+    if processos <= 1:
+        Worker(app, threads, lote, intervalo, agendar_cada).executar()
+        return
+    
+    contexto = multiprocessing.get_context("fork")
+    filhos = [
+        contexto.Process(
+            target=_processo_worker,
+            args=(app, threads, lote, intervalo, agendar_cada if numero == 0 else 0),
+            name=f"worker-{numero}"
+        )
+        for numero in range(processos)
+    ]
+    for filho in filhos:
+        filho.start()
+    
+    def repassar(sinal, _):
+        for filho in filhos:
+            if filho.is_alive():
+                os.kill(filho.pid, sinal)
+    
+    signal.signal(signal.SIGTERM, repassar)
+    signal.signal(signal.SIGINT, repassar)
+    for filho in filhos:
+        filho.join()
@@ -0,0 +1,81 @@
+# logs.py - Logging da aplicação (logger "tarefas" e filhos)
+#
+# LOG_LEVEL escolhe o nível (DEBUG, INFO, WARNING, ERROR) ou OFF para
+# desligar tudo; LOG_FORMATO "texto" ou "json" (uma linha por evento, com
+# os campos passados em extra=). Com LOG_ASSINCRONO a thread da requisição
+# só coloca o registro numa fila; a escrita no stderr fica com uma thread
+# própria (QueueListener).
+
+import sys
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+
+LOGGER_RAIZ = "tarefas"
+
+# Atributos que todo LogRecord tem; o resto veio de extra=
+_CAMPOS_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_ouvinte = None
+
+class FormatadorJson(logging.Formatter):
+    """Uma linha JSON por registro, com os campos de extra="""
+    
+    def format(self, registro):
+        dados = {
+            "momento": self.formatTime(registro, "%Y-%m-%dT%H:%M:%S"),
+            "nivel": registro.levelname,
+            "logger": registro.name,
+            "mensagem": registro.getMessage()
+        }
+        dados.update({
+            chave: valor for chave, valor in vars(registro).items()
+            if chave not in _CAMPOS_PADRAO
+        })
+        if registro.exc_info:
+            dados["erro"] = self.formatException(registro.exc_info)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+def _parar_ouvinte():
+    global _ouvinte
+    if _ouvinte is not None:
+        _ouvinte.stop()
+        _ouvinte = None
+
+def configurar_logging(app):
+    """Configurar o logger "tarefas" pelas chaves LOG_* da config"""
+    global _ouvinte
+    
+    raiz = logging.getLogger(LOGGER_RAIZ)
+    _parar_ouvinte()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.propagate = False
+    
+    nivel = app.config["LOG_LEVEL"].upper()
+    if nivel in ("OFF", "NENHUM"):
+        # Acima de CRITICAL: isEnabledFor() recusa antes de montar o registro
+        raiz.setLevel(logging.CRITICAL + 1)
+        return raiz
+    raiz.setLevel(nivel)
+    
+    saida = logging.StreamHandler(sys.stderr)
+    if app.config["LOG_FORMATO"] == "json":
+        saida.setFormatter(FormatadorJson())
+    else:
+        saida.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    
+    if app.config["LOG_ASSINCRONO"]:
+        fila = queue.SimpleQueue()
+        raiz.addHandler(logging.handlers.QueueHandler(fila))
+        _ouvinte = logging.handlers.QueueListener(fila, saida, respect_handler_level=True)
+        _ouvinte.start()
+    else:
+        raiz.addHandler(saida)
+    
+    return raiz
+
+# Esvazia a fila antes de o processo terminar
+atexit.register(_parar_ouvinte)
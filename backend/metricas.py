@@ -0,0 +1,231 @@
+# metricas.py - Métricas das requisições e do banco no formato do Prometheus
+#
+# Um before_request/teardown_request mede latência, status e requisições
+# em andamento por rota; before/after_cursor_execute contam os comandos SQL
+# e o tempo no banco de cada requisição. Tudo sai em texto (formato de
+# exposição do Prometheus) em METRICAS_ROTA, por padrão /metrics.
+#
+# Os valores ficam na memória do processo: com vários workers do gunicorn
+# cada um responde pelos próprios números (o Prometheus soma as séries).
+
+import time
+import threading
+from flask import Response, g, request, has_request_context
+from sqlalchemy import event
+from models import db
+from conexoes import metricas_pool
+
+# Segundos
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Comandos SQL por requisição
+BUCKETS_QUERIES = (1, 2, 3, 5, 10, 20, 50, 100)
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _formatar_rotulos(rotulos):
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos) + "}"
+
+def _formatar_numero(valor):
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+class Metrica:
+    """Série com rótulos; `coletar` (opcional) lê o valor na hora do scrape"""
+    tipo = "untyped"
+    
+    def __init__(self, nome, ajuda, rotulos=(), coletar=None):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.coletar = coletar
+        self._lock = threading.Lock()
+        self._valores = {}
+    
+    def _chave(self, rotulos):
+        return tuple((nome, rotulos[nome]) for nome in self.rotulos)
+    
+    def amostras(self):
+        """Linhas (nome, rótulos, valor) para a exposição"""
+        if self.coletar is not None:
+            return [(self.nome, (), self.coletar())]
+        with self._lock:
+            return [(self.nome, chave, valor) for chave, valor in sorted(self._valores.items())]
+    
+    def exposicao(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        linhas += [
+            f"{nome}{_formatar_rotulos(rotulos)} {_formatar_numero(valor)}"
+            for nome, rotulos, valor in self.amostras()
+        ]
+        return "\n".join(linhas)
+
+class Contador(Metrica):
+    tipo = "counter"
+    
+    def inc(self, valor=1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+class Medidor(Metrica):
+    tipo = "gauge"
+    
+    def inc(self, valor=1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+    
+    def dec(self, valor=1, **rotulos):
+        self.inc(-valor, **rotulos)
+
+class Histograma(Metrica):
+    tipo = "histogram"
+    
+    def __init__(self, nome, ajuda, rotulos=(), buckets=BUCKETS_LATENCIA):
+        super().__init__(nome, ajuda, rotulos)
+        self.buckets = tuple(buckets) + (float("inf"),)
+    
+    def observar(self, valor, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            contagens, soma = self._valores.get(chave, ([0] * len(self.buckets), 0.0))
+            for indice, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    contagens[indice] += 1
+                    break
+            self._valores[chave] = (contagens, soma + valor)
+    
+    def amostras(self):
+        with self._lock:
+            valores = [(chave, list(contagens), soma) for chave, (contagens, soma) in sorted(self._valores.items())]
+        
+        linhas = []
+        for chave, contagens, soma in valores:
+            acumulado = 0
+            for limite, contagem in zip(self.buckets, contagens):
+                acumulado += contagem
+                linhas.append((f"{self.nome}_bucket", chave + (("le", _formatar_numero(limite)),), acumulado))
+            linhas.append((f"{self.nome}_sum", chave, soma))
+            linhas.append((f"{self.nome}_count", chave, acumulado))
+        return linhas
+
+# ========================================
+# MÉTRICAS DA APLICAÇÃO
+# ========================================
+REQUISICOES = Contador(
+    "tarefas_http_requisicoes_total", "Requisições atendidas por rota, método e status",
+    ("rota", "metodo", "status")
+)
+LATENCIA = Histograma(
+    "tarefas_http_requisicao_segundos", "Duração das requisições por rota e método",
+    ("rota", "metodo")
+)
+EM_ANDAMENTO = Medidor(
+    "tarefas_http_requisicoes_em_andamento", "Requisições sendo atendidas agora"
+)
+QUERIES_POR_REQUISICAO = Histograma(
+    "tarefas_db_queries_por_requisicao", "Comandos SQL enviados por requisição",
+    ("rota",), buckets=BUCKETS_QUERIES
+)
+TEMPO_BANCO_POR_REQUISICAO = Histograma(
+    "tarefas_db_tempo_por_requisicao_segundos", "Tempo no banco por requisição",
+    ("rota",)
+)
+COMANDOS_SQL = Contador("tarefas_db_comandos_total", "Comandos SQL enviados (requisições, jobs e CLI)")
+TEMPO_SQL = Contador("tarefas_db_comandos_segundos_total", "Tempo total dos comandos SQL")
+
+def _valor_pool(campo):
+    return lambda: metricas_pool()[campo]
+
+def _assinantes_eventos():
+    import eventos
+    return eventos.broker.total_assinantes() if eventos.broker is not None else 0
+
+METRICAS = [
+    REQUISICOES,
+    LATENCIA,
+    EM_ANDAMENTO,
+    QUERIES_POR_REQUISICAO,
+    TEMPO_BANCO_POR_REQUISICAO,
+    COMANDOS_SQL,
+    TEMPO_SQL,
+    Medidor("tarefas_db_pool_conexoes", "Conexões do pool (pool_size)", coletar=_valor_pool("tamanho")),
+    Medidor("tarefas_db_pool_em_uso", "Conexões emprestadas agora", coletar=_valor_pool("em_uso")),
+    Medidor("tarefas_db_pool_livres", "Conexões livres no pool", coletar=_valor_pool("livres")),
+    Medidor("tarefas_db_pool_overflow", "Conexões além do pool_size", coletar=_valor_pool("overflow")),
+    Contador("tarefas_db_pool_checkouts_total", "Conexões emprestadas pelo pool", coletar=_valor_pool("checkouts")),
+    Contador("tarefas_db_pool_espera_segundos_total", "Tempo esperando por conexão livre", coletar=_valor_pool("espera_total_segundos")),
+    Contador("tarefas_db_pool_timeouts_total", "Checkouts que estouraram pool_timeout", coletar=_valor_pool("timeouts")),
+    Medidor("tarefas_sse_assinantes", "Clientes conectados em /api/tarefas/stream", coletar=_assinantes_eventos)
+]
+
+def exposicao():
+    """Texto de todas as métricas (text/plain; version=0.0.4)"""
+    return "\n".join(metrica.exposicao() for metrica in METRICAS) + "\n"
+
+# ========================================
+# GANCHOS (FLASK E SQLALCHEMY)
+# ========================================
+def _rota():
+    # O molde da rota, não a URL: /api/tarefas/<int:tarefa_id> é uma série só
+    return request.url_rule.rule if request.url_rule is not None else "sem_rota"
+
+def _inicio_requisicao():
+    g.metricas_inicio = time.perf_counter()
+    g.metricas_sql = [0, 0.0]
+    EM_ANDAMENTO.inc()
+
+def _status_resposta(resposta):
+    g.metricas_status = resposta.status_code
+    return resposta
+
+def _fim_requisicao(erro):
+    inicio = g.pop("metricas_inicio", None)
+    if inicio is None:
+        return
+    EM_ANDAMENTO.dec()
+    
+    rota = _rota()
+    status = 500 if erro is not None else g.get("metricas_status", 500)
+    comandos, tempo_banco = g.get("metricas_sql", (0, 0.0))
+    
+    REQUISICOES.inc(rota=rota, metodo=request.method, status=status)
+    LATENCIA.observar(time.perf_counter() - inicio, rota=rota, metodo=request.method)
+    QUERIES_POR_REQUISICAO.observar(comandos, rota=rota)
+    TEMPO_BANCO_POR_REQUISICAO.observar(tempo_banco, rota=rota)
+
+def _antes_do_comando(conexao, cursor, comando, parametros, contexto, varios):
+    contexto._metricas_inicio = time.perf_counter()
+
+def _depois_do_comando(conexao, cursor, comando, parametros, contexto, varios):
+    duracao = time.perf_counter() - contexto._metricas_inicio
+    COMANDOS_SQL.inc()
+    TEMPO_SQL.inc(duracao)
+    
+    if has_request_context():
+        contagem = g.get("metricas_sql")
+        if contagem is not None:
+            contagem[0] += 1
+            contagem[1] += duracao
+
+def rota_metricas():
+    return Response(exposicao(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+def configurar_metricas(app):
+    """Registrar os ganchos e a rota de métricas (METRICAS_ATIVAS)"""
+    if not app.config["METRICAS_ATIVAS"]:
+        return
+    
+    app.before_request(_inicio_requisicao)
+    app.after_request(_status_resposta)
+    app.teardown_request(_fim_requisicao)
+    app.add_url_rule(app.config["METRICAS_ROTA"], "metricas", rota_metricas)
+    
+    with app.app_context():
+        if not event.contains(db.engine, "before_cursor_execute", _antes_do_comando):
+            event.listen(db.engine, "before_cursor_execute", _antes_do_comando)
+            event.listen(db.engine, "after_cursor_execute", _depois_do_comando)
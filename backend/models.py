@@ -1,9 +1,61 @@
 # models.py - Modelos atualizados e compatíveis com o banco PostgreSQL
 
-from datetime import datetime, timezone
+import enum
+import logging
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from contextlib import contextmanager
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, func, select, or_, and_, literal, tuple_, literal_column
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session, aliased, column_property, joinedload, undefer
+from sqlalchemy.sql.functions import FunctionElement
 
 db = SQLAlchemy()
+log = logging.getLogger("tarefas.models")
+
+# ========================================
+# ENUMERAÇÕES: STATUS E PRIORIDADE
+# ========================================
+# Uma definição só para modelos, validação e serialização. Os membros são
+# as próprias strings da API (StrEnum): o ORM lê e grava str comum e as
+# respostas não mudam.
+
+class EnumTexto(enum.StrEnum):
+    @classmethod
+    def valores(cls):
+        """Strings aceitas, na ordem de declaração"""
+        return [membro.value for membro in cls]
+
+class StatusTarefa(EnumTexto):
+    PENDENTE = "pendente"
+    ANDAMENTO = "andamento"
+    CONCLUIDA = "concluida"
+    CANCELADA = "cancelada"
+
+class StatusProjeto(EnumTexto):
+    ATIVO = "ativo"
+    PAUSADO = "pausado"
+    CONCLUIDO = "concluido"
+    CANCELADO = "cancelado"
+
+class Prioridade(EnumTexto):
+    BAIXA = "baixa"
+    MEDIA = "media"
+    ALTA = "alta"
+    CRITICA = "critica"
+
+def tipo_enum(classe, nome):
+    """Tipo da coluna: ENUM nativo no PostgreSQL (4 bytes por linha e nos
+    índices, comparação sem collation), VARCHAR no SQLite. Valores fora
+    do enum são recusados antes de chegar ao banco."""
+    return db.Enum(*classe.valores(), name=nome, metadata=db.metadata, validate_strings=True)
+
+TIPO_STATUS_TAREFA = tipo_enum(StatusTarefa, "status_tarefa")
+TIPO_STATUS_PROJETO = tipo_enum(StatusProjeto, "status_projeto")
+# Compartilhado por tarefas e projetos
+TIPO_PRIORIDADE = tipo_enum(Prioridade, "prioridade")
 
 # ========================================
 # MODELO: USUARIOS
@@ -21,11 +73,14 @@ class Usuario(db.Model):
     ativo = db.Column(db.Boolean, default=True)
     
     # Relacionamentos
+    # passive_deletes: quem exclui os filhos é o banco (ON DELETE CASCADE),
+    # sem carregar cada linha na sessão antes
     tarefas = db.relationship(
         "Tarefa",
         backref="usuario",
         lazy=True,
         cascade="all, delete-orphan",
+        passive_deletes=True,
         foreign_keys="Tarefa.usuario_id"
     )
     
@@ -40,14 +95,16 @@ class Usuario(db.Model):
         "Comentario",
         backref="usuario",
         lazy=True,
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     
     anexos = db.relationship(
         "Anexo",
         backref="usuario",
         lazy=True,
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     
     # Métodos
@@ -62,8 +119,13 @@ class Usuario(db.Model):
             'email': self.email,
             'ativo': self.ativo,
             'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
-            'total_tarefas': len(self.tarefas) if self.tarefas else 0
+            'total_tarefas': self.total_tarefas or 0
         }
+    
+    @classmethod
+    def opcoes_serializacao(cls):
+        """Opções de carga para serializar vários usuários sem N+1"""
+        return (undefer(cls.total_tarefas),)
 
 # ========================================
 # MODELO: CATEGORIAS
@@ -101,8 +163,13 @@ class Categoria(db.Model):
             'cor': self.cor,
             'icone': self.icone,
             'ativo': self.ativo,
-            'total_tarefas': len(self.tarefas) if self.tarefas else 0
+            'total_tarefas': self.total_tarefas or 0
         }
+    
+    @classmethod
+    def opcoes_serializacao(cls):
+        """Opções de carga para serializar várias categorias sem N+1"""
+        return (undefer(cls.total_tarefas),)
 
 # ========================================
 # MODELO: PROJETOS
@@ -117,8 +184,8 @@ class Projeto(db.Model):
     data_inicio = db.Column(db.Date, nullable=True)
     data_fim_prevista = db.Column(db.Date, nullable=True)
     data_fim_real = db.Column(db.Date, nullable=True)
-    status = db.Column(db.String(20), default="ativo")  # ativo, pausado, concluido, cancelado
-    prioridade = db.Column(db.String(10), default="media")  # baixa, media, alta, critica
+    status = db.Column(TIPO_STATUS_PROJETO, default=StatusProjeto.ATIVO.value)
+    prioridade = db.Column(TIPO_PRIORIDADE, default=Prioridade.MEDIA.value)
     progresso = db.Column(db.Integer, default=0)  # 0-100%
     responsavel_id = db.Column(db.Integer, db.ForeignKey("usuarios.id_usuario"), nullable=True)
     data_criacao = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
@@ -138,6 +205,8 @@ class Projeto(db.Model):
     
     def to_dict(self):
         """Converter para dicionário"""
+        from referencias import cache_referencias
+        
         return {
             'id_projeto': self.id_projeto,
             'nome': self.nome,
@@ -147,22 +216,94 @@ class Projeto(db.Model):
             'progresso': self.progresso,
             'data_inicio': self.data_inicio.isoformat() if self.data_inicio else None,
             'data_fim_prevista': self.data_fim_prevista.isoformat() if self.data_fim_prevista else None,
-            'responsavel_nome': self.responsavel.nome if self.responsavel else None,
-            'total_tarefas': len(self.tarefas) if self.tarefas else 0
+            'responsavel_nome': cache_referencias.nome_usuario(self.responsavel_id),
+            'total_tarefas': self.total_tarefas or 0
         }
+    
+    @classmethod
+    def opcoes_serializacao(cls):
+        """Opções de carga para serializar vários projetos sem N+1"""
+        return (undefer(cls.total_tarefas),)
 
 # ========================================
 # MODELO: TAREFAS (Principal)
 # ========================================
+CONFIG_BUSCA = "portuguese"
+
+# Documento da busca textual, igual a documento_busca_tarefa
+EXPRESSAO_BUSCA_TAREFA = (
+    f"to_tsvector('{CONFIG_BUSCA}'::regconfig, "
+    "coalesce(titulo, '') || ' ' || coalesce(descricao, ''))"
+)
+
+# Limite de níveis das consultas recursivas (protege contra ciclos em tarefa_pai_id)
+PROFUNDIDADE_MAXIMA_ARVORE = 100
+
+# Tarefas nesses status não vencem (fora do índice parcial de vencimento)
+STATUS_ENCERRADOS = (StatusTarefa.CONCLUIDA.value, StatusTarefa.CANCELADA.value)
+CONDICAO_EM_ABERTO = "status NOT IN ({})".format(", ".join(f"'{status}'" for status in STATUS_ENCERRADOS))
+
+def dia_de_referencia():
+    """Data de hoje usada pelas consultas por vencimento (vencidas, próximas, dias restantes)"""
+    return date.today()
+
+class dias_entre(FunctionElement):
+    """Dias de `inicio` até `fim` (datas), como inteiro no SQL"""
+    type = db.Integer()
+    inherit_cache = True
+
+@compiles(dias_entre)
+def _dias_entre(elemento, compilador, **kw):
+    # PostgreSQL: date - date já é integer
+    inicio, fim = list(elemento.clauses)
+    return f"({compilador.process(fim, **kw)} - {compilador.process(inicio, **kw)})"
+
+@compiles(dias_entre, "sqlite")
+def _dias_entre_sqlite(elemento, compilador, **kw):
+    inicio, fim = list(elemento.clauses)
+    return (
+        f"CAST(julianday({compilador.process(fim, **kw)}) - "
+        f"julianday({compilador.process(inicio, **kw)}) AS INTEGER)"
+    )
+
 class Tarefa(db.Model):
     __tablename__ = "tarefas"
+    __table_args__ = (
+        # Paginação por cursor: ORDER BY data_criacao DESC, tarefa_id DESC
+        db.Index("ix_tarefas_data_criacao_id", "data_criacao", "tarefa_id"),
+        # Filtros da listagem, já na ordem da paginação
+        db.Index("ix_tarefas_status_data_criacao_id", "status", "data_criacao", "tarefa_id"),
+        db.Index("ix_tarefas_prioridade_data_criacao_id", "prioridade", "data_criacao", "tarefa_id"),
+        db.Index("ix_tarefas_categoria_data_criacao_id", "categoria_id", "data_criacao", "tarefa_id"),
+        db.Index("ix_tarefas_projeto_data_criacao_id", "projeto_id", "data_criacao", "tarefa_id"),
+        db.Index("ix_tarefas_data_vencimento", "data_vencimento"),
+        # Vencidas/próximas: só tarefas em aberto, na ordem (data_vencimento, tarefa_id)
+        db.Index(
+            "ix_tarefas_vencimento_abertas",
+            "data_vencimento", "tarefa_id",
+            postgresql_where=db.text(CONDICAO_EM_ABERTO),
+            sqlite_where=db.text(CONDICAO_EM_ABERTO)
+        ),
+        # Árvore de subtarefas (CTE recursiva desce por tarefa_pai_id)
+        db.Index("ix_tarefas_tarefa_pai_id", "tarefa_pai_id"),
+        # ON DELETE CASCADE ao excluir o usuário
+        db.Index("ix_tarefas_usuario_id", "usuario_id"),
+        # Sincronização incremental: WHERE (data_atualizacao, tarefa_id) > cursor
+        db.Index("ix_tarefas_data_atualizacao_id", "data_atualizacao", "tarefa_id"),
+        # Busca textual: só existe no PostgreSQL
+        db.Index(
+            "ix_tarefas_busca",
+            db.text(EXPRESSAO_BUSCA_TAREFA),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
     
     # Campos
     tarefa_id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(200), nullable=False)
     descricao = db.Column(db.Text, nullable=True)
-    status = db.Column(db.String(20), default="pendente")  # pendente, andamento, concluida, cancelada
-    prioridade = db.Column(db.String(10), default="media")  # baixa, media, alta, critica
+    status = db.Column(TIPO_STATUS_TAREFA, default=StatusTarefa.PENDENTE.value)
+    prioridade = db.Column(TIPO_PRIORIDADE, default=Prioridade.MEDIA.value)
     data_criacao = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     data_atualizacao = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     data_inicio = db.Column(db.DateTime, nullable=True)
@@ -171,12 +312,14 @@ class Tarefa(db.Model):
     estimativa_horas = db.Column(db.Numeric(5, 2), nullable=True)
     horas_trabalhadas = db.Column(db.Numeric(5, 2), default=0)
     progresso = db.Column(db.Integer, default=0)  # 0-100%
+    # Concorrência otimista: todo UPDATE (ORM, em lote ou Core) soma 1
+    versao = db.Column(db.Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("versao + 1"))
     
     # Foreign Keys
-    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id_usuario"), nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id_usuario", ondelete="CASCADE"), nullable=False)
     categoria_id = db.Column(db.Integer, db.ForeignKey("categorias.id_categoria"), nullable=False)
     projeto_id = db.Column(db.Integer, db.ForeignKey("projetos.id_projeto"), nullable=True)
-    tarefa_pai_id = db.Column(db.Integer, db.ForeignKey("tarefas.tarefa_id"), nullable=True)
+    tarefa_pai_id = db.Column(db.Integer, db.ForeignKey("tarefas.tarefa_id", ondelete="SET NULL"), nullable=True)
     
     # Relacionamentos
     comentarios = db.relationship(
@@ -184,6 +327,7 @@ class Tarefa(db.Model):
         backref="tarefa",
         lazy=True,
         cascade="all, delete-orphan",
+        passive_deletes=True,
         foreign_keys="Comentario.tarefa_id"
     )
     
@@ -191,14 +335,16 @@ class Tarefa(db.Model):
         "Anexo",
         backref="tarefa",
         lazy=True,
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     
-    # Relacionamento para subtarefas
+    # Relacionamento para subtarefas (o banco zera tarefa_pai_id: ON DELETE SET NULL)
     subtarefas = db.relationship(
         "Tarefa",
         backref=db.backref("tarefa_pai", remote_side="Tarefa.tarefa_id"),
-        lazy=True
+        lazy=True,
+        passive_deletes=True
     )
     
     # Métodos
@@ -207,6 +353,8 @@ class Tarefa(db.Model):
     
     def to_dict(self):
         """Converter para dicionário (compatível com API)"""
+        from referencias import cache_referencias
+        
         return {
             'id': self.tarefa_id,  # Para compatibilidade com JavaScript
             'tarefa_id': self.tarefa_id,  # Para compatibilidade com código existente
@@ -215,6 +363,7 @@ class Tarefa(db.Model):
             'status': self.status,
             'prioridade': self.prioridade,
             'progresso': self.progresso,
+            'versao': self.versao,
             'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
             'data_vencimento': self.data_vencimento.isoformat() if self.data_vencimento else None,
             'data_inicio': self.data_inicio.isoformat() if self.data_inicio else None,
@@ -224,33 +373,188 @@ class Tarefa(db.Model):
             'usuario_id': self.usuario_id,
             'categoria_id': self.categoria_id,
             'projeto_id': self.projeto_id,
-            'usuario_nome': self.usuario.nome if self.usuario else None,
-            'categoria_nome': self.categoria.nome if self.categoria else None,
+            'usuario_nome': cache_referencias.nome_usuario(self.usuario_id),
+            'categoria_nome': cache_referencias.nome_categoria(self.categoria_id),
             'projeto_nome': self.projeto.nome if self.projeto else None,
-            'total_comentarios': len(self.comentarios) if self.comentarios else 0,
-            'total_anexos': len(self.anexos) if self.anexos else 0
+            'total_comentarios': self.total_comentarios or 0,
+            'total_anexos': self.total_anexos or 0
         }
     
-    @property
+    @classmethod
+    def opcoes_serializacao(cls):
+        """Opções de carga para serializar várias tarefas sem N+1.
+        
+        Nomes de usuário e categoria vêm do cache de referências; o nome do
+        projeto vem no mesmo SELECT (JOIN) e as contagens de comentários e
+        anexos como subconsultas correlacionadas.
+        """
+        return (
+            joinedload(cls.projeto).load_only(Projeto.nome),
+            undefer(cls.total_comentarios),
+            undefer(cls.total_anexos)
+        )
+    
+    @classmethod
+    def arvore(cls, tarefa_id, profundidade_max=None):
+        """Subárvore da tarefa em uma consulta (WITH RECURSIVE).
+        
+        Volta um dicionário aninhado (None se a tarefa não existe) em que
+        cada nó traz "subtarefas" e "total" com progresso, estimativa_horas
+        e horas_trabalhadas somados/ponderados sobre os níveis carregados.
+        `profundidade_max` limita os níveis abaixo da tarefa (0 = só ela).
+        """
+        if profundidade_max is None or profundidade_max > PROFUNDIDADE_MAXIMA_ARVORE:
+            profundidade_max = PROFUNDIDADE_MAXIMA_ARVORE
+        
+        colunas = (
+            "tarefa_id", "tarefa_pai_id", "titulo", "status", "prioridade",
+            "progresso", "estimativa_horas", "horas_trabalhadas"
+        )
+        
+        raiz = (
+            select(*(getattr(cls, nome) for nome in colunas), literal_column("0", db.Integer).label("profundidade"))
+            .where(cls.tarefa_id == tarefa_id)
+            .cte("arvore", recursive=True)
+        )
+        filha = aliased(cls)
+        descendentes = (
+            select(*(getattr(filha, nome) for nome in colunas), (raiz.c.profundidade + 1).label("profundidade"))
+            .join(raiz, filha.tarefa_pai_id == raiz.c.tarefa_id)
+            .where(raiz.c.profundidade < profundidade_max)
+        )
+        arvore = raiz.union_all(descendentes)
+        
+        linhas = db.session.execute(
+            select(arvore).order_by(arvore.c.profundidade, arvore.c.tarefa_id)
+        ).all()
+        if not linhas:
+            return None
+        
+        # Pais vêm antes dos filhos (ordem por profundidade): O(n)
+        nos = {}
+        for linha in linhas:
+            no = {
+                "id": linha.tarefa_id,
+                "titulo": linha.titulo,
+                "status": linha.status,
+                "prioridade": linha.prioridade,
+                "profundidade": linha.profundidade,
+                "progresso": linha.progresso or 0,
+                "estimativa_horas": float(linha.estimativa_horas) if linha.estimativa_horas else None,
+                "horas_trabalhadas": float(linha.horas_trabalhadas) if linha.horas_trabalhadas else 0,
+                "subtarefas": []
+            }
+            nos[linha.tarefa_id] = (no, linha)
+            if linha.profundidade > 0:
+                nos[linha.tarefa_pai_id][0]["subtarefas"].append(no)
+        
+        # Totais de baixo para cima: (estimativa, horas, progresso) por tarefa
+        totais = {}
+        for no, linha in reversed(list(nos.values())):
+            estimativa = linha.estimativa_horas or Decimal(0)
+            horas = linha.horas_trabalhadas or Decimal(0)
+            progresso = Decimal(linha.progresso or 0)
+            
+            if no["subtarefas"]:
+                # Progresso das subtarefas ponderado pela estimativa (peso 1 sem estimativa)
+                soma_pesos = Decimal(0)
+                soma_progresso = Decimal(0)
+                for subtarefa in no["subtarefas"]:
+                    estimativa_sub, horas_sub, progresso_sub = totais[subtarefa["id"]]
+                    estimativa += estimativa_sub
+                    horas += horas_sub
+                    peso = estimativa_sub or Decimal(1)
+                    soma_pesos += peso
+                    soma_progresso += progresso_sub * peso
+                progresso = soma_progresso / soma_pesos
+            
+            totais[linha.tarefa_id] = (estimativa, horas, progresso)
+            no["total"] = {
+                "progresso": round(float(progresso), 1),
+                "estimativa_horas": float(estimativa),
+                "horas_trabalhadas": float(horas)
+            }
+        
+        return nos[linhas[0].tarefa_id][0]
+    
+    @classmethod
+    def caminho(cls, tarefa_id):
+        """Ancestrais da tarefa, da raiz até ela, em uma consulta (WITH RECURSIVE)"""
+        inicio = (
+            select(cls.tarefa_id, cls.tarefa_pai_id, cls.titulo, cls.status, literal_column("0", db.Integer).label("nivel"))
+            .where(cls.tarefa_id == tarefa_id)
+            .cte("caminho", recursive=True)
+        )
+        pai = aliased(cls)
+        ancestrais = (
+            select(pai.tarefa_id, pai.tarefa_pai_id, pai.titulo, pai.status, (inicio.c.nivel + 1).label("nivel"))
+            .join(inicio, pai.tarefa_id == inicio.c.tarefa_pai_id)
+            .where(inicio.c.nivel < PROFUNDIDADE_MAXIMA_ARVORE)
+        )
+        caminho = inicio.union_all(ancestrais)
+        
+        linhas = db.session.execute(select(caminho).order_by(caminho.c.nivel.desc())).all()
+        return [
+            {"id": linha.tarefa_id, "titulo": linha.titulo, "status": linha.status}
+            for linha in linhas
+        ]
+    
+    @hybrid_property
+    def em_aberto(self):
+        """Tarefa ainda não concluída nem cancelada"""
+        return self.status not in STATUS_ENCERRADOS
+    
+    @em_aberto.expression
+    def em_aberto(cls):
+        # Literais, iguais ao WHERE do índice parcial ix_tarefas_vencimento_abertas
+        return cls.status.not_in([literal_column(f"'{status}'") for status in STATUS_ENCERRADOS])
+    
+    @hybrid_property
     def is_vencida(self):
         """Verificar se a tarefa está vencida"""
-        if self.data_vencimento and self.status not in ['concluida', 'cancelada']:
-            return datetime.now().date() > self.data_vencimento
+        if self.data_vencimento and self.em_aberto:
+            return dia_de_referencia() > self.data_vencimento
         return False
     
-    @property
+    @is_vencida.expression
+    def is_vencida(cls):
+        # Data de hoje calculada a cada consulta, como na instância
+        return and_(cls.em_aberto, cls.data_vencimento < literal(dia_de_referencia(), db.Date))
+    
+    @hybrid_property
     def dias_para_vencimento(self):
         """Calcular dias para vencimento"""
         if self.data_vencimento:
-            delta = self.data_vencimento - datetime.now().date()
+            delta = self.data_vencimento - dia_de_referencia()
             return delta.days
         return None
+    
+    @dias_para_vencimento.expression
+    def dias_para_vencimento(cls):
+        return dias_entre(literal(dia_de_referencia(), db.Date), cls.data_vencimento)
+    
+    @classmethod
+    def condicao_vence_ate(cls, dias):
+        """Em aberto e vencendo de hoje até daqui a `dias` dias"""
+        hoje = dia_de_referencia()
+        return and_(
+            cls.em_aberto,
+            cls.data_vencimento.between(literal(hoje, db.Date), literal(hoje + timedelta(days=dias), db.Date))
+        )
 
 # ========================================
 # MODELO: COMENTARIOS
 # ========================================
 class Comentario(db.Model):
     __tablename__ = "comentarios"
+    __table_args__ = (
+        # Comentários de primeiro nível da tarefa, na ordem da paginação
+        db.Index("ix_comentarios_tarefa_pai_data_id", "tarefa_id", "comentario_pai_id", "data_criacao", "id_comentario"),
+        # Respostas (CTE recursiva desce por comentario_pai_id)
+        db.Index("ix_comentarios_comentario_pai_id", "comentario_pai_id"),
+        # ON DELETE CASCADE ao excluir o usuário
+        db.Index("ix_comentarios_usuario_id", "usuario_id"),
+    )
     
     # Campos
     id_comentario = db.Column(db.Integer, primary_key=True)
@@ -261,15 +565,16 @@ class Comentario(db.Model):
     privado = db.Column(db.Boolean, default=False)
     
     # Foreign Keys
-    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id_usuario"), nullable=False)
-    tarefa_id = db.Column(db.Integer, db.ForeignKey("tarefas.tarefa_id"), nullable=False)
-    comentario_pai_id = db.Column(db.Integer, db.ForeignKey("comentarios.id_comentario"), nullable=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id_usuario", ondelete="CASCADE"), nullable=False)
+    tarefa_id = db.Column(db.Integer, db.ForeignKey("tarefas.tarefa_id", ondelete="CASCADE"), nullable=False)
+    comentario_pai_id = db.Column(db.Integer, db.ForeignKey("comentarios.id_comentario", ondelete="SET NULL"), nullable=True)
     
     # Relacionamento para respostas
     respostas = db.relationship(
         "Comentario",
         backref=db.backref("comentario_pai", remote_side="Comentario.id_comentario"),
-        lazy=True
+        lazy=True,
+        passive_deletes=True
     )
     
     # Métodos
@@ -278,23 +583,117 @@ class Comentario(db.Model):
     
     def to_dict(self):
         """Converter para dicionário"""
+        from referencias import cache_referencias
+        
         return {
             'id_comentario': self.id_comentario,
             'comentario': self.comentario,
             'tipo': self.tipo,
             'privado': self.privado,
             'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
-            'usuario_nome': self.usuario.nome if self.usuario else None,
+            'usuario_nome': cache_referencias.nome_usuario(self.usuario_id),
             'tarefa_id': self.tarefa_id,
             'comentario_pai_id': self.comentario_pai_id,
-            'total_respostas': len(self.respostas) if self.respostas else 0
+            'total_respostas': self.total_respostas or 0
+        }
+    
+    @classmethod
+    def opcoes_serializacao(cls):
+        """Opções de carga para serializar vários comentários sem N+1"""
+        return (undefer(cls.total_respostas),)
+    
+    @classmethod
+    def discussao(cls, tarefa_id, limite=20, cursor=None):
+        """Comentários da tarefa em árvore, em uma consulta (WITH RECURSIVE).
+        
+        Pagina os comentários de primeiro nível por (data_criacao,
+        id_comentario) crescente; cada um vem com todas as respostas
+        aninhadas. Volta (comentarios, tem_mais, ultimo) onde `ultimo` é
+        (data_criacao, id_comentario) do último comentário da página.
+        """
+        from referencias import cache_referencias
+        
+        colunas = (
+            "id_comentario", "comentario_pai_id", "comentario", "tipo",
+            "privado", "data_criacao", "usuario_id"
+        )
+        
+        # Uma raiz a mais só para saber se existe próxima página
+        raizes = (
+            select(cls.id_comentario)
+            .where(cls.tarefa_id == tarefa_id, cls.comentario_pai_id.is_(None))
+            .order_by(cls.data_criacao, cls.id_comentario)
+            .limit(limite + 1)
+        )
+        if cursor:
+            raizes = raizes.where(tuple_(cls.data_criacao, cls.id_comentario) > tuple_(*cursor))
+        
+        inicio = (
+            select(*(getattr(cls, nome) for nome in colunas), literal_column("0", db.Integer).label("nivel"))
+            .where(cls.id_comentario.in_(raizes))
+            .cte("discussao", recursive=True)
+        )
+        resposta = aliased(cls)
+        respostas = (
+            select(*(getattr(resposta, nome) for nome in colunas), (inicio.c.nivel + 1).label("nivel"))
+            .join(inicio, resposta.comentario_pai_id == inicio.c.id_comentario)
+            .where(inicio.c.nivel < PROFUNDIDADE_MAXIMA_ARVORE)
+        )
+        discussao = inicio.union_all(respostas)
+        
+        linhas = db.session.execute(
+            select(discussao).order_by(discussao.c.data_criacao, discussao.c.id_comentario)
+        ).all()
+        
+        # Dois passos O(n): nós primeiro, depois cada resposta no pai
+        nos = {
+            linha.id_comentario: {
+                'id_comentario': linha.id_comentario,
+                'comentario': linha.comentario,
+                'tipo': linha.tipo,
+                'privado': linha.privado,
+                'data_criacao': linha.data_criacao.isoformat() if linha.data_criacao else None,
+                'usuario_id': linha.usuario_id,
+                'usuario_nome': cache_referencias.nome_usuario(linha.usuario_id),
+                'tarefa_id': tarefa_id,
+                'comentario_pai_id': linha.comentario_pai_id,
+                'respostas': []
+            }
+            for linha in linhas
         }
+        primeiro_nivel = []
+        for linha in linhas:
+            no = nos[linha.id_comentario]
+            if linha.nivel == 0:
+                primeiro_nivel.append((linha, no))
+            else:
+                nos[linha.comentario_pai_id]['respostas'].append(no)
+        
+        for no in nos.values():
+            no['total_respostas'] = len(no['respostas'])
+        
+        tem_mais = len(primeiro_nivel) > limite
+        primeiro_nivel = primeiro_nivel[:limite]
+        
+        ultimo = None
+        if primeiro_nivel:
+            linha, _ = primeiro_nivel[-1]
+            ultimo = (linha.data_criacao, linha.id_comentario)
+        
+        return [no for _, no in primeiro_nivel], tem_mais, ultimo
 
 # ========================================
 # MODELO: ANEXOS
 # ========================================
 class Anexo(db.Model):
     __tablename__ = "anexos"
+    __table_args__ = (
+        db.Index("ix_anexos_tarefa_id", "tarefa_id"),
+        # ON DELETE CASCADE ao excluir o usuário
+        db.Index("ix_anexos_usuario_id", "usuario_id"),
+        # Deduplicação: anexos com o mesmo conteúdo dividem o arquivo
+        db.Index("ix_anexos_hash_conteudo", "hash_conteudo"),
+    )
     
     # Campos
     id_anexo = db.Column(db.Integer, primary_key=True)
@@ -303,12 +702,13 @@ class Anexo(db.Model):
     tipo_mime = db.Column(db.String(100), nullable=True)
     tamanho_bytes = db.Column(db.BigInteger, nullable=True)
     caminho_arquivo = db.Column(db.Text, nullable=False)
+    hash_conteudo = db.Column(db.String(64), nullable=True)  # SHA-256 (armazenamento.py)
     data_upload = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     ativo = db.Column(db.Boolean, default=True)
     
     # Foreign Keys
-    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id_usuario"), nullable=False)
-    tarefa_id = db.Column(db.Integer, db.ForeignKey("tarefas.tarefa_id"), nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id_usuario", ondelete="CASCADE"), nullable=False)
+    tarefa_id = db.Column(db.Integer, db.ForeignKey("tarefas.tarefa_id", ondelete="CASCADE"), nullable=False)
     
     # Métodos
     def __repr__(self):
@@ -316,6 +716,8 @@ class Anexo(db.Model):
     
     def to_dict(self):
         """Converter para dicionário"""
+        from referencias import cache_referencias
+        
         return {
             'id_anexo': self.id_anexo,
             'nome_arquivo': self.nome_arquivo,
@@ -323,8 +725,9 @@ class Anexo(db.Model):
             'tipo_mime': self.tipo_mime,
             'tamanho_bytes': self.tamanho_bytes,
             'tamanho_legivel': self.tamanho_legivel,
+            'hash_conteudo': self.hash_conteudo,
             'data_upload': self.data_upload.isoformat() if self.data_upload else None,
-            'usuario_nome': self.usuario.nome if self.usuario else None,
+            'usuario_nome': cache_referencias.nome_usuario(self.usuario_id),
             'tarefa_id': self.tarefa_id,
             'ativo': self.ativo
         }
@@ -332,19 +735,315 @@ class Anexo(db.Model):
     @property
     def tamanho_legivel(self):
         """Converter bytes para formato legível"""
-        if not self.tamanho_bytes:
-            return "0 B"
-        
-        for unidade in ['B', 'KB', 'MB', 'GB']:
-            if self.tamanho_bytes < 1024.0:
-                return f"{self.tamanho_bytes:.1f} {unidade}"
-            self.tamanho_bytes /= 1024.0
-        return f"{self.tamanho_bytes:.1f} TB"
+        return formatar_tamanho(self.tamanho_bytes)
+
+def formatar_tamanho(tamanho_bytes):
+    """Converter bytes para formato legível (sem alterar o valor recebido)"""
+    if not tamanho_bytes:
+        return "0 B"
+    
+    tamanho = float(tamanho_bytes)
+    for unidade in ['B', 'KB', 'MB', 'GB']:
+        if tamanho < 1024.0:
+            return f"{tamanho:.1f} {unidade}"
+        tamanho /= 1024.0
+    return f"{tamanho:.1f} TB"
+
+# ========================================
+# MODELO: TOTAL DO ARMAZENAMENTO
+# ========================================
+class TotalArmazenamento(db.Model):
+    """Total de anexos ativos e bytes, mantido a cada upload/exclusão.
+    
+    Uma linha só (chave "anexos"); ver armazenamento.py.
+    """
+    __tablename__ = "armazenamento_total"
+    
+    chave = db.Column(db.String(20), primary_key=True)
+    total_anexos = db.Column(db.BigInteger, nullable=False, default=0)
+    total_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    data_atualizacao = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    def __repr__(self):
+        return f"<TotalArmazenamento {self.total_anexos} anexos, {self.total_bytes} bytes>"
+    
+    def to_dict(self):
+        """Converter para dicionário"""
+        return {
+            'total_anexos': self.total_anexos,
+            'total_bytes': self.total_bytes,
+            'total_legivel': formatar_tamanho(self.total_bytes),
+            'data_atualizacao': self.data_atualizacao.isoformat() if self.data_atualizacao else None
+        }
+
+# ========================================
+# MODELO: JOBS (FILA EM SEGUNDO PLANO)
+# ========================================
+class Job(db.Model):
+    """Trabalho para o worker (flask worker), fora do ciclo da requisição.
+    
+    Reservado com SELECT ... FOR UPDATE SKIP LOCKED no PostgreSQL; ver jobs.py.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Próximos a executar: só os pendentes, na ordem da reserva
+        db.Index(
+            "ix_jobs_pendentes_executar_em",
+            "executar_em", "id_job",
+            postgresql_where=db.text("status = 'pendente'"),
+            sqlite_where=db.text("status = 'pendente'")
+        ),
+        # Jobs presos em "executando" por um worker que morreu
+        db.Index("ix_jobs_status_reservado_em", "status", "reservado_em"),
+    )
+    
+    id_job = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    # Mesma chave = mesmo job: enfileirar de novo não duplica
+    chave = db.Column(db.String(200), unique=True, nullable=True)
+    dados = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), nullable=False, default="pendente")  # pendente, executando, concluido, falhou
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    max_tentativas = db.Column(db.Integer, nullable=False, default=5)
+    executar_em = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    reservado_em = db.Column(db.DateTime, nullable=True)
+    reservado_por = db.Column(db.String(100), nullable=True)
+    ultimo_erro = db.Column(db.Text, nullable=True)
+    data_criacao = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    data_conclusao = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<Job {self.id_job} {self.tipo} ({self.status})>"
+    
+    def to_dict(self):
+        """Converter para dicionário"""
+        return {
+            'id_job': self.id_job,
+            'tipo': self.tipo,
+            'chave': self.chave,
+            'dados': self.dados,
+            'status': self.status,
+            'tentativas': self.tentativas,
+            'max_tentativas': self.max_tentativas,
+            'executar_em': self.executar_em.isoformat() if self.executar_em else None,
+            'ultimo_erro': self.ultimo_erro,
+            'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
+            'data_conclusao': self.data_conclusao.isoformat() if self.data_conclusao else None
+        }
+
+# ========================================
+# MODELO: VERSOES DAS TABELAS
+# ========================================
+class VersaoTabela(db.Model):
+    """Contador incrementado a cada transação que altera a tabela.
+    
+    Usado para ETag/Last-Modified (ver sincronizacao.py).
+    """
+    __tablename__ = "versoes_tabelas"
+    
+    tabela = db.Column(db.String(50), primary_key=True)
+    versao = db.Column(db.BigInteger, nullable=False, default=0)
+    data_atualizacao = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    def __repr__(self):
+        return f"<VersaoTabela {self.tabela} v{self.versao}>"
+
+# ========================================
+# MODELO: TAREFAS EXCLUIDAS
+# ========================================
+class TarefaExcluida(db.Model):
+    """Registro (tombstone) de cada tarefa excluída.
+    
+    Permite que /api/tarefas/changes informe exclusões (ver sincronizacao.py).
+    """
+    __tablename__ = "tarefas_excluidas"
+    __table_args__ = (
+        db.Index("ix_tarefas_excluidas_data_exclusao_id", "data_exclusao", "tarefa_id"),
+    )
+    
+    # Sem chave estrangeira: a tarefa não existe mais
+    tarefa_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    data_exclusao = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    
+    def __repr__(self):
+        return f"<TarefaExcluida {self.tarefa_id}>"
+
+# ========================================
+# MODELO: RESUMO DOS PROJETOS
+# ========================================
+class ProjetoResumo(db.Model):
+    """Contadores das tarefas de cada projeto, mantidos a cada escrita.
+    
+    Atualizados por resumos.py; `flask resumos reconciliar` corrige
+    divergências recalculando a partir da tabela de tarefas.
+    """
+    __tablename__ = "projetos_resumo"
+    
+    projeto_id = db.Column(db.Integer, db.ForeignKey("projetos.id_projeto", ondelete="CASCADE"), primary_key=True, autoincrement=False)
+    total_tarefas = db.Column(db.Integer, nullable=False, default=0)
+    tarefas_pendentes = db.Column(db.Integer, nullable=False, default=0)
+    tarefas_andamento = db.Column(db.Integer, nullable=False, default=0)
+    tarefas_concluidas = db.Column(db.Integer, nullable=False, default=0)
+    tarefas_canceladas = db.Column(db.Integer, nullable=False, default=0)
+    estimativa_horas = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    horas_trabalhadas = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    # Progresso ponderado pela estimativa (peso 1 sem estimativa):
+    # soma(progresso * peso) / soma(peso)
+    soma_pesos = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    soma_progresso = db.Column(db.Numeric(16, 2), nullable=False, default=0)
+    data_atualizacao = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    def __repr__(self):
+        return f"<ProjetoResumo {self.projeto_id}: {self.total_tarefas} tarefas>"
+    
+    @property
+    def progresso(self):
+        """Progresso ponderado do projeto (0-100)"""
+        if not self.soma_pesos:
+            return 0.0
+        return round(float(self.soma_progresso / self.soma_pesos), 1)
+    
+    def to_dict(self):
+        """Converter para dicionário"""
+        return {
+            'projeto_id': self.projeto_id,
+            'total_tarefas': self.total_tarefas,
+            'por_status': {
+                'pendente': self.tarefas_pendentes,
+                'andamento': self.tarefas_andamento,
+                'concluida': self.tarefas_concluidas,
+                'cancelada': self.tarefas_canceladas
+            },
+            'estimativa_horas': float(self.estimativa_horas),
+            'horas_trabalhadas': float(self.horas_trabalhadas),
+            'progresso': self.progresso,
+            'data_atualizacao': self.data_atualizacao.isoformat() if self.data_atualizacao else None
+        }
+
+# ========================================
+# CONTAGENS (SUBCONSULTAS CORRELACIONADAS)
+# ========================================
+# Ficam adiadas (deferred): só entram no SELECT quando a consulta pede
+# undefer(...), como fazem os opcoes_serializacao() acima. Assim o to_dict
+# não precisa carregar coleções inteiras só para usar len().
+
+def _contagem(coluna_filha, coluna_pai):
+    """Subconsulta COUNT(*) dos filhos ligados à linha do pai"""
+    return column_property(
+        select(func.count())
+        .where(coluna_filha == coluna_pai)
+        .correlate_except(coluna_filha.class_)
+        .scalar_subquery(),
+        deferred=True
+    )
+
+Usuario.total_tarefas = _contagem(Tarefa.usuario_id, Usuario.id_usuario)
+Categoria.total_tarefas = _contagem(Tarefa.categoria_id, Categoria.id_categoria)
+Projeto.total_tarefas = _contagem(Tarefa.projeto_id, Projeto.id_projeto)
+Tarefa.total_comentarios = _contagem(Comentario.tarefa_id, Tarefa.tarefa_id)
+Tarefa.total_anexos = _contagem(Anexo.tarefa_id, Tarefa.tarefa_id)
+
+_Resposta = aliased(Comentario)
+Comentario.total_respostas = column_property(
+    select(func.count())
+    .where(_Resposta.comentario_pai_id == Comentario.id_comentario)
+    .correlate_except(_Resposta)
+    .scalar_subquery(),
+    deferred=True
+)
+
+# ========================================
+# BUSCA TEXTUAL (POSTGRESQL)
+# ========================================
+# O índice GIN ix_tarefas_busca (em Tarefa.__table_args__) e a consulta
+# precisam da mesma expressão, senão o PostgreSQL não usa o índice. Aqui as
+# colunas saem qualificadas (tarefas.titulo) para não conflitar com JOINs.
+# Em outros bancos (SQLite dos benchmarks) o índice não é criado e a busca
+# cai para ILIKE.
+
+documento_busca_tarefa = func.to_tsvector(
+    literal_column(f"'{CONFIG_BUSCA}'::regconfig"),
+    func.coalesce(Tarefa.titulo, literal_column("''"))
+    .op("||")(literal_column("' '"))
+    .op("||")(func.coalesce(Tarefa.descricao, literal_column("''")))
+)
+
+def condicao_busca_tarefa(texto):
+    """Condição WHERE para a busca por texto em título/descrição"""
+    if db.engine.dialect.name == "postgresql":
+        consulta_ts = func.websearch_to_tsquery(literal_column(f"'{CONFIG_BUSCA}'::regconfig"), texto)
+        return documento_busca_tarefa.op("@@")(consulta_ts)
+    
+    padrao = f"%{texto}%"
+    return or_(Tarefa.titulo.ilike(padrao), Tarefa.descricao.ilike(padrao))
+
+# ========================================
+# EXCLUSÕES EM CASCATA NO BANCO
+# ========================================
+# Com passive_deletes, as linhas que o banco exclui sozinho (ON DELETE
+# CASCADE) nunca entram em session.deleted. Os ganchos que precisam delas
+# (tombstones, eventos, resumos) leem tarefas_em_cascata(), calculado no
+# before_flush, enquanto as linhas ainda existem.
+
+def tarefas_em_cascata(session, flush_context):
+    """(tarefa_id, projeto_id) das tarefas que saem junto com os usuários
+    excluídos neste flush (tarefas.usuario_id ON DELETE CASCADE)"""
+    if "tarefas_em_cascata" not in flush_context.attributes:
+        usuarios = [objeto.id_usuario for objeto in session.deleted if isinstance(objeto, Usuario)]
+        ja_excluidas = {objeto.tarefa_id for objeto in session.deleted if isinstance(objeto, Tarefa)}
+        linhas = []
+        if usuarios:
+            # Pela conexão: dentro do flush, sem autoflush nem eventos do ORM
+            linhas = [
+                linha for linha in session.connection().execute(
+                    select(Tarefa.tarefa_id, Tarefa.projeto_id).where(Tarefa.usuario_id.in_(usuarios))
+                )
+                if linha.tarefa_id not in ja_excluidas
+            ]
+        flush_context.attributes["tarefas_em_cascata"] = linhas
+    return flush_context.attributes["tarefas_em_cascata"]
+
+@event.listens_for(Session, "before_flush")
+def _cascata_antes_do_flush(session, flush_context, instances):
+    tarefas_em_cascata(session, flush_context)
 
 # ========================================
 # FUNÇÕES UTILITÁRIAS
 # ========================================
 
+def insert_do_dialeto(modelo):
+    """INSERT do dialeto em uso, que aceita on_conflict_do_update/do_nothing"""
+    if db.engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(modelo)
+
+@contextmanager
+def contador_queries(engine=None):
+    """Contar os comandos SQL enviados ao banco dentro do bloco"""
+    engine = engine or db.engine
+    contagem = {"total": 0}
+    
+    def antes_de_executar(*args, **kwargs):
+        contagem["total"] += 1
+    
+    event.listen(engine, "before_cursor_execute", antes_de_executar)
+    try:
+        yield contagem
+    finally:
+        event.remove(engine, "before_cursor_execute", antes_de_executar)
+
+@contextmanager
+def garantir_max_queries(limite, engine=None):
+    """Falhar (AssertionError) se o bloco enviar mais de `limite` comandos SQL"""
+    with contador_queries(engine) as contagem:
+        yield contagem
+    
+    assert contagem["total"] <= limite, (
+        f"Esperava no máximo {limite} queries, foram executadas {contagem['total']}"
+    )
+
 def init_db(app):
     """Inicializar banco de dados com a aplicação Flask"""
     db.init_app(app)
@@ -385,20 +1084,23 @@ def criar_dados_exemplo():
 
 def get_estatisticas():
     """Obter estatísticas gerais do sistema"""
+    from estatisticas import calcular_estatisticas
+    
     try:
+        estatisticas = calcular_estatisticas()
         return {
-            'total_usuarios': Usuario.query.count(),
-            'total_categorias': Categoria.query.count(),
-            'total_projetos': Projeto.query.count(),
-            'total_tarefas': Tarefa.query.count(),
-            'tarefas_pendentes': Tarefa.query.filter_by(status='pendente').count(),
-            'tarefas_andamento': Tarefa.query.filter_by(status='andamento').count(),
-            'tarefas_concluidas': Tarefa.query.filter_by(status='concluida').count(),
-            'total_comentarios': Comentario.query.count(),
-            'total_anexos': Anexo.query.count()
+            'total_usuarios': estatisticas['total_usuarios'],
+            'total_categorias': estatisticas['total_categorias'],
+            'total_projetos': estatisticas['total_projetos'],
+            'total_tarefas': estatisticas['total_tarefas'],
+            'tarefas_pendentes': estatisticas['por_status']['pendente'],
+            'tarefas_andamento': estatisticas['por_status']['andamento'],
+            'tarefas_concluidas': estatisticas['por_status']['concluida'],
+            'total_comentarios': estatisticas['total_comentarios'],
+            'total_anexos': estatisticas['total_anexos']
         }
     except Exception as e:
-        print(f"❌ Erro ao obter estatísticas: {e}")
+        log.exception("❌ Erro ao obter estatísticas: %s", e)
         return {}
 
 # ========================================
@@ -413,12 +1115,12 @@ def validar_email(email):
 
 def validar_prioridade(prioridade):
     """Validar se prioridade é válida"""
-    return prioridade.lower() in ['baixa', 'media', 'alta', 'critica']
+    return prioridade.lower() in Prioridade.valores()
 
 def validar_status_tarefa(status):
     """Validar se status da tarefa é válido"""
-    return status.lower() in ['pendente', 'andamento', 'concluida', 'cancelada']
+    return status.lower() in StatusTarefa.valores()
 
 def validar_status_projeto(status):
     """Validar se status do projeto é válido"""
-    return status.lower() in ['ativo', 'pausado', 'concluido', 'cancelado']
\ No newline at end of file
+    return status.lower() in StatusProjeto.valores()
\ No newline at end of file
@@ -0,0 +1,156 @@
+# referencias.py - Cache em memória de usuários e categorias
+#
+# Usuários e categorias mudam pouco e são lidos em toda escrita de tarefa
+# (ids padrão) e em toda serialização (usuario_nome, categoria_nome). O
+# cache evita essas consultas; é descartado quando a sessão faz commit de
+# alguma alteração nessas tabelas e, entre processos diferentes, expira
+# depois de REFERENCIAS_TTL segundos (configuração da aplicação).
+
+import time
+import threading
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db, Usuario, Categoria
+
+# Limite do cache negativo (ids procurados e não encontrados) por tabela
+REFERENCIAS_MAX_AUSENTES = 1000
+
+def _ler_usuarios():
+    return {
+        linha.id_usuario: {"id": linha.id_usuario, "nome": linha.nome}
+        for linha in db.session.query(Usuario.id_usuario, Usuario.nome)
+    }
+
+def _ler_categorias():
+    return {
+        linha.id_categoria: {
+            "id": linha.id_categoria,
+            "nome": linha.nome,
+            "cor": linha.cor,
+            "icone": linha.icone
+        }
+        for linha in db.session.query(Categoria.id_categoria, Categoria.nome, Categoria.cor, Categoria.icone)
+    }
+
+LEITURAS = {
+    "usuarios": _ler_usuarios,
+    "categorias": _ler_categorias
+}
+
+class CacheReferencias:
+    """Dicionários id -> dados de usuários e categorias.
+    
+    Os dicionários nunca são alterados depois de prontos: carregar troca o
+    objeto inteiro. Quem lê pega a referência sob o lock e usa só essa
+    cópia local, então um invalidar() concorrente não a apaga no meio.
+    Cada tabela é carregada e expira sozinha; um id que não existe nem
+    depois de recarregar a tabela fica no cache negativo até a próxima
+    carga (commit local nessas tabelas, TTL ou invalidar). Sem ttl, vale
+    o REFERENCIAS_TTL da aplicação corrente, lido a cada uso.
+    """
+    
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._dados = {tabela: None for tabela in LEITURAS}
+        self._carregado_em = {tabela: 0.0 for tabela in LEITURAS}
+        self._ausentes = {tabela: set() for tabela in LEITURAS}
+    
+    def carregar(self, tabelas=tuple(LEITURAS)):
+        """Ler as tabelas pedidas do banco (uma consulta cada); volta os dados lidos"""
+        lidos = {tabela: LEITURAS[tabela]() for tabela in tabelas}
+        agora = time.monotonic()
+        
+        with self._lock:
+            for tabela, dados in lidos.items():
+                self._dados[tabela] = dados
+                self._carregado_em[tabela] = agora
+                self._ausentes[tabela] = set()
+        return lidos
+    
+    def invalidar(self):
+        """Descartar os dados; a próxima leitura recarrega"""
+        with self._lock:
+            for tabela in LEITURAS:
+                self._dados[tabela] = None
+                self._ausentes[tabela] = set()
+    
+    def _garantir_carregado(self, tabela):
+        """Dicionário da tabela pego sob o lock (recarregado se preciso)"""
+        ttl = self.ttl if self.ttl is not None else current_app.config["REFERENCIAS_TTL"]
+        with self._lock:
+            dados = self._dados[tabela]
+            if dados is not None and time.monotonic() - self._carregado_em[tabela] <= ttl:
+                return dados
+        return self.carregar([tabela])[tabela]
+    
+    def _buscar(self, tabela, item_id):
+        if item_id is None:
+            return None
+        
+        item = self._garantir_carregado(tabela).get(item_id)
+        if item is not None:
+            return item
+        
+        with self._lock:
+            if item_id in self._ausentes[tabela]:
+                return None
+        
+        # Pode ter sido criado por outro processo: recarrega só esta tabela, uma vez
+        item = self.carregar([tabela])[tabela].get(item_id)
+        if item is None:
+            with self._lock:
+                if len(self._ausentes[tabela]) < REFERENCIAS_MAX_AUSENTES:
+                    self._ausentes[tabela].add(item_id)
+        return item
+    
+    def usuario(self, usuario_id):
+        """Dados do usuário (id, nome) ou None"""
+        return self._buscar("usuarios", usuario_id)
+    
+    def categoria(self, categoria_id):
+        """Dados da categoria (id, nome, cor, icone) ou None"""
+        return self._buscar("categorias", categoria_id)
+    
+    def nome_usuario(self, usuario_id):
+        usuario = self.usuario(usuario_id)
+        return usuario["nome"] if usuario else None
+    
+    def nome_categoria(self, categoria_id):
+        categoria = self.categoria(categoria_id)
+        return categoria["nome"] if categoria else None
+    
+    def usuario_padrao_id(self):
+        """Usuário usado quando a tarefa não informa um (o de menor id)"""
+        usuarios = self._garantir_carregado("usuarios")
+        return min(usuarios) if usuarios else None
+    
+    def categoria_padrao_id(self):
+        """Categoria usada quando a tarefa não informa uma (a de menor id)"""
+        categorias = self._garantir_carregado("categorias")
+        return min(categorias) if categorias else None
+
+cache_referencias = CacheReferencias()
+
+# ========================================
+# INVALIDAÇÃO NAS ESCRITAS
+# ========================================
+# O flush só marca a sessão; o cache é descartado depois do commit, para
+# que nenhuma outra requisição recarregue dados ainda não confirmados.
+
+@event.listens_for(Session, "after_flush")
+def _marcar_alteracao_referencias(session, flush_context):
+    for objeto in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(objeto, (Usuario, Categoria)):
+            session.info["referencias_alteradas"] = True
+            return
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_apos_commit(session):
+    if session.info.pop("referencias_alteradas", False):
+        cache_referencias.invalidar()
+
+@event.listens_for(Session, "after_rollback")
+def _limpar_marca(session):
+    session.info.pop("referencias_alteradas", None)
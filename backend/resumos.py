@@ -0,0 +1,349 @@
+# resumos.py - Resumo das tarefas de cada projeto (projetos_resumo)
+#
+# Cada tarefa contribui para o projeto com um vetor: 1 no total, 1 no
+# contador do seu status, estimativa, horas e progresso * peso. A cada
+# flush do ORM a contribuição antiga sai e a nova entra num acumulado em
+# session.info; no commit um único UPSERT "coluna = coluna + delta" grava
+# todos os projetos, na mesma transação.
+#
+# Quando o valor antigo não é conhecido (atributo alterado sem ter sido
+# carregado) ou a escrita foi em lote (session.execute), o projeto é
+# recalculado inteiro a partir da tabela de tarefas. A edição de uma tarefa
+# por UPDATE ... RETURNING (app.atualizar_tarefa) traz o status antigo no
+# próprio comando e aplica só o delta (trocar_status).
+
+from collections import defaultdict
+from datetime import datetime, timezone
+from decimal import Decimal
+from sqlalchemy import event, func, select, delete, inspect, literal
+from sqlalchemy.orm import Session
+from models import db, Tarefa, ProjetoResumo, StatusTarefa, insert_do_dialeto, tarefas_em_cascata
+
+COLUNAS_STATUS = {
+    StatusTarefa.PENDENTE: "tarefas_pendentes",
+    StatusTarefa.ANDAMENTO: "tarefas_andamento",
+    StatusTarefa.CONCLUIDA: "tarefas_concluidas",
+    StatusTarefa.CANCELADA: "tarefas_canceladas"
+}
+
+COLUNAS_INTEIRAS = ["total_tarefas", *COLUNAS_STATUS.values()]
+COLUNAS_CONTADORES = [*COLUNAS_INTEIRAS, "estimativa_horas", "horas_trabalhadas", "soma_pesos", "soma_progresso"]
+
+# Campos da tarefa que mudam o resumo
+CAMPOS_RESUMO = ("projeto_id", "status", "estimativa_horas", "horas_trabalhadas", "progresso")
+
+def _decimal(valor):
+    return Decimal(str(valor)) if valor is not None else None
+
+def contribuicao(status, estimativa_horas, horas_trabalhadas, progresso, sinal=1):
+    """Quanto uma tarefa soma em cada contador do projeto"""
+    estimativa = _decimal(estimativa_horas)
+    peso = estimativa if estimativa is not None else Decimal(1)
+    
+    valores = {
+        "total_tarefas": sinal,
+        "estimativa_horas": sinal * (estimativa or Decimal(0)),
+        "horas_trabalhadas": sinal * (_decimal(horas_trabalhadas) or Decimal(0)),
+        "soma_pesos": sinal * peso,
+        "soma_progresso": sinal * peso * (progresso or 0)
+    }
+    if status in COLUNAS_STATUS:
+        valores[COLUNAS_STATUS[status]] = sinal
+    return valores
+
+# ========================================
+# RECÁLCULO COMPLETO
+# ========================================
+def consulta_agregada(projeto_ids=None):
+    """SELECT com os contadores de cada projeto, direto da tabela de tarefas"""
+    estimativa = func.coalesce(Tarefa.estimativa_horas, 0)
+    peso = func.coalesce(Tarefa.estimativa_horas, 1)
+    
+    consulta = (
+        select(
+            Tarefa.projeto_id,
+            func.count().label("total_tarefas"),
+            *(
+                func.count().filter(Tarefa.status == status).label(coluna)
+                for status, coluna in COLUNAS_STATUS.items()
+            ),
+            func.coalesce(func.sum(estimativa), 0).label("estimativa_horas"),
+            func.coalesce(func.sum(func.coalesce(Tarefa.horas_trabalhadas, 0)), 0).label("horas_trabalhadas"),
+            func.coalesce(func.sum(peso), 0).label("soma_pesos"),
+            func.coalesce(func.sum(peso * func.coalesce(Tarefa.progresso, 0)), 0).label("soma_progresso")
+        )
+        .where(Tarefa.projeto_id.is_not(None))
+        .group_by(Tarefa.projeto_id)
+    )
+    if projeto_ids is not None:
+        consulta = consulta.where(Tarefa.projeto_id.in_(projeto_ids))
+    return consulta
+
+def recalcular_resumos(session, projeto_ids):
+    """Refazer o resumo dos projetos a partir das tarefas.
+    
+    INSERT ... SELECT ... ON CONFLICT DO UPDATE para os projetos que têm
+    tarefas e DELETE só dos que ficaram sem nenhuma: duas transações
+    recalculando o mesmo projeto não colidem na chave primária.
+    """
+    projeto_ids = sorted({projeto_id for projeto_id in projeto_ids if projeto_id is not None})
+    if not projeto_ids:
+        return
+    
+    agregado = consulta_agregada(projeto_ids).add_columns(
+        literal(datetime.now(timezone.utc), db.DateTime).label("data_atualizacao")
+    )
+    comando = insert_do_dialeto(ProjetoResumo).from_select(
+        ["projeto_id", *COLUNAS_CONTADORES, "data_atualizacao"],
+        agregado
+    )
+    comando = comando.on_conflict_do_update(
+        index_elements=[ProjetoResumo.projeto_id],
+        set_={
+            coluna: getattr(comando.excluded, coluna)
+            for coluna in [*COLUNAS_CONTADORES, "data_atualizacao"]
+        }
+    )
+    
+    # O recálculo já inclui o que estava acumulado para estes projetos; se
+    # ele for desfeito por um SAVEPOINT, o commit recalcula de novo
+    pendentes = session.info.get("resumo_deltas")
+    if pendentes:
+        descartados = [projeto_id for projeto_id in projeto_ids if pendentes.pop(projeto_id, None)]
+        session.info.setdefault("resumo_recalcular", set()).update(descartados)
+    
+    conexao = session.connection()
+    conexao.execute(comando)
+    conexao.execute(
+        delete(ProjetoResumo).where(
+            ProjetoResumo.projeto_id.in_(projeto_ids),
+            ~select(Tarefa.tarefa_id).where(Tarefa.projeto_id == ProjetoResumo.projeto_id).exists()
+        )
+    )
+
+def recalcular_resumos_das_tarefas(session, tarefa_ids):
+    """Recalcular os projetos das tarefas gravadas por INSERT/UPDATE em lote"""
+    if not tarefa_ids:
+        return
+    projeto_ids = session.execute(
+        select(Tarefa.projeto_id).distinct()
+        .where(Tarefa.tarefa_id.in_(list(tarefa_ids)), Tarefa.projeto_id.is_not(None))
+    ).scalars().all()
+    recalcular_resumos(session, projeto_ids)
+
+# ========================================
+# ATUALIZAÇÃO INCREMENTAL (FLUSH DO ORM)
+# ========================================
+# A linha de resumo do projeto fica travada do UPSERT até o COMMIT. Com o
+# UPSERT no after_flush, duas transações com tarefas do mesmo projeto
+# esperavam uma pela outra durante todo o resto da transação; acumulando
+# até o before_commit (como sincronizacao.gravar_versoes) a espera cai
+# para o intervalo entre o UPSERT e o COMMIT.
+
+def _novos_deltas():
+    return defaultdict(lambda: defaultdict(Decimal))
+
+def _somar(deltas, projeto_id, valores):
+    if projeto_id is None:
+        return
+    for coluna, valor in valores.items():
+        deltas[projeto_id][coluna] += valor
+
+def acumular_deltas(session, deltas, recalcular=()):
+    """Juntar deltas (e projetos a recalcular) aos pendentes da transação;
+    gravados uma vez, no commit"""
+    if deltas:
+        pendentes = session.info.setdefault("resumo_deltas", _novos_deltas())
+        for projeto_id, valores in deltas.items():
+            _somar(pendentes, projeto_id, valores)
+    recalcular = {projeto_id for projeto_id in recalcular if projeto_id is not None}
+    if recalcular:
+        session.info.setdefault("resumo_recalcular", set()).update(recalcular)
+
+def aplicar_deltas(session, deltas):
+    """UPSERT "coluna = coluna + delta" de cada projeto alterado"""
+    linhas = []
+    for projeto_id, valores in sorted(deltas.items()):
+        if not any(valores.values()):
+            continue
+        linhas.append(dict(
+            {coluna: valores.get(coluna, 0) for coluna in COLUNAS_CONTADORES},
+            **{coluna: int(valores.get(coluna, 0)) for coluna in COLUNAS_INTEIRAS},
+            projeto_id=projeto_id,
+            data_atualizacao=datetime.now(timezone.utc)
+        ))
+    if not linhas:
+        return
+    
+    comando = insert_do_dialeto(ProjetoResumo)
+    comando = comando.on_conflict_do_update(
+        index_elements=[ProjetoResumo.projeto_id],
+        set_={
+            **{
+                coluna: getattr(ProjetoResumo, coluna) + getattr(comando.excluded, coluna)
+                for coluna in COLUNAS_CONTADORES
+            },
+            "data_atualizacao": comando.excluded.data_atualizacao
+        }
+    )
+    # Pela conexão, para não disparar de novo os eventos da sessão
+    session.connection().execute(comando, linhas)
+
+def trocar_status(session, projeto_id, anterior, novo):
+    """Mover a tarefa de um contador de status para outro no resumo do
+    projeto (UPDATE em um comando, com o status antigo do RETURNING)"""
+    if projeto_id is None or anterior == novo:
+        return
+    deltas = _novos_deltas()
+    if anterior in COLUNAS_STATUS:
+        deltas[projeto_id][COLUNAS_STATUS[anterior]] -= 1
+    if novo in COLUNAS_STATUS:
+        deltas[projeto_id][COLUNAS_STATUS[novo]] += 1
+    acumular_deltas(session, deltas)
+
+def _valor_anterior(estado, campo):
+    """Valor do campo antes das alterações pendentes (None, False se desconhecido)"""
+    historico = estado.attrs[campo].history
+    if historico.deleted:
+        return historico.deleted[0], True
+    if historico.unchanged:
+        return historico.unchanged[0], True
+    if historico.added:
+        # Alterado sem ter sido carregado: o valor antigo não é conhecido
+        return None, False
+    return getattr(estado.obj(), campo), True
+
+@event.listens_for(Session, "before_flush")
+def _resumo_antes_do_flush(session, flush_context, instances):
+    # Tarefas excluídas: o valor gravado ainda pode ser lido (carregado) aqui
+    pendentes = session.info.setdefault("resumo_exclusoes", {})
+    for objeto in session.deleted:
+        if isinstance(objeto, Tarefa) and objeto.tarefa_id not in pendentes:
+            estado = inspect(objeto)
+            anteriores = {campo: _valor_anterior(estado, campo) for campo in CAMPOS_RESUMO}
+            pendentes[objeto.tarefa_id] = anteriores
+
+@event.listens_for(Session, "after_flush")
+def _resumo_no_flush(session, flush_context):
+    deltas = _novos_deltas()
+    recalcular = set()
+    exclusoes = session.info.pop("resumo_exclusoes", {})
+    
+    for objeto in session.new:
+        if isinstance(objeto, Tarefa) and objeto.projeto_id is not None:
+            _somar(deltas, objeto.projeto_id, contribuicao(
+                objeto.status, objeto.estimativa_horas, objeto.horas_trabalhadas, objeto.progresso
+            ))
+    
+    for objeto in session.dirty:
+        if not isinstance(objeto, Tarefa):
+            continue
+        estado = inspect(objeto)
+        if not any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_RESUMO):
+            continue
+        
+        anteriores = {campo: _valor_anterior(estado, campo) for campo in CAMPOS_RESUMO}
+        if not all(conhecido for _, conhecido in anteriores.values()):
+            recalcular.update((anteriores["projeto_id"][0], objeto.projeto_id))
+            continue
+        
+        _somar(deltas, anteriores["projeto_id"][0], contribuicao(
+            anteriores["status"][0], anteriores["estimativa_horas"][0],
+            anteriores["horas_trabalhadas"][0], anteriores["progresso"][0], sinal=-1
+        ))
+        _somar(deltas, objeto.projeto_id, contribuicao(
+            objeto.status, objeto.estimativa_horas, objeto.horas_trabalhadas, objeto.progresso
+        ))
+    
+    for objeto in session.deleted:
+        if not isinstance(objeto, Tarefa):
+            continue
+        anteriores = exclusoes.get(objeto.tarefa_id)
+        if anteriores is None:
+            # Excluída em cascata, sem passar pelo before_flush
+            anteriores = {campo: _valor_anterior(inspect(objeto), campo) for campo in CAMPOS_RESUMO}
+        projeto_id, conhecido = anteriores["projeto_id"]
+        if not all(conhecido for _, conhecido in anteriores.values()):
+            recalcular.add(projeto_id)
+            continue
+        _somar(deltas, projeto_id, contribuicao(
+            anteriores["status"][0], anteriores["estimativa_horas"][0],
+            anteriores["horas_trabalhadas"][0], anteriores["progresso"][0], sinal=-1
+        ))
+    
+    # Excluídas pelo banco junto com o usuário: valores não passam pela sessão
+    recalcular.update(linha.projeto_id for linha in tarefas_em_cascata(session, flush_context))
+    
+    acumular_deltas(session, deltas, recalcular)
+
+@event.listens_for(Session, "before_commit")
+def _resumo_no_commit(session):
+    if session.in_nested_transaction():
+        return
+    # O commit só faz o último flush depois deste evento
+    session.flush()
+    deltas = session.info.pop("resumo_deltas", {})
+    recalcular = session.info.pop("resumo_recalcular", set())
+    # O recálculo lê a tabela, que já tem o que os deltas somariam
+    for projeto_id in recalcular:
+        deltas.pop(projeto_id, None)
+    aplicar_deltas(session, deltas)
+    recalcular_resumos(session, recalcular)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _resumo_no_rollback_do_savepoint(session, previous_transaction):
+    # Deltas do SAVEPOINT desfeito se misturam aos de fora: os projetos
+    # com algo pendente saem do recálculo no commit
+    if previous_transaction.nested and session.info.get("resumo_deltas"):
+        acumular_deltas(session, {}, session.info.pop("resumo_deltas").keys())
+
+@event.listens_for(Session, "after_rollback")
+def _resumo_no_rollback(session):
+    session.info.pop("resumo_exclusoes", None)
+
+@event.listens_for(Session, "after_transaction_end")
+def _limpar_resumos(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("resumo_deltas", None)
+        session.info.pop("resumo_recalcular", None)
+
+# ========================================
+# LEITURA E RECONCILIAÇÃO
+# ========================================
+def obter_resumo(projeto_id):
+    """Resumo gravado do projeto (zerado se o projeto ainda não tem tarefas)"""
+    resumo = db.session.get(ProjetoResumo, projeto_id)
+    if resumo is None:
+        resumo = ProjetoResumo(projeto_id=projeto_id, **{coluna: 0 for coluna in COLUNAS_CONTADORES})
+    return resumo
+
+def reconciliar_resumos(corrigir=True):
+    """Comparar projetos_resumo com a tabela de tarefas.
+    
+    Volta os ids dos projetos divergentes; com corrigir=True recalcula
+    esses projetos e faz commit.
+    """
+    esperados = {
+        linha.projeto_id: {coluna: getattr(linha, coluna) for coluna in COLUNAS_CONTADORES}
+        for linha in db.session.execute(consulta_agregada())
+    }
+    gravados = {
+        linha.projeto_id: {coluna: getattr(linha, coluna) for coluna in COLUNAS_CONTADORES}
+        for linha in db.session.execute(
+            select(ProjetoResumo.projeto_id, *(getattr(ProjetoResumo, coluna) for coluna in COLUNAS_CONTADORES))
+        )
+    }
+    
+    zerado = {coluna: 0 for coluna in COLUNAS_CONTADORES}
+    divergentes = []
+    for projeto_id in sorted(set(esperados) | set(gravados)):
+        esperado = esperados.get(projeto_id, zerado)
+        gravado = gravados.get(projeto_id, zerado)
+        if any(Decimal(str(esperado[coluna])) != Decimal(str(gravado[coluna])) for coluna in COLUNAS_CONTADORES):
+            divergentes.append(projeto_id)
+    
+    if corrigir and divergentes:
+        recalcular_resumos(db.session, divergentes)
+        db.session.commit()
+    
+    return divergentes
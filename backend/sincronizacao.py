@@ -0,0 +1,275 @@
+# sincronizacao.py - Versão por tabela, respostas condicionais (ETag / 304)
+# e alterações incrementais de tarefas
+#
+# Toda transação que grava em uma tabela monitorada incrementa a linha dela
+# em versoes_tabelas uma vez, logo antes do COMMIT e dentro da mesma
+# transação (rollback desfaz junto).
+# As rotas GET usam essas versões para gerar o ETag e responder 304 antes
+# de consultar e serializar qualquer tarefa.
+#
+# Tarefas excluídas deixam um registro em tarefas_excluidas, para que
+# /api/tarefas/changes devolva inclusões/edições e exclusões em ordem.
+
+import hashlib
+from datetime import datetime, time, timedelta, timezone
+from functools import wraps
+from flask import request, current_app, make_response
+from sqlalchemy import event, select, tuple_
+from sqlalchemy.orm import Session
+from models import db, Usuario, Categoria, Projeto, Tarefa, Comentario, Anexo, VersaoTabela, TarefaExcluida, insert_do_dialeto, tarefas_em_cascata
+
+# Modelos cujas escritas mudam a versão da tabela
+TABELAS_VERSIONADAS = {
+    Usuario: "usuarios",
+    Categoria: "categorias",
+    Projeto: "projetos",
+    Tarefa: "tarefas",
+    Comentario: "comentarios",
+    Anexo: "anexos"
+}
+
+# Tabelas que o banco limpa junto (ON DELETE CASCADE / SET NULL) quando
+# uma linha é excluída: a versão delas muda também
+TABELAS_EM_CASCATA = {
+    "usuarios": ("tarefas", "comentarios", "anexos"),
+    "tarefas": ("tarefas", "comentarios", "anexos")
+}
+
+# ========================================
+# INCREMENTO DAS VERSÕES
+# ========================================
+# Flushes e comandos em lote só anotam as tabelas tocadas em session.info;
+# o UPSERT em versoes_tabelas roda uma vez, logo antes do COMMIT.
+#
+# Custo: a linha de versão de uma tabela é um ponto único de escrita, e
+# quem a atualiza segura o lock dela até o COMMIT. Incrementando no
+# primeiro flush, duas transações que gravam tarefas ficavam em fila
+# durante todo o resto da transação (validações, outros flushes, jobs);
+# no before_commit a espera cai para o intervalo entre o UPSERT e o
+# COMMIT. As escritas na mesma tabela continuam serializadas nesse
+# trecho curto, e a versão muda junto com os dados (rollback desfaz os
+# dois). A alternativa sem lock nenhum, derivar a versão de
+# max(data_atualizacao) de cada tabela, não enxerga exclusões (nem as em
+# cascata) e custaria uma agregação por GET; por isso ficou a tabela.
+
+def incrementar_versoes(session, tabelas):
+    """Anotar as tabelas alteradas; a versão sobe uma vez, no commit"""
+    session.info.setdefault("versoes_pendentes", set()).update(tabelas)
+
+def gravar_versoes(session, tabelas):
+    """UPSERT versao = versao + 1 das tabelas, em ordem (locks sempre na
+    mesma sequência entre transações)"""
+    agora = datetime.now(timezone.utc)
+    comando = insert_do_dialeto(VersaoTabela)
+    comando = comando.on_conflict_do_update(
+        index_elements=[VersaoTabela.tabela],
+        set_={
+            "versao": VersaoTabela.versao + 1,
+            "data_atualizacao": comando.excluded.data_atualizacao
+        }
+    )
+    
+    # Pela conexão, para não disparar de novo os eventos da sessão
+    session.connection().execute(
+        comando,
+        [{"tabela": tabela, "versao": 1, "data_atualizacao": agora} for tabela in sorted(tabelas)]
+    )
+
+@event.listens_for(Session, "after_flush")
+def _versoes_no_flush(session, flush_context):
+    tabelas = set()
+    for objeto in session.new:
+        if type(objeto) in TABELAS_VERSIONADAS:
+            tabelas.add(TABELAS_VERSIONADAS[type(objeto)])
+    for objeto in session.deleted:
+        if type(objeto) in TABELAS_VERSIONADAS:
+            tabela = TABELAS_VERSIONADAS[type(objeto)]
+            tabelas.add(tabela)
+            tabelas.update(TABELAS_EM_CASCATA.get(tabela, ()))
+    for objeto in session.dirty:
+        if type(objeto) in TABELAS_VERSIONADAS and session.is_modified(objeto, include_collections=False):
+            tabelas.add(TABELAS_VERSIONADAS[type(objeto)])
+    
+    if tabelas:
+        incrementar_versoes(session, tabelas)
+
+@event.listens_for(Session, "do_orm_execute")
+def _versoes_em_lote(orm_execute_state):
+    """INSERT/UPDATE/DELETE em lote (session.execute) não passam pelo flush"""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in TABELAS_VERSIONADAS:
+        tabela = TABELAS_VERSIONADAS[mapper.class_]
+        tabelas = [tabela]
+        if orm_execute_state.is_delete:
+            tabelas += TABELAS_EM_CASCATA.get(tabela, ())
+        incrementar_versoes(orm_execute_state.session, tabelas)
+
+@event.listens_for(Session, "before_commit")
+def _versoes_no_commit(session):
+    # SAVEPOINT (begin_nested) não é o fim da transação
+    if session.in_nested_transaction():
+        return
+    
+    # O commit só faz o último flush depois deste evento: antecipado aqui
+    # para que as tabelas dele também entrem
+    session.flush()
+    
+    tabelas = session.info.pop("versoes_pendentes", None)
+    if tabelas:
+        gravar_versoes(session, tabelas)
+
+@event.listens_for(Session, "after_transaction_end")
+def _limpar_versoes(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("versoes_pendentes", None)
+
+# ========================================
+# REGISTRO DE EXCLUSÕES
+# ========================================
+def registrar_exclusoes(session, ids):
+    """Gravar o tombstone das tarefas excluídas, na mesma transação.
+    
+    O flush do ORM chama isto sozinho (inclusive para as tarefas excluídas
+    em cascata com o usuário); DELETE em lote (session.execute) precisa
+    chamar com os ids do RETURNING.
+    """
+    ids = sorted(set(ids))
+    if not ids:
+        return
+    
+    agora = datetime.now(timezone.utc)
+    comando = insert_do_dialeto(TarefaExcluida)
+    comando = comando.on_conflict_do_update(
+        index_elements=[TarefaExcluida.tarefa_id],
+        set_={"data_exclusao": comando.excluded.data_exclusao}
+    )
+    session.connection().execute(
+        comando,
+        [{"tarefa_id": tarefa_id, "data_exclusao": agora} for tarefa_id in ids]
+    )
+
+@event.listens_for(Session, "after_flush")
+def _exclusoes_no_flush(session, flush_context):
+    excluidas = [objeto.tarefa_id for objeto in session.deleted if isinstance(objeto, Tarefa)]
+    excluidas += [linha.tarefa_id for linha in tarefas_em_cascata(session, flush_context)]
+    registrar_exclusoes(session, excluidas)
+
+# ========================================
+# ALTERAÇÕES DESDE UM CURSOR
+# ========================================
+def buscar_alteracoes(colunas, cursor=None, limite=100, margem_segundos=0):
+    """Tarefas gravadas e excluídas depois de `cursor`, em ordem.
+    
+    `cursor` é (data, tarefa_id) da última alteração já vista. As duas
+    fontes (tarefas.data_atualizacao e tarefas_excluidas.data_exclusao)
+    são lidas pelo índice (data, id) e intercaladas. Volta
+    (alteracoes, tem_mais), onde cada alteração é (data, tarefa_id, linha)
+    e linha é None para exclusões.
+    """
+    ate = datetime.now(timezone.utc) - timedelta(seconds=margem_segundos)
+    
+    consulta_gravadas = (
+        select(Tarefa.data_atualizacao, Tarefa.tarefa_id, *colunas)
+        .where(Tarefa.data_atualizacao <= ate)
+        .order_by(Tarefa.data_atualizacao, Tarefa.tarefa_id)
+        .limit(limite + 1)
+    )
+    consulta_excluidas = (
+        select(TarefaExcluida.data_exclusao, TarefaExcluida.tarefa_id)
+        .where(TarefaExcluida.data_exclusao <= ate)
+        .order_by(TarefaExcluida.data_exclusao, TarefaExcluida.tarefa_id)
+        .limit(limite + 1)
+    )
+    if cursor:
+        consulta_gravadas = consulta_gravadas.where(
+            tuple_(Tarefa.data_atualizacao, Tarefa.tarefa_id) > tuple_(*cursor)
+        )
+        consulta_excluidas = consulta_excluidas.where(
+            tuple_(TarefaExcluida.data_exclusao, TarefaExcluida.tarefa_id) > tuple_(*cursor)
+        )
+    
+    alteracoes = [
+        (linha.data_atualizacao, linha.tarefa_id, linha)
+        for linha in db.session.execute(consulta_gravadas)
+    ]
+    alteracoes += [
+        (linha.data_exclusao, linha.tarefa_id, None)
+        for linha in db.session.execute(consulta_excluidas)
+    ]
+    alteracoes.sort(key=lambda alteracao: (alteracao[0], alteracao[1]))
+    
+    return alteracoes[:limite], len(alteracoes) > limite
+
+# ========================================
+# RESPOSTAS CONDICIONAIS
+# ========================================
+def ler_versoes(tabelas):
+    """Versão e data da última alteração de cada tabela (uma consulta)"""
+    linhas = db.session.execute(
+        select(VersaoTabela.tabela, VersaoTabela.versao, VersaoTabela.data_atualizacao)
+        .where(VersaoTabela.tabela.in_(tabelas))
+    ).all()
+    encontradas = {linha.tabela: (linha.versao, linha.data_atualizacao) for linha in linhas}
+    return {tabela: encontradas.get(tabela, (0, None)) for tabela in tabelas}
+
+def calcular_etag(versoes, chave):
+    """ETag a partir das versões das tabelas e da URL pedida"""
+    bruto = chave + "|" + "|".join(f"{tabela}:{versao}" for tabela, (versao, _) in sorted(versoes.items()))
+    return hashlib.sha1(bruto.encode()).hexdigest()
+
+def condicional(*tabelas, referencia=None):
+    """Decorator para rotas GET: ETag, Last-Modified, Cache-Control e 304.
+    
+    O ETag só muda quando alguma das `tabelas` muda, então uma resposta
+    não modificada volta 304 sem consultar nem serializar as tarefas.
+    Rotas cujo resultado depende do dia (vencidas, próximas) passam
+    `referencia`, uma função que devolve a data usada na consulta: ela
+    entra no ETag, e o Last-Modified nunca fica antes da meia-noite dela.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versoes = ler_versoes(tabelas)
+            chave = request.full_path
+            datas = [
+                data.replace(tzinfo=timezone.utc)
+                for _, data in versoes.values() if data is not None
+            ]
+            if referencia is not None:
+                dia = referencia()
+                chave += f"|referencia:{dia.isoformat()}"
+                # Meia-noite local do dia de referência, em UTC
+                datas.append(datetime.combine(dia, time.min).astimezone(timezone.utc))
+            etag = calcular_etag(versoes, chave)
+            ultima_alteracao = max(datas).replace(microsecond=0) if datas else None
+            
+            # Com o timestamp no corpo os bytes mudam a cada resposta: ETag fraco
+            fraco = current_app.config["RESPOSTA_TIMESTAMP_NO_CORPO"]
+            
+            if request.if_none_match:
+                nao_modificado = request.if_none_match.contains_weak(etag)
+            else:
+                nao_modificado = (
+                    ultima_alteracao is not None
+                    and request.if_modified_since is not None
+                    and ultima_alteracao <= request.if_modified_since
+                )
+            
+            if nao_modificado:
+                resposta = make_response("", 304)
+            else:
+                resposta = make_response(view(*args, **kwargs))
+                if resposta.status_code != 200:
+                    return resposta
+            
+            resposta.set_etag(etag, weak=fraco)
+            if ultima_alteracao is not None:
+                resposta.last_modified = ultima_alteracao
+            resposta.headers["Cache-Control"] = current_app.config["API_CACHE_CONTROL"]
+            return resposta
+        
+        return wrapper
+    return decorator
@@ -5,24 +5,203 @@
 console.log('📝 Sistema de Tarefas carregado!');
 
 // ========================================
-// FILTRAR TAREFAS
+// CARREGAR TAREFAS DA API (PAGINADO)
 // ========================================
-function filtrarTarefas() {
-    const filtro = document.getElementById('filtro').value;
-    const tarefas = document.querySelectorAll('.task-item');
-    let contador = 0;
+const TAREFAS_POR_PAGINA = 30;
+
+const ROTULOS_STATUS = {
+    'pendente': '⏳ Pendente',
+    'andamento': '🔄 Em Andamento',
+    'concluida': '✅ Concluída'
+};
+
+const ROTULOS_PRIORIDADE = {
+    'baixa': '🟢 Baixa',
+    'media': '🟡 Média',
+    'alta': '🔴 Alta'
+};
+
+function escaparHtml(texto) {
+    const div = document.createElement('div');
+    div.textContent = texto || '';
+    return div.innerHTML;
+}
+
+function formatarData(iso) {
+    if (!iso) return '';
+    const data = new Date(iso);
+    const doisDigitos = n => String(n).padStart(2, '0');
+    return `${doisDigitos(data.getDate())}/${doisDigitos(data.getMonth() + 1)}/${data.getFullYear()} ` +
+           `às ${doisDigitos(data.getHours())}:${doisDigitos(data.getMinutes())}`;
+}
+
+// Mesma marcação que templates/index.html gera para cada tarefa
+function criarElementoTarefa(tarefa) {
+    const artigo = document.createElement('article');
+    artigo.className = 'task-item';
+    artigo.dataset.status = tarefa.status;
+    artigo.dataset.priority = tarefa.prioridade;
+    artigo.dataset.id = tarefa.id;
     
-    console.log(`🔍 Filtrando por: ${filtro}`);
+    artigo.innerHTML = `
+        <header class="task-header">
+            <h3 class="task-title">${escaparHtml(tarefa.titulo)}</h3>
+            <div class="task-actions">
+                <button class="btn-icon btn-edit" title="Editar tarefa">✏️</button>
+                <a href="/excluir/${tarefa.id}" class="btn-icon btn-delete" title="Excluir tarefa">🗑️</a>
+            </div>
+        </header>
+        <div class="task-meta">
+            <span class="task-status status-${escaparHtml(tarefa.status)}">${ROTULOS_STATUS[tarefa.status] || '✅ Concluída'}</span>
+            <span class="task-priority priority-${escaparHtml(tarefa.prioridade)}">${ROTULOS_PRIORIDADE[tarefa.prioridade] || '🔴 Alta'}</span>
+            <time class="task-date">📅 ${formatarData(tarefa.data_criacao)}</time>
+        </div>
+        ${tarefa.descricao ? `<div class="task-description"><p>${escaparHtml(tarefa.descricao)}</p></div>` : ''}
+    `;
+    
+    artigo.querySelector('.btn-edit').addEventListener('click', function() {
+        editarTarefa(tarefa.id, tarefa.titulo, tarefa.descricao, tarefa.prioridade, tarefa.status);
+    });
+    
+    artigo.querySelector('.btn-delete').addEventListener('click', function(e) {
+        if (!confirm(`🗑️ Tem certeza que deseja excluir a tarefa:\n\n${tarefa.titulo}?`)) {
+            e.preventDefault();
+        }
+    });
+    
+    return artigo;
+}
+
+function montarUrlTarefas(cursor) {
+    const params = new URLSearchParams({ limit: TAREFAS_POR_PAGINA });
+    const filtro = document.getElementById('filtro');
+    const busca = document.getElementById('busca-rapida');
+    
+    if (filtro && filtro.value !== 'todas') params.set('status', filtro.value);
+    if (busca && busca.value.trim()) params.set('q', busca.value.trim());
+    if (cursor) params.set('after', cursor);
+    
+    return `/api/tarefas?${params.toString()}`;
+}
+
+// substituir=true recomeça a lista (novo filtro/busca); senão anexa a próxima página
+async function carregarTarefas(substituir) {
+    const container = document.getElementById('taskContainer');
+    const botao = document.getElementById('carregarMais');
+    const cursor = substituir ? '' : container.dataset.proximoCursor;
+    
+    const resposta = await fetch(montarUrlTarefas(cursor));
+    const json = await resposta.json();
+    
+    if (!json.success) {
+        console.error('❌ Erro ao carregar tarefas:', json.message);
+        return 0;
+    }
+    
+    if (substituir) {
+        container.innerHTML = '';
+    }
+    
+    json.data.forEach(tarefa => container.appendChild(criarElementoTarefa(tarefa)));
+    
+    container.dataset.proximoCursor = json.paginacao.proximo_cursor || '';
+    if (botao) {
+        botao.hidden = !json.paginacao.tem_mais;
+    }
+    
+    console.log(`📋 ${json.data.length} tarefas carregadas da API`);
+    return json.data.length;
+}
+
+function configurarCarregarMais() {
+    const botao = document.getElementById('carregarMais');
+    if (!botao) return;
+    
+    botao.addEventListener('click', async function() {
+        botao.disabled = true;
+        try {
+            await carregarTarefas(false);
+        } finally {
+            botao.disabled = false;
+        }
+    });
+}
+
+// ========================================
+// ATUALIZAÇÕES EM TEMPO REAL (SSE)
+// ========================================
+// Acima disso, recarregar a primeira página sai mais barato que buscar uma a uma
+const MAXIMO_ATUALIZACOES_INDIVIDUAIS = 10;
+
+let recarregamentoAgendado = null;
+
+function agendarRecarregamento() {
+    clearTimeout(recarregamentoAgendado);
+    recarregamentoAgendado = setTimeout(filtrarTarefas, 300);
+}
+
+async function atualizarTarefaNaLista(id) {
+    const atual = document.querySelector(`#taskContainer .task-item[data-id="${id}"]`);
+    if (!atual) return;
+    
+    const resposta = await fetch(`/api/tarefas/${id}`);
+    if (!resposta.ok) return;
+    
+    const json = await resposta.json();
+    atual.replaceWith(criarElementoTarefa(json.data));
+}
+
+function removerTarefasDaLista(ids) {
+    ids.forEach(id => {
+        const elemento = document.querySelector(`#taskContainer .task-item[data-id="${id}"]`);
+        if (elemento) elemento.remove();
+    });
+}
+
+function configurarEventosTempoReal() {
+    if (!window.EventSource || !document.getElementById('taskContainer')) return;
+    
+    const fonte = new EventSource('/api/tarefas/stream');
+    let conectadoAntes = false;
     
-    tarefas.forEach(tarefa => {
-        if (filtro === 'todas' || tarefa.dataset.status === filtro) {
-            tarefa.style.display = 'block';
-            contador++;
+    fonte.addEventListener('open', function() {
+        // Reconexão: o que mudou enquanto estava fora não chegou
+        if (conectadoAntes) agendarRecarregamento();
+        conectadoAntes = true;
+    });
+    
+    fonte.addEventListener('upsert', function(e) {
+        const evento = JSON.parse(e.data);
+        const container = document.getElementById('taskContainer');
+        const presentes = evento.ids.filter(id => container.querySelector(`.task-item[data-id="${id}"]`));
+        
+        // Tarefa nova (ou fora da página atual) muda a ordem da lista
+        if (presentes.length < evento.ids.length || presentes.length > MAXIMO_ATUALIZACOES_INDIVIDUAIS) {
+            agendarRecarregamento();
         } else {
-            tarefa.style.display = 'none';
+            presentes.forEach(atualizarTarefaNaLista);
         }
     });
     
+    fonte.addEventListener('delete', function(e) {
+        removerTarefasDaLista(JSON.parse(e.data).ids);
+    });
+    
+    fonte.addEventListener('reset', agendarRecarregamento);
+    
+    window.addEventListener('beforeunload', () => fonte.close());
+}
+
+// ========================================
+// FILTRAR TAREFAS (NO SERVIDOR)
+// ========================================
+async function filtrarTarefas() {
+    const filtro = document.getElementById('filtro').value;
+    
+    console.log(`🔍 Filtrando por: ${filtro}`);
+    
+    const contador = await carregarTarefas(true);
+    
     console.log(`📋 Mostrando ${contador} tarefas`);
     
     // Mostrar mensagem se não houver tarefas
@@ -254,42 +433,6 @@ function adicionarAnimacoes() {
     });
 }
 
-// ========================================
-// ESTATÍSTICAS DINÂMICAS
-// ========================================
-function atualizarEstatisticas() {
-    const tarefas = document.querySelectorAll('.task-item');
-    const stats = {
-        total: tarefas.length,
-        pendente: 0,
-        andamento: 0,
-        concluida: 0
-    };
-    
-    tarefas.forEach(tarefa => {
-        const status = tarefa.dataset.status;
-        if (stats.hasOwnProperty(status)) {
-            stats[status]++;
-        }
-    });
-    
-    // Atualizar elementos de estatística se existirem
-    const statElements = {
-        total: document.querySelector('.stat-item:nth-child(1) .stat-number'),
-        pendente: document.querySelector('.stat-item:nth-child(2) .stat-number'),
-        andamento: document.querySelector('.stat-item:nth-child(3) .stat-number'),
-        concluida: document.querySelector('.stat-item:nth-child(4) .stat-number')
-    };
-    
-    Object.keys(statElements).forEach(key => {
-        if (statElements[key]) {
-            statElements[key].textContent = stats[key];
-        }
-    });
-    
-    console.log('📊 Estatísticas:', stats);
-}
-
 // ========================================
 // BUSCA RÁPIDA
 // ========================================
@@ -308,23 +451,15 @@ function adicionarBuscaRapida() {
     header.appendChild(buscaContainer);
     
     const inputBusca = document.getElementById('busca-rapida');
+    let espera = null;
+    
+    // A busca roda no servidor; espera o usuário parar de digitar
     inputBusca.addEventListener('input', function() {
-        const termo = this.value.toLowerCase();
-        const tarefas = document.querySelectorAll('.task-item');
-        
-        tarefas.forEach(tarefa => {
-            const titulo = tarefa.querySelector('.task-title').textContent.toLowerCase();
-            const descricao = tarefa.querySelector('.task-description p');
-            const textoDescricao = descricao ? descricao.textContent.toLowerCase() : '';
-            
-            if (titulo.includes(termo) || textoDescricao.includes(termo)) {
-                tarefa.style.display = 'block';
-            } else {
-                tarefa.style.display = 'none';
-            }
-        });
-        
-        console.log(`🔍 Buscando por: "${termo}"`);
+        clearTimeout(espera);
+        espera = setTimeout(() => {
+            console.log(`🔍 Buscando por: "${inputBusca.value}"`);
+            filtrarTarefas();
+        }, 300);
     });
 }
 
@@ -387,9 +522,10 @@ document.addEventListener('DOMContentLoaded', function() {
         // Executar todas as funções de inicialização
         gerenciarAlertas();
         configurarFormulario();
-        atualizarEstatisticas();
         adicionarAnimacoes();
         adicionarBuscaRapida();
+        configurarCarregarMais();
+        configurarEventosTempoReal();
         melhorarConfirmacoes();
         salvarPreferencias();
         
@@ -404,7 +540,8 @@ document.addEventListener('DOMContentLoaded', function() {
         ✅ Excluir tarefas
         ✅ Filtrar tarefas
         ✅ Buscar tarefas
-        ✅ Estatísticas dinâmicas
+        ✅ Paginação sob demanda
+        ✅ Atualização em tempo real
         ✅ Animações suaves
         ✅ Design responsivo
         
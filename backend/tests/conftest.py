@@ -0,0 +1,59 @@
+# conftest.py - Fixtures dos testes: create_app("teste") com SQLite em memória
+#
+# Cada teste ganha uma aplicação nova, tabelas recém-criadas e os dados
+# padrão (usuário 1, categoria 1). Rodar de backend/:
+#   python -m pytest -q tests
+
+import os
+import sys
+from datetime import datetime, timedelta
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, criar_dados_iniciais
+from models import db, Tarefa
+
+@pytest.fixture
+def app(tmp_path):
+    aplicacao = create_app("teste")
+    aplicacao.config["ANEXOS_DIRETORIO"] = str(tmp_path / "anexos")
+    
+    with aplicacao.app_context():
+        db.create_all()
+        criar_dados_iniciais()
+        yield aplicacao
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+@pytest.fixture
+def criar_tarefas(app):
+    """Inserir `quantidade` tarefas direto na tabela (data_criacao crescente
+    de minuto em minuto); devolve os ids na ordem de inserção"""
+    inicio = datetime(2025, 1, 1)
+    
+    def criar(quantidade, **campos):
+        ids = db.session.execute(
+            Tarefa.__table__.insert().returning(Tarefa.tarefa_id),
+            [
+                {
+                    "titulo": f"Tarefa {i}",
+                    "usuario_id": 1,
+                    "categoria_id": 1,
+                    "status": "pendente",
+                    "prioridade": "media",
+                    "data_criacao": inicio + timedelta(minutes=i),
+                    "data_atualizacao": inicio + timedelta(minutes=i),
+                    **campos
+                }
+                for i in range(quantidade)
+            ]
+        ).scalars().all()
+        db.session.commit()
+        return ids
+    
+    return criar
@@ -0,0 +1,58 @@
+# test_alteracoes.py - /api/tarefas/changes: alterações e exclusões desde um cursor
+
+from models import db, TarefaExcluida
+
+def buscar(cliente, since=None, **parametros):
+    if since:
+        parametros["since"] = since
+    corpo = cliente.get("/api/tarefas/changes", query_string=parametros).get_json()
+    return corpo["data"], corpo["paginacao"]
+
+def test_sincronizacao_completa_em_paginas(cliente, criar_tarefas):
+    ids = criar_tarefas(5)
+    
+    vistos, since = [], None
+    while True:
+        itens, paginacao = buscar(cliente, since, limit=2)
+        vistos += [item["id"] for item in itens]
+        since = paginacao["proximo_cursor"]
+        if not paginacao["tem_mais"]:
+            break
+    
+    assert vistos == ids
+    
+    # Sem novidades: nada volta e o cursor não anda
+    itens, paginacao = buscar(cliente, since)
+    assert itens == []
+    assert paginacao["proximo_cursor"] == since
+
+def test_edicoes_e_exclusoes_chegam_em_ordem_depois_do_cursor(cliente, criar_tarefas):
+    editada, excluida, intacta = criar_tarefas(3)
+    _, paginacao = buscar(cliente)
+    since = paginacao["proximo_cursor"]
+    
+    assert cliente.patch(f"/api/tarefas/{editada}", json={"status": "concluida"}).status_code == 200
+    assert cliente.delete(f"/api/tarefas/{excluida}").status_code == 200
+    
+    itens, _ = buscar(cliente, since, fields="id,status")
+    
+    assert [(item["tipo"], item["id"]) for item in itens] == [("upsert", editada), ("delete", excluida)]
+    assert itens[0]["tarefa"] == {"id": editada, "status": "concluida"}
+    assert "tarefa" not in itens[1]
+    assert intacta not in [item["id"] for item in itens]
+    assert db.session.get(TarefaExcluida, excluida) is not None
+
+def test_tarefa_recriada_com_o_mesmo_id_sai_como_upsert_depois_do_delete(cliente, criar_tarefas):
+    tarefa_id, = criar_tarefas(1)
+    _, paginacao = buscar(cliente)
+    since = paginacao["proximo_cursor"]
+    
+    cliente.delete(f"/api/tarefas/{tarefa_id}")
+    cliente.post("/api/tarefas/bulk?upsert=1", json=[{"id": tarefa_id, "titulo": "De volta"}])
+    
+    itens, _ = buscar(cliente, since)
+    
+    assert [(item["tipo"], item["id"]) for item in itens] == [("delete", tarefa_id), ("upsert", tarefa_id)]
+
+def test_cursor_invalido_volta_400(cliente):
+    assert cliente.get("/api/tarefas/changes?since=lixo").status_code == 400
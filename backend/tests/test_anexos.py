@@ -0,0 +1,110 @@
+# test_anexos.py - upload em blocos, conteúdo deduplicado e download com Range
+
+import hashlib
+import io
+import os
+import time
+from armazenamento import caminho_absoluto, caminho_relativo, limpar_orfaos
+
+CONTEUDO = b"0123456789" * 1000
+
+def enviar(cliente, tarefa_id, conteudo=CONTEUDO, nome="dados.bin"):
+    return cliente.post(
+        f"/api/tarefas/{tarefa_id}/anexos?nome={nome}",
+        data=conteudo,
+        content_type="application/octet-stream"
+    )
+
+def test_mesmo_conteudo_e_gravado_uma_vez(app, cliente, criar_tarefas):
+    app.config["ANEXOS_BLOCO_BYTES"] = 1024
+    primeira, segunda = criar_tarefas(2)
+    
+    um = enviar(cliente, primeira)
+    dois = enviar(cliente, segunda, nome="copia.bin")
+    
+    assert um.status_code == dois.status_code == 201
+    um, dois = um.get_json()["data"], dois.get_json()["data"]
+    assert (um["duplicado"], dois["duplicado"]) == (False, True)
+    assert um["hash_conteudo"] == dois["hash_conteudo"] == hashlib.sha256(CONTEUDO).hexdigest()
+    assert um["tamanho_bytes"] == len(CONTEUDO)
+    
+    arquivos = [nome for _, _, nomes in os.walk(app.config["ANEXOS_DIRETORIO"]) for nome in nomes]
+    assert arquivos == [um["hash_conteudo"]]
+
+def envelhecer(caminho, segundos=7200):
+    antigo = time.time() - segundos
+    os.utime(caminho, (antigo, antigo))
+
+def test_arquivo_sem_anexo_so_sai_pelo_coletor_depois_da_carencia(app, cliente, criar_tarefas):
+    primeira, segunda = criar_tarefas(2)
+    um = enviar(cliente, primeira).get_json()["data"]
+    dois = enviar(cliente, segunda).get_json()["data"]
+    caminho = caminho_absoluto(caminho_relativo(um["hash_conteudo"]))
+    
+    assert cliente.delete(f"/api/anexos/{um['id_anexo']}").get_json()["data"] == {"id": um["id_anexo"]}
+    envelhecer(caminho)
+    assert limpar_orfaos() == 0
+    
+    # Nenhum anexo aponta mais para o arquivo, mas a rota não apaga nada
+    cliente.delete(f"/api/anexos/{dois['id_anexo']}")
+    assert os.path.exists(caminho)
+    
+    envelhecer(caminho, 60)
+    assert limpar_orfaos() == 0
+    envelhecer(caminho)
+    assert limpar_orfaos() == 1
+    assert not os.path.exists(caminho)
+
+def test_upload_deduplicado_renova_o_arquivo_antes_do_commit(app, cliente, criar_tarefas):
+    primeira, segunda = criar_tarefas(2)
+    um = enviar(cliente, primeira).get_json()["data"]
+    caminho = caminho_absoluto(caminho_relativo(um["hash_conteudo"]))
+    cliente.delete(f"/api/anexos/{um['id_anexo']}")
+    envelhecer(caminho)
+    
+    # O mesmo conteúdo chega de novo: o coletor não leva o arquivo
+    assert enviar(cliente, segunda).get_json()["data"]["duplicado"] is True
+    assert limpar_orfaos() == 0
+    assert os.path.exists(caminho)
+
+def test_download_completo_parcial_e_condicional(cliente, criar_tarefas):
+    tarefa_id, = criar_tarefas(1)
+    anexo = enviar(cliente, tarefa_id).get_json()["data"]
+    url = f"/api/anexos/{anexo['id_anexo']}/download"
+    
+    completo = cliente.get(url)
+    assert completo.status_code == 200
+    assert completo.data == CONTEUDO
+    assert "dados.bin" in completo.headers["Content-Disposition"]
+    
+    parcial = cliente.get(url, headers={"Range": "bytes=10-19"})
+    assert parcial.status_code == 206
+    assert parcial.data == CONTEUDO[10:20]
+    assert parcial.headers["Content-Range"] == f"bytes 10-19/{len(CONTEUDO)}"
+    
+    repetido = cliente.get(url, headers={"If-None-Match": completo.headers["ETag"]})
+    assert repetido.status_code == 304
+
+def test_multipart_e_nome_sem_diretorios(cliente, criar_tarefas):
+    tarefa_id, = criar_tarefas(1)
+    
+    resposta = cliente.post(
+        f"/api/tarefas/{tarefa_id}/anexos",
+        data={"arquivo": (io.BytesIO(b"conteudo"), "../../etc/notas.txt")},
+        content_type="multipart/form-data"
+    )
+    
+    dados = resposta.get_json()["data"]
+    assert resposta.status_code == 201
+    assert dados["nome_original"] == "notas.txt"
+    assert dados["tipo_mime"] == "text/plain"
+
+def test_upload_grande_demais_e_tarefa_inexistente(app, cliente, criar_tarefas):
+    tarefa_id, = criar_tarefas(1)
+    app.config["ANEXOS_TAMANHO_MAXIMO"] = 100
+    
+    assert enviar(cliente, tarefa_id).status_code == 413
+    assert enviar(cliente, 999999, conteudo=b"x").status_code == 404
+    
+    temporarios = os.path.join(app.config["ANEXOS_DIRETORIO"], "tmp")
+    assert not os.path.isdir(temporarios) or os.listdir(temporarios) == []
@@ -0,0 +1,135 @@
+# test_armazenamento.py - tamanho legível sem efeito colateral e totais de anexos
+
+from sqlalchemy import event
+import armazenamento
+from models import db, Anexo, Projeto, Usuario, TotalArmazenamento, formatar_tamanho, garantir_max_queries
+
+def adicionar_anexo(tarefa_id, tamanho, hash_conteudo, ativo=True):
+    """Anexo na sessão, sem commit"""
+    anexo = Anexo(
+        nome_arquivo=hash_conteudo, nome_original=f"{hash_conteudo}.bin",
+        tipo_mime="application/octet-stream", tamanho_bytes=tamanho,
+        caminho_arquivo=hash_conteudo, hash_conteudo=hash_conteudo,
+        usuario_id=1, tarefa_id=tarefa_id, ativo=ativo
+    )
+    db.session.add(anexo)
+    return anexo
+
+def anexar(tarefa_id, tamanho, hash_conteudo, ativo=True):
+    anexo = adicionar_anexo(tarefa_id, tamanho, hash_conteudo, ativo)
+    db.session.commit()
+    return anexo
+
+def total_gravado():
+    db.session.expire_all()
+    total = db.session.get(TotalArmazenamento, armazenamento.CHAVE_TOTAL)
+    return (total.total_anexos, total.total_bytes)
+
+def total_recalculado():
+    armazenamento.recalcular_total(db.session)
+    return total_gravado()
+
+def test_tamanho_legivel_nao_altera_tamanho_bytes(app, criar_tarefas):
+    tarefa_id, = criar_tarefas(1)
+    anexo = anexar(tarefa_id, 3 * 1024 * 1024, "a" * 64)
+    
+    assert anexo.tamanho_legivel == "3.0 MB"
+    assert anexo.tamanho_legivel == "3.0 MB"
+    assert anexo.tamanho_bytes == 3 * 1024 * 1024
+    assert formatar_tamanho(0) == "0 B"
+    assert formatar_tamanho(1536) == "1.5 KB"
+
+def test_totais_por_usuario_tarefa_e_projeto_em_uma_consulta(app, criar_tarefas):
+    projeto = Projeto(nome="Projeto")
+    db.session.add(projeto)
+    db.session.commit()
+    no_projeto, = criar_tarefas(1, projeto_id=projeto.id_projeto)
+    solta, = criar_tarefas(1)
+    anexar(no_projeto, 100, "a" * 64)
+    anexar(no_projeto, 50, "b" * 64)
+    anexar(solta, 400, "c" * 64)
+    anexar(solta, 999, "d" * 64, ativo=False)
+    
+    with garantir_max_queries(1):
+        totais = armazenamento.calcular_totais()
+    
+    assert totais["usuario"] == [{"id": 1, "total_anexos": 3, "total_bytes": 550}]
+    assert totais["tarefa"] == [
+        {"id": solta, "total_anexos": 1, "total_bytes": 400},
+        {"id": no_projeto, "total_anexos": 2, "total_bytes": 150},
+    ]
+    assert totais["projeto"] == [{"id": projeto.id_projeto, "total_anexos": 2, "total_bytes": 150}]
+    assert [linha["id"] for linha in armazenamento.calcular_totais(limite_tarefas=1)["tarefa"]] == [solta]
+
+def test_total_geral_acompanha_inclusao_desativacao_e_exclusoes(cliente, criar_tarefas):
+    primeira, segunda = criar_tarefas(2)
+    anexar(primeira, 100, "a" * 64)
+    anexo = anexar(segunda, 300, "b" * 64)
+    anexar(segunda, 20, "c" * 64)
+    assert total_gravado() == (3, 420)
+    
+    anexo.ativo = False
+    db.session.commit()
+    assert total_gravado() == (2, 120)
+    
+    # DELETE ... RETURNING da tarefa desconta os anexos dela
+    assert cliente.delete(f"/api/tarefas/{primeira}").status_code == 200
+    assert total_gravado() == (1, 20)
+    assert total_recalculado() == (1, 20)
+    
+    db.session.delete(db.session.get(Usuario, 1))
+    db.session.commit()
+    assert total_gravado() == (0, 0)
+
+def test_total_geral_e_gravado_uma_vez_no_commit(app, criar_tarefas):
+    tarefa_id, = criar_tarefas(1)
+    anexar(tarefa_id, 10, "a" * 64)
+    comandos = []
+    
+    def registrar(conexao, cursor, comando, *args):
+        comandos.append(comando)
+    
+    event.listen(db.engine, "before_cursor_execute", registrar)
+    try:
+        for letra, tamanho in (("b", 100), ("c", 200)):
+            adicionar_anexo(tarefa_id, tamanho, letra * 64)
+            db.session.flush()
+        # Sem flush explícito: entra no mesmo UPSERT do commit
+        db.session.get(Anexo, 1).ativo = False
+        db.session.commit()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", registrar)
+    
+    upserts = [i for i, comando in enumerate(comandos) if "armazenamento_total" in comando]
+    assert len(upserts) == 1
+    assert not any(comando.startswith(("INSERT INTO anexos", "UPDATE anexos"))
+                   for comando in comandos[upserts[0] + 1:])
+    assert total_gravado() == (2, 300)
+
+def test_rollback_e_savepoint_desfeito_nao_mexem_no_total(app, criar_tarefas):
+    tarefa_id, = criar_tarefas(1)
+    anexar(tarefa_id, 10, "a" * 64)
+    
+    adicionar_anexo(tarefa_id, 100, "b" * 64)
+    db.session.flush()
+    db.session.rollback()
+    assert total_gravado() == (1, 10)
+    
+    adicionar_anexo(tarefa_id, 100, "c" * 64)
+    db.session.flush()
+    with db.session.begin_nested() as savepoint:
+        adicionar_anexo(tarefa_id, 100, "d" * 64)
+        db.session.flush()
+        savepoint.rollback()
+    db.session.commit()
+    assert total_gravado() == (2, 110)
+
+def test_api_armazenamento(cliente, criar_tarefas):
+    tarefa_id, = criar_tarefas(1)
+    anexar(tarefa_id, 2048, "a" * 64)
+    
+    dados = cliente.get("/api/armazenamento").get_json()["data"]
+    
+    assert dados["total"]["total_bytes"] == 2048
+    assert dados["total"]["total_legivel"] == "2.0 KB"
+    assert dados["por_tarefa"] == [{"id": tarefa_id, "total_anexos": 1, "total_bytes": 2048}]
@@ -0,0 +1,53 @@
+# test_arvore.py - subárvore de tarefas (WITH RECURSIVE) e totais ponderados
+
+import pytest
+from models import db, Tarefa, garantir_max_queries
+
+@pytest.fixture
+def arvore(app):
+    """raiz -> a (10h, 50%) e b (sem estimativa, 100%) -> c (2h, 25%)"""
+    raiz = Tarefa(titulo="Raiz", usuario_id=1, categoria_id=1)
+    db.session.add(raiz)
+    db.session.flush()
+    a = Tarefa(titulo="A", usuario_id=1, categoria_id=1, tarefa_pai_id=raiz.tarefa_id,
+               estimativa_horas=10, horas_trabalhadas=4, progresso=50)
+    b = Tarefa(titulo="B", usuario_id=1, categoria_id=1, tarefa_pai_id=raiz.tarefa_id,
+               horas_trabalhadas=1, progresso=100)
+    db.session.add_all([a, b])
+    db.session.flush()
+    c = Tarefa(titulo="C", usuario_id=1, categoria_id=1, tarefa_pai_id=b.tarefa_id,
+               estimativa_horas=2, horas_trabalhadas=2, progresso=25)
+    db.session.add(c)
+    db.session.commit()
+    return {"raiz": raiz.tarefa_id, "a": a.tarefa_id, "b": b.tarefa_id, "c": c.tarefa_id}
+
+def test_arvore_completa_em_uma_consulta_com_totais(arvore):
+    with garantir_max_queries(1):
+        raiz = Tarefa.arvore(arvore["raiz"])
+    
+    a, b = raiz["subtarefas"]
+    assert (a["id"], b["id"]) == (arvore["a"], arvore["b"])
+    assert [no["id"] for no in b["subtarefas"]] == [arvore["c"]]
+    assert b["subtarefas"][0]["profundidade"] == 2
+    
+    # b herda a estimativa e o progresso de c; a raiz pondera a (10h) e b (2h)
+    assert b["total"] == {"progresso": 25.0, "estimativa_horas": 2.0, "horas_trabalhadas": 3.0}
+    assert raiz["total"] == {"progresso": 45.8, "estimativa_horas": 12.0, "horas_trabalhadas": 7.0}
+
+def test_profundidade_limita_os_niveis_e_os_totais(cliente, arvore):
+    resposta = cliente.get(f"/api/tarefas/{arvore['raiz']}/arvore?profundidade=1")
+    raiz = resposta.get_json()["data"]
+    
+    assert resposta.status_code == 200
+    assert all(no["subtarefas"] == [] for no in raiz["subtarefas"])
+    # Sem c, b pesa 1 com 100%: (50 * 10 + 100 * 1) / 11
+    assert raiz["total"]["progresso"] == 54.5
+
+def test_caminho_da_raiz_ate_a_tarefa(cliente, arvore):
+    dados = cliente.get(f"/api/tarefas/{arvore['c']}/arvore?caminho=1").get_json()["data"]
+    
+    assert [no["id"] for no in dados["caminho"]] == [arvore["raiz"], arvore["b"], arvore["c"]]
+
+def test_tarefa_inexistente_e_profundidade_invalida(cliente, arvore):
+    assert cliente.get("/api/tarefas/999999/arvore").status_code == 404
+    assert cliente.get(f"/api/tarefas/{arvore['raiz']}/arvore?profundidade=-1").status_code == 400
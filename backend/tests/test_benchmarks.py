@@ -0,0 +1,61 @@
+# test_benchmarks.py - gerador de dados sintéticos e comparação de resultados
+
+import hashlib
+import os
+import sys
+import pytest
+from sqlalchemy import select
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "benchmarks"))
+
+import armazenamento
+import resumos
+from models import db, Tarefa, Comentario, Anexo
+from semear import semear
+from comparar import comparar
+
+def semear_do_zero(semente):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    totais = semear(tarefas=400, lote=150, semente=semente, progresso=False)
+    linhas = db.session.execute(
+        select(Tarefa.tarefa_id, Tarefa.titulo, Tarefa.status, Tarefa.tarefa_pai_id, Tarefa.projeto_id)
+        .order_by(Tarefa.tarefa_id)
+    ).all()
+    return totais, hashlib.sha256(repr(linhas).encode()).hexdigest()
+
+def test_mesma_semente_gera_os_mesmos_dados(app):
+    totais, assinatura = semear_do_zero(7)
+    _, repetida = semear_do_zero(7)
+    _, outra = semear_do_zero(8)
+    
+    assert assinatura == repetida
+    assert assinatura != outra
+    assert totais["tarefas"] == 400
+
+def test_totais_mantidos_batem_com_as_tabelas(app):
+    totais, _ = semear_do_zero(7)
+    
+    assert db.session.query(Tarefa).count() == totais["tarefas"]
+    assert db.session.query(Comentario).count() == totais["comentarios"]
+    assert armazenamento.obter_total().total_anexos == db.session.query(Anexo).count() == totais["anexos"]
+    assert resumos.reconciliar_resumos(corrigir=False) == []
+    # Subtarefas ficam no projeto do pai
+    filhas = db.session.query(Tarefa).filter(Tarefa.tarefa_pai_id.is_not(None)).all()
+    assert filhas
+    assert all(filha.projeto_id == db.session.get(Tarefa, filha.tarefa_pai_id).projeto_id for filha in filhas)
+
+def resultado(**valores):
+    return {"suite": "micro", "commit": "x", "banco": "sqlite", "parametros": {}, "resultados": valores}
+
+def test_comparar_marca_so_as_pioras_acima_do_limiar(capsys):
+    antes = resultado(listar={"p50_ms": 10.0, "n": 100}, carga={"vazao": 200.0})
+    depois = resultado(listar={"p50_ms": 10.5, "n": 5}, carga={"vazao": 150.0})
+    
+    assert comparar(antes, depois, limiar=10) == 1
+    saida = capsys.readouterr().out
+    assert "carga.vazao" in saida and "❌" in saida
+    assert "listar.n" not in saida
+    
+    assert comparar(antes, resultado(listar={"p50_ms": 5.0}, carga={"vazao": 400.0}), limiar=10) == 0
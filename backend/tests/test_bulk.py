@@ -0,0 +1,101 @@
+# test_bulk.py - criação, edição e exclusão em lote (JSON e NDJSON)
+
+import json
+from models import db, Tarefa
+
+def test_criar_em_lotes_guarda_a_ordem_e_isola_itens_invalidos(cliente):
+    itens = [
+        {"titulo": "Alfa", "prioridade": "alta"},
+        {"titulo": ""},
+        {"titulo": "Beta", "status": "andamento"},
+        {"titulo": "Gama", "prioridade": "urgente"},
+        {"titulo": "Delta"},
+    ]
+    
+    resposta = cliente.post("/api/tarefas/bulk?lote=2", json=itens)
+    dados = resposta.get_json()["data"]
+    
+    assert resposta.status_code == 200
+    assert (dados["sucessos"], dados["falhas"]) == (3, 2)
+    assert [item["indice"] for item in dados["itens"]] == [0, 1, 2, 3, 4]
+    assert [item["sucesso"] for item in dados["itens"]] == [True, False, True, False, True]
+    
+    criadas = {item["id"]: itens[item["indice"]]["titulo"] for item in dados["itens"] if item["sucesso"]}
+    gravadas = dict(db.session.query(Tarefa.tarefa_id, Tarefa.titulo).all())
+    assert gravadas == criadas
+
+def test_ndjson_com_linha_quebrada_so_falha_aquele_item(cliente):
+    corpo = "\n".join([json.dumps({"titulo": "Primeira"}), "{quebrado", json.dumps({"titulo": "Segunda"})])
+    
+    resposta = cliente.post("/api/tarefas/bulk", data=corpo, content_type="application/x-ndjson")
+    itens = resposta.get_json()["data"]["itens"]
+    
+    assert [item["sucesso"] for item in itens] == [True, False, True]
+    assert itens[1]["erros"] == ["Linha NDJSON inválida"]
+
+def test_upsert_atualiza_existentes_e_cria_novas(cliente, criar_tarefas):
+    existente, = criar_tarefas(1)
+    
+    resposta = cliente.post("/api/tarefas/bulk?upsert=1", json=[
+        {"id": existente, "titulo": "Renomeada", "status": "concluida"},
+        {"titulo": "Nova"},
+    ])
+    
+    assert resposta.get_json()["data"]["sucessos"] == 2
+    db.session.expire_all()
+    assert db.session.get(Tarefa, existente).titulo == "Renomeada"
+    assert db.session.query(Tarefa).count() == 2
+
+def test_upsert_com_id_novo_nao_colide_com_a_proxima_criacao(cliente, criar_tarefas):
+    existente, = criar_tarefas(1)
+    explicito = existente + 10
+    
+    cliente.post("/api/tarefas/bulk?upsert=1", json=[{"id": explicito, "titulo": "Id escolhido"}])
+    resposta = cliente.post("/api/tarefas/bulk", json=[{"titulo": "Id da sequência"}])
+    item, = resposta.get_json()["data"]["itens"]
+    
+    assert item["sucesso"]
+    assert item["id"] > explicito
+
+def test_editar_em_lote_e_parcial_e_reporta_ids_inexistentes(cliente, criar_tarefas):
+    ids = criar_tarefas(3, prioridade="baixa")
+    
+    resposta = cliente.put("/api/tarefas/bulk", json=[
+        {"id": ids[0], "status": "concluida"},
+        {"id": ids[1], "prioridade": "alta"},
+        {"id": 999999, "titulo": "Fantasma"},
+        {"titulo": "Sem id"},
+    ])
+    itens = resposta.get_json()["data"]["itens"]
+    
+    assert [item["sucesso"] for item in itens] == [True, True, False, False]
+    assert itens[2]["erros"] == ["Tarefa não encontrada"]
+    db.session.expire_all()
+    primeira, segunda, terceira = (db.session.get(Tarefa, tarefa_id) for tarefa_id in ids)
+    assert (primeira.status, primeira.prioridade, primeira.titulo) == ("concluida", "baixa", "Tarefa 0")
+    assert (segunda.status, segunda.prioridade) == ("pendente", "alta")
+    assert terceira.prioridade == "baixa"
+
+def test_excluir_em_lote_aceita_ids_e_objetos(cliente, criar_tarefas):
+    ids = criar_tarefas(4)
+    
+    resposta = cliente.delete("/api/tarefas/bulk?lote=2", json=[ids[0], {"id": ids[1]}, 999999])
+    itens = resposta.get_json()["data"]["itens"]
+    
+    assert [item["sucesso"] for item in itens] == [True, True, False]
+    assert sorted(tarefa_id for tarefa_id, in db.session.query(Tarefa.tarefa_id)) == ids[2:]
+
+def test_booleano_nao_vale_como_id(cliente, criar_tarefas):
+    primeira, = criar_tarefas(1)
+    assert primeira == 1
+    
+    resposta = cliente.delete("/api/tarefas/bulk", json=[True, {"id": True}])
+    itens = resposta.get_json()["data"]["itens"]
+    
+    assert [item["erros"] for item in itens] == [["Item sem id válido"]] * 2
+    assert db.session.get(Tarefa, primeira) is not None
+
+def test_corpo_que_nao_e_lista_volta_400(cliente):
+    resposta = cliente.post("/api/tarefas/bulk", json={"titulo": "solto"})
+    
+    assert resposta.status_code == 400
@@ -0,0 +1,46 @@
+# test_cli.py - inicialização preguiçosa: tabelas e dados padrão só pelos comandos
+
+import pytest
+from sqlalchemy import inspect
+from app import create_app
+from models import db, Usuario, Categoria
+
+def executar(aplicacao, *args):
+    """Rodar `flask <args>`; o comando flask empilha o contexto da
+    aplicação sozinho, o runner de teste não"""
+    with aplicacao.app_context():
+        resultado = aplicacao.test_cli_runner().invoke(args=list(args))
+    assert resultado.exit_code == 0, resultado.output
+    return resultado
+
+@pytest.fixture
+def app_vazia():
+    """Aplicação sem create_all nem dados padrão"""
+    aplicacao = create_app("teste")
+    yield aplicacao
+    with aplicacao.app_context():
+        db.session.remove()
+        db.drop_all()
+
+def test_create_app_nao_toca_no_banco(app_vazia):
+    with app_vazia.app_context():
+        assert not inspect(db.engine).has_table("tarefas")
+
+def test_db_init_cria_tabelas_e_dados_padrao(app_vazia):
+    executar(app_vazia, "db", "init")
+    
+    with app_vazia.app_context():
+        assert inspect(db.engine).has_table("tarefas")
+        assert Usuario.query.count() == 1
+        assert Categoria.query.count() == 1
+
+def test_db_init_sem_seed_e_seed_idempotente(app_vazia):
+    executar(app_vazia, "db", "init", "--sem-seed")
+    with app_vazia.app_context():
+        assert Usuario.query.count() == 0
+    
+    for _ in range(2):
+        executar(app_vazia, "seed")
+    with app_vazia.app_context():
+        assert Usuario.query.count() == 1
+        assert Categoria.query.count() == 1
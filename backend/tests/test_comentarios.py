@@ -0,0 +1,62 @@
+# test_comentarios.py - discussão da tarefa em árvore, paginada pelo primeiro nível
+
+from datetime import datetime, timedelta
+import pytest
+from models import db, Comentario, garantir_max_queries
+
+@pytest.fixture
+def discussao(app, criar_tarefas):
+    """Três comentários de primeiro nível; o primeiro com respostas em
+    dois níveis e o segundo com uma resposta"""
+    tarefa_id, = criar_tarefas(1)
+    inicio = datetime(2025, 2, 1)
+    
+    def comentar(texto, minutos, pai=None):
+        comentario = Comentario(
+            tarefa_id=tarefa_id, usuario_id=1, comentario=texto,
+            comentario_pai_id=pai, data_criacao=inicio + timedelta(minutes=minutos)
+        )
+        db.session.add(comentario)
+        db.session.flush()
+        return comentario.id_comentario
+    
+    primeiro = comentar("primeiro", 0)
+    segundo = comentar("segundo", 1)
+    comentar("terceiro", 2)
+    resposta = comentar("resposta ao primeiro", 3, pai=primeiro)
+    comentar("resposta da resposta", 4, pai=resposta)
+    comentar("resposta ao segundo", 5, pai=segundo)
+    db.session.commit()
+    return tarefa_id
+
+def test_discussao_inteira_em_uma_consulta(discussao):
+    with garantir_max_queries(1):
+        comentarios, tem_mais, _ = Comentario.discussao(discussao)
+    
+    assert not tem_mais
+    assert [c["comentario"] for c in comentarios] == ["primeiro", "segundo", "terceiro"]
+    primeiro = comentarios[0]
+    assert primeiro["total_respostas"] == 1
+    assert primeiro["respostas"][0]["comentario"] == "resposta ao primeiro"
+    assert primeiro["respostas"][0]["respostas"][0]["comentario"] == "resposta da resposta"
+    assert comentarios[2]["respostas"] == []
+
+def test_paginacao_pelo_primeiro_nivel(cliente, discussao):
+    corpo = cliente.get(f"/api/tarefas/{discussao}/comentarios?limit=2").get_json()
+    
+    assert [c["comentario"] for c in corpo["data"]] == ["primeiro", "segundo"]
+    assert corpo["data"][1]["respostas"][0]["comentario"] == "resposta ao segundo"
+    assert corpo["paginacao"]["tem_mais"]
+    
+    cursor = corpo["paginacao"]["proximo_cursor"]
+    corpo = cliente.get(f"/api/tarefas/{discussao}/comentarios?limit=2&after={cursor}").get_json()
+    assert [c["comentario"] for c in corpo["data"]] == ["terceiro"]
+    assert not corpo["paginacao"]["tem_mais"]
+
+def test_tarefa_sem_comentarios_e_tarefa_inexistente(cliente, criar_tarefas):
+    tarefa_id, = criar_tarefas(1)
+    
+    resposta = cliente.get(f"/api/tarefas/{tarefa_id}/comentarios")
+    assert resposta.status_code == 200
+    assert resposta.get_json()["data"] == []
+    assert cliente.get("/api/tarefas/999999/comentarios").status_code == 404
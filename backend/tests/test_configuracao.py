@@ -0,0 +1,73 @@
+# test_configuracao.py - fábrica da aplicação, configurações e pool instrumentado
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app import create_app
+from configuracao import ConfigProducao, ConfigTeste, obter_configuracao
+from conexoes import QueuePoolInstrumentado, metricas_pool, opcoes_engine
+
+def test_configuracao_pelo_nome_ou_app_config(monkeypatch):
+    assert obter_configuracao("teste") is ConfigTeste
+    
+    monkeypatch.setenv("APP_CONFIG", "producao")
+    assert obter_configuracao() is ConfigProducao
+    
+    with pytest.raises(ValueError):
+        obter_configuracao("homologacao")
+
+def test_sqlite_usa_o_pool_padrao():
+    assert opcoes_engine({"SQLALCHEMY_DATABASE_URI": "sqlite://"}) == {}
+
+def test_postgresql_usa_pool_instrumentado_e_statement_timeout():
+    config = {
+        "SQLALCHEMY_DATABASE_URI": "postgresql+psycopg2://u:s@localhost/banco",
+        "DB_POOL_SIZE": 8,
+        "DB_MAX_OVERFLOW": 2,
+        "DB_POOL_TIMEOUT": 5,
+        "DB_POOL_RECYCLE": 600,
+        "DB_POOL_PRE_PING": True,
+        "DB_STATEMENT_TIMEOUT_MS": 15000
+    }
+    
+    opcoes = opcoes_engine(config)
+    
+    assert opcoes["poolclass"] is QueuePoolInstrumentado
+    assert (opcoes["pool_size"], opcoes["max_overflow"], opcoes["pool_timeout"]) == (8, 2, 5)
+    assert opcoes["connect_args"] == {"options": "-c statement_timeout=15000"}
+    
+    sem_timeout = opcoes_engine(dict(config, DB_STATEMENT_TIMEOUT_MS=0))
+    assert "connect_args" not in sem_timeout
+
+def test_apps_independentes_por_configuracao():
+    producao = create_app(ConfigProducao)
+    teste = create_app("teste")
+    
+    assert producao.config["DB_POOL_SIZE"] == ConfigProducao.DB_POOL_SIZE
+    assert producao.config["SQLALCHEMY_ENGINE_OPTIONS"]["poolclass"] is QueuePoolInstrumentado
+    assert teste.config["TESTING"] is True
+    assert teste.config["SQLALCHEMY_ENGINE_OPTIONS"] == {}
+    assert "rotas.api_listar_tarefas" in producao.view_functions
+
+def test_pool_conta_checkouts_e_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=QueuePoolInstrumentado,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05
+    )
+    antes = metricas_pool()
+    
+    try:
+        with engine.connect():
+            assert metricas_pool()["em_uso"] >= 1
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+    finally:
+        engine.dispose()
+    
+    depois = metricas_pool()
+    assert depois["checkouts"] == antes["checkouts"] + 1
+    assert depois["timeouts"] == antes["timeouts"] + 1
+    assert depois["espera_maxima_segundos"] >= 0
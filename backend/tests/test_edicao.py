@@ -0,0 +1,80 @@
+# test_edicao.py - PATCH/DELETE de uma tarefa em um comando, com controle de versão
+
+from sqlalchemy import event
+from models import db, Tarefa
+
+def comandos_sql(funcao):
+    comandos = []
+    
+    def registrar(conexao, cursor, comando, *args):
+        comandos.append(comando)
+    
+    event.listen(db.engine, "before_cursor_execute", registrar)
+    try:
+        resultado = funcao()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", registrar)
+    return resultado, comandos
+
+def test_patch_e_um_update_returning_sem_select_antes(cliente, criar_tarefas):
+    tarefa_id, = criar_tarefas(1)
+    
+    resposta, comandos = comandos_sql(
+        lambda: cliente.patch(f"/api/tarefas/{tarefa_id}", json={"titulo": "Novo título"})
+    )
+    
+    assert resposta.status_code == 200
+    dados = resposta.get_json()["data"]
+    assert (dados["titulo"], dados["versao"], dados["prioridade"]) == ("Novo título", 2, "media")
+    escritas = [c for c in comandos if "tarefas" in c and not c.startswith("INSERT INTO versoes")]
+    assert escritas[0].startswith("UPDATE tarefas") and "RETURNING" in escritas[0]
+    assert not any(c.startswith("SELECT") and "FROM tarefas" in c for c in comandos)
+
+def test_versao_antiga_volta_409_com_a_versao_atual(cliente, criar_tarefas):
+    tarefa_id, = criar_tarefas(1)
+    
+    primeira = cliente.patch(f"/api/tarefas/{tarefa_id}", json={"status": "andamento", "versao": 1})
+    atrasada = cliente.patch(f"/api/tarefas/{tarefa_id}", json={"status": "concluida", "versao": 1})
+    
+    assert primeira.status_code == 200
+    assert atrasada.status_code == 409
+    assert atrasada.get_json()["data"] == {"versao_atual": 2}
+    db.session.expire_all()
+    assert db.session.get(Tarefa, tarefa_id).status == "andamento"
+    
+    em_dia = cliente.patch(f"/api/tarefas/{tarefa_id}", json={"status": "concluida", "versao": 2})
+    assert em_dia.get_json()["data"]["versao"] == 3
+
+def test_upsert_em_lote_sobe_a_versao_e_invalida_a_copia_antiga(cliente, criar_tarefas):
+    tarefa_id, = criar_tarefas(1)
+    
+    cliente.post("/api/tarefas/bulk?upsert=1", json=[{"id": tarefa_id, "titulo": "Pelo lote"}])
+    db.session.expire_all()
+    assert db.session.get(Tarefa, tarefa_id).versao == 2
+    
+    atrasada = cliente.patch(f"/api/tarefas/{tarefa_id}", json={"titulo": "Cópia antiga", "versao": 1})
+    assert atrasada.status_code == 409
+    assert atrasada.get_json()["data"] == {"versao_atual": 2}
+
+def test_validacao_e_tarefa_inexistente(cliente, criar_tarefas):
+    tarefa_id, = criar_tarefas(1)
+    
+    assert cliente.patch(f"/api/tarefas/{tarefa_id}", json={"prioridade": "urgente"}).status_code == 400
+    assert cliente.patch(f"/api/tarefas/{tarefa_id}", json={}).status_code == 400
+    assert cliente.patch(f"/api/tarefas/{tarefa_id}", json={"titulo": "x" * 5, "versao": "dois"}).status_code == 400
+    assert cliente.patch("/api/tarefas/999999", json={"titulo": "Ninguém"}).status_code == 404
+    assert cliente.patch("/api/tarefas/999999", json={"titulo": "Ninguém", "versao": 1}).status_code == 404
+
+def test_delete_devolve_o_titulo_e_desliga_subtarefas(cliente, criar_tarefas):
+    pai, = criar_tarefas(1, titulo="Tarefa pai")
+    filha, = criar_tarefas(1, tarefa_pai_id=pai)
+    
+    resposta = cliente.delete(f"/api/tarefas/{pai}")
+    
+    assert resposta.status_code == 200
+    assert "Tarefa pai" in resposta.get_json()["message"]
+    db.session.expire_all()
+    restante = db.session.get(Tarefa, filha)
+    assert restante.tarefa_pai_id is None
+    assert restante.versao == 2
+    assert cliente.delete(f"/api/tarefas/{pai}").status_code == 404
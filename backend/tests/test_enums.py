@@ -0,0 +1,45 @@
+# test_enums.py - status e prioridade como enum (ENUM nativo no PostgreSQL)
+
+import pytest
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import StatementError
+from models import db, Projeto, Tarefa, StatusTarefa, StatusProjeto, Prioridade
+
+def test_colunas_usam_os_valores_dos_enums():
+    colunas = Tarefa.__table__.c
+    
+    assert colunas.status.type.enums == StatusTarefa.valores()
+    assert colunas.prioridade.type.enums == Prioridade.valores()
+    assert Projeto.__table__.c.status.type.enums == StatusProjeto.valores()
+    # Um tipo prioridade só, para tarefas e projetos
+    assert Projeto.__table__.c.prioridade.type is colunas.prioridade.type
+
+def test_tipo_nativo_no_postgresql_e_texto_no_sqlite():
+    colunas = Tarefa.__table__.c
+    
+    assert colunas.status.type.compile(dialect=postgresql.dialect()) == "status_tarefa"
+    assert colunas.prioridade.type.compile(dialect=postgresql.dialect()) == "prioridade"
+    assert colunas.status.type.compile(dialect=sqlite.dialect()).startswith("VARCHAR")
+
+def test_valor_fora_do_enum_e_recusado_antes_do_banco(app):
+    db.session.add(Tarefa(titulo="Inválida", usuario_id=1, categoria_id=1, status="feita"))
+    
+    with pytest.raises(StatementError):
+        db.session.flush()
+    db.session.rollback()
+
+def test_membros_do_enum_e_strings_se_equivalem(cliente, criar_tarefas):
+    concluida, = criar_tarefas(1, status=StatusTarefa.CONCLUIDA, prioridade=Prioridade.CRITICA)
+    criar_tarefas(1)
+    
+    filtradas = Tarefa.query.filter(Tarefa.status == StatusTarefa.CONCLUIDA).all()
+    assert [tarefa.tarefa_id for tarefa in filtradas] == [concluida]
+    assert filtradas[0].status == "concluida"
+    
+    dados = cliente.get(f"/api/tarefas/{concluida}").get_json()["data"]
+    assert (dados["status"], dados["prioridade"]) == ("concluida", "critica")
+    
+    # Filtros aceitam todos os membros; a escrita pela API, só o subconjunto
+    resposta = cliente.get("/api/tarefas?status=cancelada&prioridade=critica")
+    assert resposta.status_code == 200
+    assert cliente.patch(f"/api/tarefas/{concluida}", json={"status": "cancelada"}).status_code == 400
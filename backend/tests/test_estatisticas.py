@@ -0,0 +1,49 @@
+# test_estatisticas.py - /api/status e get_estatisticas em uma consulta agregada
+
+from models import db, Comentario, garantir_max_queries, get_estatisticas
+from estatisticas import calcular_estatisticas, obter_estatisticas, invalidar_cache_estatisticas
+
+def test_contagens_por_status_e_prioridade(app, criar_tarefas):
+    criar_tarefas(3, status="pendente", prioridade="alta")
+    criar_tarefas(2, status="concluida", prioridade="baixa")
+    ids = criar_tarefas(1, status="cancelada", prioridade="critica")
+    db.session.add(Comentario(tarefa_id=ids[0], usuario_id=1, comentario="ok"))
+    db.session.commit()
+    
+    with garantir_max_queries(1):
+        estatisticas = calcular_estatisticas()
+    
+    assert estatisticas["total_tarefas"] == 6
+    assert estatisticas["total_usuarios"] == 1
+    assert estatisticas["total_categorias"] == 1
+    assert estatisticas["total_comentarios"] == 1
+    assert estatisticas["por_status"] == {"pendente": 3, "andamento": 0, "concluida": 2, "cancelada": 1}
+    assert estatisticas["por_prioridade"] == {"baixa": 2, "media": 0, "alta": 3, "critica": 1}
+    
+    resumo = get_estatisticas()
+    assert resumo["tarefas_pendentes"] == 3
+    assert resumo["total_tarefas"] == 6
+
+def test_api_status_usa_uma_consulta(cliente, criar_tarefas):
+    criar_tarefas(4, status="andamento")
+    
+    with garantir_max_queries(1):
+        resposta = cliente.get("/api/status")
+    
+    dados = resposta.get_json()["data"]
+    assert resposta.status_code == 200
+    assert dados["total_tarefas"] == 4
+    assert dados["estatisticas_status"] == {"pendente": 0, "andamento": 4, "concluida": 0}
+
+def test_cache_com_ttl_reaproveita_o_resultado(app, criar_tarefas):
+    invalidar_cache_estatisticas()
+    criar_tarefas(1)
+    assert obter_estatisticas(ttl=60)["total_tarefas"] == 1
+    
+    criar_tarefas(1)
+    with garantir_max_queries(0):
+        assert obter_estatisticas(ttl=60)["total_tarefas"] == 1
+    
+    invalidar_cache_estatisticas()
+    assert obter_estatisticas(ttl=60)["total_tarefas"] == 2
+    invalidar_cache_estatisticas()
@@ -0,0 +1,86 @@
+# test_eventos.py - eventos de tarefas (broker em memória) e /api/tarefas/stream
+
+import json
+import eventos
+from eventos import Assinatura, IDS_POR_EVENTO, montar_eventos
+from models import db, Tarefa
+
+def eventos_recebidos(assinatura):
+    recebidos = []
+    while (evento := assinatura.proximo(timeout=0)) is not None:
+        recebidos.append(evento)
+    return recebidos
+
+def test_eventos_saem_so_no_commit(app):
+    assinatura = eventos.broker.assinar()
+    
+    tarefa = Tarefa(titulo="Nova", usuario_id=1, categoria_id=1)
+    db.session.add(tarefa)
+    db.session.flush()
+    assert eventos_recebidos(assinatura) == []
+    
+    db.session.commit()
+    assert eventos_recebidos(assinatura) == [{"tipo": "upsert", "ids": [tarefa.tarefa_id]}]
+    
+    db.session.delete(tarefa)
+    db.session.flush()
+    db.session.rollback()
+    assert eventos_recebidos(assinatura) == []
+    
+    eventos.broker.cancelar(assinatura)
+    assert eventos.broker.total_assinantes() == 0
+
+def test_exclusao_pela_api_publica_delete(cliente, criar_tarefas):
+    tarefa_id, = criar_tarefas(1)
+    assinatura = eventos.broker.assinar()
+    
+    cliente.delete(f"/api/tarefas/{tarefa_id}")
+    
+    assert {"tipo": "delete", "ids": [tarefa_id]} in eventos_recebidos(assinatura)
+
+def test_eventos_grandes_sao_quebrados_em_pedacos():
+    lotes = montar_eventos("upsert", range(IDS_POR_EVENTO * 2 + 1))
+    
+    assert [len(lote["ids"]) for lote in lotes] == [IDS_POR_EVENTO, IDS_POR_EVENTO, 1]
+    assert all(len(json.dumps(lote)) < 8000 for lote in lotes)
+
+def test_assinante_lento_perde_eventos_e_e_avisado():
+    assinatura = Assinatura(tamanho_maximo=2)
+    
+    for i in range(3):
+        assinatura.entregar({"tipo": "upsert", "ids": [i]})
+    
+    assert assinatura.perdeu_eventos
+    assert len(eventos_recebidos(assinatura)) == 2
+
+def test_stream_sse_entrega_alteracoes_e_heartbeat(app, cliente):
+    app.config["EVENTOS_HEARTBEAT_SEGUNDOS"] = 0.01
+    app.config["EVENTOS_DURACAO_MAXIMA"] = 5
+    
+    resposta = cliente.get("/api/tarefas/stream", buffered=False)
+    assert resposta.mimetype == "text/event-stream"
+    pedacos = iter(resposta.response)
+    assert next(pedacos) == b"retry: 3000\n\n"
+    assert next(pedacos) == b": ping\n\n"
+    
+    tarefa = Tarefa(titulo="Ao vivo", usuario_id=1, categoria_id=1)
+    db.session.add(tarefa)
+    db.session.commit()
+    
+    pedaco = next(pedacos)
+    assert pedaco.startswith(b"event: upsert\n")
+    assert json.loads(pedaco.split(b"data: ")[1]) == {"tipo": "upsert", "ids": [tarefa.tarefa_id]}
+    
+    resposta.close()
+    assert eventos.broker.total_assinantes() == 0
+
+def test_fila_cheia_vira_evento_reset_no_stream(app, cliente):
+    app.config["EVENTOS_HEARTBEAT_SEGUNDOS"] = 0.01
+    
+    resposta = cliente.get("/api/tarefas/stream", buffered=False)
+    pedacos = iter(resposta.response)
+    next(pedacos)
+    eventos.broker.marcar_perda()
+    
+    assert next(pedacos) == b"event: reset\ndata: {}\n\n"
+    resposta.close()
@@ -0,0 +1,76 @@
+# test_exclusao.py - Exclusões em cascata no banco e DELETE /api/tarefas por filtro
+
+import pytest
+import armazenamento
+from models import db, Usuario, Tarefa, Comentario, Anexo, TarefaExcluida
+
+def contar_tarefas():
+    return db.session.query(Tarefa).count()
+
+@pytest.mark.parametrize("query_string", [
+    "",
+    "?status=",
+    "?status=,",
+    "?categoria_id=,",
+    "?status=,&prioridade=%20,%20&q=%20",
+    "?lote=10"
+])
+def test_excluir_por_filtro_sem_filtro_efetivo_responde_400(cliente, criar_tarefas, query_string):
+    criar_tarefas(3)
+    
+    resposta = cliente.delete(f"/api/tarefas{query_string}")
+    
+    assert resposta.status_code == 400
+    assert contar_tarefas() == 3
+
+def test_excluir_por_filtro_com_valor_invalido_responde_400(cliente, criar_tarefas):
+    criar_tarefas(2)
+    
+    assert cliente.delete("/api/tarefas?status=parada").status_code == 400
+    assert contar_tarefas() == 2
+
+def test_excluir_por_filtro_apaga_so_as_que_atendem_em_lotes(cliente, criar_tarefas):
+    alta = criar_tarefas(5, prioridade="alta")
+    baixa = criar_tarefas(4, prioridade="baixa")
+    
+    resposta = cliente.delete("/api/tarefas?prioridade=alta&lote=2")
+    
+    assert resposta.status_code == 200
+    assert resposta.get_json()["data"] == {"excluidas": 5}
+    restantes = {tarefa_id for (tarefa_id,) in db.session.query(Tarefa.tarefa_id)}
+    assert restantes == set(baixa)
+    assert {linha.tarefa_id for linha in TarefaExcluida.query} == set(alta)
+
+def test_excluir_usuario_leva_tarefas_comentarios_e_anexos_junto(app):
+    outro = Usuario(nome="Outro", email="outro@exemplo.com")
+    db.session.add(outro)
+    db.session.flush()
+    tarefas = [Tarefa(titulo=f"T{i}", usuario_id=outro.id_usuario, categoria_id=1) for i in range(3)]
+    db.session.add_all(tarefas)
+    db.session.flush()
+    subtarefa = Tarefa(titulo="Sub", usuario_id=1, categoria_id=1, tarefa_pai_id=tarefas[0].tarefa_id)
+    db.session.add(subtarefa)
+    for tarefa in tarefas:
+        db.session.add(Comentario(tarefa_id=tarefa.tarefa_id, usuario_id=1, comentario="c"))
+        db.session.add(Anexo(
+            tarefa_id=tarefa.tarefa_id, usuario_id=1, nome_arquivo="a", nome_original="a",
+            caminho_arquivo="x", tamanho_bytes=10, ativo=True
+        ))
+    db.session.commit()
+    ids = [tarefa.tarefa_id for tarefa in tarefas]
+    subtarefa_id = subtarefa.tarefa_id
+    assert armazenamento.obter_total().total_bytes == 30
+    
+    # Sem os filhos carregados na sessão: quem exclui é o banco
+    usuario_id = outro.id_usuario
+    db.session.expunge_all()
+    db.session.delete(db.session.get(Usuario, usuario_id))
+    db.session.commit()
+    
+    assert Tarefa.query.filter(Tarefa.tarefa_id.in_(ids)).count() == 0
+    assert Comentario.query.count() == 0
+    assert Anexo.query.count() == 0
+    assert db.session.get(Tarefa, subtarefa_id).tarefa_pai_id is None
+    assert {linha.tarefa_id for linha in TarefaExcluida.query} == set(ids)
+    total = armazenamento.obter_total()
+    assert (total.total_anexos, total.total_bytes) == (0, 0)
@@ -0,0 +1,47 @@
+# test_exportacao.py - exportação de tarefas em NDJSON/CSV, em streaming
+
+import csv
+import io
+import json
+from models import db, Projeto
+from exportacao import campos_exportacao, gerar_ndjson
+
+def test_ndjson_exporta_todas_as_tarefas_filtradas_em_ordem(cliente, criar_tarefas):
+    altas = criar_tarefas(5, prioridade="alta")
+    criar_tarefas(3, prioridade="baixa")
+    
+    resposta = cliente.get("/api/tarefas/export?prioridade=alta")
+    
+    assert resposta.status_code == 200
+    assert resposta.is_streamed
+    assert resposta.mimetype == "application/x-ndjson"
+    assert "tarefas.ndjson" in resposta.headers["Content-Disposition"]
+    linhas = [json.loads(linha) for linha in resposta.get_data(as_text=True).splitlines()]
+    assert [linha["id"] for linha in linhas] == altas
+    assert list(linhas[0]) == campos_exportacao()
+    assert linhas[0]["data_criacao"] == "2025-01-01T00:00:00"
+
+def test_csv_com_nomes_de_usuario_categoria_e_projeto(cliente, criar_tarefas):
+    projeto = Projeto(nome="Migração")
+    db.session.add(projeto)
+    db.session.commit()
+    criar_tarefas(1, projeto_id=projeto.id_projeto)
+    criar_tarefas(1)
+    
+    resposta = cliente.get("/api/tarefas/export?format=csv&nomes=1")
+    
+    assert resposta.mimetype == "text/csv"
+    linhas = list(csv.DictReader(io.StringIO(resposta.get_data(as_text=True))))
+    assert len(linhas) == 2
+    assert linhas[0]["projeto_nome"] == "Migração"
+    assert linhas[1]["projeto_nome"] == ""
+    assert linhas[0]["usuario_nome"] and linhas[0]["categoria_nome"]
+
+def test_lotes_juntam_varias_linhas_por_pedaco():
+    pedacos = list(gerar_ndjson(({"id": i} for i in range(5)), linhas_por_lote=2))
+    
+    assert [pedaco.count("\n") for pedaco in pedacos] == [2, 2, 1]
+
+def test_formato_desconhecido_volta_400(cliente):
+    assert cliente.get("/api/tarefas/export?format=xlsx").status_code == 400
+    assert cliente.get("/api/tarefas/export?status=feita").status_code == 400
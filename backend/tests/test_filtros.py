@@ -0,0 +1,69 @@
+# test_filtros.py - filtros e busca por texto em GET /api/tarefas
+
+from datetime import date
+import pytest
+from models import db, Categoria, Projeto
+
+def ids_da_resposta(resposta):
+    assert resposta.status_code == 200
+    return sorted(tarefa["id"] for tarefa in resposta.get_json()["data"])
+
+def test_status_e_prioridade_aceitam_listas_e_se_combinam(cliente, criar_tarefas):
+    pendentes_altas = criar_tarefas(2, status="pendente", prioridade="alta")
+    andamento_baixa = criar_tarefas(1, status="andamento", prioridade="baixa")
+    criar_tarefas(2, status="concluida", prioridade="alta")
+    
+    resposta = cliente.get("/api/tarefas?status=pendente,andamento")
+    assert ids_da_resposta(resposta) == sorted(pendentes_altas + andamento_baixa)
+    
+    resposta = cliente.get("/api/tarefas?status=pendente,andamento&prioridade=alta")
+    assert ids_da_resposta(resposta) == sorted(pendentes_altas)
+
+def test_filtros_por_categoria_projeto_e_vencimento(cliente, criar_tarefas):
+    categoria = Categoria(nome="Outra")
+    projeto = Projeto(nome="Projeto")
+    db.session.add_all([categoria, projeto])
+    db.session.commit()
+    
+    na_categoria = criar_tarefas(2, categoria_id=categoria.id_categoria)
+    no_projeto = criar_tarefas(1, projeto_id=projeto.id_projeto, data_vencimento=date(2025, 3, 10))
+    criar_tarefas(1, data_vencimento=date(2025, 4, 1))
+    
+    assert ids_da_resposta(cliente.get(f"/api/tarefas?categoria_id={categoria.id_categoria}")) == na_categoria
+    assert ids_da_resposta(cliente.get(f"/api/tarefas?projeto_id={projeto.id_projeto}")) == no_projeto
+    resposta = cliente.get("/api/tarefas?vencimento_de=2025-03-01&vencimento_ate=2025-03-31")
+    assert ids_da_resposta(resposta) == no_projeto
+
+def test_busca_por_texto_no_titulo_e_na_descricao(cliente, criar_tarefas):
+    no_titulo = criar_tarefas(1, titulo="Revisar relatório anual")
+    na_descricao = criar_tarefas(1, titulo="Outra", descricao="anexar o relatório")
+    criar_tarefas(3)
+    
+    resposta = cliente.get("/api/tarefas?q=relatório")
+    assert ids_da_resposta(resposta) == sorted(no_titulo + na_descricao)
+
+def test_filtros_e_paginacao_juntos_nao_repetem_tarefas(cliente, criar_tarefas):
+    altas = criar_tarefas(7, prioridade="alta")
+    criar_tarefas(7, prioridade="baixa")
+    
+    vistos = []
+    url = "/api/tarefas?prioridade=alta&limit=3"
+    while url:
+        corpo = cliente.get(url).get_json()
+        vistos += [tarefa["id"] for tarefa in corpo["data"]]
+        cursor = corpo["paginacao"]["proximo_cursor"]
+        url = f"/api/tarefas?prioridade=alta&limit=3&after={cursor}" if cursor else None
+    
+    assert sorted(vistos) == sorted(altas)
+
+@pytest.mark.parametrize("consulta", [
+    "status=feita",
+    "prioridade=urgente",
+    "categoria_id=abc",
+    "vencimento_de=10/03/2025",
+])
+def test_valor_invalido_volta_400(cliente, consulta):
+    resposta = cliente.get(f"/api/tarefas?{consulta}")
+    
+    assert resposta.status_code == 400
+    assert resposta.get_json()["success"] is False
@@ -0,0 +1,36 @@
+# test_home.py - página inicial: primeira página de tarefas em streaming
+
+from app import TAREFAS_POR_PAGINA_HOME
+
+def test_home_envia_so_a_primeira_pagina_em_streaming(cliente, criar_tarefas):
+    criar_tarefas(TAREFAS_POR_PAGINA_HOME + 5)
+    
+    resposta = cliente.get("/")
+    
+    assert resposta.status_code == 200
+    assert resposta.is_streamed
+    html = resposta.get_data(as_text=True)
+    # criar_tarefas numera a partir de 0 e a página vem das mais novas
+    assert html.count('class="task-title"') == TAREFAS_POR_PAGINA_HOME
+    assert f">Tarefa {TAREFAS_POR_PAGINA_HOME + 4}</h3>" in html
+    assert ">Tarefa 4</h3>" not in html
+    assert 'data-proximo-cursor=""' not in html
+    assert "carregarMais\" class=\"btn btn-secondary\" hidden" not in html
+
+def test_home_sem_proxima_pagina_esconde_o_botao(cliente, criar_tarefas):
+    criar_tarefas(2)
+    
+    html = cliente.get("/").get_data(as_text=True)
+    
+    assert 'data-proximo-cursor=""' in html
+    assert "Tarefa 1" in html
+
+def test_mensagem_flash_aparece_uma_vez_so(cliente):
+    cliente.post("/adicionar", data={"titulo": "Pelo formulário", "prioridade": "alta", "status": "pendente"})
+    
+    primeira = cliente.get("/").get_data(as_text=True)
+    segunda = cliente.get("/").get_data(as_text=True)
+    
+    assert "adicionada com sucesso" in primeira
+    assert "adicionada com sucesso" not in segunda
+    assert "Pelo formulário" in segunda
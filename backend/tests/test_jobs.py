@@ -0,0 +1,117 @@
+# test_jobs.py - fila de jobs: reserva, novas tentativas, presos e agendamento
+
+from datetime import date, datetime, timedelta, timezone
+import pytest
+import jobs
+from models import db, Job
+
+@pytest.fixture
+def chamadas():
+    """Manipuladores de teste: "ok" registra os dados, "quebra" falha sempre"""
+    recebidos = []
+    jobs.manipulador("teste_ok")(recebidos.append)
+    
+    def quebrar(dados):
+        recebidos.append(dados)
+        raise RuntimeError("serviço fora do ar")
+    jobs.manipulador("teste_quebra")(quebrar)
+    
+    yield recebidos
+    jobs.MANIPULADORES.pop("teste_ok")
+    jobs.MANIPULADORES.pop("teste_quebra")
+
+def status_dos_jobs():
+    db.session.expire_all()
+    return {job.chave: job.status for job in Job.query}
+
+def test_chave_repetida_nao_duplica_e_o_job_roda_uma_vez(app, chamadas):
+    assert jobs.enfileirar(db.session, "teste_ok", {"n": 1}, chave="unico")
+    assert not jobs.enfileirar(db.session, "teste_ok", {"n": 2}, chave="unico")
+    db.session.commit()
+    
+    assert jobs.processar_pendentes() == (1, 0)
+    assert chamadas == [{"n": 1}]
+    assert status_dos_jobs() == {"unico": "concluido"}
+    assert jobs.processar_pendentes() == (0, 0)
+
+def test_reserva_respeita_executar_em_e_nao_pega_o_mesmo_job_duas_vezes(app, chamadas):
+    futuro = datetime.now(timezone.utc) + timedelta(hours=1)
+    jobs.enfileirar_varios(db.session, [
+        {"tipo": "teste_ok", "chave": "agora-1"},
+        {"tipo": "teste_ok", "chave": "agora-2"},
+        {"tipo": "teste_ok", "chave": "depois", "executar_em": futuro},
+    ])
+    db.session.commit()
+    
+    primeiro = jobs.reservar(db.session, 1, "w1")
+    segundo = jobs.reservar(db.session, 10, "w2")
+    
+    assert len(primeiro) == 1 and len(segundo) == 1
+    assert set(primeiro).isdisjoint(segundo)
+    assert jobs.reservar(db.session, 10, "w3") == []
+    assert status_dos_jobs() == {"agora-1": "executando", "agora-2": "executando", "depois": "pendente"}
+
+def test_falha_volta_para_a_fila_ate_max_tentativas(app, chamadas):
+    app.config["JOBS_ESPERA_BASE_SEGUNDOS"] = 0
+    jobs.enfileirar(db.session, "teste_quebra", {"n": 1}, chave="instavel", max_tentativas=3)
+    db.session.commit()
+    
+    assert jobs.processar_pendentes() == (0, 3)
+    
+    job = Job.query.filter_by(chave="instavel").one()
+    assert len(chamadas) == 3
+    assert (job.status, job.tentativas) == ("falhou", 3)
+    assert job.ultimo_erro == "RuntimeError: serviço fora do ar"
+
+def test_espera_exponencial_com_teto(app):
+    app.config["JOBS_ESPERA_BASE_SEGUNDOS"] = 30
+    app.config["JOBS_ESPERA_MAXIMA_SEGUNDOS"] = 600
+    
+    assert 24 <= jobs.espera_nova_tentativa(1) <= 36
+    assert 96 <= jobs.espera_nova_tentativa(3) <= 144
+    assert jobs.espera_nova_tentativa(20) <= 720
+
+def test_job_preso_volta_para_a_fila(app, chamadas):
+    jobs.enfileirar(db.session, "teste_ok", chave="preso")
+    db.session.commit()
+    jobs.reservar(db.session, 1, "morto")
+    db.session.query(Job).update({"reservado_em": datetime.now(timezone.utc) - timedelta(hours=2)})
+    db.session.commit()
+    
+    assert jobs.recuperar_presos(db.session, tempo_limite=60) == 1
+    assert status_dos_jobs() == {"preso": "pendente"}
+    assert jobs.processar_pendentes() == (1, 0)
+
+def test_erro_fora_do_manipulador_nao_derruba_a_thread_do_worker(app, monkeypatch, caplog):
+    worker = jobs.Worker(app, threads=1, lote=2, intervalo=0.01, agendar_cada=0)
+    executados = []
+    
+    def executar(session, id_job):
+        executados.append(id_job)
+        if id_job == 1:
+            raise RuntimeError("conexão perdida")
+        worker.parar()
+    
+    monkeypatch.setattr(jobs, "reservar", lambda session, limite, trabalhador: [1, 2])
+    monkeypatch.setattr(jobs, "executar", executar)
+    
+    worker._laco(0)
+    
+    assert executados == [1, 2]
+    assert "erro ao executar o job 1" in caplog.text
+
+def test_lembretes_agendados_uma_vez_por_vencimento(app, criar_tarefas, monkeypatch):
+    notificacoes = []
+    monkeypatch.setattr(jobs, "notificar", lambda usuario, assunto, mensagem: notificacoes.append((assunto, mensagem)))
+    amanha = date.today() + timedelta(days=1)
+    criar_tarefas(2, data_vencimento=amanha)
+    criar_tarefas(1, data_vencimento=amanha, status="concluida")
+    criar_tarefas(1, data_vencimento=amanha + timedelta(days=30))
+    
+    assert jobs.agendar_lembretes(db.session, dias=1, lote=1) == 2
+    assert jobs.agendar_lembretes(db.session, dias=1) == 0
+    assert jobs.agendar_resumos_diarios(db.session) == 1
+    
+    assert jobs.processar_pendentes() == (3, 0)
+    assert [assunto for assunto, _ in notificacoes].count("Tarefa vence em 1 dia(s)") == 2
+    assert any(assunto.startswith("Resumo de ") for assunto, _ in notificacoes)
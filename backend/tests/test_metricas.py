@@ -0,0 +1,56 @@
+# test_metricas.py - métricas de requisições e SQL no formato do Prometheus
+
+from app import create_app
+from configuracao import ConfigTeste
+from metricas import Contador, Histograma
+
+def valor(texto, serie):
+    """Valor da linha `serie` (nome + rótulos) na exposição; 0 se ausente"""
+    for linha in texto.splitlines():
+        if linha.startswith(serie + " "):
+            return float(linha.rsplit(" ", 1)[1])
+    return 0.0
+
+def test_requisicoes_agrupadas_pelo_molde_da_rota(cliente, criar_tarefas):
+    primeira, segunda = criar_tarefas(2)
+    serie = 'tarefas_http_requisicoes_total{rota="/api/tarefas/<int:tarefa_id>",metodo="GET",status="200"}'
+    consultas = 'tarefas_db_queries_por_requisicao_count{rota="/api/tarefas/<int:tarefa_id>"}'
+    antes = cliente.get("/metrics").get_data(as_text=True)
+    
+    cliente.get(f"/api/tarefas/{primeira}")
+    cliente.get(f"/api/tarefas/{segunda}")
+    cliente.get("/api/tarefas/999999")
+    
+    resposta = cliente.get("/metrics")
+    depois = resposta.get_data(as_text=True)
+    assert resposta.content_type.startswith("text/plain; version=0.0.4")
+    assert valor(depois, serie) == valor(antes, serie) + 2
+    assert valor(depois, serie.replace('"200"', '"404"')) == valor(antes, serie.replace('"200"', '"404"')) + 1
+    assert valor(depois, consultas) == valor(antes, consultas) + 3
+    assert valor(depois, "tarefas_db_comandos_total") > valor(antes, "tarefas_db_comandos_total")
+    assert valor(depois, "tarefas_http_requisicoes_em_andamento") == 1
+    assert "# TYPE tarefas_http_requisicao_segundos histogram" in depois
+
+def test_histograma_acumula_buckets_e_rotulos_sao_escapados():
+    histograma = Histograma("h", "ajuda", ("rota",), buckets=(1, 5))
+    for amostra in (0.5, 3, 3, 10):
+        histograma.observar(amostra, rota='a"b')
+    
+    texto = histograma.exposicao()
+    
+    assert 'h_bucket{rota="a\\"b",le="1"} 1' in texto
+    assert 'h_bucket{rota="a\\"b",le="5"} 3' in texto
+    assert 'h_bucket{rota="a\\"b",le="+Inf"} 4' in texto
+    assert 'h_sum{rota="a\\"b"} 16.5' in texto
+    assert 'h_count{rota="a\\"b"} 4' in texto
+    
+    contador = Contador("c_total", "ajuda", ("x",))
+    contador.inc(x="1")
+    contador.inc(2, x="1")
+    assert 'c_total{x="1"} 3' in contador.exposicao()
+
+def test_metricas_desligadas_nao_expoem_rota():
+    class SemMetricas(ConfigTeste):
+        METRICAS_ATIVAS = False
+    
+    assert create_app(SemMetricas).test_client().get("/metrics").status_code == 404
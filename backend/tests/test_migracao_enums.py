@@ -0,0 +1,120 @@
+# test_migracao_enums.py - migração 014 (texto -> ENUM) sobre dados legados
+#
+# Só roda contra PostgreSQL (TEST_DATABASE_URL=postgresql://...): cada teste
+# cria um schema próprio com as colunas ainda em texto, executa o script e
+# apaga o schema no fim.
+
+import os
+import uuid
+import pytest
+from sqlalchemy import create_engine
+
+URL = os.environ.get("TEST_DATABASE_URL", "")
+SCRIPT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..", "..", "database", "migracoes", "014_enums_status_prioridade.sql"
+)
+
+pytestmark = pytest.mark.skipif(
+    not URL.startswith("postgresql"),
+    reason="migração 014 precisa de PostgreSQL (TEST_DATABASE_URL)"
+)
+
+TABELAS_LEGADAS = """
+CREATE TABLE projetos (
+    id_projeto serial PRIMARY KEY,
+    nome varchar(100) NOT NULL,
+    status varchar(20) DEFAULT 'ativo',
+    prioridade varchar(10) DEFAULT 'media'
+);
+CREATE TABLE tarefas (
+    tarefa_id serial PRIMARY KEY,
+    titulo varchar(200) NOT NULL,
+    status varchar(20) DEFAULT 'pendente',
+    prioridade varchar(10) DEFAULT 'media',
+    data_criacao timestamp DEFAULT now(),
+    data_vencimento date
+);
+CREATE INDEX ix_tarefas_status_data_criacao_id ON tarefas (status, data_criacao, tarefa_id);
+CREATE INDEX ix_tarefas_vencimento_abertas ON tarefas (data_vencimento, tarefa_id)
+    WHERE status NOT IN ('concluida', 'cancelada');
+"""
+
+@pytest.fixture
+def conexao():
+    """Conexão DBAPI em autocommit (o script tem BEGIN/COMMIT próprios)
+    com search_path num schema descartável"""
+    engine = create_engine(URL)
+    bruta = engine.raw_connection()
+    bruta.driver_connection.autocommit = True
+    schema = f"migracao_014_{uuid.uuid4().hex[:8]}"
+    cursor = bruta.cursor()
+    cursor.execute(f"CREATE SCHEMA {schema}")
+    cursor.execute(f"SET search_path TO {schema}")
+    cursor.execute(TABELAS_LEGADAS)
+    try:
+        yield cursor
+    finally:
+        cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+        bruta.close()
+        engine.dispose()
+
+def executar_migracao(cursor):
+    with open(SCRIPT, encoding="utf-8") as arquivo:
+        cursor.execute(arquivo.read())
+
+def tipo_da_coluna(cursor, tabela, coluna):
+    cursor.execute(
+        "SELECT udt_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = %s AND column_name = %s",
+        (tabela, coluna)
+    )
+    return cursor.fetchone()[0]
+
+def test_valores_legados_com_maiusculas_e_espacos_sao_convertidos(conexao):
+    conexao.execute(
+        "INSERT INTO tarefas (titulo, status, prioridade) VALUES "
+        "('a', ' Pendente ', 'ALTA'), ('b', 'concluida', ' media'), ('c', 'CANCELADA', 'Critica')"
+    )
+    conexao.execute("INSERT INTO projetos (nome, status, prioridade) VALUES ('p', 'Ativo ', 'BAIXA')")
+    
+    executar_migracao(conexao)
+    
+    assert tipo_da_coluna(conexao, "tarefas", "status") == "status_tarefa"
+    assert tipo_da_coluna(conexao, "tarefas", "prioridade") == "prioridade"
+    assert tipo_da_coluna(conexao, "projetos", "status") == "status_projeto"
+    conexao.execute("SELECT titulo, status::text, prioridade::text FROM tarefas ORDER BY titulo")
+    assert conexao.fetchall() == [
+        ("a", "pendente", "alta"),
+        ("b", "concluida", "media"),
+        ("c", "cancelada", "critica"),
+    ]
+    conexao.execute("SELECT status::text, prioridade::text FROM projetos")
+    assert conexao.fetchall() == [("ativo", "baixa")]
+    
+    # Índice parcial recriado sobre o novo tipo
+    conexao.execute(
+        "SELECT indexdef FROM pg_indexes "
+        "WHERE schemaname = current_schema() AND indexname = 'ix_tarefas_vencimento_abertas'"
+    )
+    assert "status_tarefa" in conexao.fetchone()[0]
+
+def test_valor_fora_do_enum_aborta_com_mensagem_e_sem_alterar_nada(conexao):
+    conexao.execute(
+        "INSERT INTO tarefas (titulo, status, prioridade) VALUES "
+        "('a', ' Pendente ', 'alta'), ('b', 'feito', 'alta'), ('c', 'feito', 'urgente')"
+    )
+    
+    with pytest.raises(Exception) as erro:
+        executar_migracao(conexao)
+    
+    mensagem = str(erro.value)
+    assert "Migração 014 abortada" in mensagem
+    assert "tarefas.status = 'feito' (2 linhas)" in mensagem
+    assert "tarefas.prioridade = 'urgente' (1 linhas)" in mensagem
+    
+    # A transação do script foi desfeita: colunas e valores como antes
+    conexao.execute("ROLLBACK")
+    assert tipo_da_coluna(conexao, "tarefas", "status") == "varchar"
+    conexao.execute("SELECT status FROM tarefas WHERE titulo = 'a'")
+    assert conexao.fetchone()[0] == " Pendente "
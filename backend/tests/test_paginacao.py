@@ -0,0 +1,41 @@
+# test_paginacao.py - GET /api/tarefas: paginação por cursor e projeção de campos
+
+def ler_todas_as_paginas(cliente, limite, extra=""):
+    ids = []
+    rota = f"/api/tarefas?limit={limite}{extra}"
+    while True:
+        corpo = cliente.get(rota).get_json()
+        ids += [tarefa["id"] for tarefa in corpo["data"]]
+        if not corpo["paginacao"]["tem_mais"]:
+            return ids
+        rota = f"/api/tarefas?limit={limite}{extra}&after={corpo['paginacao']['proximo_cursor']}"
+
+def test_paginas_cobrem_todas_as_tarefas_sem_repetir(cliente, criar_tarefas):
+    ids = criar_tarefas(7)
+    
+    # Mais recentes primeiro; nenhuma tarefa pulada ou repetida entre páginas
+    assert ler_todas_as_paginas(cliente, 3) == list(reversed(ids))
+
+def test_tarefas_criadas_no_meio_nao_deslocam_as_paginas(cliente, criar_tarefas):
+    ids = criar_tarefas(6)
+    primeira = cliente.get("/api/tarefas?limit=3").get_json()
+    cursor = primeira["paginacao"]["proximo_cursor"]
+    
+    cliente.post("/api/tarefas", json={"titulo": "Nova no topo"})
+    segunda = cliente.get(f"/api/tarefas?limit=3&after={cursor}").get_json()
+    
+    assert [tarefa["id"] for tarefa in segunda["data"]] == list(reversed(ids[:3]))
+    assert segunda["paginacao"]["tem_mais"] is False
+
+def test_fields_devolve_so_os_campos_pedidos(cliente, criar_tarefas):
+    criar_tarefas(2)
+    
+    corpo = cliente.get("/api/tarefas?fields=id,titulo").get_json()
+    
+    assert [set(tarefa) for tarefa in corpo["data"]] == [{"id", "titulo"}] * 2
+
+def test_parametros_invalidos_respondem_400(cliente):
+    assert cliente.get("/api/tarefas?limit=0").status_code == 400
+    assert cliente.get("/api/tarefas?limit=abc").status_code == 400
+    assert cliente.get("/api/tarefas?after=nao-e-cursor").status_code == 400
+    assert cliente.get("/api/tarefas?fields=id,senha").status_code == 400
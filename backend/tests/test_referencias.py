@@ -0,0 +1,68 @@
+# test_referencias.py - Cache de usuários e categorias (referencias.py)
+
+from models import db, Usuario, Categoria, contador_queries
+from referencias import CacheReferencias, cache_referencias
+
+def test_nomes_e_ids_padrao_vem_do_cache_sem_consultas(app):
+    cache = CacheReferencias()
+    cache.carregar()
+    
+    with contador_queries() as contagem:
+        assert cache.usuario_padrao_id() == 1
+        assert cache.categoria_padrao_id() == 1
+        assert cache.nome_usuario(1) == "Usuário Padrão"
+        assert cache.nome_categoria(1) == "Geral"
+    
+    assert contagem["total"] == 0
+
+def test_invalidar_entre_carregar_e_ler_nao_quebra_a_leitura(app, monkeypatch):
+    cache = CacheReferencias()
+    original = cache._garantir_carregado
+    
+    # Reproduz a corrida: outro thread invalida logo depois do carregamento
+    def carregar_e_invalidar(tabela):
+        dados = original(tabela)
+        cache.invalidar()
+        return dados
+    
+    monkeypatch.setattr(cache, "_garantir_carregado", carregar_e_invalidar)
+    
+    assert cache.usuario_padrao_id() == 1
+    assert cache.categoria_padrao_id() == 1
+    assert cache.nome_usuario(1) == "Usuário Padrão"
+    assert cache.nome_categoria(1) == "Geral"
+
+def test_id_desconhecido_recarrega_so_a_tabela_e_guarda_a_falta(app):
+    cache = CacheReferencias()
+    cache.carregar()
+    
+    with contador_queries() as primeira:
+        assert cache.nome_usuario(999) is None
+    with contador_queries() as segunda:
+        assert cache.nome_usuario(999) is None
+        assert cache.nome_categoria(1) == "Geral"
+    
+    assert primeira["total"] == 1
+    assert segunda["total"] == 0
+
+def test_commit_em_usuarios_invalida_e_id_novo_aparece(app):
+    cache_referencias.carregar()
+    assert cache_referencias.nome_usuario(2) is None
+    
+    db.session.add(Usuario(nome="Segundo", email="segundo@exemplo.com"))
+    db.session.add(Categoria(nome="Outra"))
+    db.session.commit()
+    
+    assert cache_referencias.nome_usuario(2) == "Segundo"
+    assert cache_referencias.nome_categoria(2) == "Outra"
+
+def test_id_criado_por_outro_processo_aparece_depois_do_ttl(app):
+    app.config["REFERENCIAS_TTL"] = 0
+    cache = CacheReferencias()
+    cache.carregar()
+    assert cache.nome_usuario(2) is None
+    
+    # Inserção sem passar pelo ORM nem pelo commit que invalida
+    db.session.execute(Usuario.__table__.insert(), {"nome": "Externo", "email": "externo@exemplo.com"})
+    
+    assert cache.nome_usuario(2) == "Externo"
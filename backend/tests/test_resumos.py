@@ -0,0 +1,158 @@
+# test_resumos.py - projetos_resumo mantido por deltas e conferido contra as tarefas
+
+import warnings
+from sqlalchemy import event
+from sqlalchemy.exc import SAWarning
+import resumos
+from models import db, Projeto, Tarefa, ProjetoResumo
+
+def criar_projeto():
+    projeto = Projeto(nome="Projeto")
+    db.session.add(projeto)
+    db.session.commit()
+    return projeto.id_projeto
+
+def comandos_sql(funcao):
+    """Executar `funcao` e devolver os comandos SQL enviados ao banco"""
+    comandos = []
+    
+    def registrar(conexao, cursor, comando, *args):
+        comandos.append(comando)
+    
+    event.listen(db.engine, "before_cursor_execute", registrar)
+    try:
+        funcao()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", registrar)
+    return comandos
+
+def test_alteracoes_pelo_orm_mantem_o_resumo_igual_ao_recalculo(app):
+    projeto_id = criar_projeto()
+    tarefas = [
+        Tarefa(titulo=f"T{i}", usuario_id=1, categoria_id=1, projeto_id=projeto_id,
+               estimativa_horas=i + 1, horas_trabalhadas=i, progresso=10 * i)
+        for i in range(4)
+    ]
+    db.session.add_all(tarefas)
+    db.session.commit()
+    
+    tarefas[0].status = "concluida"
+    tarefas[1].horas_trabalhadas = 7
+    tarefas[2].projeto_id = None
+    db.session.delete(tarefas[3])
+    db.session.commit()
+    
+    resumo = db.session.get(ProjetoResumo, projeto_id)
+    assert (resumo.total_tarefas, resumo.tarefas_pendentes, resumo.tarefas_concluidas) == (2, 1, 1)
+    assert resumos.reconciliar_resumos(corrigir=False) == []
+
+def test_resumo_e_gravado_uma_vez_no_commit(app):
+    projeto_id = criar_projeto()
+    
+    def gravar():
+        for i in range(3):
+            db.session.add(Tarefa(titulo=f"T{i}", usuario_id=1, categoria_id=1, projeto_id=projeto_id))
+            db.session.flush()
+        # Sem flush explícito: entra no mesmo UPSERT do commit
+        db.session.add(Tarefa(titulo="Última", usuario_id=1, categoria_id=1, projeto_id=projeto_id, status="concluida"))
+        db.session.commit()
+    
+    comandos = comandos_sql(gravar)
+    
+    upserts = [i for i, comando in enumerate(comandos) if "projetos_resumo" in comando]
+    assert len(upserts) == 1
+    assert not any(comando.startswith("INSERT INTO tarefas") for comando in comandos[upserts[0] + 1:])
+    resumo = db.session.get(ProjetoResumo, projeto_id)
+    assert (resumo.total_tarefas, resumo.tarefas_concluidas) == (4, 1)
+
+def test_recalculo_no_meio_da_transacao_nao_conta_os_deltas_duas_vezes(app):
+    projeto_id = criar_projeto()
+    tarefa = Tarefa(titulo="Primeira", usuario_id=1, categoria_id=1, projeto_id=projeto_id)
+    db.session.add(tarefa)
+    db.session.flush()
+    # O recálculo já enxerga a tarefa, que também está nos deltas pendentes
+    resumos.recalcular_resumos_das_tarefas(db.session, [tarefa.tarefa_id])
+    db.session.commit()
+    
+    db.session.expire_all()
+    assert db.session.get(ProjetoResumo, projeto_id).total_tarefas == 1
+
+def test_savepoint_desfeito_nao_entra_no_resumo(app):
+    projeto_id = criar_projeto()
+    db.session.add(Tarefa(titulo="Primeira", usuario_id=1, categoria_id=1, projeto_id=projeto_id))
+    db.session.flush()
+    
+    with db.session.begin_nested() as savepoint:
+        db.session.add(Tarefa(titulo="Desfeita", usuario_id=1, categoria_id=1, projeto_id=projeto_id))
+        db.session.flush()
+        savepoint.rollback()
+    db.session.commit()
+    
+    db.session.expire_all()
+    assert db.session.get(ProjetoResumo, projeto_id).total_tarefas == 1
+    assert resumos.reconciliar_resumos(corrigir=False) == []
+
+def test_patch_de_status_aplica_delta_sem_reagregar_o_projeto(cliente):
+    projeto_id = criar_projeto()
+    tarefas = [Tarefa(titulo=f"T{i}", usuario_id=1, categoria_id=1, projeto_id=projeto_id) for i in range(3)]
+    db.session.add_all(tarefas)
+    db.session.commit()
+    tarefa_id = tarefas[0].tarefa_id
+    
+    comandos = comandos_sql(
+        lambda: cliente.patch(f"/api/tarefas/{tarefa_id}", json={"status": "andamento"})
+    )
+    
+    assert not [comando for comando in comandos if "GROUP BY" in comando.upper()]
+    db.session.expire_all()
+    resumo = db.session.get(ProjetoResumo, projeto_id)
+    assert (resumo.total_tarefas, resumo.tarefas_pendentes, resumo.tarefas_andamento) == (3, 2, 1)
+    assert resumos.reconciliar_resumos(corrigir=False) == []
+
+def test_patch_com_o_mesmo_status_nao_muda_o_resumo(cliente):
+    projeto_id = criar_projeto()
+    tarefa = Tarefa(titulo="Única", usuario_id=1, categoria_id=1, projeto_id=projeto_id)
+    db.session.add(tarefa)
+    db.session.commit()
+    
+    cliente.patch(f"/api/tarefas/{tarefa.tarefa_id}", json={"status": "pendente"})
+    
+    db.session.expire_all()
+    assert db.session.get(ProjetoResumo, projeto_id).tarefas_pendentes == 1
+    assert resumos.reconciliar_resumos(corrigir=False) == []
+
+def test_recalcular_sobrescreve_existente_e_remove_projeto_sem_tarefas(app, criar_tarefas):
+    com_tarefas = criar_projeto()
+    sem_tarefas = criar_projeto()
+    criar_tarefas(3, projeto_id=com_tarefas)
+    # Resumos desatualizados: recalcular atualiza um e apaga o outro
+    db.session.add(ProjetoResumo(projeto_id=com_tarefas, total_tarefas=99))
+    db.session.add(ProjetoResumo(projeto_id=sem_tarefas, total_tarefas=5))
+    db.session.commit()
+    
+    resumos.recalcular_resumos(db.session, [com_tarefas, sem_tarefas])
+    resumos.recalcular_resumos(db.session, [com_tarefas, sem_tarefas])
+    db.session.commit()
+    
+    db.session.expire_all()
+    assert db.session.get(ProjetoResumo, com_tarefas).total_tarefas == 3
+    assert db.session.get(ProjetoResumo, sem_tarefas) is None
+
+def test_reconciliar_corrige_divergencias(app, criar_tarefas):
+    projeto_id = criar_projeto()
+    # Inserção direta na tabela: o resumo não fica sabendo
+    criar_tarefas(2, projeto_id=projeto_id)
+    
+    assert resumos.reconciliar_resumos() == [projeto_id]
+    assert resumos.reconciliar_resumos(corrigir=False) == []
+
+def test_recalcular_das_tarefas_nao_emite_avisos(app, criar_tarefas):
+    projeto_id = criar_projeto()
+    ids = criar_tarefas(2, projeto_id=projeto_id)
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", SAWarning)
+        resumos.recalcular_resumos_das_tarefas(db.session, ids)
+    db.session.commit()
+    
+    assert db.session.get(ProjetoResumo, projeto_id).total_tarefas == 2
@@ -0,0 +1,63 @@
+# test_serializacao.py - listas, detalhes e árvores serializados com número fixo de queries
+
+import pytest
+from models import db, Projeto, Tarefa, Comentario, Usuario, Categoria, garantir_max_queries
+from referencias import cache_referencias
+
+# Versões das tabelas (ETag) + a consulta da rota; não pode crescer com as linhas
+MAX_QUERIES_POR_REQUISICAO = 2
+
+def criar_arvore(filhos):
+    """Raiz com `filhos` subtarefas, cada uma com uma neta e um comentário"""
+    projeto = Projeto(nome="Projeto")
+    db.session.add(projeto)
+    db.session.flush()
+    
+    raiz = Tarefa(titulo="Raiz", usuario_id=1, categoria_id=1, projeto_id=projeto.id_projeto)
+    db.session.add(raiz)
+    db.session.flush()
+    
+    for i in range(filhos):
+        filha = Tarefa(titulo=f"Filha {i}", usuario_id=1, categoria_id=1,
+                       projeto_id=projeto.id_projeto, tarefa_pai_id=raiz.tarefa_id)
+        db.session.add(filha)
+        db.session.flush()
+        db.session.add(Tarefa(titulo=f"Neta {i}", usuario_id=1, categoria_id=1,
+                              tarefa_pai_id=filha.tarefa_id))
+        db.session.add(Comentario(tarefa_id=filha.tarefa_id, usuario_id=1, comentario="ok"))
+    
+    db.session.commit()
+    cache_referencias.carregar()
+    return raiz.tarefa_id
+
+def contar_nos(no):
+    return 1 + sum(contar_nos(filho) for filho in no["subtarefas"])
+
+@pytest.mark.parametrize("filhos", [1, 20, 100])
+@pytest.mark.parametrize("rota", [
+    "/api/tarefas?limit=500",
+    "/api/tarefas?detalhes=1&limit=500",
+    "/api/tarefas/{raiz}",
+    "/api/tarefas/{raiz}/arvore",
+])
+def test_rotas_serializam_com_queries_constantes(app, cliente, filhos, rota):
+    raiz = criar_arvore(filhos)
+    
+    with garantir_max_queries(MAX_QUERIES_POR_REQUISICAO):
+        resposta = cliente.get(rota.format(raiz=raiz))
+    
+    assert resposta.status_code == 200
+    dados = resposta.get_json()["data"]
+    if isinstance(dados, list):
+        assert len(dados) == 2 * filhos + 1
+    elif "subtarefas" in dados:
+        assert contar_nos(dados) == 2 * filhos + 1
+
+@pytest.mark.parametrize("modelo", [Usuario, Categoria, Projeto])
+def test_to_dict_com_opcoes_de_serializacao_nao_dispara_lazy_load(app, modelo):
+    criar_arvore(10)
+    
+    with garantir_max_queries(1):
+        registros = [r.to_dict() for r in modelo.query.options(*modelo.opcoes_serializacao())]
+    
+    assert registros
@@ -0,0 +1,82 @@
+# test_sincronizacao.py - versões por tabela, ETag e 304
+
+from sqlalchemy import event, update
+from models import db, Tarefa, Comentario, VersaoTabela
+
+def versao(tabela):
+    linha = db.session.get(VersaoTabela, tabela)
+    return linha.versao if linha else 0
+
+def test_get_repetido_com_etag_volta_304_ate_a_tabela_mudar(cliente, criar_tarefas):
+    criar_tarefas(3)
+    
+    primeira = cliente.get("/api/tarefas")
+    assert primeira.status_code == 200
+    etag = primeira.headers["ETag"]
+    
+    repetida = cliente.get("/api/tarefas", headers={"If-None-Match": etag})
+    assert repetida.status_code == 304
+    assert repetida.data == b""
+    
+    cliente.post("/api/tarefas", json={"titulo": "Nova", "usuario_id": 1, "categoria_id": 1})
+    
+    depois = cliente.get("/api/tarefas", headers={"If-None-Match": etag})
+    assert depois.status_code == 200
+    assert depois.headers["ETag"] != etag
+
+def test_escrita_em_outra_tabela_nao_muda_o_etag(cliente, criar_tarefas):
+    tarefa_id, = criar_tarefas(1)
+    etag = cliente.get(f"/api/tarefas/{tarefa_id}").headers["ETag"]
+    
+    db.session.add(Comentario(tarefa_id=tarefa_id, usuario_id=1, comentario="oi"))
+    db.session.commit()
+    
+    assert cliente.get(f"/api/tarefas/{tarefa_id}", headers={"If-None-Match": etag}).status_code == 304
+
+def test_versao_sobe_uma_vez_por_transacao_no_commit(app):
+    antes = versao("tarefas")
+    comandos = []
+    
+    def registrar(conexao, cursor, comando, *args):
+        comandos.append(comando)
+    
+    event.listen(db.engine, "before_cursor_execute", registrar)
+    try:
+        for i in range(3):
+            db.session.add(Tarefa(titulo=f"T{i}", usuario_id=1, categoria_id=1))
+            db.session.flush()
+        db.session.execute(update(Tarefa).values(progresso=10))
+        # Sem flush explícito: o commit grava esta e só então a versão
+        db.session.add(Tarefa(titulo="Última", usuario_id=1, categoria_id=1))
+        db.session.commit()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", registrar)
+    
+    upserts = [i for i, comando in enumerate(comandos) if "versoes_tabelas" in comando]
+    assert len(upserts) == 1
+    # Nenhuma escrita nas tabelas de dados depois do incremento
+    assert not any("INSERT INTO tarefas" in comando or "UPDATE tarefas" in comando
+                   for comando in comandos[upserts[0] + 1:])
+    assert versao("tarefas") == antes + 1
+
+def test_rollback_nao_sobe_a_versao(app):
+    antes = versao("tarefas")
+    
+    db.session.add(Tarefa(titulo="Descartada", usuario_id=1, categoria_id=1))
+    db.session.flush()
+    db.session.rollback()
+    
+    db.session.add(Tarefa(titulo="Gravada", usuario_id=1, categoria_id=1))
+    db.session.commit()
+    
+    assert versao("tarefas") == antes + 1
+
+def test_savepoint_nao_conta_como_commit(app):
+    antes = versao("tarefas")
+    
+    with db.session.begin_nested():
+        db.session.add(Tarefa(titulo="Dentro", usuario_id=1, categoria_id=1))
+    assert versao("tarefas") == antes
+    db.session.commit()
+    
+    assert versao("tarefas") == antes + 1
@@ -0,0 +1,70 @@
+# test_vencimento.py - /api/tarefas/vencidas e /proximas (consulta no SQL e cache HTTP)
+
+from datetime import date, timedelta
+import pytest
+import models
+from models import db, Tarefa
+
+# O dia real: as versões das tabelas são gravadas com o relógio de verdade
+HOJE = date.today()
+
+class DataFixa(date):
+    """date.today() controlado pelo teste"""
+    dia = HOJE
+    
+    @classmethod
+    def today(cls):
+        return cls.dia
+
+@pytest.fixture
+def data_fixa(monkeypatch):
+    monkeypatch.setattr(models, "date", DataFixa)
+    DataFixa.dia = HOJE
+    return DataFixa
+
+def ids(resposta):
+    return [tarefa["id"] for tarefa in resposta.get_json()["data"]]
+
+def test_vencidas_e_proximas_so_em_aberto_na_ordem_do_vencimento(cliente, criar_tarefas, data_fixa):
+    atrasada_2 = criar_tarefas(1, data_vencimento=HOJE - timedelta(days=2))[0]
+    atrasada_1 = criar_tarefas(1, data_vencimento=HOJE - timedelta(days=1))[0]
+    criar_tarefas(1, data_vencimento=HOJE - timedelta(days=5), status="concluida")
+    hoje = criar_tarefas(1, data_vencimento=HOJE)[0]
+    em_3_dias = criar_tarefas(1, data_vencimento=HOJE + timedelta(days=3))[0]
+    criar_tarefas(1, data_vencimento=HOJE + timedelta(days=30))
+    criar_tarefas(1, data_vencimento=HOJE + timedelta(days=1), status="cancelada")
+    
+    assert ids(cliente.get("/api/tarefas/vencidas")) == [atrasada_2, atrasada_1]
+    assert ids(cliente.get("/api/tarefas/proximas?dias=7")) == [hoje, em_3_dias]
+    assert ids(cliente.get("/api/tarefas/proximas?dias=0")) == [hoje]
+    assert cliente.get("/api/tarefas/proximas?dias=-1").status_code == 400
+
+@pytest.mark.parametrize("rota", ["/api/tarefas/vencidas", "/api/tarefas/proximas?dias=1"])
+def test_virada_do_dia_invalida_etag_e_last_modified(cliente, criar_tarefas, data_fixa, rota):
+    criar_tarefas(1, data_vencimento=HOJE)
+    primeira = cliente.get(rota)
+    etag = primeira.headers["ETag"]
+    ultima_alteracao = primeira.headers["Last-Modified"]
+    
+    # Mesmo dia e nenhuma escrita: 304 pelos dois validadores
+    assert cliente.get(rota, headers={"If-None-Match": etag}).status_code == 304
+    assert cliente.get(rota, headers={"If-Modified-Since": ultima_alteracao}).status_code == 304
+    
+    # Meia-noite sem escrita nenhuma: a lista muda, o cache não pode valer
+    data_fixa.dia = HOJE + timedelta(days=1)
+    por_etag = cliente.get(rota, headers={"If-None-Match": etag})
+    por_data = cliente.get(rota, headers={"If-Modified-Since": ultima_alteracao})
+    
+    assert por_etag.status_code == 200
+    assert por_etag.headers["ETag"] != etag
+    assert por_data.status_code == 200
+    assert ids(por_etag) != ids(primeira)
+
+def test_indice_parcial_so_com_tarefas_em_aberto(app):
+    indice = next(indice for indice in Tarefa.__table__.indexes if indice.name == "ix_tarefas_vencimento_abertas")
+    
+    condicao = str(indice.dialect_options["postgresql"]["where"])
+    assert "concluida" in condicao and "cancelada" in condicao
+    # A expressão do ORM usa os mesmos literais do índice
+    compilado = str(Tarefa.em_aberto.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    assert "'concluida'" in compilado and "'cancelada'" in compilado
@@ -0,0 +1,11 @@
+# wsgi.py - Ponto de entrada para servidores WSGI em produção
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#   waitress-serve --listen=0.0.0.0:5000 --threads=8 wsgi:app
+#
+# APP_CONFIG escolhe a configuração (padrão aqui: producao).
+
+import os
+from app import create_app
+
+app = create_app(os.environ.get("APP_CONFIG", "producao"))
@@ -0,0 +1,93 @@
+# bench_arvore.py - Árvore de subtarefas: recursão pelo ORM x Tarefa.arvore (WITH RECURSIVE)
+#
+# Uso:
+#   python benchmarks/bench_arvore.py [profundidade_cadeia] [largura] [niveis]
+#   BENCH_DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_arvore.py 90 10 4
+#
+# A cadeia deve ficar abaixo de PROFUNDIDADE_MAXIMA_ARVORE (models.py).
+
+import sys
+from comum import criar_app_benchmark, popular_tarefas, cronometrar
+from models import db, Tarefa, contador_queries
+
+def inserir_filhas(pais, quantidade, nivel):
+    """Inserir `quantidade` subtarefas para cada pai e devolver os novos ids"""
+    ids = db.session.execute(
+        Tarefa.__table__.insert().returning(Tarefa.tarefa_id),
+        [
+            {
+                "titulo": f"Nível {nivel} - {pai}.{i}",
+                "usuario_id": 1,
+                "categoria_id": 1,
+                "tarefa_pai_id": pai,
+                "estimativa_horas": 1 + i % 5,
+                "horas_trabalhadas": i % 3,
+                "progresso": (i * 10) % 101
+            }
+            for pai in pais
+            for i in range(quantidade)
+        ]
+    ).scalars().all()
+    return ids
+
+def criar_cadeia(profundidade):
+    """Uma tarefa com `profundidade` níveis de uma subtarefa cada"""
+    raiz = inserir_filhas([None], 1, 0)[0]
+    atual = [raiz]
+    for nivel in range(1, profundidade + 1):
+        atual = inserir_filhas(atual, 1, nivel)
+    db.session.commit()
+    return raiz
+
+def criar_arvore_larga(largura, niveis):
+    """Uma tarefa com `largura` subtarefas por nó em `niveis` níveis"""
+    raiz = inserir_filhas([None], 1, 0)[0]
+    atual = [raiz]
+    for nivel in range(1, niveis + 1):
+        atual = inserir_filhas(atual, largura, nivel)
+    db.session.commit()
+    return raiz
+
+def arvore_orm(tarefa_id):
+    """Implementação ingênua: tarefa.subtarefas nível a nível (uma query por nó)"""
+    def montar(tarefa):
+        return {
+            "id": tarefa.tarefa_id,
+            "titulo": tarefa.titulo,
+            "subtarefas": [montar(subtarefa) for subtarefa in tarefa.subtarefas]
+        }
+    
+    resultado = montar(db.session.get(Tarefa, tarefa_id))
+    db.session.expire_all()
+    return resultado
+
+def main():
+    profundidade = int(sys.argv[1]) if len(sys.argv) > 1 else 90
+    largura = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    niveis = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    app = criar_app_benchmark()
+    
+    with app.app_context():
+        popular_tarefas(1000)
+        cenarios = [
+            (f"cadeia com {profundidade} níveis", criar_cadeia(profundidade)),
+            (f"árvore {largura}^{niveis} ({sum(largura ** n for n in range(niveis + 1))} nós)", criar_arvore_larga(largura, niveis))
+        ]
+        
+        print("🌳 Benchmark da árvore de subtarefas")
+        print("=" * 60)
+        
+        for descricao, raiz in cenarios:
+            print(f"   {descricao}")
+            candidatos = [
+                ("ORM (lazy por nó)", lambda: arvore_orm(raiz)),
+                ("WITH RECURSIVE", lambda: Tarefa.arvore(raiz))
+            ]
+            for nome, funcao in candidatos:
+                with contador_queries() as contagem:
+                    funcao()
+                media_ms = cronometrar(funcao, repeticoes=10)
+                print(f"      {nome:<20} {media_ms:8.2f} ms  |  {contagem['total']} queries")
+
+if __name__ == "__main__":
+    main()
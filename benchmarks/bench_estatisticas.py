@@ -0,0 +1,48 @@
+# bench_estatisticas.py - Compara /api/status antigo (9 COUNTs) com a consulta agregada
+#
+# Uso:
+#   python benchmarks/bench_estatisticas.py [quantidade_de_tarefas]
+#   BENCH_DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_estatisticas.py 100000
+
+import sys
+from comum import criar_app_benchmark, popular_tarefas, cronometrar
+from models import db, Usuario, Categoria, Tarefa, contador_queries
+from estatisticas import calcular_estatisticas, obter_estatisticas
+
+def estatisticas_legado():
+    """Implementação anterior: um COUNT(*) por número exibido"""
+    return {
+        'total_tarefas': Tarefa.query.count(),
+        'total_usuarios': Usuario.query.count(),
+        'total_categorias': Categoria.query.count(),
+        'pendente': Tarefa.query.filter_by(status='pendente').count(),
+        'andamento': Tarefa.query.filter_by(status='andamento').count(),
+        'concluida': Tarefa.query.filter_by(status='concluida').count(),
+        'baixa': Tarefa.query.filter_by(prioridade='baixa').count(),
+        'media': Tarefa.query.filter_by(prioridade='media').count(),
+        'alta': Tarefa.query.filter_by(prioridade='alta').count()
+    }
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    app = criar_app_benchmark()
+    
+    with app.app_context():
+        popular_tarefas(quantidade)
+        print(f"📊 Benchmark de estatísticas com {quantidade} tarefas")
+        print("=" * 50)
+        
+        candidatos = [
+            ("legado (COUNT por status)", estatisticas_legado),
+            ("consulta agregada", calcular_estatisticas),
+            ("agregada + cache TTL 2s", lambda: obter_estatisticas(ttl=2))
+        ]
+        
+        for nome, funcao in candidatos:
+            with contador_queries() as contagem:
+                funcao()
+            media_ms = cronometrar(funcao)
+            print(f"   {nome:<28} {media_ms:8.2f} ms  |  {contagem['total']} queries")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# bench_exclusao.py - Excluir uma tarefa pelo ORM com N comentários e N anexos
+#
+# Com ON DELETE CASCADE e passive_deletes=True o ORM não carrega os filhos:
+# session.delete(tarefa) + commit deve custar o mesmo número de queries
+# qualquer que seja N, e o tempo crescer só com o trabalho do próprio banco.
+#
+# Uso:
+#   python benchmarks/bench_exclusao.py [N ...]
+#   BENCH_DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_exclusao.py 0 100 1000 10000
+
+import sys
+import time
+import statistics
+from comum import criar_app_benchmark, popular_tarefas
+from models import db, Tarefa, Comentario, Anexo, contador_queries
+
+def criar_tarefa_com_filhos(quantidade):
+    """Uma tarefa com `quantidade` comentários e `quantidade` anexos"""
+    tarefa_id = db.session.execute(
+        Tarefa.__table__.insert().returning(Tarefa.tarefa_id),
+        {"titulo": f"Exclusão com {quantidade} filhos", "usuario_id": 1, "categoria_id": 1}
+    ).scalar_one()
+    
+    if quantidade:
+        db.session.execute(
+            Comentario.__table__.insert(),
+            [{"comentario": f"Comentário {i}", "usuario_id": 1, "tarefa_id": tarefa_id} for i in range(quantidade)]
+        )
+        db.session.execute(
+            Anexo.__table__.insert(),
+            [
+                {
+                    "nome_arquivo": f"anexo{i}.txt",
+                    "nome_original": f"anexo{i}.txt",
+                    "caminho_arquivo": f"bench/anexo{i}.txt",
+                    "tamanho_bytes": 100,
+                    "usuario_id": 1,
+                    "tarefa_id": tarefa_id,
+                    "ativo": True
+                }
+                for i in range(quantidade)
+            ]
+        )
+    db.session.commit()
+    return tarefa_id
+
+def excluir(tarefa_id):
+    """Caminho medido: carregar a tarefa, session.delete e commit"""
+    db.session.delete(db.session.get(Tarefa, tarefa_id))
+    db.session.commit()
+
+def main():
+    quantidades = [int(valor) for valor in sys.argv[1:]] or [0, 100, 1000, 10000]
+    repeticoes = 5
+    app = criar_app_benchmark()
+    
+    with app.app_context():
+        popular_tarefas(1000)
+        
+        print("🗑️  Benchmark de exclusão em cascata (session.delete de uma tarefa)")
+        print("=" * 60)
+        
+        for quantidade in quantidades:
+            tempos = []
+            queries = 0
+            for _ in range(repeticoes):
+                tarefa_id = criar_tarefa_com_filhos(quantidade)
+                db.session.expunge_all()
+                
+                with contador_queries() as contagem:
+                    inicio = time.perf_counter()
+                    excluir(tarefa_id)
+                    tempos.append(time.perf_counter() - inicio)
+                queries = contagem["total"]
+                
+                restantes = db.session.query(Comentario).filter_by(tarefa_id=tarefa_id).count()
+                restantes += db.session.query(Anexo).filter_by(tarefa_id=tarefa_id).count()
+                assert restantes == 0, f"{restantes} filhos ficaram para trás"
+            
+            print(f"   N={quantidade:<7} {statistics.median(tempos) * 1000:8.2f} ms (mediana)  |  {queries} queries")
+
+if __name__ == "__main__":
+    main()
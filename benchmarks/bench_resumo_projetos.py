@@ -0,0 +1,89 @@
+# bench_resumo_projetos.py - Progresso do projeto: agregação na hora x projetos_resumo
+#
+# Uso:
+#   python benchmarks/bench_resumo_projetos.py [quantidade_de_tarefas] [projetos]
+#   BENCH_DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_resumo_projetos.py 100000 20
+
+import sys
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+from comum import criar_app_benchmark, popular_tarefas, cronometrar
+from models import db, Projeto, Tarefa, contador_queries
+import resumos
+
+def progresso_legado(projeto_id):
+    """Implementação ingênua: carregar Projeto.tarefas e somar em Python"""
+    projeto = db.session.get(Projeto, projeto_id)
+    tarefas = projeto.tarefas
+    pesos = [float(tarefa.estimativa_horas) if tarefa.estimativa_horas is not None else 1.0 for tarefa in tarefas]
+    soma_pesos = sum(pesos)
+    resultado = {
+        "total_tarefas": len(tarefas),
+        "concluidas": sum(1 for tarefa in tarefas if tarefa.status == "concluida"),
+        "horas_trabalhadas": sum(float(tarefa.horas_trabalhadas or 0) for tarefa in tarefas),
+        "progresso": sum((tarefa.progresso or 0) * peso for tarefa, peso in zip(tarefas, pesos)) / soma_pesos if soma_pesos else 0
+    }
+    db.session.expire_all()
+    return resultado
+
+def progresso_agregado(projeto_id):
+    """GROUP BY na hora, só com as colunas necessárias"""
+    return db.session.execute(resumos.consulta_agregada([projeto_id])).one()
+
+def progresso_resumo(projeto_id):
+    """Linha de projetos_resumo mantida a cada escrita"""
+    resultado = resumos.obter_resumo(projeto_id).to_dict()
+    db.session.expire_all()
+    return resultado
+
+def editar_tarefas(ids):
+    """Escrita pelo ORM: muda status/progresso de algumas tarefas e faz commit"""
+    for tarefa in db.session.query(Tarefa).filter(Tarefa.tarefa_id.in_(ids)):
+        tarefa.status = "concluida" if tarefa.status != "concluida" else "andamento"
+        tarefa.progresso = ((tarefa.progresso or 0) + 10) % 101
+    db.session.commit()
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    projetos = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    app = criar_app_benchmark()
+    
+    with app.app_context():
+        popular_tarefas(quantidade)
+        db.session.add_all(Projeto(nome=f"Projeto {i}") for i in range(projetos))
+        db.session.flush()
+        db.session.execute(
+            update(Tarefa).values(
+                projeto_id=1 + Tarefa.tarefa_id % projetos,
+                estimativa_horas=1 + Tarefa.tarefa_id % 8,
+                progresso=Tarefa.tarefa_id % 101
+            )
+        )
+        db.session.commit()
+        resumos.reconciliar_resumos()
+        
+        print(f"📈 Resumo de projetos com {quantidade} tarefas em {projetos} projetos")
+        print("=" * 60)
+        
+        candidatos = [
+            ("legado (Projeto.tarefas)", lambda: progresso_legado(1)),
+            ("GROUP BY na hora", lambda: progresso_agregado(1)),
+            ("projetos_resumo", lambda: progresso_resumo(1))
+        ]
+        for nome, funcao in candidatos:
+            with contador_queries() as contagem:
+                funcao()
+            media_ms = cronometrar(funcao, repeticoes=20)
+            print(f"   leitura  {nome:<26} {media_ms:8.2f} ms  |  {contagem['total']} queries")
+        
+        # Custo na escrita: mesmo lote de edições com e sem os eventos do resumo
+        ids = list(range(1, 51))
+        com_resumo = cronometrar(lambda: editar_tarefas(ids), repeticoes=20)
+        event.remove(Session, "before_flush", resumos._resumo_antes_do_flush)
+        event.remove(Session, "after_flush", resumos._resumo_no_flush)
+        sem_resumo = cronometrar(lambda: editar_tarefas(ids), repeticoes=20)
+        print(f"   escrita  50 tarefas sem resumo        {sem_resumo:8.2f} ms")
+        print(f"   escrita  50 tarefas com resumo        {com_resumo:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
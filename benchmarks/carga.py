@@ -0,0 +1,224 @@
+# carga.py - Teste de carga com mistura de operações e percentis por rota
+#
+# Sem --url, sobe a aplicação no próprio processo (servidor do werkzeug
+# com threads) sobre um SQLite em arquivo temporário semeado por semear.py;
+# com --url, mede um servidor já no ar (ex.: gunicorn + PostgreSQL) com os
+# dados que ele tiver. Clientes em threads disparam requisições até
+# --duracao segundos; no fim saem p50/p95/p99 por operação, vazão e erros.
+#
+# No modo embutido clientes e servidor dividem o GIL: os números servem para
+# comparar commits entre si, não como capacidade de produção.
+#
+# Uso:
+#   python benchmarks/carga.py --modo leitura --clientes 8 --duracao 10
+#   python benchmarks/carga.py --modo misto --tarefas 1e5 --saida carga.json
+#   python benchmarks/carga.py --url http://127.0.0.1:8000 --modo misto
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from comum import criar_app_benchmark, resumir_tempos, salvar_resultados
+
+# Operação -> peso em cada modo
+MODOS = {
+    "leitura": {
+        "home": 2,
+        "listar": 5,
+        "status": 1
+    },
+    "misto": {
+        "home": 2,
+        "listar": 5,
+        "status": 1,
+        "criar": 1,
+        "atualizar": 1,
+        "excluir": 1
+    }
+}
+
+def requisitar(base, metodo, rota, corpo=None):
+    """Fazer uma requisição; devolve (status, corpo decodificado ou None)"""
+    dados = json.dumps(corpo).encode("utf-8") if corpo is not None else None
+    pedido = urllib.request.Request(base + rota, data=dados, method=metodo)
+    if dados is not None:
+        pedido.add_header("Content-Type", "application/json")
+    try:
+        with urllib.request.urlopen(pedido, timeout=30) as resposta:
+            conteudo = resposta.read()
+            status = resposta.status
+    except urllib.error.HTTPError as erro:
+        erro.read()
+        return erro.code, None
+    
+    if resposta.headers.get_content_type() == "application/json":
+        return status, json.loads(conteudo)
+    return status, None
+
+class Cliente(threading.Thread):
+    """Dispara operações sorteadas pelos pesos do modo até `fim`"""
+    
+    def __init__(self, base, pesos, fim, ids_existentes, semente):
+        super().__init__(daemon=True)
+        self.base = base
+        self.operacoes = list(pesos)
+        self.pesos = list(pesos.values())
+        self.fim = fim
+        self.ids_existentes = ids_existentes
+        self.aleatorio = random.Random(semente)
+        # Só exclui o que ele mesmo criou: a carga não esvazia a base semeada
+        self.criadas = []
+        self.tempos = {operacao: [] for operacao in self.operacoes}
+        self.erros = {operacao: 0 for operacao in self.operacoes}
+    
+    def executar(self, operacao):
+        if operacao == "home":
+            return requisitar(self.base, "GET", "/")
+        if operacao == "listar":
+            return requisitar(self.base, "GET", "/api/tarefas?limit=50")
+        if operacao == "status":
+            return requisitar(self.base, "GET", "/api/status")
+        if operacao == "criar":
+            status, corpo = requisitar(self.base, "POST", "/api/tarefas", {
+                "titulo": f"Carga {self.aleatorio.randrange(10 ** 9)}",
+                "descricao": "Criada pelo teste de carga",
+                "prioridade": self.aleatorio.choice(["baixa", "media", "alta"])
+            })
+            if status == 201:
+                self.criadas.append(corpo["data"]["id"])
+            return status, corpo
+        if operacao == "atualizar":
+            tarefa_id = self.aleatorio.choice(self.ids_existentes)
+            return requisitar(self.base, "PUT", f"/api/tarefas/{tarefa_id}", {
+                "status": self.aleatorio.choice(["pendente", "andamento", "concluida"]),
+                "prioridade": self.aleatorio.choice(["baixa", "media", "alta"])
+            })
+        if operacao == "excluir":
+            if not self.criadas:
+                return self.executar("criar")
+            return requisitar(self.base, "DELETE", f"/api/tarefas/{self.criadas.pop()}")
+        raise ValueError(f"Operação desconhecida: {operacao}")
+    
+    def run(self):
+        while time.perf_counter() < self.fim:
+            operacao = self.aleatorio.choices(self.operacoes, self.pesos)[0]
+            inicio = time.perf_counter()
+            try:
+                status, _ = self.executar(operacao)
+                sucesso = status < 400
+            except Exception:
+                sucesso = False
+            duracao = time.perf_counter() - inicio
+            
+            if sucesso:
+                self.tempos[operacao].append(duracao)
+            else:
+                self.erros[operacao] += 1
+
+def subir_servidor(tarefas, semente):
+    """Aplicação embutida em SQLite temporário; devolve (base, servidor, arquivo)"""
+    from werkzeug.serving import make_server
+    from semear import semear
+    
+    descritor, arquivo = tempfile.mkstemp(prefix="carga-", suffix=".db")
+    os.close(descritor)
+    app = criar_app_benchmark(uri=f"sqlite:///{arquivo}")
+    
+    with app.app_context():
+        semear(tarefas=tarefas, semente=semente)
+    
+    # Sem o log de acesso do werkzeug: uma linha por requisição no stderr
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    servidor = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{servidor.server_port}", servidor, arquivo
+
+def ids_para_atualizar(base):
+    """IDs das tarefas da primeira página (alvo dos PUTs)"""
+    status, corpo = requisitar(base, "GET", "/api/tarefas?limit=100")
+    if status != 200 or not corpo["data"]:
+        raise SystemExit(f"❌ Não foi possível listar tarefas em {base} (status {status})")
+    return [tarefa["id"] for tarefa in corpo["data"]]
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da API")
+    parser.add_argument("--url", default=None, help="Servidor já no ar (padrão: aplicação embutida)")
+    parser.add_argument("--modo", choices=sorted(MODOS), default="leitura")
+    parser.add_argument("--clientes", type=int, default=8)
+    parser.add_argument("--duracao", type=float, default=10, help="Segundos de carga")
+    parser.add_argument("--aquecimento", type=float, default=1, help="Segundos descartados no início")
+    parser.add_argument("--tarefas", type=float, default=10000, help="Tarefas semeadas (modo embutido)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", default=None, help="Gravar resultados em JSON")
+    args = parser.parse_args()
+    
+    servidor = arquivo = None
+    if args.url:
+        base = args.url.rstrip("/")
+    else:
+        base, servidor, arquivo = subir_servidor(int(args.tarefas), args.semente)
+    
+    try:
+        pesos = MODOS[args.modo]
+        ids_existentes = ids_para_atualizar(base)
+        
+        if args.aquecimento > 0:
+            aquecimento = [
+                Cliente(base, pesos, time.perf_counter() + args.aquecimento, ids_existentes, args.semente + 1000 + i)
+                for i in range(args.clientes)
+            ]
+            for cliente in aquecimento:
+                cliente.start()
+            for cliente in aquecimento:
+                cliente.join()
+        
+        print(f"🔥 Carga '{args.modo}' em {base}: {args.clientes} clientes por {args.duracao:g}s")
+        print("=" * 50)
+        
+        fim = time.perf_counter() + args.duracao
+        clientes = [
+            Cliente(base, pesos, fim, ids_existentes, args.semente + i)
+            for i in range(args.clientes)
+        ]
+        inicio = time.perf_counter()
+        for cliente in clientes:
+            cliente.start()
+        for cliente in clientes:
+            cliente.join()
+        decorrido = time.perf_counter() - inicio
+    finally:
+        if servidor is not None:
+            servidor.shutdown()
+            os.remove(arquivo)
+    
+    resultados = {}
+    total_ok = total_erros = 0
+    for operacao in pesos:
+        tempos = [tempo for cliente in clientes for tempo in cliente.tempos[operacao]]
+        erros = sum(cliente.erros[operacao] for cliente in clientes)
+        resultados[operacao] = dict(resumir_tempos(tempos), erros=erros, vazao_rps=len(tempos) / decorrido)
+        total_ok += len(tempos)
+        total_erros += erros
+        
+        resumo = resultados[operacao]
+        print(f"   {operacao:<10} n={resumo['n']:<7} p50 {resumo['p50_ms']:8.2f} ms  |  "
+              f"p95 {resumo['p95_ms']:8.2f} ms  |  p99 {resumo['p99_ms']:8.2f} ms  |  erros {erros}")
+    
+    resultados["total"] = {"vazao_rps": total_ok / decorrido, "erros": total_erros}
+    print("=" * 50)
+    print(f"📈 Vazão: {total_ok / decorrido:.1f} req/s  |  erros: {total_erros}")
+    
+    if args.saida:
+        salvar_resultados(args.saida, f"carga-{args.modo}", resultados, vars(args))
+    
+    return 1 if total_erros else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+# carga_workers.py - Mede a vazão do gunicorn com 1, 2, 4... workers
+#
+# Sobe o gunicorn (wsgi:app) para cada quantidade de workers, dispara
+# requisições concorrentes por alguns segundos e mostra req/s. Precisa do
+# gunicorn instalado e de um PostgreSQL acessível pelas variáveis DB_*.
+#
+# Uso:
+#   python benchmarks/carga_workers.py --workers 1 2 4 8 --duracao 10 --clientes 32
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+PASTA_BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+ROTAS = ["/api/status", "/api/tarefas?limit=50"]
+
+def esperar_servidor(url, limite_segundos=20):
+    """Esperar o gunicorn responder"""
+    fim = time.time() + limite_segundos
+    while time.time() < fim:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return True
+        except Exception:
+            time.sleep(0.2)
+    return False
+
+def cliente(base, fim):
+    """Fazer requisições em sequência até `fim`; devolve (ok, erros)"""
+    ok = erros = 0
+    indice = 0
+    while time.time() < fim:
+        rota = ROTAS[indice % len(ROTAS)]
+        indice += 1
+        try:
+            urllib.request.urlopen(base + rota, timeout=10).read()
+            ok += 1
+        except Exception:
+            erros += 1
+    return ok, erros
+
+def medir(workers, duracao, clientes, porta):
+    """Subir gunicorn com `workers` e medir req/s"""
+    ambiente = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_BIND=f"127.0.0.1:{porta}")
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", "", "wsgi:app"],
+        cwd=PASTA_BACKEND,
+        env=ambiente,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    
+    base = f"http://127.0.0.1:{porta}"
+    try:
+        if not esperar_servidor(base + "/api/status"):
+            print(f"   ❌ gunicorn com {workers} workers não respondeu")
+            return None
+        
+        fim = time.time() + duracao
+        with ThreadPoolExecutor(max_workers=clientes) as executor:
+            resultados = list(executor.map(lambda _: cliente(base, fim), range(clientes)))
+        
+        ok = sum(r[0] for r in resultados)
+        erros = sum(r[1] for r in resultados)
+        return ok / duracao, erros
+    finally:
+        processo.terminate()
+        processo.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duracao", type=float, default=10)
+    parser.add_argument("--clientes", type=int, default=16)
+    parser.add_argument("--porta", type=int, default=5055)
+    args = parser.parse_args()
+    
+    print(f"🚀 Carga: {args.clientes} clientes por {args.duracao:.0f}s em {', '.join(ROTAS)}")
+    print("=" * 50)
+    
+    for workers in args.workers:
+        resultado = medir(workers, args.duracao, args.clientes, args.porta)
+        if resultado:
+            vazao, erros = resultado
+            print(f"   {workers:>2} workers: {vazao:8.1f} req/s  |  {erros} erros")
+
+if __name__ == "__main__":
+    main()
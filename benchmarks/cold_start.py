@@ -0,0 +1,65 @@
+# cold_start.py - Tempo de inicialização de um worker (import + create_app)
+#
+# Cada medição roda em um processo Python novo, como um worker recém-criado.
+# --com-inicializacao reproduz o comportamento antigo, em que todo worker
+# rodava db.create_all() e criar_dados_iniciais() ao subir.
+#
+# Uso:
+#   python benchmarks/cold_start.py [--com-inicializacao] [--repeticoes 10]
+#   DATABASE_URL=postgresql+psycopg2://... python benchmarks/cold_start.py
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+PASTA_BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+CODIGO = """
+import time
+inicio = time.perf_counter()
+from app import create_app, criar_dados_iniciais
+from models import db
+meio = time.perf_counter()
+app = create_app()
+if {com_inicializacao}:
+    with app.app_context():
+        db.create_all()
+        criar_dados_iniciais()
+print(meio - inicio, time.perf_counter() - meio)
+"""
+
+def medir(com_inicializacao):
+    """Rodar um processo novo; devolve (segundos de import, segundos de create_app)"""
+    saida = subprocess.run(
+        [sys.executable, "-c", CODIGO.format(com_inicializacao=com_inicializacao)],
+        cwd=PASTA_BACKEND,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    importacao, criacao = saida.strip().splitlines()[-1].split()
+    return float(importacao), float(criacao)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--com-inicializacao", action="store_true")
+    parser.add_argument("--repeticoes", type=int, default=10)
+    args = parser.parse_args()
+    
+    medicoes = [medir(args.com_inicializacao) for _ in range(args.repeticoes)]
+    modo = "create_all + seed no boot" if args.com_inicializacao else "inicialização preguiçosa"
+    
+    print(f"⏱️  Cold start ({modo}), {args.repeticoes} processos")
+    print("=" * 50)
+    for nome, tempos in (
+        ("imports", [m[0] for m in medicoes]),
+        ("create_app", [m[1] for m in medicoes]),
+        ("total", [m[0] + m[1] for m in medicoes])
+    ):
+        print(f"   {nome:<11} mediana {statistics.median(tempos) * 1000:8.1f} ms  |  "
+              f"mín {min(tempos) * 1000:7.1f} ms  |  máx {max(tempos) * 1000:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
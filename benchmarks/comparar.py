@@ -0,0 +1,137 @@
+# comparar.py - Compara dois resultados de benchmark (ou dois commits)
+#
+# Com dois arquivos JSON (gravados por --saida em micro.py ou carga.py)
+# mostra cada número lado a lado com a variação. Tempos: menor é melhor;
+# campos de vazão (vazao, rps): maior é melhor. Variações piores que
+# --limiar (%) são marcadas e fazem o script sair com código 1.
+#
+# Com --refs, cria um git worktree para cada ref, roda a suíte em cada um
+# (BENCH_BACKEND aponta para o backend/ do worktree), compara e remove os
+# worktrees no fim.
+#
+# Uso:
+#   python benchmarks/comparar.py antes.json depois.json [--limiar 10]
+#   python benchmarks/comparar.py --refs main HEAD --suite micro.py -- --tarefas 5000
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+PASTA_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+
+def carregar(caminho):
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+def achatar(resultados, prefixo=""):
+    """{"listar": {"p50_ms": 1}} -> {"listar.p50_ms": 1} (só números)"""
+    valores = {}
+    for chave, valor in resultados.items():
+        nome = f"{prefixo}{chave}"
+        if isinstance(valor, dict):
+            valores.update(achatar(valor, f"{nome}."))
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            valores[nome] = valor
+    return valores
+
+def maior_e_melhor(campo):
+    campo = campo.rsplit(".", 1)[-1]
+    return "vazao" in campo or "rps" in campo
+
+def ignorar(campo):
+    # Contagens de amostras e de chamadas variam com a duração, não com o código
+    return campo.rsplit(".", 1)[-1] in ("n", "chamadas_por_rodada")
+
+def comparar(antes, depois, limiar):
+    """Imprimir a tabela de variações; devolve quantos campos pioraram"""
+    valores_antes = achatar(antes["resultados"])
+    valores_depois = achatar(depois["resultados"])
+    
+    print(f"📊 {antes.get('suite')}: {antes.get('commit')} ({antes.get('banco')}) -> "
+          f"{depois.get('commit')} ({depois.get('banco')})")
+    if antes.get("parametros") != depois.get("parametros"):
+        print("   ⚠️  Parâmetros diferentes entre as execuções")
+    print("=" * 50)
+    
+    pioras = 0
+    for campo in sorted(valores_antes.keys() | valores_depois.keys()):
+        if ignorar(campo):
+            continue
+        if campo not in valores_antes or campo not in valores_depois:
+            print(f"   {campo:<40} só em {'depois' if campo in valores_depois else 'antes'}")
+            continue
+        
+        valor_antes = valores_antes[campo]
+        valor_depois = valores_depois[campo]
+        if valor_antes == 0:
+            variacao = 0.0 if valor_depois == 0 else float("inf")
+        else:
+            variacao = (valor_depois - valor_antes) / valor_antes * 100
+        
+        piora = -variacao if maior_e_melhor(campo) else variacao
+        marca = ""
+        if piora > limiar:
+            marca = "  ❌"
+            pioras += 1
+        elif piora < -limiar:
+            marca = "  ✅"
+        
+        print(f"   {campo:<40} {valor_antes:12.2f} -> {valor_depois:12.2f}  ({variacao:+7.1f}%){marca}")
+    
+    print("=" * 50)
+    print(f"{'❌' if pioras else '✅'} {pioras} campo(s) pioraram mais de {limiar:g}%")
+    return pioras
+
+def git(*argumentos, cwd=PASTA_BENCHMARKS):
+    return subprocess.run(["git", *argumentos], cwd=cwd, capture_output=True, text=True, check=True).stdout.strip()
+
+def rodar_em_refs(refs, suite, argumentos_suite):
+    """Rodar `suite` (deste checkout) contra o backend/ de cada ref"""
+    raiz = git("rev-parse", "--show-toplevel")
+    pasta_temporaria = tempfile.mkdtemp(prefix="bench-refs-")
+    documentos = []
+    worktrees = []
+    
+    try:
+        for indice, ref in enumerate(refs):
+            worktree = os.path.join(pasta_temporaria, f"ref{indice}")
+            git("worktree", "add", "--detach", worktree, ref, cwd=raiz)
+            worktrees.append(worktree)
+            
+            saida = os.path.join(pasta_temporaria, f"ref{indice}.json")
+            ambiente = dict(os.environ, BENCH_BACKEND=os.path.join(worktree, "backend"))
+            print(f"▶️  {suite} em {ref}")
+            subprocess.run(
+                [sys.executable, os.path.join(PASTA_BENCHMARKS, suite), *argumentos_suite, "--saida", saida],
+                cwd=PASTA_BENCHMARKS, env=ambiente, check=True
+            )
+            documentos.append(carregar(saida))
+    finally:
+        for worktree in worktrees:
+            git("worktree", "remove", "--force", worktree, cwd=raiz)
+    
+    return documentos
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparar resultados de benchmark")
+    parser.add_argument("arquivos", nargs="*", help="antes.json depois.json")
+    parser.add_argument("--refs", nargs=2, metavar=("ANTES", "DEPOIS"), help="Comparar dois commits/branches")
+    parser.add_argument("--suite", default="micro.py", help="Script rodado em cada ref (com --refs)")
+    parser.add_argument("--limiar", type=float, default=10, help="Piora tolerada em %%")
+    args, argumentos_suite = parser.parse_known_args()
+    argumentos_suite = [argumento for argumento in argumentos_suite if argumento != "--"]
+    
+    if args.refs:
+        antes, depois = rodar_em_refs(args.refs, args.suite, argumentos_suite)
+    elif len(args.arquivos) == 2:
+        antes, depois = (carregar(caminho) for caminho in args.arquivos)
+    else:
+        parser.error("informe dois arquivos JSON ou --refs ANTES DEPOIS")
+    
+    return 1 if comparar(antes, depois, args.limiar) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
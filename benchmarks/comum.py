@@ -0,0 +1,138 @@
+# comum.py - Utilitários compartilhados pelos benchmarks
+#
+# Os benchmarks usam create_app() com um banco descartável: BENCH_DATABASE_URL
+# ou, quando a variável não está definida, um SQLite em memória.
+# BENCH_BACKEND aponta para outro backend/ (ex.: um git worktree de outro
+# commit, ver comparar.py); o padrão é o backend/ deste checkout.
+
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+from datetime import datetime, timedelta
+
+PASTA_BACKEND = os.path.abspath(os.environ.get(
+    "BENCH_BACKEND",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+))
+sys.path.insert(0, PASTA_BACKEND)
+
+from models import db, Usuario, Categoria, Tarefa, contador_queries
+from configuracao import ConfigTeste
+from app import create_app
+
+class ConfigBenchmark(ConfigTeste):
+    SQLALCHEMY_DATABASE_URI = os.environ.get("BENCH_DATABASE_URL", "sqlite://")
+
+def criar_app_benchmark(uri=None, recriar=True):
+    """Criar a aplicação com banco descartável e tabelas recriadas.
+    
+    `uri` troca o banco de ConfigBenchmark (ex.: SQLite em arquivo para
+    servir requisições de várias threads).
+    """
+    config = ConfigBenchmark
+    if uri is not None:
+        config = type("ConfigBenchmarkUri", (ConfigBenchmark,), {"SQLALCHEMY_DATABASE_URI": uri})
+    app = create_app(config)
+    
+    with app.app_context():
+        if recriar:
+            db.drop_all()
+        db.create_all()
+    
+    return app
+
+def popular_tarefas(quantidade, usuarios=5, categorias=5):
+    """Inserir usuários, categorias e `quantidade` tarefas sintéticas"""
+    db.session.add_all(
+        Usuario(nome=f"Usuário {i}", email=f"usuario{i}@exemplo.com") for i in range(usuarios)
+    )
+    db.session.add_all(Categoria(nome=f"Categoria {i}") for i in range(categorias))
+    db.session.flush()
+    
+    status = ["pendente", "andamento", "concluida", "cancelada"]
+    prioridades = ["baixa", "media", "alta", "critica"]
+    inicio = datetime(2025, 1, 1)
+    
+    db.session.execute(
+        Tarefa.__table__.insert(),
+        [
+            {
+                "titulo": f"Tarefa {i}",
+                "descricao": f"Descrição da tarefa {i}",
+                "status": status[i % len(status)],
+                "prioridade": prioridades[(i // 3) % len(prioridades)],
+                "usuario_id": 1 + i % usuarios,
+                "categoria_id": 1 + i % categorias,
+                "data_criacao": inicio + timedelta(minutes=i),
+                "data_atualizacao": inicio + timedelta(minutes=i)
+            }
+            for i in range(quantidade)
+        ]
+    )
+    db.session.commit()
+
+def cronometrar(funcao, repeticoes=50):
+    """Executar `funcao` várias vezes e devolver o tempo médio em ms"""
+    funcao()  # aquecimento
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+def percentil(valores_ordenados, fracao):
+    """Percentil por interpolação linear (valores já ordenados)"""
+    if not valores_ordenados:
+        return 0.0
+    posicao = (len(valores_ordenados) - 1) * fracao
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(valores_ordenados) - 1)
+    peso = posicao - inferior
+    return valores_ordenados[inferior] * (1 - peso) + valores_ordenados[superior] * peso
+
+def resumir_tempos(tempos_segundos):
+    """p50/p95/p99/média/máximo em ms de uma lista de durações"""
+    ordenados = sorted(tempos_segundos)
+    return {
+        "n": len(ordenados),
+        "p50_ms": percentil(ordenados, 0.50) * 1000,
+        "p95_ms": percentil(ordenados, 0.95) * 1000,
+        "p99_ms": percentil(ordenados, 0.99) * 1000,
+        "media_ms": (sum(ordenados) / len(ordenados) * 1000) if ordenados else 0.0,
+        "max_ms": (ordenados[-1] * 1000) if ordenados else 0.0
+    }
+
+def commit_atual():
+    """Commit do backend medido (com + se houver alterações não commitadas)"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PASTA_BACKEND, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        sujo = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no", "."],
+            cwd=PASTA_BACKEND, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        return commit + ("+" if sujo else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+def salvar_resultados(caminho, suite, resultados, parametros=None):
+    """Gravar resultados em JSON com commit, banco e ambiente (comparar.py lê)"""
+    uri = ConfigBenchmark.SQLALCHEMY_DATABASE_URI
+    documento = {
+        "suite": suite,
+        "commit": commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "banco": uri.split(":", 1)[0],
+        "python": platform.python_version(),
+        "maquina": platform.node(),
+        "parametros": parametros or {},
+        "resultados": resultados
+    }
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(documento, arquivo, ensure_ascii=False, indent=2)
+    print(f"💾 Resultados gravados em {caminho}")
+    return documento
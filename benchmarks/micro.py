@@ -0,0 +1,90 @@
+# micro.py - Micro-benchmarks do caminho quente das requisições
+#
+# tarefa_to_dict (linha projetada e objeto), Tarefa.to_dict,
+# validar_dados_tarefa e a renderização de index.html com a primeira
+# página de tarefas. Cada item roda em várias rodadas; a mediana por
+# chamada é o número a comparar entre commits (comparar.py).
+#
+# Uso:
+#   python benchmarks/micro.py [--tarefas 5000] [--rodadas 7] [--saida micro.json]
+
+import sys
+import timeit
+import argparse
+import statistics
+from flask import render_template
+from comum import criar_app_benchmark, salvar_resultados
+from semear import semear
+from models import db
+
+def medir(funcao, rodadas, tempo_minimo=0.2):
+    """Mediana e mínimo (µs por chamada) de `rodadas` medições"""
+    cronometro = timeit.Timer(funcao)
+    # Chamadas por rodada: o suficiente para a rodada durar `tempo_minimo`
+    numero, _ = cronometro.autorange()
+    numero = max(1, int(numero * tempo_minimo / 0.2))
+    tempos = [tempo / numero * 1e6 for tempo in cronometro.repeat(repeat=rodadas, number=numero)]
+    return {
+        "mediana_us": statistics.median(tempos),
+        "min_us": min(tempos),
+        "chamadas_por_rodada": numero
+    }
+
+def casos(app):
+    """Funções a medir (nome -> função sem argumentos)"""
+    import app as modulo_app
+    
+    tarefas_por_pagina = getattr(modulo_app, "TAREFAS_POR_PAGINA_HOME", 30)
+    linhas, paginacao = modulo_app.buscar_pagina_tarefas(limite=tarefas_por_pagina)
+    objetos, _ = modulo_app.buscar_pagina_tarefas(limite=tarefas_por_pagina, detalhes=True)
+    estatisticas = modulo_app.obter_estatisticas()
+    linha = linhas[0]
+    objeto = objetos[0]
+    
+    return {
+        "tarefa_to_dict (linha)": lambda: modulo_app.tarefa_to_dict(linha),
+        "tarefa_to_dict (página)": lambda: [modulo_app.tarefa_to_dict(item) for item in linhas],
+        "Tarefa.to_dict (objeto)": lambda: objeto.to_dict(),
+        "Tarefa.to_dict (página)": lambda: [item.to_dict() for item in objetos],
+        "validar_dados_tarefa (válido)": lambda: modulo_app.validar_dados_tarefa("Revisar relatório", "media", "pendente"),
+        "validar_dados_tarefa (inválido)": lambda: modulo_app.validar_dados_tarefa("x", "urgente", "parada"),
+        "render index.html": lambda: render_template(
+            "index.html",
+            tarefas=linhas,
+            paginacao=paginacao,
+            estatisticas=estatisticas,
+            mensagens=[]
+        )
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks")
+    parser.add_argument("--tarefas", type=int, default=5000)
+    parser.add_argument("--rodadas", type=int, default=7)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", default=None, help="Gravar resultados em JSON")
+    args = parser.parse_args()
+    
+    app = criar_app_benchmark()
+    resultados = {}
+    
+    with app.app_context():
+        semear(tarefas=args.tarefas, semente=args.semente, progresso=False)
+        
+        with app.test_request_context("/"):
+            print(f"🔬 Micro-benchmarks ({args.tarefas} tarefas, {args.rodadas} rodadas)")
+            print("=" * 50)
+            for nome, funcao in casos(app).items():
+                funcao()  # aquecimento (caches de template e referências)
+                resultados[nome] = medir(funcao, args.rodadas)
+                print(f"   {nome:<34} {resultados[nome]['mediana_us']:10.2f} µs  |  "
+                      f"mín {resultados[nome]['min_us']:10.2f} µs")
+        
+        # Sessão limpa: os objetos medidos não ficam presos ao contexto
+        db.session.remove()
+    
+    if args.saida:
+        salvar_resultados(args.saida, "micro", resultados, vars(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+# semear.py - Gerador de dados sintéticos em escala configurável
+#
+# Usuários, categorias, projetos e de 10^3 a 10^7 tarefas (com subtarefas,
+# comentários com respostas e anexos), inseridos em lotes pelo Core para a
+# memória não crescer com a escala. A mesma semente gera sempre os mesmos
+# dados, então dois commits medidos com a mesma semente veem o mesmo banco.
+#
+# Anexos são só metadados (hash fictício, sem arquivo em disco).
+#
+# Uso:
+#   python benchmarks/semear.py --tarefas 100000
+#   BENCH_DATABASE_URL=postgresql+psycopg2://... python benchmarks/semear.py --tarefas 1e7 --lote 20000
+#
+# Em outros benchmarks: semear(tarefas=..., ...) dentro de um app context.
+
+import sys
+import time
+import random
+import argparse
+from array import array
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, text
+from comum import ConfigBenchmark, criar_app_benchmark
+from models import db, Usuario, Categoria, Projeto, Tarefa, Comentario, Anexo
+
+VERBOS = [
+    "Revisar", "Implementar", "Corrigir", "Atualizar", "Documentar",
+    "Testar", "Migrar", "Configurar", "Analisar", "Planejar", "Publicar", "Otimizar"
+]
+OBJETOS = [
+    "relatório mensal", "API de pagamentos", "tela de login", "backup do banco",
+    "contrato do cliente", "pipeline de deploy", "cadastro de usuários",
+    "dashboard de vendas", "integração com ERP", "política de senhas",
+    "campanha de e-mail", "inventário do estoque", "orçamento do trimestre"
+]
+FRASES = [
+    "Conferir com o time antes de fechar.",
+    "Depende da aprovação do cliente.",
+    "Ver histórico no chamado anterior.",
+    "Prioridade combinada na reunião de segunda.",
+    "Atenção aos dados de produção.",
+    "Estimativa revisada depois da primeira entrega."
+]
+
+# Pesos aproximados de um quadro real
+STATUS = (["pendente", "andamento", "concluida", "cancelada"], [35, 25, 30, 10])
+PRIORIDADES = (["baixa", "media", "alta", "critica"], [25, 45, 22, 8])
+TIPOS_MIME = [
+    ("application/pdf", "pdf"), ("image/png", "png"), ("image/jpeg", "jpg"),
+    ("text/plain", "txt"), ("application/zip", "zip")
+]
+
+def _escolher(aleatorio, opcoes_pesos):
+    opcoes, pesos = opcoes_pesos
+    return aleatorio.choices(opcoes, pesos)[0]
+
+def _texto(aleatorio, minimo, maximo):
+    return " ".join(aleatorio.choice(FRASES) for _ in range(aleatorio.randint(minimo, maximo)))
+
+def _proximo_id(coluna):
+    return (db.session.execute(select(func.max(coluna))).scalar() or 0) + 1
+
+def _ajustar_sequencias():
+    """No PostgreSQL os ids foram dados explicitamente: avançar as sequências"""
+    if db.engine.dialect.name != "postgresql":
+        return
+    for tabela, coluna in (
+        ("usuarios", "id_usuario"), ("categorias", "id_categoria"), ("projetos", "id_projeto"),
+        ("tarefas", "tarefa_id"), ("comentarios", "id_comentario"), ("anexos", "id_anexo")
+    ):
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{tabela}', '{coluna}'), "
+            f"COALESCE((SELECT MAX({coluna}) FROM {tabela}), 0) + 1, false)"
+        ))
+
+def semear(tarefas=1000, usuarios=None, categorias=10, projetos=None,
+           fracao_subtarefas=0.2, comentarios_por_tarefa=1.5, fracao_anexos=0.2,
+           lote=5000, semente=42, inicio=datetime(2024, 1, 1), dias=730, progresso=True):
+    """Inserir dados sintéticos no banco do app context atual.
+    
+    usuarios/projetos padrão crescem com a escala (1 usuário a cada mil
+    tarefas, 1 projeto a cada 200). Volta as quantidades inseridas.
+    """
+    import resumos
+    import armazenamento
+    
+    aleatorio = random.Random(semente)
+    usuarios = usuarios or min(max(5, tarefas // 1000), 10000)
+    projetos = projetos or max(3, tarefas // 200)
+    cronometro = time.perf_counter()
+    
+    # Usuários, categorias e projetos (poucos: um comando cada)
+    primeiro_usuario = _proximo_id(Usuario.id_usuario)
+    db.session.execute(Usuario.__table__.insert(), [
+        {
+            "id_usuario": primeiro_usuario + i,
+            "nome": f"Usuário {primeiro_usuario + i}",
+            "email": f"usuario{primeiro_usuario + i}.{semente}@exemplo.com",
+            "ativo": aleatorio.random() > 0.05
+        }
+        for i in range(usuarios)
+    ])
+    primeira_categoria = _proximo_id(Categoria.id_categoria)
+    db.session.execute(Categoria.__table__.insert(), [
+        {
+            "id_categoria": primeira_categoria + i,
+            "nome": f"Categoria {primeira_categoria + i}.{semente}",
+            "descricao": _texto(aleatorio, 1, 2)
+        }
+        for i in range(categorias)
+    ])
+    primeiro_projeto = _proximo_id(Projeto.id_projeto)
+    db.session.execute(Projeto.__table__.insert(), [
+        {
+            "id_projeto": primeiro_projeto + i,
+            "nome": f"{aleatorio.choice(OBJETOS).capitalize()} {primeiro_projeto + i}",
+            "descricao": _texto(aleatorio, 1, 3),
+            "status": aleatorio.choice(["ativo", "ativo", "ativo", "pausado", "concluido"]),
+            "prioridade": _escolher(aleatorio, PRIORIDADES),
+            "responsavel_id": primeiro_usuario + aleatorio.randrange(usuarios)
+        }
+        for i in range(projetos)
+    ])
+    db.session.commit()
+    
+    # Projeto de cada tarefa, para a subtarefa ficar no projeto do pai
+    projeto_da_tarefa = array("i")
+    primeira_tarefa = _proximo_id(Tarefa.tarefa_id)
+    proximo_comentario = _proximo_id(Comentario.id_comentario)
+    proximo_anexo = _proximo_id(Anexo.id_anexo)
+    total_comentarios = total_anexos = 0
+    segundos_por_tarefa = dias * 86400 / max(tarefas, 1)
+    
+    for inicio_lote in range(0, tarefas, lote):
+        linhas_tarefas, linhas_comentarios, linhas_anexos = [], [], []
+        
+        for indice in range(inicio_lote, min(inicio_lote + lote, tarefas)):
+            tarefa_id = primeira_tarefa + indice
+            # Criadas em ordem ao longo de `dias`, como num sistema em uso
+            criada = inicio + timedelta(seconds=indice * segundos_por_tarefa)
+            status = _escolher(aleatorio, STATUS)
+            
+            tarefa_pai_id = None
+            projeto_id = primeiro_projeto + aleatorio.randrange(projetos) if aleatorio.random() < 0.8 else 0
+            if indice and aleatorio.random() < fracao_subtarefas:
+                # Pai entre as tarefas recentes: gera árvores de alguns níveis
+                pai = aleatorio.randrange(max(0, indice - 1000), indice)
+                tarefa_pai_id = primeira_tarefa + pai
+                projeto_id = projeto_da_tarefa[pai]
+            projeto_da_tarefa.append(projeto_id)
+            
+            estimativa = round(aleatorio.uniform(0.5, 40), 1) if aleatorio.random() < 0.6 else None
+            progresso_tarefa = {"concluida": 100, "pendente": 0}.get(status, aleatorio.randrange(0, 100, 5))
+            linhas_tarefas.append({
+                "tarefa_id": tarefa_id,
+                "titulo": f"{aleatorio.choice(VERBOS)} {aleatorio.choice(OBJETOS)} #{tarefa_id}",
+                "descricao": _texto(aleatorio, 0, 4),
+                "status": status,
+                "prioridade": _escolher(aleatorio, PRIORIDADES),
+                "data_criacao": criada,
+                "data_atualizacao": criada + timedelta(hours=aleatorio.randint(0, 240)),
+                "data_vencimento": (criada + timedelta(days=aleatorio.randint(1, 60))).date() if aleatorio.random() < 0.6 else None,
+                "data_conclusao": criada + timedelta(days=aleatorio.randint(1, 30)) if status == "concluida" else None,
+                "estimativa_horas": estimativa,
+                "horas_trabalhadas": round((estimativa or 4) * progresso_tarefa / 100 * aleatorio.uniform(0.7, 1.5), 1),
+                "progresso": progresso_tarefa,
+                "usuario_id": primeiro_usuario + aleatorio.randrange(usuarios),
+                "categoria_id": primeira_categoria + aleatorio.randrange(categorias),
+                "projeto_id": projeto_id or None,
+                "tarefa_pai_id": tarefa_pai_id
+            })
+            
+            # Comentários: quantidade ~ exponencial com a média pedida; parte responde a um anterior
+            quantidade = int(aleatorio.expovariate(1 / comentarios_por_tarefa)) if comentarios_por_tarefa else 0
+            da_tarefa = []
+            for numero in range(quantidade):
+                linhas_comentarios.append({
+                    "id_comentario": proximo_comentario,
+                    "comentario": _texto(aleatorio, 1, 3),
+                    "tipo": "comentario",
+                    "usuario_id": primeiro_usuario + aleatorio.randrange(usuarios),
+                    "tarefa_id": tarefa_id,
+                    "comentario_pai_id": aleatorio.choice(da_tarefa) if da_tarefa and aleatorio.random() < 0.4 else None,
+                    "data_criacao": criada + timedelta(hours=numero + 1)
+                })
+                da_tarefa.append(proximo_comentario)
+                proximo_comentario += 1
+            
+            if aleatorio.random() < fracao_anexos:
+                tipo_mime, extensao = aleatorio.choice(TIPOS_MIME)
+                hash_conteudo = f"{aleatorio.getrandbits(256):064x}"
+                linhas_anexos.append({
+                    "id_anexo": proximo_anexo,
+                    "nome_arquivo": hash_conteudo,
+                    "nome_original": f"arquivo-{proximo_anexo}.{extensao}",
+                    "tipo_mime": tipo_mime,
+                    # Log-normal: muitos arquivos pequenos, alguns grandes
+                    "tamanho_bytes": int(aleatorio.lognormvariate(11, 1.5)),
+                    "caminho_arquivo": f"{hash_conteudo[:2]}/{hash_conteudo[2:4]}/{hash_conteudo}",
+                    "hash_conteudo": hash_conteudo,
+                    "usuario_id": primeiro_usuario + aleatorio.randrange(usuarios),
+                    "tarefa_id": tarefa_id
+                })
+                proximo_anexo += 1
+        
+        db.session.execute(Tarefa.__table__.insert(), linhas_tarefas)
+        if linhas_comentarios:
+            db.session.execute(Comentario.__table__.insert(), linhas_comentarios)
+        if linhas_anexos:
+            db.session.execute(Anexo.__table__.insert(), linhas_anexos)
+        db.session.commit()
+        
+        total_comentarios += len(linhas_comentarios)
+        total_anexos += len(linhas_anexos)
+        if progresso:
+            feitas = min(inicio_lote + lote, tarefas)
+            decorrido = time.perf_counter() - cronometro
+            print(f"   {feitas:>10} tarefas  |  {feitas / decorrido:9.0f} tarefas/s", end="\r", flush=True)
+    
+    # Os INSERTs pelo Core não passam pelos ganchos do ORM: refazer os totais mantidos
+    _ajustar_sequencias()
+    resumos.recalcular_resumos(db.session, range(primeiro_projeto, primeiro_projeto + projetos))
+    armazenamento.recalcular_total(db.session)
+    db.session.commit()
+    
+    if progresso:
+        print()
+    return {
+        "usuarios": usuarios,
+        "categorias": categorias,
+        "projetos": projetos,
+        "tarefas": tarefas,
+        "comentarios": total_comentarios,
+        "anexos": total_anexos,
+        "segundos": round(time.perf_counter() - cronometro, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerar dados sintéticos para benchmarks")
+    parser.add_argument("--tarefas", type=float, default=1000, help="Quantidade de tarefas (aceita 1e6)")
+    parser.add_argument("--usuarios", type=int, default=None)
+    parser.add_argument("--categorias", type=int, default=10)
+    parser.add_argument("--projetos", type=int, default=None)
+    parser.add_argument("--subtarefas", type=float, default=0.2, help="Fração de tarefas que são subtarefas")
+    parser.add_argument("--comentarios", type=float, default=1.5, help="Média de comentários por tarefa")
+    parser.add_argument("--anexos", type=float, default=0.2, help="Fração de tarefas com anexo")
+    parser.add_argument("--lote", type=int, default=5000)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--manter", action="store_true", help="Não recriar as tabelas antes")
+    args = parser.parse_args()
+    
+    if ConfigBenchmark.SQLALCHEMY_DATABASE_URI == "sqlite://":
+        print("⚠️ Sem BENCH_DATABASE_URL os dados ficam num SQLite em memória e somem ao sair")
+    
+    app = criar_app_benchmark(recriar=not args.manter)
+    with app.app_context():
+        print(f"🌱 Semeando {int(args.tarefas)} tarefas (semente {args.semente})")
+        totais = semear(
+            tarefas=int(args.tarefas),
+            usuarios=args.usuarios,
+            categorias=args.categorias,
+            projetos=args.projetos,
+            fracao_subtarefas=args.subtarefas,
+            comentarios_por_tarefa=args.comentarios,
+            fracao_anexos=args.anexos,
+            lote=args.lote,
+            semente=args.semente
+        )
+    print("✅ " + ", ".join(f"{nome}: {valor}" for nome, valor in totais.items()))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+-- 001 - Índice para a paginação por cursor de /api/tarefas
+-- A listagem ordena por (data_criacao DESC, tarefa_id DESC) e continua a
+-- partir do cursor com (data_criacao, tarefa_id) < (:data, :id).
+
+CREATE INDEX IF NOT EXISTS ix_tarefas_data_criacao_id
+    ON tarefas (data_criacao, tarefa_id);
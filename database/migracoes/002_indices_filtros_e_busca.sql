@@ -0,0 +1,24 @@
+-- 002 - Índices para os filtros e a busca textual de /api/tarefas
+-- Em tabelas grandes prefira rodar cada comando com CREATE INDEX CONCURRENTLY
+-- (fora de transação).
+
+CREATE INDEX IF NOT EXISTS ix_tarefas_status_data_criacao_id
+    ON tarefas (status, data_criacao, tarefa_id);
+
+CREATE INDEX IF NOT EXISTS ix_tarefas_prioridade_data_criacao_id
+    ON tarefas (prioridade, data_criacao, tarefa_id);
+
+CREATE INDEX IF NOT EXISTS ix_tarefas_categoria_data_criacao_id
+    ON tarefas (categoria_id, data_criacao, tarefa_id);
+
+CREATE INDEX IF NOT EXISTS ix_tarefas_projeto_data_criacao_id
+    ON tarefas (projeto_id, data_criacao, tarefa_id);
+
+CREATE INDEX IF NOT EXISTS ix_tarefas_data_vencimento
+    ON tarefas (data_vencimento);
+
+-- Deve ser idêntico a models.documento_busca_tarefa
+CREATE INDEX IF NOT EXISTS ix_tarefas_busca
+    ON tarefas USING gin (
+        to_tsvector('portuguese'::regconfig, coalesce(titulo, '') || ' ' || coalesce(descricao, ''))
+    );
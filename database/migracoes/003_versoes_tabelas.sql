@@ -0,0 +1,7 @@
+-- 003 - Versão por tabela para ETag/Last-Modified da API (sincronizacao.py)
+
+CREATE TABLE IF NOT EXISTS versoes_tabelas (
+    tabela           VARCHAR(50) PRIMARY KEY,
+    versao           BIGINT NOT NULL DEFAULT 0,
+    data_atualizacao TIMESTAMP
+);
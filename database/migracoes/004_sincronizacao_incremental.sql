@@ -0,0 +1,14 @@
+-- 004 - Sincronização incremental (/api/tarefas/changes, sincronizacao.py)
+
+-- Tarefas alteradas depois do cursor, na ordem do cursor
+CREATE INDEX IF NOT EXISTS ix_tarefas_data_atualizacao_id
+    ON tarefas (data_atualizacao, tarefa_id);
+
+-- Tombstone de cada tarefa excluída (sem chave estrangeira)
+CREATE TABLE IF NOT EXISTS tarefas_excluidas (
+    tarefa_id     INTEGER PRIMARY KEY,
+    data_exclusao TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_tarefas_excluidas_data_exclusao_id
+    ON tarefas_excluidas (data_exclusao, tarefa_id);
@@ -0,0 +1,4 @@
+-- 005 - Árvore de subtarefas (Tarefa.arvore, WITH RECURSIVE por tarefa_pai_id)
+
+CREATE INDEX IF NOT EXISTS ix_tarefas_tarefa_pai_id
+    ON tarefas (tarefa_pai_id);
@@ -0,0 +1,9 @@
+-- 006 - Discussão da tarefa em árvore (Comentario.discussao, WITH RECURSIVE)
+
+-- Comentários de primeiro nível da tarefa, na ordem da paginação
+CREATE INDEX IF NOT EXISTS ix_comentarios_tarefa_pai_data_id
+    ON comentarios (tarefa_id, comentario_pai_id, data_criacao, id_comentario);
+
+-- Respostas de cada comentário
+CREATE INDEX IF NOT EXISTS ix_comentarios_comentario_pai_id
+    ON comentarios (comentario_pai_id);
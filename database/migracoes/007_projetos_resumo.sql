@@ -0,0 +1,16 @@
+-- 007 - Resumo das tarefas de cada projeto (resumos.py)
+-- Depois de criar a tabela, preencha com: flask resumos reconciliar
+
+CREATE TABLE IF NOT EXISTS projetos_resumo (
+    projeto_id         INTEGER PRIMARY KEY REFERENCES projetos (id_projeto) ON DELETE CASCADE,
+    total_tarefas      INTEGER NOT NULL DEFAULT 0,
+    tarefas_pendentes  INTEGER NOT NULL DEFAULT 0,
+    tarefas_andamento  INTEGER NOT NULL DEFAULT 0,
+    tarefas_concluidas INTEGER NOT NULL DEFAULT 0,
+    tarefas_canceladas INTEGER NOT NULL DEFAULT 0,
+    estimativa_horas   NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    horas_trabalhadas  NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    soma_pesos         NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    soma_progresso     NUMERIC(16, 2) NOT NULL DEFAULT 0,
+    data_atualizacao   TIMESTAMP
+);
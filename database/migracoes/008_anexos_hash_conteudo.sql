@@ -0,0 +1,10 @@
+-- 008 - Upload/download de anexos com deduplicação por conteúdo (armazenamento.py)
+
+ALTER TABLE anexos ADD COLUMN IF NOT EXISTS hash_conteudo VARCHAR(64);
+
+CREATE INDEX IF NOT EXISTS ix_anexos_tarefa_id
+    ON anexos (tarefa_id);
+
+-- Anexos com o mesmo conteúdo dividem o arquivo
+CREATE INDEX IF NOT EXISTS ix_anexos_hash_conteudo
+    ON anexos (hash_conteudo);
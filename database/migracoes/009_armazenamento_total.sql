@@ -0,0 +1,18 @@
+-- 009 - Total de armazenamento dos anexos, mantido a cada flush (armazenamento.py)
+-- O INSERT abaixo preenche o total; depois, se preciso: flask anexos recalcular
+
+CREATE TABLE IF NOT EXISTS armazenamento_total (
+    chave            VARCHAR(20) PRIMARY KEY,
+    total_anexos     BIGINT NOT NULL DEFAULT 0,
+    total_bytes      BIGINT NOT NULL DEFAULT 0,
+    data_atualizacao TIMESTAMP
+);
+
+INSERT INTO armazenamento_total (chave, total_anexos, total_bytes, data_atualizacao)
+SELECT 'anexos', COUNT(*), COALESCE(SUM(tamanho_bytes), 0), NOW()
+FROM anexos
+WHERE ativo
+ON CONFLICT (chave) DO UPDATE
+    SET total_anexos     = EXCLUDED.total_anexos,
+        total_bytes      = EXCLUDED.total_bytes,
+        data_atualizacao = EXCLUDED.data_atualizacao;
@@ -0,0 +1,6 @@
+-- 010 - Tarefas vencidas/próximas do vencimento (/api/tarefas/vencidas e /proximas)
+-- Índice parcial: só as tarefas em aberto, na ordem da paginação
+
+CREATE INDEX IF NOT EXISTS ix_tarefas_vencimento_abertas
+    ON tarefas (data_vencimento, tarefa_id)
+    WHERE status NOT IN ('concluida', 'cancelada');
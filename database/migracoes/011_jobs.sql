@@ -0,0 +1,26 @@
+-- 011 - Fila de trabalhos em segundo plano (jobs.py, flask worker)
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id_job          SERIAL PRIMARY KEY,
+    tipo            VARCHAR(50) NOT NULL,
+    chave           VARCHAR(200) UNIQUE,
+    dados           JSON NOT NULL DEFAULT '{}',
+    status          VARCHAR(20) NOT NULL DEFAULT 'pendente',
+    tentativas      INTEGER NOT NULL DEFAULT 0,
+    max_tentativas  INTEGER NOT NULL DEFAULT 5,
+    executar_em     TIMESTAMP NOT NULL DEFAULT NOW(),
+    reservado_em    TIMESTAMP,
+    reservado_por   VARCHAR(100),
+    ultimo_erro     TEXT,
+    data_criacao    TIMESTAMP DEFAULT NOW(),
+    data_conclusao  TIMESTAMP
+);
+
+-- Reserva: WHERE status = 'pendente' AND executar_em <= agora ORDER BY executar_em, id_job
+CREATE INDEX IF NOT EXISTS ix_jobs_pendentes_executar_em
+    ON jobs (executar_em, id_job)
+    WHERE status = 'pendente';
+
+-- Recuperação de jobs presos em 'executando'
+CREATE INDEX IF NOT EXISTS ix_jobs_status_reservado_em
+    ON jobs (status, reservado_em);
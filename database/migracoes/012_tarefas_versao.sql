@@ -0,0 +1,5 @@
+-- 012 - Versão da linha para concorrência otimista (PUT/PATCH com "versao")
+-- Todo UPDATE incrementa a coluna (onupdate do modelo); a escrita condicional
+-- usa WHERE tarefa_id = :id AND versao = :versao, sem travar a linha
+
+ALTER TABLE tarefas ADD COLUMN IF NOT EXISTS versao INTEGER NOT NULL DEFAULT 1;
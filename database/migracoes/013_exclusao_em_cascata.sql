@@ -0,0 +1,54 @@
+-- 013 - Exclusões em cascata no banco (ON DELETE CASCADE / SET NULL)
+-- Excluir um usuário ou uma tarefa não carrega mais os filhos no ORM:
+-- o banco remove comentários/anexos/tarefas e zera tarefa_pai_id e
+-- comentario_pai_id. As chaves estrangeiras atuais são recriadas com a
+-- ação certa, e usuario_id ganha índice nas três tabelas (sem ele cada
+-- exclusão de usuário varreria as tabelas filhas inteiras).
+
+DO $$
+DECLARE
+    restricao RECORD;
+BEGIN
+    -- Nomes gerados variam entre bancos: procura pela coluna
+    FOR restricao IN
+        SELECT c.conrelid::regclass AS tabela, c.conname AS nome
+        FROM pg_constraint c
+        JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey)
+        WHERE c.contype = 'f'
+          AND (c.conrelid::regclass, a.attname) IN (
+              ('tarefas'::regclass, 'usuario_id'),
+              ('tarefas'::regclass, 'tarefa_pai_id'),
+              ('comentarios'::regclass, 'usuario_id'),
+              ('comentarios'::regclass, 'tarefa_id'),
+              ('comentarios'::regclass, 'comentario_pai_id'),
+              ('anexos'::regclass, 'usuario_id'),
+              ('anexos'::regclass, 'tarefa_id')
+          )
+    LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', restricao.tabela, restricao.nome);
+    END LOOP;
+END $$;
+
+ALTER TABLE tarefas
+    ADD CONSTRAINT tarefas_usuario_id_fkey
+        FOREIGN KEY (usuario_id) REFERENCES usuarios (id_usuario) ON DELETE CASCADE,
+    ADD CONSTRAINT tarefas_tarefa_pai_id_fkey
+        FOREIGN KEY (tarefa_pai_id) REFERENCES tarefas (tarefa_id) ON DELETE SET NULL;
+
+ALTER TABLE comentarios
+    ADD CONSTRAINT comentarios_usuario_id_fkey
+        FOREIGN KEY (usuario_id) REFERENCES usuarios (id_usuario) ON DELETE CASCADE,
+    ADD CONSTRAINT comentarios_tarefa_id_fkey
+        FOREIGN KEY (tarefa_id) REFERENCES tarefas (tarefa_id) ON DELETE CASCADE,
+    ADD CONSTRAINT comentarios_comentario_pai_id_fkey
+        FOREIGN KEY (comentario_pai_id) REFERENCES comentarios (id_comentario) ON DELETE SET NULL;
+
+ALTER TABLE anexos
+    ADD CONSTRAINT anexos_usuario_id_fkey
+        FOREIGN KEY (usuario_id) REFERENCES usuarios (id_usuario) ON DELETE CASCADE,
+    ADD CONSTRAINT anexos_tarefa_id_fkey
+        FOREIGN KEY (tarefa_id) REFERENCES tarefas (tarefa_id) ON DELETE CASCADE;
+
+CREATE INDEX IF NOT EXISTS ix_tarefas_usuario_id ON tarefas (usuario_id);
+CREATE INDEX IF NOT EXISTS ix_comentarios_usuario_id ON comentarios (usuario_id);
+CREATE INDEX IF NOT EXISTS ix_anexos_usuario_id ON anexos (usuario_id);
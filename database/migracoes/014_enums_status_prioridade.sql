@@ -0,0 +1,110 @@
+-- 014 - status/prioridade de tarefas e projetos como ENUM nativo
+-- Os valores são os de StatusTarefa, StatusProjeto e Prioridade (models.py):
+-- 4 bytes por linha e por entrada de índice em vez do texto, e comparações
+-- sem collation. A API continua lendo e gravando as mesmas strings.
+--
+-- A conversão reescreve as tabelas (lock exclusivo durante o ALTER): rode
+-- numa janela de manutenção. Tudo numa transação: depois de normalizar
+-- maiúsculas/espaços, a conferência abaixo lista os valores que ainda
+-- ficam fora do enum e aborta a migração sem alterar nada.
+
+BEGIN;
+
+DO $$
+BEGIN
+    CREATE TYPE status_tarefa AS ENUM ('pendente', 'andamento', 'concluida', 'cancelada');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+DO $$
+BEGIN
+    CREATE TYPE status_projeto AS ENUM ('ativo', 'pausado', 'concluido', 'cancelado');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+DO $$
+BEGIN
+    CREATE TYPE prioridade AS ENUM ('baixa', 'media', 'alta', 'critica');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+-- Índices sobre as colunas (o parcial compara status com literais de texto):
+-- removidos antes e recriados sobre o novo tipo
+DROP INDEX IF EXISTS ix_tarefas_status_data_criacao_id;
+DROP INDEX IF EXISTS ix_tarefas_prioridade_data_criacao_id;
+DROP INDEX IF EXISTS ix_tarefas_vencimento_abertas;
+
+-- Valores gravados antes da validação com maiúsculas/espaços
+UPDATE tarefas SET status = lower(trim(status)) WHERE status <> lower(trim(status));
+UPDATE tarefas SET prioridade = lower(trim(prioridade)) WHERE prioridade <> lower(trim(prioridade));
+UPDATE projetos SET status = lower(trim(status)) WHERE status <> lower(trim(status));
+UPDATE projetos SET prioridade = lower(trim(prioridade)) WHERE prioridade <> lower(trim(prioridade));
+
+-- Conferência antes do cast: um valor desconhecido vira uma mensagem com
+-- tabela, coluna, valor e quantidade de linhas, em vez de parar no meio
+-- do ALTER com "invalid input value for enum"
+DO $$
+DECLARE
+    invalidos text;
+BEGIN
+    SELECT string_agg(format('%s.%s = %L (%s linhas)', tabela, coluna, valor, linhas), ', ' ORDER BY tabela, coluna, valor)
+      INTO invalidos
+      FROM (
+          SELECT 'tarefas' AS tabela, 'status' AS coluna, status AS valor, count(*) AS linhas
+            FROM tarefas
+           WHERE status NOT IN (SELECT unnest(enum_range(NULL::status_tarefa))::text)
+           GROUP BY status
+          UNION ALL
+          SELECT 'tarefas', 'prioridade', prioridade, count(*)
+            FROM tarefas
+           WHERE prioridade NOT IN (SELECT unnest(enum_range(NULL::prioridade))::text)
+           GROUP BY prioridade
+          UNION ALL
+          SELECT 'projetos', 'status', status, count(*)
+            FROM projetos
+           WHERE status NOT IN (SELECT unnest(enum_range(NULL::status_projeto))::text)
+           GROUP BY status
+          UNION ALL
+          SELECT 'projetos', 'prioridade', prioridade, count(*)
+            FROM projetos
+           WHERE prioridade NOT IN (SELECT unnest(enum_range(NULL::prioridade))::text)
+           GROUP BY prioridade
+      ) fora_do_enum;
+    
+    IF invalidos IS NOT NULL THEN
+        RAISE EXCEPTION 'Migração 014 abortada, valores fora do enum: %', invalidos
+            USING HINT = 'Corrija ou mapeie esses valores e rode a migração de novo; nenhuma tabela foi alterada.';
+    END IF;
+END $$;
+
+ALTER TABLE tarefas
+    ALTER COLUMN status DROP DEFAULT,
+    ALTER COLUMN prioridade DROP DEFAULT,
+    ALTER COLUMN status TYPE status_tarefa USING status::status_tarefa,
+    ALTER COLUMN prioridade TYPE prioridade USING prioridade::prioridade,
+    ALTER COLUMN status SET DEFAULT 'pendente',
+    ALTER COLUMN prioridade SET DEFAULT 'media';
+
+ALTER TABLE projetos
+    ALTER COLUMN status DROP DEFAULT,
+    ALTER COLUMN prioridade DROP DEFAULT,
+    ALTER COLUMN status TYPE status_projeto USING status::status_projeto,
+    ALTER COLUMN prioridade TYPE prioridade USING prioridade::prioridade,
+    ALTER COLUMN status SET DEFAULT 'ativo',
+    ALTER COLUMN prioridade SET DEFAULT 'media';
+
+CREATE INDEX ix_tarefas_status_data_criacao_id
+    ON tarefas (status, data_criacao, tarefa_id);
+
+CREATE INDEX ix_tarefas_prioridade_data_criacao_id
+    ON tarefas (prioridade, data_criacao, tarefa_id);
+
+CREATE INDEX ix_tarefas_vencimento_abertas
+    ON tarefas (data_vencimento, tarefa_id)
+    WHERE status NOT IN ('concluida', 'cancelada');
+
+COMMIT;
+
+-- Tabelas reescritas: estatísticas novas para o planejador
+ANALYZE tarefas;
+ANALYZE projetos;